@@ -11,6 +11,11 @@ import time
 import urllib.parse
 from datetime import datetime
 from typing import Dict, List, Optional
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent / "src"))
+from rate_limiter import get_rate_limiter, PRIORITY_DISCOVERY
 
 class CasinoAPIFinder:
     """Поисковик API казино"""
@@ -178,6 +183,7 @@ class CasinoAPIFinder:
             return
         
         try:
+            get_rate_limiter().acquire(url, PRIORITY_DISCOVERY)
             response = self.session.get(url, timeout=10)
             content = response.text
             
@@ -224,6 +230,7 @@ class CasinoAPIFinder:
     def test_endpoint(self, url: str) -> Dict:
         """Тестирование конкретного endpoint"""
         try:
+            get_rate_limiter().acquire(url, PRIORITY_DISCOVERY)
             response = self.session.get(url, timeout=10)
             
             result = {
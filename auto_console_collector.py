@@ -10,15 +10,73 @@
 2. Скопируйте сгенерированный JavaScript код
 3. Вставьте в консоль браузера Opera
 4. Данные будут автоматически сохраняться и готовы для анализа
+
+РЕЖИМЫ:
+- "interval": строка истории перечитывается каждые 30 секунд (как раньше)
+- "observer": MutationObserver - новое число попадает в сборщик сразу,
+  как только страница его показала; с endpoint пачки сразу уходят в Python
+  (FeedServer из src/dom_feed.py или источник "console_feed" в collector_plugins).
+  В адресе приемника - секрет этого компьютера, поэтому код observer
+  генерируется у себя и никому не передается
 """
 
 import json
+import sys
 from pathlib import Path
 from datetime import datetime
 
+sys.path.append(str(Path(__file__).parent / "src"))
+from dom_feed import OBSERVER_JS, DEFAULT_FEED_URL, feed_url
+
+
+# Запуск сбора по таймеру
+INTERVAL_START = '''    
+    // Первый сбор
+    collectData();
+    
+    // Запускаем автоматический сбор
+    window.rouletteCollectorInterval = setInterval(collectData, CONFIG.updateInterval);'''
+
+# Запуск наблюдателя: новые числа приходят сами, без опроса страницы
+OBSERVER_START = '''    
+    // Новые числа от наблюдателя (от старых к новым)
+    function addResults(results) {
+        results.forEach(r => {
+            allResults.unshift({number: r.number, color: r.color, timestamp: r.timestamp, table: r.table});
+        });
+        if (allResults.length > CONFIG.maxResults) {
+            allResults = allResults.slice(0, CONFIG.maxResults);
+        }
+        saveData();
+        
+        const latest = allResults[0];
+        const emoji = latest.color === 'red' ? '🔴' : 
+                     latest.color === 'black' ? '⚫' : '🟢';
+        const time = new Date(latest.timestamp).toLocaleTimeString('ru-RU');
+        console.log(time, emoji, latest.number, '- Всего:', allResults.length, 'результатов');
+    }
+    
+    // Запускаем наблюдение за строкой истории (уже сохраненные числа не повторяются)
+    window.rouletteFeed = startRouletteFeed({
+        selector: CONFIG.selector,
+        table: "console_collector",
+        endpoint: CONFIG.endpoint,
+        previous: allResults.slice(0, 20).map(r => r.number),
+        onResults: addResults
+    });'''
+
 
-def generate_console_code() -> str:
-    """Генерирует JavaScript код для вставки в консоль"""
+def generate_console_code(mode: str = "interval", endpoint: str = None) -> str:
+    """
+    Генерирует JavaScript код для вставки в консоль
+    
+    Args:
+        mode: "interval" - опрос раз в 30 секунд, "observer" - MutationObserver
+        endpoint: Адрес локального приемника с секретом (только для "observer"), например feed_url()
+    """
+    if mode not in ("interval", "observer"):
+        raise ValueError(f"Неизвестный режим: {mode}")
+    observer = mode == "observer"
     
     js_code = '''
 // ============================================
@@ -32,7 +90,8 @@ def generate_console_code() -> str:
         updateInterval: 30000,  // 30 секунд
         maxResults: 100,        // Максимум результатов
         autoExport: true,       // Автоматический экспорт
-        storageKey: "rouletteData"
+        storageKey: "rouletteData",
+        endpoint: __ENDPOINT__  // Куда отправлять новые числа (режим observer)
     };
     
     // Хранилище данных
@@ -42,7 +101,7 @@ def generate_console_code() -> str:
     console.log('━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━');
     console.log('🎰 АВТОМАТИЧЕСКИЙ СБОРЩИК ДАННЫХ ЗАПУЩЕН!');
     console.log('━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━');
-    console.log('⏰ Обновление каждые', CONFIG.updateInterval / 1000, 'секунд');
+    __MODE_LOG__
     console.log('📊 Максимум результатов:', CONFIG.maxResults);
     console.log('⏹️  Остановка: stopRouletteCollector()');
     console.log('📋 Экспорт данных: exportRouletteData()');
@@ -51,6 +110,7 @@ def generate_console_code() -> str:
     console.log('━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━');
     console.log('');
     
+__OBSERVER_CORE__
     // Загружаем сохраненные данные
     function loadSavedData() {
         try {
@@ -216,8 +276,18 @@ def generate_console_code() -> str:
     
     // Остановить сборщик
     window.stopRouletteCollector = function() {
+        let stopped = false;
         if (window.rouletteCollectorInterval) {
             clearInterval(window.rouletteCollectorInterval);
+            window.rouletteCollectorInterval = null;
+            stopped = true;
+        }
+        if (window.rouletteFeed) {
+            window.rouletteFeed.stop();
+            window.rouletteFeed = null;
+            stopped = true;
+        }
+        if (stopped) {
             console.log('⏹️ Сборщик данных остановлен');
             console.log('📊 Собрано результатов:', allResults.length);
             console.log('💡 Экспорт: exportRouletteData()');
@@ -226,12 +296,7 @@ def generate_console_code() -> str:
     
     // Загружаем сохраненные данные
     loadSavedData();
-    
-    // Первый сбор
-    collectData();
-    
-    // Запускаем автоматический сбор
-    window.rouletteCollectorInterval = setInterval(collectData, CONFIG.updateInterval);
+__START__
     
     console.log('✅ Сборщик активен! Данные обновляются автоматически...');
     console.log('');
@@ -243,7 +308,17 @@ def generate_console_code() -> str:
 // ============================================
 '''
     
-    return js_code
+    if observer:
+        mode_log = "console.log('⚡ Новые числа сразу по изменению страницы (MutationObserver)');"
+    else:
+        mode_log = "console.log('⏰ Обновление каждые', CONFIG.updateInterval / 1000, 'секунд');"
+    core = "\n".join("    " + line if line else line for line in OBSERVER_JS.strip("\n").split("\n"))
+    
+    return (js_code
+            .replace("__ENDPOINT__", json.dumps(endpoint if observer else None))
+            .replace("__MODE_LOG__", mode_log)
+            .replace("__OBSERVER_CORE__\n", core + "\n\n" if observer else "")
+            .replace("__START__", OBSERVER_START if observer else INTERVAL_START))
 
 
 def create_sample_json():
@@ -276,6 +351,16 @@ def main():
         f.write(js_code)
     
     print(f"✅ JavaScript код сохранен в: {output_file}")
+    
+    # Вариант без опроса: MutationObserver + отправка в Python
+    observer_file = "auto_collector_observer_code.js"
+    with open(observer_file, "w", encoding="utf-8") as f:
+        f.write(generate_console_code("observer", feed_url()))
+    
+    print(f"⚡ Код с мгновенной доставкой (MutationObserver) сохранен в: {observer_file}")
+    print(f"   Новые числа сразу уходят на {DEFAULT_FEED_URL} (FeedServer из src/dom_feed.py)")
+    print("   и сохраняются в localStorage, даже если Python не запущен")
+    print("   ⚠️ В коде секрет приемника (data/feed_token.txt) - не публикуйте этот файл")
     print()
     
     # Создаем пример JSON
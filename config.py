@@ -17,7 +17,9 @@ CASINO_CONFIG = {
 # 🔗 НАСТРОЙКИ ПОДКЛЮЧЕНИЯ
 CONNECTION_CONFIG = {
     'method': 'mock',  # mock, api, scraping, manual
-    'update_interval': 120,  # Интервал обновления в секундах
+    'update_interval': 120,  # Интервал обновления в секундах (если adaptive_polling выключен)
+    'adaptive_polling': True,  # Подстраивать опрос под ритм спинов стола (poll_scheduler)
+    'poll_tradeoff': 0.5,  # 0 - быстрее узнавать о спине, 1 - меньше запросов
     'timeout': 30,  # Таймаут подключения
     'retry_attempts': 3,  # Количество попыток при ошибке
 }
@@ -35,7 +37,10 @@ API_CONFIG = {
         'Content-Type': 'application/json',
         'User-Agent': 'RouletteAnalyzer/1.0'
     },
-    'rate_limit': 60  # Запросов в минуту
+    'rate_limit': 60,  # Запросов в минуту (к одному серверу, для всех сборщиков вместе)
+    'rate_limit_burst': None,  # Запросов подряд без ожидания (None - лимит на 5 секунд)
+    'host_rate_limits': {},  # Свой лимит для отдельных серверов: {'host': запросов в минуту}
+    'rate_limit_state_file': None,  # Файл общего лимита для нескольких процессов (например 'data/rate_limits.json')
 }
 
 # 🕷️ WEB SCRAPING НАСТРОЙКИ (если используете скрапинг)
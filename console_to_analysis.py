@@ -20,6 +20,7 @@ from datetime import datetime, timedelta
 sys.path.append(str(Path(__file__).parent / "src"))
 
 from utils import RouletteUtils
+from streak_engine import StreakEngine
 
 
 class ConsoleDataAnalyzer:
@@ -115,9 +116,8 @@ class ConsoleDataAnalyzer:
         
         sorted_numbers = sorted(number_counts.items(), key=lambda x: x[1], reverse=True)
         
-        # Серии
-        red_series = self._find_series(colors, "red")
-        black_series = self._find_series(colors, "black")
+        # Серии (кодирование длин серий по числам, зеро прерывает серию)
+        longest = StreakEngine([int(n) for n in numbers], properties=["color"]).longest_runs()["color"]
         
         self.stats = {
             "total_spins": len(self.data),
@@ -127,29 +127,11 @@ class ConsoleDataAnalyzer:
                 for color, count in color_counts.items()
             },
             "top_numbers": sorted_numbers[:5],
-            "max_red_series": max(red_series) if red_series else 0,
-            "max_black_series": max(black_series) if black_series else 0,
+            "max_red_series": longest["red"]["max"],
+            "max_black_series": longest["black"]["max"],
             "unique_numbers": len(set(numbers))
         }
     
-    def _find_series(self, colors: list, target_color: str) -> list:
-        """Находит серии одного цвета"""
-        series = []
-        current_series = 0
-        
-        for color in colors:
-            if color == target_color:
-                current_series += 1
-            else:
-                if current_series > 0:
-                    series.append(current_series)
-                current_series = 0
-        
-        if current_series > 0:
-            series.append(current_series)
-        
-        return series
-    
     def print_statistics(self):
         """Выводит статистику на экран"""
         if not self.stats:
@@ -10,6 +10,10 @@ import urllib.request
 import urllib.parse
 from datetime import datetime
 from pathlib import Path
+import sys
+
+sys.path.append(str(Path(__file__).parent / "src"))
+from rate_limiter import rate_limited_urlopen, PRIORITY_DISCOVERY
 
 def debug_api():
     """Отладка API стола"""
@@ -50,7 +54,7 @@ def debug_api():
         req.add_header('Accept', 'application/json, text/plain, */*')
         req.add_header('Accept-Language', 'ru,en-US;q=0.9,en;q=0.8,lt;q=0.7')
         
-        with urllib.request.urlopen(req, timeout=10) as response:
+        with rate_limited_urlopen(req, timeout=10, priority=PRIORITY_DISCOVERY) as response:
             status = response.getcode()
             content_type = response.headers.get('Content-Type', '')
             data = response.read().decode('utf-8')
@@ -10,10 +10,15 @@ import json
 import time
 import urllib.request
 import urllib.parse
-from datetime import datetime
 from typing import Dict, List
 from pathlib import Path
 import sqlite3
+import sys
+
+sys.path.append(str(Path(__file__).parent / "src"))
+from rate_limiter import PRIORITY_LIVE
+from http_client import get_http_client, HTTPClientError
+from history_parser import parse_history
 
 
 class FinalSingleTableSystem:
@@ -61,6 +66,9 @@ class FinalSingleTableSystem:
     def get_single_table_data_only(self, limit: int = 50) -> List[Dict]:
         """
         Получает данные СТРОГО ТОЛЬКО с указанного стола
+        
+        Raises:
+            HTTPClientError: API недоступен (после всех повторов) или предохранитель выбит
         """
         print(f"🔍 ПОЛУЧЕНИЕ ДАННЫХ ТОЛЬКО С СТОЛА: {self.TARGET_TABLE}")
         print(f"🚫 ВСЕ ОСТАЛЬНЫЕ СТОЛЫ ИГНОРИРУЮТСЯ!")
@@ -69,104 +77,42 @@ class FinalSingleTableSystem:
             print("❌ Нет конфигурации API")
             return []
         
-        try:
-            # API запрос СТРОГО для одного стола
-            auth = self.config['api']['auth']
-            base_url = "https://games.pragmaticplaylive.net/api/ui/statisticHistory"
-            
-            # Параметры ТОЛЬКО для нашего стола
-            params = {
-                'tableId': self.TARGET_TABLE,  # СТРОГО наш стол
-                'numberOfGames': min(limit, 500)
-            }
-            
-            url = f"{base_url}?" + urllib.parse.urlencode(params)
-            
-            req = urllib.request.Request(url)
-            req.add_header('User-Agent', self.config['api']['headers']['User-Agent'])
-            req.add_header('Accept', 'application/json')
-            
-            with urllib.request.urlopen(req, timeout=10) as response:
-                if response.getcode() == 200:
-                    data = json.loads(response.read().decode('utf-8'))
-                    results = self._parse_with_strict_filtering(data)
-                    
-                    print(f"✅ ПОЛУЧЕНО {len(results)} результатов ТОЛЬКО с стола {self.TARGET_TABLE}")
-                    return results
-                else:
-                    print(f"❌ API вернул код {response.getcode()}")
-                    
-        except Exception as e:
-            print(f"❌ Ошибка API: {e}")
+        # API запрос СТРОГО для одного стола
+        auth = self.config['api']['auth']
+        base_url = "https://games.pragmaticplaylive.net/api/ui/statisticHistory"
+        
+        # Параметры ТОЛЬКО для нашего стола
+        params = {
+            'tableId': self.TARGET_TABLE,  # СТРОГО наш стол
+            'numberOfGames': min(limit, 500)
+        }
+        
+        url = f"{base_url}?" + urllib.parse.urlencode(params)
+        
+        req = urllib.request.Request(url)
+        req.add_header('User-Agent', self.config['api']['headers']['User-Agent'])
+        req.add_header('Accept', 'application/json')
+        
+        # Повторы и предохранитель - в общем клиенте; ошибка сети уходит вызывающему коду
+        body = get_http_client().get(req, priority=PRIORITY_LIVE, timeout=10)
+        results = self._parse_with_strict_filtering(body)
         
-        return []
+        print(f"✅ ПОЛУЧЕНО {len(results)} результатов ТОЛЬКО с стола {self.TARGET_TABLE}")
+        return results
     
-    def _parse_with_strict_filtering(self, data: Dict) -> List[Dict]:
+    def _parse_with_strict_filtering(self, data) -> List[Dict]:
         """
-        Парсит данные с ЖЕСТКОЙ фильтрацией по столу
+        Парсит данные (тело ответа или JSON); table_id ПРИНУДИТЕЛЬНО наш стол
         """
-        results = []
-        
         try:
-            if 'history' in data and isinstance(data['history'], list):
-                print(f"📊 Получено {len(data['history'])} записей из API")
-                
-                valid_results = 0
-                filtered_out = 0
-                
-                for game in data['history']:
-                    if not isinstance(game, dict):
-                        continue
-                    
-                    # Парсим номер и цвет
-                    winning_number = None
-                    color = None
-                    
-                    if 'gameResult' in game:
-                        try:
-                            parts = game['gameResult'].split()
-                            if len(parts) >= 2:
-                                winning_number = int(parts[0])
-                                api_color = parts[1].lower()
-                                color = api_color if api_color in ['red', 'black', 'green'] else self._get_color(winning_number)
-                        except (ValueError, IndexError):
-                            continue
-                    
-                    if winning_number is not None and 0 <= winning_number <= 36:
-                        # Время
-                        timestamp = datetime.now()
-                        if 'gameTime' in game:
-                            try:
-                                timestamp = datetime.fromisoformat(game['gameTime'].replace('Z', '+00:00'))
-                            except:
-                                pass
-                        
-                        # ЖЕСТКАЯ ПРОВЕРКА: ТОЛЬКО НАШ СТОЛ
-                        result = {
-                            'number': winning_number,
-                            'color': color,
-                            'timestamp': timestamp,
-                            'table_id': self.TARGET_TABLE,  # ПРИНУДИТЕЛЬНО наш стол
-                            'source': 'final_single_table_api',
-                            'game_id': game.get('gameId', '')
-                        }
-                        
-                        # ДОПОЛНИТЕЛЬНАЯ ПРОВЕРКА - убеждаемся что это наш стол
-                        if result['table_id'] == self.TARGET_TABLE:
-                            results.append(result)
-                            valid_results += 1
-                        else:
-                            filtered_out += 1
-                            print(f"🚫 ОТФИЛЬТРОВАН: {result['table_id']}")
-                
-                print(f"✅ Валидных результатов: {valid_results}")
-                print(f"🚫 Отфильтровано: {filtered_out}")
-                print(f"🎯 ВСЕ РЕЗУЛЬТАТЫ С СТОЛА: {self.TARGET_TABLE}")
-                
-        except Exception as e:
+            batch = parse_history(data, self.TARGET_TABLE)
+        except ValueError as e:
             print(f"❌ Ошибка парсинга: {e}")
-        
-        return results
+            return []
+
+        print(f"📊 Получено {batch.received} записей из API, валидных: {len(batch)}, отброшено: {batch.skipped}")
+        print(f"🎯 ВСЕ РЕЗУЛЬТАТЫ С СТОЛА: {self.TARGET_TABLE}")
+        return batch.to_records('final_single_table_api', sort=False)
     
     def _get_color(self, number: int) -> str:
         """Определяет цвет числа"""
@@ -290,7 +236,11 @@ class FinalSingleTableSystem:
         print("="*50)
         
         # Получаем данные
-        results = self.get_single_table_data_only(count)
+        try:
+            results = self.get_single_table_data_only(count)
+        except HTTPClientError as e:
+            print(f"❌ API недоступен: {e}")
+            return
         
         if results:
             # Сохраняем
@@ -330,7 +280,11 @@ def main():
             count = input("Количество результатов (по умолчанию 20): ").strip()
             count = int(count) if count.isdigit() else 20
             
-            results = system.get_single_table_data_only(count)
+            try:
+                results = system.get_single_table_data_only(count)
+            except HTTPClientError as e:
+                print(f"❌ API недоступен: {e}")
+                results = []
             if results:
                 system.save_to_database(results)
                 print(f"✅ Получено и сохранено {len(results)} результатов")
@@ -343,7 +297,11 @@ def main():
         
         elif choice == '4':
             print("🧪 Тестирование подключения...")
-            results = system.get_single_table_data_only(5)
+            try:
+                results = system.get_single_table_data_only(5)
+            except HTTPClientError as e:
+                print(f"❌ API недоступен: {e}")
+                results = []
             if results:
                 print(f"✅ Подключение работает! Получено {len(results)} результатов")
                 for i, r in enumerate(results, 1):
@@ -11,6 +11,7 @@ from pathlib import Path
 # Добавляем путь к строгому сборщику
 sys.path.insert(0, str(Path(__file__).parent))
 from strict_single_table import SingleTableOnlyCollector
+from http_client import HTTPClientError
 
 
 def patch_main_system():
@@ -149,7 +150,11 @@ def test_patched_system():
     collector = SingleTableOnlyCollector("roulettestura541")
     
     # Получаем данные
-    results = collector.get_single_table_data(20)
+    try:
+        results = collector.get_single_table_data(20)
+    except HTTPClientError as e:
+        print(f"❌ API недоступен: {e}")
+        return
     
     if results:
         print(f"✅ Система работает! Получено {len(results)} результатов")
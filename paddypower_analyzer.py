@@ -10,6 +10,10 @@ import json
 import urllib.request
 import urllib.parse
 from pathlib import Path
+import sys
+
+sys.path.append(str(Path(__file__).parent / "src"))
+from rate_limiter import rate_limited_urlopen, PRIORITY_DISCOVERY
 
 class APIAnalyzer:
     """Анализатор найденных API"""
@@ -130,7 +134,7 @@ class APIAnalyzer:
                     req.add_header('Authorization', f"Bearer {headers['pragmatic_bearer']}")
                 
                 # Выполняем запрос
-                with urllib.request.urlopen(req, timeout=10) as response:
+                with rate_limited_urlopen(req, timeout=10, priority=PRIORITY_DISCOVERY) as response:
                     status_code = response.getcode()
                     content_type = response.headers.get('Content-Type', '')
                     data = response.read(1000).decode('utf-8', errors='ignore')
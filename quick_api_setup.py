@@ -10,6 +10,10 @@ import json
 import urllib.request
 import urllib.parse
 from pathlib import Path
+import sys
+
+sys.path.append(str(Path(__file__).parent / "src"))
+from rate_limiter import rate_limited_urlopen, PRIORITY_DISCOVERY
 
 class QuickAPISetup:
     """Быстрая настройка API из браузера"""
@@ -176,7 +180,7 @@ class QuickAPISetup:
                     req.add_header(header, value)
                 
                 # Выполняем запрос
-                with urllib.request.urlopen(req, timeout=5) as response:
+                with rate_limited_urlopen(req, timeout=5, priority=PRIORITY_DISCOVERY) as response:
                     status_code = response.getcode()
                     content_type = response.headers.get('Content-Type', '')
                     
@@ -11,6 +11,11 @@ import json
 import time
 from datetime import datetime
 from typing import Dict, List, Optional
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent / "src"))
+from rate_limiter import rate_limited_urlopen, PRIORITY_DISCOVERY
 
 class SimpleCasinoAPIFinder:
     """Простой поисковик API казино"""
@@ -174,7 +179,7 @@ class SimpleCasinoAPIFinder:
             )
             
             # Выполняем запрос
-            with urllib.request.urlopen(req, timeout=10) as response:
+            with rate_limited_urlopen(req, timeout=10, priority=PRIORITY_DISCOVERY) as response:
                 status = response.getcode()
                 content_type = response.headers.get('Content-Type', '').lower()
                 
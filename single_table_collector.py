@@ -11,6 +11,12 @@ import urllib.request
 import urllib.parse
 from datetime import datetime
 from pathlib import Path
+import sys
+
+sys.path.append(str(Path(__file__).parent / "src"))
+from rate_limiter import rate_limited_urlopen, PRIORITY_DISCOVERY, PRIORITY_LIVE
+from http_client import get_http_client, HTTPClientError
+from history_parser import parse_history
 
 class SingleTableCollector:
     """Сборщик данных одного стола рулетки"""
@@ -37,105 +43,55 @@ class SingleTableCollector:
         return None
     
     def get_single_table_history(self, limit=100):
-        """Получает историю только указанного стола"""
+        """
+        Получает историю только указанного стола
+        
+        Raises:
+            HTTPClientError: API недоступен (после всех повторов) или предохранитель выбит
+        """
         if not self.config or not self.target_table_id:
             print("❌ Конфигурация стола не найдена")
             return []
         
         print(f"🔍 Получение истории стола {self.target_table_id}...")
         
-        try:
-            # Используем API статистики для конкретного стола
-            auth = self.config['api']['auth']
-            base_url = "https://games.pragmaticplaylive.net/api/ui/statisticHistory"
-            
-            # Параметры запроса для конкретного стола
-            params = {
-                'tableId': self.target_table_id,
-                'numberOfGames': min(limit, 500),  # Максимум 500
-                'JSESSIONID': auth['jsessionid'],
-                'ck': str(int(datetime.now().timestamp() * 1000)),
-                'game_mode': 'lobby_desktop'
-            }
-            
-            url = f"{base_url}?" + urllib.parse.urlencode(params)
-            
-            # Создаем запрос
-            req = urllib.request.Request(url)
-            req.add_header('User-Agent', self.config['api']['headers']['User-Agent'])
-            req.add_header('Accept', 'application/json, text/plain, */*')
-            req.add_header('Accept-Language', 'ru,en-US;q=0.9,en;q=0.8,lt;q=0.7')
-            
-            # Выполняем запрос
-            with urllib.request.urlopen(req, timeout=10) as response:
-                if response.getcode() == 200:
-                    data = json.loads(response.read().decode('utf-8'))
-                    return self.parse_history_data(data)
-                else:
-                    print(f"❌ HTTP {response.getcode()}")
-                    
-        except Exception as e:
-            print(f"❌ Ошибка получения данных: {e}")
-        
-        return []
+        # Используем API статистики для конкретного стола
+        auth = self.config['api']['auth']
+        base_url = "https://games.pragmaticplaylive.net/api/ui/statisticHistory"
+        
+        # Параметры запроса для конкретного стола
+        params = {
+            'tableId': self.target_table_id,
+            'numberOfGames': min(limit, 500),  # Максимум 500
+            'JSESSIONID': auth['jsessionid'],
+            'ck': str(int(datetime.now().timestamp() * 1000)),
+            'game_mode': 'lobby_desktop'
+        }
+        
+        url = f"{base_url}?" + urllib.parse.urlencode(params)
+        
+        # Создаем запрос
+        req = urllib.request.Request(url)
+        req.add_header('User-Agent', self.config['api']['headers']['User-Agent'])
+        req.add_header('Accept', 'application/json, text/plain, */*')
+        req.add_header('Accept-Language', 'ru,en-US;q=0.9,en;q=0.8,lt;q=0.7')
+        
+        # Выполняем запрос (повторы и предохранитель - в общем клиенте, ошибка уходит вызывающему коду)
+        body = get_http_client().get(req, priority=PRIORITY_LIVE, timeout=10)
+        return self.parse_history_data(body)
     
     def parse_history_data(self, data):
-        """Парсит данные истории"""
-        results = []
-        
+        """Парсит данные истории (тело ответа или JSON), новые сначала"""
         try:
-            if 'history' in data and isinstance(data['history'], list):
-                print(f"📊 Получено {len(data['history'])} записей")
-                
-                for game in data['history']:
-                    if isinstance(game, dict):
-                        # Парсим gameResult из API (формат: "25 Red", "0 Green")
-                        winning_number = None
-                        api_color = None
-                        
-                        if 'gameResult' in game:
-                            try:
-                                parts = game['gameResult'].split()
-                                if len(parts) >= 2:
-                                    winning_number = int(parts[0])
-                                    api_color = parts[1].lower()
-                            except (ValueError, IndexError):
-                                continue
-                        
-                        if winning_number is not None and 0 <= winning_number <= 36:
-                            # Используем цвет из API или рассчитываем
-                            color = api_color if api_color in ['red', 'black', 'green'] else self.get_number_color(winning_number)
-                            
-                            # Время игры
-                            timestamp = datetime.now()
-                            if 'gameTime' in game:
-                                try:
-                                    timestamp = datetime.fromisoformat(game['gameTime'].replace('Z', '+00:00'))
-                                except:
-                                    pass
-                            
-                            result = {
-                                'number': winning_number,
-                                'color': color,
-                                'timestamp': timestamp,
-                                'table_id': self.target_table_id,
-                                'game_id': game.get('gameId', ''),
-                            }
-                            
-                            results.append(result)
-                
-                # Сортируем по времени (новые сначала)
-                results.sort(key=lambda x: x['timestamp'], reverse=True)
-                
-                print(f"✅ Обработано {len(results)} результатов стола {self.target_table_id}")
-                
-            else:
-                print("⚠️ Неожиданный формат данных")
-                
-        except Exception as e:
+            batch = parse_history(data, self.target_table_id)
+        except ValueError as e:
             print(f"❌ Ошибка парсинга данных: {e}")
-        
-        return results
+            return []
+
+        if not batch.received:
+            print("⚠️ Неожиданный формат данных")
+        print(f"✅ Обработано {len(batch)} из {batch.received} записей стола {self.target_table_id}")
+        return batch.to_records(source=None)
     
     def get_number_color(self, number):
         """Определяет цвет числа рулетки"""
@@ -180,7 +136,7 @@ class SingleTableCollector:
             req.add_header('User-Agent', self.config['api']['headers']['User-Agent'])
             req.add_header('Accept', 'application/json, text/plain, */*')
             
-            with urllib.request.urlopen(req, timeout=10) as response:
+            with rate_limited_urlopen(req, timeout=10, priority=PRIORITY_DISCOVERY) as response:
                 if response.getcode() == 200:
                     data = response.read().decode('utf-8')
                     print(f"ℹ️  Конфигурация стола {self.target_table_id} получена")
@@ -204,7 +160,11 @@ class SingleTableCollector:
         table_info = self.get_table_info()
         
         # Получаем последние результаты
-        results = self.get_single_table_history(50)
+        try:
+            results = self.get_single_table_history(50)
+        except HTTPClientError as e:
+            print(f"❌ API недоступен: {e}")
+            return
         
         if results:
             print(f"\n📊 ПОСЛЕДНИЕ РЕЗУЛЬТАТЫ СТОЛА {self.target_table_id}:")
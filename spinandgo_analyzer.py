@@ -10,6 +10,10 @@ import urllib.request
 import urllib.parse
 from pathlib import Path
 import re
+import sys
+
+sys.path.append(str(Path(__file__).parent / "src"))
+from rate_limiter import rate_limited_urlopen, PRIORITY_DISCOVERY
 
 class NewAPIAnalyzer:
     """Анализатор новых API endpoints"""
@@ -92,7 +96,7 @@ class NewAPIAnalyzer:
                 req.add_header('Accept', 'application/json, text/plain, */*')
                 req.add_header('Accept-Language', 'en-US,en;q=0.9')
                 
-                with urllib.request.urlopen(req, timeout=5) as response:
+                with rate_limited_urlopen(req, timeout=5, priority=PRIORITY_DISCOVERY) as response:
                     status_code = response.getcode()
                     content_type = response.headers.get('Content-Type', '')
                     
@@ -137,7 +141,7 @@ class NewAPIAnalyzer:
             req = urllib.request.Request(url)
             req.add_header('User-Agent', 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
             
-            with urllib.request.urlopen(req, timeout=10) as response:
+            with rate_limited_urlopen(req, timeout=10, priority=PRIORITY_DISCOVERY) as response:
                 if response.getcode() == 200:
                     content = response.read().decode('utf-8', errors='ignore')
                     
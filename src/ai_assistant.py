@@ -12,21 +12,25 @@
 - Рассчитывает ожидаемую прибыль
 """
 
-try:
-    import numpy as np
-    NUMPY_AVAILABLE = True
-except ImportError:
-    NUMPY_AVAILABLE = False
-    print("⚠️ numpy не установлен, используем базовые функции")
-
 from datetime import datetime, timedelta
-from typing import List, Dict, Tuple, Any
-from collections import Counter, defaultdict
-import math
+from typing import List, Dict, Tuple, Any, Optional
+from collections import defaultdict
 
 from data_collector import DataCollector
 from game_analyzer import GameAnalyzer, GameStrategy
 from utils import RouletteUtils
+from fused_analysis import (FusedAnalyzer, wheel_sectors, summarize_sectors, summarize_frequency,
+                            summarize_color_streaks, summarize_long_streaks, summarize_volatility,
+                            summarize_anomalies, TRANSITION_ORDER)
+from rolling_stats import RollingStatistics
+from frequency_index import FrequencyIndex
+from sector_engine import SectorEngine, WHEEL_POSITION
+from randomness_tests import RandomnessTestSuite
+from transition_analysis import TransitionAnalyzer
+from segment_analytics import SegmentAnalyzer
+from streak_engine import StreakEngine
+from bias_estimator import BiasEstimator
+from decay_tracker import DecayTracker
 
 
 class PatternAnalyzer:
@@ -50,44 +54,8 @@ class PatternAnalyzer:
         if len(spins) < 10:
             return {"error": "Недостаточно данных"}
         
-        colors = [spin['color'] for spin in spins]
-        
-        # Анализируем серии
-        streaks = {"red": [], "black": [], "green": []}
-        current_color = colors[0]
-        current_streak = 1
-        
-        for color in colors[1:]:
-            if color == current_color and color != 'green':
-                current_streak += 1
-            else:
-                if current_color != 'green':
-                    streaks[current_color].append(current_streak)
-                current_color = color
-                current_streak = 1
-        
-        # Добавляем последнюю серию
-        if current_color != 'green':
-            streaks[current_color].append(current_streak)
-        
-        # Статистика серий
-        analysis = {}
-        for color in ['red', 'black']:
-            if streaks[color]:
-                if NUMPY_AVAILABLE:
-                    avg_streak = np.mean(streaks[color])
-                else:
-                    avg_streak = sum(streaks[color]) / len(streaks[color])
-                
-                analysis[color] = {
-                    "avg_streak": avg_streak,
-                    "max_streak": max(streaks[color]),
-                    "total_streaks": len(streaks[color]),
-                    "streaks_3_plus": len([s for s in streaks[color] if s >= 3]),
-                    "streaks_5_plus": len([s for s in streaks[color] if s >= 5])
-                }
-        
-        return analysis
+        # Серии находятся кодированием длин серий по числам (зеро прерывает серию)
+        return summarize_color_streaks(StreakEngine.from_spins(spins, properties=["color"]))
     
     def analyze_number_frequency(self, spins: List[Dict], periods: List[int] = [50, 100, 200]) -> Dict:
         """
@@ -102,35 +70,17 @@ class PatternAnalyzer:
         """
         analysis = {}
         
+        # Индекс строится один раз, счетчики любого периода - разность двух строк
+        index = FrequencyIndex.from_spins(spins)
+        
         for period in periods:
             if len(spins) < period:
                 continue
                 
-            recent_spins = spins[-period:]
-            number_counts = Counter(spin['number'] for spin in recent_spins)
-            
-            # Ожидаемая частота для справедливой рулетки
-            expected_freq = period / 37
+            number_counts = index.counter(len(spins) - period, len(spins))
             
             # Найдем горячие и холодные числа
-            hot_numbers = []
-            cold_numbers = []
-            
-            for number in range(37):
-                actual_freq = number_counts.get(number, 0)
-                deviation = actual_freq - expected_freq
-                
-                if actual_freq >= expected_freq * 1.5:  # Выше нормы на 50%+
-                    hot_numbers.append((number, actual_freq, deviation))
-                elif actual_freq <= expected_freq * 0.5:  # Ниже нормы на 50%+
-                    cold_numbers.append((number, actual_freq, deviation))
-            
-            analysis[f"last_{period}"] = {
-                "hot_numbers": sorted(hot_numbers, key=lambda x: x[2], reverse=True)[:10],
-                "cold_numbers": sorted(cold_numbers, key=lambda x: x[2])[:10],
-                "most_frequent": number_counts.most_common(10),
-                "least_frequent": number_counts.most_common()[:-11:-1]
-            }
+            analysis[f"last_{period}"] = summarize_frequency(number_counts, period)
         
         return analysis
     
@@ -146,35 +96,36 @@ class PatternAnalyzer:
         Returns:
             Dict: Анализ секторов
         """
-        # Определяем соседние числа на колесе рулетки (европейская рулетка)
-        wheel_order = [0, 32, 15, 19, 4, 21, 2, 25, 17, 34, 6, 27, 13, 36, 11, 30, 8, 23, 10, 
-                      5, 24, 16, 33, 1, 20, 14, 31, 9, 22, 18, 29, 7, 28, 12, 35, 3, 26]
+        # Секторы по 5 соседних чисел на колесе (европейская рулетка)
+        sectors = wheel_sectors()
         
-        # Создаем индекс позиций на колесе
-        wheel_positions = {num: i for i, num in enumerate(wheel_order)}
+        # Гистограмма колеса строится один раз, попадания в сектор - сумма ее ячеек
+        engine = SectorEngine.from_spins(spins)
+        sector_hits = [engine.sector_hits(WHEEL_POSITION[sector_numbers[0]], len(sector_numbers))
+                       for _, sector_numbers in sectors]
         
-        # Анализируем секторы по 5 чисел
-        sector_size = 5
-        sectors = {}
-        
-        for start_pos in range(0, 37, sector_size):
-            end_pos = min(start_pos + sector_size, 37)
-            sector_numbers = wheel_order[start_pos:end_pos]
-            sector_name = f"sector_{start_pos//sector_size + 1}"
-            
-            sector_hits = sum(1 for spin in spins if spin['number'] in sector_numbers)
-            expected_hits = len(spins) * (len(sector_numbers) / 37)
-            
-            sectors[sector_name] = {
-                "numbers": sector_numbers,
-                "hits": sector_hits,
-                "expected": expected_hits,
-                "deviation": sector_hits - expected_hits,
-                "activity_ratio": sector_hits / expected_hits if expected_hits > 0 else 0
-            }
+        sectors = summarize_sectors(sector_hits, len(spins))
         
         return sectors
 
+    
+    def analyze_circular_sectors(self, spins: List[Dict], widths: List[int] = range(1, 19), top: int = 3) -> Dict:
+        """
+        Анализирует круговые секторы колеса всех ширин
+        
+        Простыми словами: Ищет горячие и холодные участки колеса любой ширины,
+        в том числе секторы, которые проходят через зеро
+        
+        Args:
+            spins (List[Dict]): История спинов
+            widths (List[int]): Ширины секторов (по умолчанию от 1 до 18)
+            top (int): Сколько секторов каждой ширины показать
+            
+        Returns:
+            Dict: Лучшие/худшие секторы по ширинам и значимые отклонения
+        """
+        return SectorEngine.from_spins(spins).analyze(widths, top)
+
 
 class AIAssistant:
     """Основной класс ИИ-ассистента"""
@@ -190,6 +141,8 @@ class AIAssistant:
         self.data_collector = data_collector
         self.game_analyzer = game_analyzer
         self.pattern_analyzer = PatternAnalyzer()
+        self.fused_analyzer = FusedAnalyzer()
+        self.segment_analyzer = SegmentAnalyzer(data_collector)
         self.utils = RouletteUtils()
     
     def analyze_data(self, start_date: datetime, end_date: datetime = None) -> Dict:
@@ -207,35 +160,31 @@ class AIAssistant:
         """
         print("ИИ анализирует данные...")
         
-        # Получаем данные
-        spins = self.data_collector.get_spins_by_period(start_date, end_date)
+        # Получаем данные одним запросом сразу в колоночном виде
+        columns = self.data_collector.get_spin_columns(start_date, end_date)
         
-        if len(spins) < 50:
+        if len(columns) < 50:
             return {"error": "Недостаточно данных для анализа (минимум 50 спинов)"}
         
-        # Базовая статистика
-        basic_stats = self.data_collector.get_statistics(start_date, end_date)
-        
-        # Анализ паттернов
-        color_patterns = self.pattern_analyzer.analyze_color_patterns(spins)
-        number_frequency = self.pattern_analyzer.analyze_number_frequency(spins)
-        sector_patterns = self.pattern_analyzer.analyze_sector_patterns(spins)
-        
-        # Поиск аномалий
-        anomalies = self._detect_anomalies(spins)
-        
-        # Оценка волатильности
-        volatility = self._calculate_volatility(spins)
+        # Статистика, паттерны, аномалии и волатильность за один проход
+        fused = self.fused_analyzer.analyze(columns, start_date, end_date)
         
         analysis = {
             "period": {"start": start_date, "end": end_date or datetime.now()},
-            "total_spins": len(spins),
-            "basic_statistics": basic_stats,
-            "color_patterns": color_patterns,
-            "number_frequency": number_frequency,
-            "sector_patterns": sector_patterns,
-            "anomalies": anomalies,
-            "volatility": volatility,
+            "total_spins": len(columns),
+            "basic_statistics": fused["basic_statistics"],
+            "color_patterns": fused["color_patterns"],
+            "number_frequency": fused["number_frequency"],
+            "sector_patterns": fused["sector_patterns"],
+            "anomalies": fused["anomalies"],
+            "volatility": fused["volatility"],
+            "rolling_volatility": fused["rolling_volatility"],
+            "circular_sectors": fused["circular_sectors"],
+            "transitions": fused["transitions"],
+            "streaks": fused["streaks"],
+            "bias": fused["bias"],
+            "recency": fused["recency"],
+            "recency_validation": fused["recency_validation"],
             "analysis_timestamp": datetime.now()
         }
         
@@ -261,9 +210,10 @@ class AIAssistant:
         
         strategies = []
         
-        # Стратегия 1: На основе горячих чисел
+        # Стратегия 1: На основе горячих чисел (только если найден перекос)
         hot_strategy = self._create_hot_numbers_strategy(analysis_data, risk_level)
-        strategies.append(hot_strategy)
+        if hot_strategy:
+            strategies.append(hot_strategy)
         
         # Стратегия 2: На основе цветовых паттернов
         color_strategy = self._create_color_pattern_strategy(analysis_data, risk_level)
@@ -273,27 +223,41 @@ class AIAssistant:
         sector_strategy = self._create_sector_strategy(analysis_data, risk_level)
         strategies.append(sector_strategy)
         
-        # Сортируем по ожидаемому профиту
-        strategies.sort(key=lambda x: x.get("expected_profit", 0), reverse=True)
+        # Стратегия 4: На основе переходов между числами (только если зависимость подтверждена)
+        transition_strategy = self._create_transition_strategy(analysis_data, risk_level)
+        if transition_strategy:
+            strategies.append(transition_strategy)
         
-        return strategies
-    
-    def _create_hot_numbers_strategy(self, analysis_data: Dict, risk_level: str) -> Dict:
-        """Создает стратегию на основе горячих чисел"""
+        # Стратегия 5: Свежие горячие числа (только если ставка на них подтверждена "вперед")
+        recency_strategy = self._create_recency_strategy(analysis_data, risk_level)
+        if recency_strategy:
+            strategies.append(recency_strategy)
         
-        # Получаем горячие числа из анализа
-        hot_numbers = []
-        freq_data = analysis_data.get("number_frequency", {})
+        # Сортируем по ожидаемому профиту и оставляем 3 лучшие
+        strategies.sort(key=lambda x: x.get("expected_profit", 0), reverse=True)
         
-        for period, data in freq_data.items():
-            if "hot_numbers" in data and data["hot_numbers"]:
-                hot_numbers.extend([num for num, freq, dev in data["hot_numbers"][:3]])
+        return strategies[:3]
+    
+    def _create_hot_numbers_strategy(self, analysis_data: Dict, risk_level: str) -> Optional[Dict]:
+        """
+        Создает стратегию на основе горячих чисел
         
-        # Убираем дубликаты и берем топ-5
-        hot_numbers = list(set(hot_numbers))[:5]
+        Простыми словами: если перекос не найден - ставить не на что, возвращаем None
+        """
         
+        # Горячие числа берем из байесовской оценки: число считается горячим, только если
+        # выпадает чаще 1/37 с поправкой на проверку всех 37 чисел; выгодность ставки
+        # посчитана по спинам, которые в выборе чисел не участвовали
+        bias = analysis_data.get("bias", {})
+        hot_numbers = bias.get("hot_numbers", [])
+        hot_bet = bias.get("hot_bet") or {}
         if not hot_numbers:
-            hot_numbers = [7, 17, 23]  # Дефолтные "счастливые" числа
+            return None
+        
+        # Ожидаемый профит - только если ставка выгодна с высокой вероятностью
+        probability_of_edge = hot_bet.get("probability_of_edge", 0.0)
+        expected_edge = hot_bet.get("expected_edge", 0.0)
+        expected_profit = expected_edge * 100 if probability_of_edge >= 0.9 and expected_edge > 0 else 0.0
         
         base_bet = {"low": 5, "medium": 10, "high": 20}[risk_level]
         
@@ -307,8 +271,8 @@ class AIAssistant:
                 "max_bet": base_bet * 5
             },
             "risk_level": risk_level,
-            "expected_profit": len(hot_numbers) * 2.5,  # Примерная оценка
-            "logic": "Числа которые выпадали чаще среднего продолжат быть активными"
+            "expected_profit": expected_profit,
+            "logic": f"Числа выпадают чаще нормы (вероятность выгоды ставки {probability_of_edge:.0%})"
         }
         
         return strategy
@@ -383,45 +347,160 @@ class AIAssistant:
         
         return strategy
     
-    def _detect_anomalies(self, spins: List[Dict]) -> Dict:
-        """Обнаруживает аномалии в данных"""
+    def _create_transition_strategy(self, analysis_data: Dict, risk_level: str) -> Optional[Dict]:
+        """
+        Создает стратегию на основе переходов между числами
+        
+        Простыми словами: если зависимость или угадывание не подтвердились - возвращаем None
+        """
         
-        anomalies = {
-            "zero_frequency": 0,
-            "long_color_streaks": [],
-            "number_gaps": [],
-            "unusual_patterns": []
+        transitions = analysis_data.get("transitions", {})
+        features = transitions.get("features", {})
+        top_k = features.get("top", 3)
+        
+        # Преимущество проверено "вперед" (каждый спин угадывался только по предыдущим);
+        # учитываем его, только если и зависимость, и угадывание статистически значимы
+        p_value = transitions.get("independence", {}).get("p_value", 1.0)
+        edge_p_value = features.get("p_value", 1.0)
+        edge = features.get("edge_per_unit", 0.0)
+        if not (p_value < 0.05 and edge_p_value < 0.05 and edge > 0):
+            return None
+        
+        base_bet = {"low": 2, "medium": 4, "high": 8}[risk_level]
+        
+        strategy = {
+            "name": "ИИ: Следование Переходам",
+            "description": f"Ставки на {top_k} числа, которые чаще всего выпадали после предыдущих",
+            "type": "transition_following",
+            "parameters": {
+                "top_k": top_k,
+                "bet_per_number": base_bet,
+                "min_observations": features.get("min_observations", 37),
+                "max_order": features.get("max_order", TRANSITION_ORDER)
+            },
+            "risk_level": risk_level,
+            "expected_profit": edge * 100,
+            "logic": (f"Следующее число зависит от предыдущего (p={p_value:.4f}), "
+                      f"прогноз угадывал {features.get('hit_rate', 0.0):.1%} спинов "
+                      f"(честно {top_k / 37:.1%}, p={edge_p_value:.4f})")
+        }
+        
+        return strategy
+    
+    def _create_recency_strategy(self, analysis_data: Dict, risk_level: str) -> Optional[Dict]:
+        """
+        Создает стратегию на основе частот с затуханием
+        
+        Простыми словами: ставим на числа, которые недавно выпадали заметно чаще нормы,
+        только если такая ставка, проверенная "вперед", выигрывала значимо чаще честной;
+        иначе возвращаем None
+        """
+        
+        validation = analysis_data.get("recency_validation", {})
+        # Проверяется каждый период полураспада - поправка Бонферрони на их число
+        alpha = 0.05 / max(len(validation), 1)
+        passed = [check for check in validation.values()
+                  if check["p_value"] < alpha and check["edge_per_unit"] > 0]
+        if not passed:
+            return None
+        best = max(passed, key=lambda check: check["edge_per_unit"])
+        
+        half_life = best["half_life"]
+        current = analysis_data.get("recency", {}).get(half_life, {}).get("hot_numbers", [])
+        base_bet = {"low": 5, "medium": 10, "high": 20}[risk_level]
+        
+        strategy = {
+            "name": "ИИ: Свежие Горячие Числа",
+            "description": f"Ставки на числа, выпадавшие чаще нормы (полураспад {half_life} спинов)",
+            "type": "hot_numbers",
+            "parameters": {
+                "target_numbers": current[:best["top"]],
+                "base_bet": base_bet,
+                "half_life": half_life,
+                "top": best["top"],
+                "min_ratio": best["min_ratio"]
+            },
+            "risk_level": risk_level,
+            "expected_profit": best["edge_per_unit"] * 100,
+            "logic": (f"Ставка на свежие горячие числа угадывала {best['hit_rate']:.1%} спинов "
+                      f"из {best['bets']} (доход на единицу {best['edge_per_unit']:+.3f}, "
+                      f"p={best['p_value']:.4f})")
         }
         
+        return strategy
+    
+    def _detect_anomalies(self, spins: List[Dict]) -> Dict:
+        """Обнаруживает аномалии в данных"""
+        
         # Частота зеро
         zero_count = sum(1 for spin in spins if spin['number'] == 0)
-        expected_zero = len(spins) / 37
-        if zero_count > expected_zero * 1.5:
-            anomalies["zero_frequency"] = {
-                "actual": zero_count,
-                "expected": expected_zero,
-                "significance": "high"
-            }
-        
-        # Длинные серии цветов
-        colors = [spin['color'] for spin in spins]
-        current_color = colors[0] if colors else None
-        current_streak = 1
-        
-        for color in colors[1:]:
-            if color == current_color and color != 'green':
-                current_streak += 1
-            else:
-                if current_streak >= 7 and current_color != 'green':
-                    anomalies["long_color_streaks"].append({
-                        "color": current_color,
-                        "length": current_streak,
-                        "significance": "high" if current_streak >= 10 else "medium"
-                    })
-                current_color = color
-                current_streak = 1
-        
-        return anomalies
+        
+        # Длинные серии цветов (текущая серия не считается - она еще не закончилась)
+        long_streaks = summarize_long_streaks(StreakEngine.from_spins(spins, properties=["color"]))
+        
+        # Статистические тесты случайности вместо одних только порогов
+        randomness = RandomnessTestSuite().run_single([spin['number'] for spin in spins])
+        
+        return summarize_anomalies(zero_count, len(spins), long_streaks, randomness)
+    
+    def scan_tables_randomness(self, start_date: datetime, end_date: datetime = None,
+                               correction: str = "bh") -> Dict:
+        """
+        Проверяет на случайность все столы за период одним вызовом
+        
+        Простыми словами: Для каждого стола прогоняем набор статистических тестов
+        и показываем, какие столы выглядят подозрительно
+        
+        Args:
+            start_date (datetime): Начальная дата
+            end_date (datetime): Конечная дата
+            correction (str): Поправка на множественное сравнение ("bh" или "bonferroni")
+            
+        Returns:
+            Dict: Результаты по столам и список провалившихся тестов
+        """
+        tables = self.data_collector.get_numbers_by_table(start_date, end_date)
+        if not tables:
+            return {"error": "Нет данных за указанный период"}
+        
+        return RandomnessTestSuite(correction=correction).run(tables)
+    
+    def estimate_table_bias(self, start_date: datetime, end_date: datetime = None) -> Dict:
+        """
+        Байесовская оценка перекоса каждого стола за период
+        
+        Простыми словами: Для каждого стола - с какой вероятностью числа
+        выпадают чаще нормы и выгодна ли ставка на них
+        
+        Args:
+            start_date (datetime): Начальная дата
+            end_date (datetime): Конечная дата
+            
+        Returns:
+            Dict: Сводка DirichletPosterior.summary по столам
+        """
+        tables = self.data_collector.get_numbers_by_table(start_date, end_date)
+        if not tables:
+            return {"error": "Нет данных за указанный период"}
+        
+        return BiasEstimator.from_tables(tables).summary()
+    
+    def analyze_segments(self, by: str, start_date: datetime, end_date: datetime = None) -> Dict:
+        """
+        Сравнивает дилеров, часы суток, сессии или столы между собой
+        
+        Простыми словами: Для каждого сегмента - распределение чисел, расстояния
+        по колесу и серии; повторный вызов пересчитывает только сегменты с новыми спинами
+        
+        Args:
+            by (str): "dealer", "hour", "session" или "table"
+            start_date (datetime): Начальная дата
+            end_date (datetime): Конечная дата
+            
+        Returns:
+            Dict: Результаты по сегментам и список подозрительных сегментов
+        """
+        return self.segment_analyzer.analyze(by, start_date, end_date)
     
     def _calculate_volatility(self, spins: List[Dict]) -> Dict:
         """Рассчитывает волатильность данных"""
@@ -429,41 +508,11 @@ class AIAssistant:
         if len(spins) < 20:
             return {"error": "Недостаточно данных"}
         
-        # Анализируем распределение по цветам в скользящих окнах
+        # Анализируем распределение по цветам в скользящих окнах (через накопленные суммы)
         window_size = 20
-        red_percentages = []
-        
-        for i in range(len(spins) - window_size + 1):
-            window = spins[i:i + window_size]
-            red_count = sum(1 for spin in window if spin['color'] == 'red')
-            red_percentages.append(red_count / window_size * 100)
+        rolling = RollingStatistics.from_spins(spins, metrics=["red"])
         
-        if not red_percentages:
-            return {"error": "Недостаточно данных для окон"}
-        
-        if NUMPY_AVAILABLE:
-            color_volatility = np.std(red_percentages)
-        else:
-            # Вычисляем стандартное отклонение вручную
-            mean_val = sum(red_percentages) / len(red_percentages)
-            variance = sum((x - mean_val) ** 2 for x in red_percentages) / len(red_percentages)
-            color_volatility = math.sqrt(variance)
-
-        volatility = {
-            "color_volatility": color_volatility,
-            "trend": "stable",
-            "predictability": "medium"
-        }
-        
-        # Определяем тренд
-        if volatility["color_volatility"] > 15:
-            volatility["trend"] = "volatile"
-            volatility["predictability"] = "low"
-        elif volatility["color_volatility"] < 8:
-            volatility["trend"] = "stable"
-            volatility["predictability"] = "high"
-        
-        return volatility
+        return summarize_volatility(rolling.window_shares("red", window_size))
     
     def test_ai_strategies(self, strategies: List[Dict], start_date: datetime, 
                           end_date: datetime = None, initial_balance: float = 1000.0) -> Dict:
@@ -515,12 +564,26 @@ class AIAssistant:
         if strategy_type == "hot_numbers":
             target_numbers = params.get("target_numbers", [17, 23, 7])
             base_bet = params.get("base_bet", 5)
+            half_life = params.get("half_life")
+            top = params.get("top", len(target_numbers))
+            min_ratio = params.get("min_ratio", 1.5)
+            
+            # Частоты с затуханием дописываются по одному спину
+            strategy.decay_tracker = DecayTracker(half_lives=[half_life]) if half_life else None
             
             def make_bet_logic(spin_number: int, history: List[Dict]) -> Dict:
+                numbers = target_numbers
+                if strategy.decay_tracker:
+                    # Как при проверке "вперед": нет горячих чисел - нет ставки
+                    strategy.decay_tracker.sync(history)
+                    numbers = strategy.decay_tracker.hot_numbers(half_life, top, min_ratio)
+                    if not numbers:
+                        return {"type": "skip", "numbers": [], "amount": 0}
+                
                 return {
                     "type": "number",
-                    "numbers": target_numbers,
-                    "amount": min(base_bet * len(target_numbers), strategy.balance)
+                    "numbers": numbers,
+                    "amount": min(base_bet * len(numbers), strategy.balance)
                 }
                 
         elif strategy_type == "color_progression":
@@ -560,6 +623,28 @@ class AIAssistant:
                     "amount": min(bet_per_number * len(sector_numbers), strategy.balance)
                 }
         
+        elif strategy_type == "transition_following":
+            top_k = params.get("top_k", 3)
+            bet_per_number = params.get("bet_per_number", 4)
+            min_observations = params.get("min_observations", 37)
+            
+            # Матрица переходов дописывается по одному спину, а не строится заново
+            strategy.transition_analyzer = TransitionAnalyzer(max_order=params.get("max_order", TRANSITION_ORDER))
+            
+            def make_bet_logic(spin_number: int, history: List[Dict]) -> Dict:
+                strategy.transition_analyzer.sync(history)
+                predicted = strategy.transition_analyzer.predict(top_k, min_observations=min_observations)
+                
+                if not predicted:
+                    # Пока мало данных о переходах - пропускаем
+                    return {"type": "skip", "numbers": [], "amount": 0}
+                
+                return {
+                    "type": "number",
+                    "numbers": predicted,
+                    "amount": min(bet_per_number * len(predicted), strategy.balance)
+                }
+        
         else:
             # Дефолтная логика
             def make_bet_logic(spin_number: int, history: List[Dict]) -> Dict:
@@ -0,0 +1,523 @@
+"""
+АСИНХРОННЫЙ СБОР СО МНОГИХ СТОЛОВ
+================================
+
+Этот модуль опрашивает историю сразу многих столов Pragmatic Play
+(endpoint statisticHistory) без блокирующих запросов и time.sleep.
+
+Простыми словами:
+- Старые сборщики ходили за одним столом (roulettestura541) через urlopen
+  и ждали 30 секунд между запросами
+- Здесь каждый стол опрашивается своей задачей asyncio, все задачи работают
+  одновременно
+- Соединения с сервером не закрываются после запроса (keep-alive) и
+  переиспользуются, а на один сервер одновременно идет не больше max_per_host
+  запросов
+- Новые результаты всех столов складываются в общий асинхронный приемник
+  (очередь или база данных); CallbackSink по пути отдает каждый спин
+  обработчику, например бумажной торговле
+- Адрес сервера настраивается, поэтому сборщик можно проверить на локальном
+  тестовом сервере
+"""
+
+import asyncio
+import gzip
+import json
+import ssl
+import time
+import urllib.parse
+from datetime import datetime
+from typing import Callable, List, Dict, Optional, Iterable, Tuple, Union
+
+from data_collector import DataCollector
+from incremental_fetch import TableCursor, fetch_new_async
+from poll_scheduler import PollScheduler
+from rate_limiter import RateLimiter, get_rate_limiter, PRIORITY_LIVE, PRIORITY_BACKFILL
+from http_client import ResilientHTTPClient, HTTPClientError, get_http_client, endpoint_key
+from history_parser import parse_history_records
+from utils import RouletteUtils
+
+
+STATISTIC_HISTORY_URL = "https://games.pragmaticplaylive.net/api/ui/statisticHistory"
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept': 'application/json, text/plain, */*',
+    'Accept-Encoding': 'gzip'
+}
+
+
+class HTTPError(Exception):
+    """Сервер ответил кодом, отличным от 200"""
+
+    def __init__(self, status: int, url: str, headers: Dict[str, str] = None):
+        super().__init__(f"HTTP {status}: {url}")
+        self.status = status
+        self.url = url
+        # Заголовки ответа (имена в нижнем регистре) - например retry-after для 429 и 503
+        self.headers = headers or {}
+
+
+class KeepAlivePool:
+    """
+    Пул постоянных HTTP/1.1 соединений поверх asyncio
+
+    Простыми словами: соединение с сервером открывается один раз и
+    используется для многих запросов; лимит одновременных запросов - на каждый
+    сервер, а частоту запросов ограничивает общий RateLimiter
+    """
+
+    def __init__(self, max_per_host: int = 8, timeout: float = 10.0, rate_limiter: RateLimiter = None):
+        """
+        Args:
+            max_per_host (int): Сколько запросов к одному серверу может идти одновременно
+            timeout (float): Таймаут одного запроса в секундах
+            rate_limiter (RateLimiter): Ограничитель частоты (по умолчанию общий для процесса)
+        """
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.rate_limit_wait = 0.0
+        self._idle: Dict[Tuple, List[Tuple]] = {}
+        self._limits: Dict[Tuple, asyncio.Semaphore] = {}
+        self._ssl_context = None
+        self.connections_opened = 0
+        self.requests_sent = 0
+
+    async def get(self, url: str, headers: Dict[str, str] = None,
+                  priority: int = PRIORITY_LIVE) -> Tuple[int, Dict[str, str], bytes]:
+        """
+        GET-запрос через пул
+
+        Args:
+            url (str): Полный адрес
+            headers (Dict[str, str]): Дополнительные заголовки
+            priority (int): Приоритет в очереди ограничителя частоты
+
+        Returns:
+            Tuple[int, Dict[str, str], bytes]: Код ответа, заголовки (в нижнем регистре) и тело
+        """
+        parts = urllib.parse.urlsplit(url)
+        secure = parts.scheme == "https"
+        host = parts.hostname
+        port = parts.port or (443 if secure else 80)
+        key = (host, port, secure)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+
+        lines = [f"GET {path} HTTP/1.1", f"Host: {parts.netloc}", "Connection: keep-alive"]
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        request = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+        if key not in self._limits:
+            self._limits[key] = asyncio.Semaphore(self.max_per_host)
+
+        # Жетон берем до занятия соединения, чтобы ожидание не держало слот
+        self.rate_limit_wait += await self.rate_limiter.acquire_async(url, priority)
+
+        async with self._limits[key]:
+            # Сохраненное соединение сервер мог уже закрыть - тогда одна попытка с новым
+            while True:
+                idle = self._idle.get(key)
+                reused = bool(idle)
+                connection = idle.pop() if reused else await self._open(host, port, secure)
+                try:
+                    status, response_headers, body, keep_alive = await asyncio.wait_for(
+                        self._exchange(connection, request), self.timeout)
+                except (ConnectionError, asyncio.IncompleteReadError, OSError):
+                    connection[1].close()
+                    if reused:
+                        continue
+                    raise
+                except BaseException:
+                    # Таймаут, отмена или непонятный ответ (ValueError при разборе) -
+                    # в каком состоянии соединение, неизвестно: в пул его не возвращаем
+                    connection[1].close()
+                    raise
+
+                self.requests_sent += 1
+                if keep_alive:
+                    self._idle.setdefault(key, []).append(connection)
+                else:
+                    connection[1].close()
+                return status, response_headers, body
+
+    async def _open(self, host: str, port: int, secure: bool) -> Tuple:
+        """Открывает новое соединение"""
+        if secure and self._ssl_context is None:
+            self._ssl_context = ssl.create_default_context()
+        connection = await asyncio.wait_for(
+            asyncio.open_connection(host, port, ssl=self._ssl_context if secure else None), self.timeout)
+        self.connections_opened += 1
+        return connection
+
+    @staticmethod
+    async def _exchange(connection: Tuple, request: bytes) -> Tuple[int, Dict[str, str], bytes, bool]:
+        """Отправляет запрос и читает ответ (Content-Length, chunked или до закрытия)"""
+        reader, writer = connection
+        writer.write(request)
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionError("Сервер закрыл соединение")
+        version, status = status_line.decode("latin-1").split(" ", 2)[:2]
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            body = bytearray()
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                if not size:
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    break
+                body += await reader.readexactly(size)
+                await reader.readexactly(2)
+            body = bytes(body)
+        elif "content-length" in headers:
+            body = await reader.readexactly(int(headers["content-length"]))
+        else:
+            body = await reader.read()
+            keep_alive = False
+
+        if headers.get("content-encoding", "").lower() == "gzip":
+            body = gzip.decompress(body)
+        return int(status), headers, body, keep_alive
+
+    async def close(self):
+        """Закрывает все сохраненные соединения"""
+        for connections in self._idle.values():
+            for _, writer in connections:
+                writer.close()
+        self._idle.clear()
+
+
+def parse_statistic_history(data: Union[bytes, Dict], table_id: str) -> List[Dict]:
+    """
+    Разбирает ответ statisticHistory (см. history_parser)
+
+    Args:
+        data: Тело ответа или JSON ({"history": [{"gameId", "gameResult": "25 Red", "gameTime"}, ...]})
+        table_id (str): Стол, для которого делался запрос
+
+    Returns:
+        List[Dict]: Результаты (number, color, timestamp, table_id, game_id, dealer, source) в порядке ответа
+    """
+    return parse_history_records(data, table_id, source='pragmatic_statistic_history', sort=False)
+
+
+class QueueSink:
+    """Общая очередь asyncio: новые результаты всех столов читают другие задачи"""
+
+    def __init__(self, maxsize: int = 0):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+
+    async def put(self, results: List[Dict]):
+        """Кладет результаты в очередь (ждет, если очередь переполнена)"""
+        for result in results:
+            await self.queue.put(result)
+
+
+class DataCollectorSink:
+    """Записывает новые результаты в базу пачками, не блокируя цикл событий"""
+
+    def __init__(self, data_collector: DataCollector, casino_name: str = None,
+                 session_id: str = "async_collector"):
+        self.data_collector = data_collector
+        self.casino_name = casino_name
+        self.session_id = session_id
+        self.saved = 0
+
+    async def put(self, results: List[Dict]):
+        """Сохраняет результаты одной транзакцией в отдельном потоке (игры, уже записанные в базу, пропускаются)"""
+        saved = await asyncio.to_thread(self.data_collector.add_spins, results,
+                                        self.session_id, self.casino_name)
+        self.saved += saved
+
+    async def last_results(self, table_id: str, limit: int = 50) -> List[Dict]:
+        """Последние записанные результаты стола, новые первыми (для продолжения после перезапуска)"""
+        return await asyncio.to_thread(self.data_collector.get_last_spins, table_id, limit)
+
+
+class CallbackSink:
+    """
+    Отдает каждый новый результат обработчику, а пачку - дальше другому приемнику
+
+    Простыми словами: так к настоящему сбору подключается, например,
+    LivePaperTradingEngine.on_spin - спин сначала записывается (inner),
+    потом сразу обрабатывается
+    """
+
+    def __init__(self, on_result: Callable[[Dict], None], inner=None):
+        """
+        Args:
+            on_result (Callable): Обработчик одного результата
+            inner: Приемник, которому передается пачка (None - только обработчик)
+        """
+        self.on_result = on_result
+        self.inner = inner
+
+    async def put(self, results: List[Dict]):
+        """Передает пачку приемнику, затем результаты по одному обработчику (от старых к новым)"""
+        if self.inner is not None:
+            await self.inner.put(results)
+        for result in results:
+            self.on_result(result)
+
+    async def last_results(self, table_id: str, limit: int = 50) -> List[Dict]:
+        """Последние записанные результаты стола - у внутреннего приемника, если он их знает"""
+        last_results = getattr(self.inner, "last_results", None)
+        if last_results is None:
+            return []
+        return await last_results(table_id, limit)
+
+
+class AsyncTableCollector:
+    """Одновременный опрос истории многих столов"""
+
+    def __init__(self, table_ids: Iterable[str], sink, base_url: str = STATISTIC_HISTORY_URL,
+                 params: Dict[str, str] = None, headers: Dict[str, str] = None,
+                 interval: float = 30.0, number_of_games: int = 50,
+                 max_per_host: int = 8, timeout: float = 10.0,
+                 scheduler: Optional[PollScheduler] = None, rate_limiter: RateLimiter = None,
+                 http_client: ResilientHTTPClient = None):
+        """
+        Args:
+            table_ids (Iterable[str]): Столы для опроса (tableId)
+            sink: Приемник с асинхронным методом put(results) (QueueSink, DataCollectorSink)
+            base_url (str): Адрес statisticHistory (для тестов - локальный сервер)
+            params (Dict[str, str]): Дополнительные параметры запроса (например JSESSIONID)
+            headers (Dict[str, str]): Дополнительные заголовки
+            interval (float): Пауза между опросами одного стола в секундах (без scheduler)
+            number_of_games (int): Сколько игр запросить при первом опросе стола
+                (дальше запрашиваются только новые игры, см. incremental_fetch)
+            max_per_host (int): Сколько запросов к одному серверу одновременно
+            timeout (float): Таймаут запроса в секундах
+            scheduler (PollScheduler): Адаптивное расписание по ритму спинов
+                (None - постоянная пауза interval)
+            rate_limiter (RateLimiter): Ограничитель частоты (по умолчанию общий для процесса,
+                настроенный по API_CONFIG['rate_limit'])
+            http_client (ResilientHTTPClient): Повторы и предохранители (по умолчанию общий клиент)
+        """
+        self.table_ids = list(dict.fromkeys(table_ids))
+        self.sink = sink
+        self.base_url = base_url
+        self.params = dict(params or {})
+        self.headers = {**DEFAULT_HEADERS, **(headers or {})}
+        self.interval = interval
+        self.number_of_games = number_of_games
+        self.timeout = timeout
+        self.max_per_host = max_per_host
+        self.scheduler = scheduler
+        self.rate_limiter = rate_limiter
+        self.http_client = http_client or get_http_client()
+        self._endpoint = endpoint_key(base_url)
+
+        self.pool: Optional[KeepAlivePool] = None
+        self.cursors = {table: TableCursor(table, initial_games=number_of_games, keep=0)
+                        for table in self.table_ids}
+        self.stats = {"requests": 0, "errors": 0, "new_results": 0, "last_errors": {}}
+        # Стол -> сколько секунд сервер просил подождать (Retry-After последней ошибки)
+        self._retry_after: Dict[str, float] = {}
+        self._latency_total = 0.0
+
+    @classmethod
+    def from_config(cls, config: Dict, table_ids: Iterable[str], sink, **kwargs) -> "AsyncTableCollector":
+        """
+        Создает сборщик по конфигурации казино (casino_setup.json)
+
+        Простыми словами: берем JSESSIONID и заголовки из раздела api
+        """
+        api = config.get('api', {})
+        params = {}
+        jsessionid = api.get('auth', {}).get('jsessionid')
+        if jsessionid:
+            params['JSESSIONID'] = jsessionid
+        return cls(table_ids, sink, params=params, headers=api.get('headers'), **kwargs)
+
+    def _url(self, table_id: str, number_of_games: int) -> str:
+        """Адрес запроса истории стола"""
+        params = {'tableId': table_id, 'numberOfGames': number_of_games, **self.params,
+                  'ck': str(int(time.time() * 1000))}
+        return f"{self.base_url}?{urllib.parse.urlencode(params)}"
+
+    async def _request(self, table_id: str, number_of_games: int, backfill: bool = False) -> List[Dict]:
+        """
+        Запрос истории стола (с повторами и предохранителем); игры возвращаются новые первыми
+
+        Raises:
+            HTTPClientError: Все попытки неудачны или предохранитель выбит
+        """
+        priority = PRIORITY_BACKFILL if backfill else PRIORITY_LIVE
+
+        async def attempt() -> List[Dict]:
+            started = time.perf_counter()
+            self.stats["requests"] += 1
+            url = self._url(table_id, number_of_games)
+            try:
+                status, response_headers, body = await self.pool.get(url, self.headers, priority)
+            finally:
+                self._latency_total += time.perf_counter() - started
+            if status != 200:
+                raise HTTPError(status, url, response_headers)
+            return parse_statistic_history(body, table_id)
+
+        return await self.http_client.call_async(self._endpoint, attempt)
+
+    async def poll_table(self, table_id: str) -> List[Dict]:
+        """
+        Один опрос одного стола
+
+        Простыми словами: запрашиваем столько игр, сколько могло появиться
+        с прошлого опроса; при разрыве запрос автоматически расширяется
+
+        Returns:
+            List[Dict]: Новые результаты стола от старых к новым (уже переданные в приемник)
+        """
+        if self.pool is None:
+            self.pool = KeepAlivePool(self.max_per_host, self.timeout, self.rate_limiter)
+
+        try:
+            fresh = await fetch_new_async(self.cursors[table_id],
+                                          lambda games, backfill: self._request(table_id, games, backfill))
+        except HTTPClientError as e:
+            self.stats["errors"] += 1
+            self.stats["last_errors"][table_id] = str(e) or type(e).__name__
+            self._retry_after[table_id] = e.retry_after
+            return []
+
+        self.stats["last_errors"].pop(table_id, None)
+        self._retry_after.pop(table_id, None)
+        fresh.reverse()
+        if fresh:
+            self.stats["new_results"] += len(fresh)
+            await self.sink.put(fresh)
+        return fresh
+
+    async def poll_once(self) -> Dict[str, int]:
+        """Опрашивает все столы один раз одновременно; возвращает число новых результатов по столам"""
+        fresh = await asyncio.gather(*(self.poll_table(table) for table in self.table_ids))
+        return {table: len(results) for table, results in zip(self.table_ids, fresh)}
+
+    async def _follow(self, table_id: str, offset: float, deadline: Optional[float], rounds: Optional[int]):
+        """Периодический опрос одного стола"""
+        await asyncio.sleep(offset)
+        done = 0
+        loop = asyncio.get_running_loop()
+        while (deadline is None or loop.time() < deadline) and (rounds is None or done < rounds):
+            fresh = await self.poll_table(table_id)
+            done += 1
+            # Сервер ответил 429/503 с Retry-After - раньше не спрашиваем
+            retry_after = self._retry_after.get(table_id, 0.0)
+            if self.scheduler is None:
+                await asyncio.sleep(max(self.interval, retry_after))
+                continue
+            # Ошибка запроса - не признак простоя стола
+            if table_id not in self.stats["last_errors"]:
+                self.scheduler.observe(table_id, fresh)
+            await asyncio.sleep(max(self.scheduler.next_delay(table_id), retry_after))
+
+    async def run(self, duration: float = None, rounds: int = None):
+        """
+        Опрашивает все столы, пока не истечет время или число кругов
+
+        Простыми словами: старты столов равномерно разнесены по интервалу,
+        чтобы запросы не уходили одной пачкой
+
+        Args:
+            duration (float): Сколько секунд работать (None - без ограничения)
+            rounds (int): Сколько раз опросить каждый стол (None - без ограничения)
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + duration if duration else None
+        step = self.interval / max(1, len(self.table_ids))
+        try:
+            await asyncio.gather(*(self._follow(table, index * step, deadline, rounds)
+                                   for index, table in enumerate(self.table_ids)))
+        finally:
+            await self.close()
+
+    async def close(self):
+        """Закрывает соединения"""
+        if self.pool is not None:
+            await self.pool.close()
+
+    def latency_stats(self) -> Dict:
+        """Статистика запросов"""
+        requests = self.stats["requests"]
+        return {
+            "requests": requests,
+            "errors": self.stats["errors"],
+            "new_results": self.stats["new_results"],
+            "games_received": sum(cursor.stats["games_received"] for cursor in self.cursors.values()),
+            "avg_ms": self._latency_total / requests * 1000 if requests else 0.0,
+            "rate_limit_wait": self.pool.rate_limit_wait if self.pool else 0.0,
+            "connections_opened": self.pool.connections_opened if self.pool else 0
+        }
+
+
+# Тестирование
+if __name__ == "__main__":
+    import random
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    print("Тестируем асинхронный сбор со многих столов...")
+
+    games = {}
+
+    class StandInHandler(BaseHTTPRequestHandler):
+        """Локальная замена statisticHistory: у каждого стола растущая история"""
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+            table = query['tableId'][0]
+            history = games.setdefault(table, [])
+            for _ in range(random.randint(0, 2)):
+                number = random.randint(0, 36)
+                history.insert(0, {"gameId": f"{table}-{len(history)}",
+                                   "gameResult": f"{number} {RouletteUtils.get_color(number).title()}",
+                                   "gameTime": datetime.now().isoformat()})
+            body = json.dumps({"history": history[:int(query['numberOfGames'][0])]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    async def demo():
+        sink = QueueSink()
+        tables = [f"table_{i}" for i in range(120)]
+        collector = AsyncTableCollector(tables, sink, base_url=f"http://127.0.0.1:{server.server_port}/stats",
+                                        interval=0.2, max_per_host=16,
+                                        rate_limiter=RateLimiter(rate_per_minute=60000))
+        started = time.perf_counter()
+        await collector.run(rounds=3)
+        elapsed = time.perf_counter() - started
+        stats = collector.latency_stats()
+        print(f"Столов: {len(tables)}, запросов: {stats['requests']} за {elapsed:.1f} с, "
+              f"соединений открыто: {stats['connections_opened']}, ошибок: {stats['errors']}")
+        print(f"Новых результатов в очереди: {sink.queue.qsize()}, "
+              f"получено игр в ответах: {stats['games_received']}")
+
+    asyncio.run(demo())
+    server.shutdown()
+
+    print("\nТест завершен!")
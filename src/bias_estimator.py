@@ -0,0 +1,371 @@
+"""
+БАЙЕСОВСКАЯ ОЦЕНКА ПЕРЕКОСА КОЛЕСА
+=================================
+
+Этот модуль оценивает, есть ли у стола (или дилера) реальный перекос в сторону
+каких-то чисел, с учетом того, сколько спинов мы видели.
+
+Простыми словами:
+- Правило "число выпало в 1.5 раза чаще нормы" ничего не значит на 50 спинах
+- Здесь для каждого стола хранится апостериорное распределение Дирихле:
+  это просто 37 счетчиков плюс априорная "псевдо-частота", обновление за O(1)
+- Для любой ставки (набора чисел) считается вероятность того, что
+  ставка выгодна игроку: точной формулой через бета-распределение
+  или быстрым Монте-Карло для многих ставок сразу
+- Горячие числа выбираются с поправкой на то, что проверяется сразу 37 чисел,
+  и только по половине спинов; выгодность ставки на них проверяется по
+  другой половине (иначе на честном колесе "находится" ложный перекос)
+"""
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+import math
+from typing import List, Dict, Iterable, Optional
+
+from utils import RouletteUtils
+
+
+# Ставки, которые проверяются в сводке: название -> числа
+STANDARD_BETS = {
+    "red": sorted(RouletteUtils.RED_NUMBERS),
+    "black": sorted(RouletteUtils.BLACK_NUMBERS),
+    "even": list(range(2, 37, 2)),
+    "odd": list(range(1, 37, 2)),
+    "low": list(range(1, 19)),
+    "high": list(range(19, 37)),
+    "dozen_1": list(range(1, 13)),
+    "dozen_2": list(range(13, 25)),
+    "dozen_3": list(range(25, 37)),
+    "column_1": list(range(1, 37, 3)),
+    "column_2": list(range(2, 37, 3)),
+    "column_3": list(range(3, 37, 3))
+}
+
+
+def _beta_continued_fraction(x: float, a: float, b: float, max_iterations: int = 10000,
+                             epsilon: float = 1e-12) -> Optional[float]:
+    """Цепная дробь неполной бета-функции (метод Лентца). None - не сошлась"""
+    tiny = 1e-300
+    qab, qap, qam = a + b, a + 1, a - 1
+    c, d = 1.0, 1 - qab * x / qap
+    d = 1 / (d if abs(d) > tiny else tiny)
+    result = d
+    for m in range(1, max_iterations + 1):
+        m2 = 2 * m
+        for numerator in (m * (b - m) * x / ((qam + m2) * (a + m2)),
+                          -(a + m) * (qab + m) * x / ((a + m2) * (qap + m2))):
+            d = 1 + numerator * d
+            d = 1 / (d if abs(d) > tiny else tiny)
+            c = 1 + numerator / c
+            c = c if abs(c) > tiny else tiny
+            result *= d * c
+        if abs(d * c - 1) < epsilon:
+            return result
+    return None
+
+
+def beta_cdf(x: float, a: float, b: float) -> float:
+    """
+    Функция распределения бета-распределения (регуляризованная неполная бета-функция)
+
+    Простыми словами: вероятность того, что доля с распределением Beta(a, b) меньше x
+
+    Args:
+        x (float): Точка от 0 до 1
+        a (float): Параметр "успехов"
+        b (float): Параметр "неудач"
+
+    Returns:
+        float: P(p <= x)
+    """
+    if x <= 0:
+        return 0.0
+    if x >= 1:
+        return 1.0
+
+    log_front = (math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b)
+                 + a * math.log(x) + b * math.log1p(-x))
+
+    # Цепная дробь быстро сходится по нужную сторону от среднего
+    if x < (a + 1) / (a + b + 2):
+        fraction = _beta_continued_fraction(x, a, b)
+        if fraction is not None:
+            return min(1.0, math.exp(log_front) * fraction / a)
+    else:
+        fraction = _beta_continued_fraction(1 - x, b, a)
+        if fraction is not None:
+            return max(0.0, 1 - math.exp(log_front) * fraction / b)
+
+    # Запасной вариант для огромных a и b: нормальное приближение
+    mean = a / (a + b)
+    std = math.sqrt(a * b / ((a + b) ** 2 * (a + b + 1)))
+    return 0.5 * math.erfc(-(x - mean) / (std * math.sqrt(2)))
+
+
+class DirichletPosterior:
+    """Апостериорное распределение вероятностей 37 чисел одного стола"""
+
+    def __init__(self, numbers: Optional[Iterable[int]] = None, prior: float = 1.0):
+        """
+        Args:
+            numbers (Iterable[int]): Начальная история чисел
+            prior (float): Априорная псевдо-частота каждого числа
+                (1 - "ничего не знаем", больше - сильнее верим в честное колесо)
+        """
+        self.prior = prior
+        self.counts = [0] * 37
+        self.total = 0
+        # Счетчики четных и нечетных по порядку спинов: по одной половине выбираем
+        # горячие числа, по другой проверяем ставку на них
+        self.halves = ([0] * 37, [0] * 37)
+        if numbers is not None:
+            self.extend(numbers)
+
+    def add(self, number: int):
+        """Учитывает один спин (O(1))"""
+        self.counts[number] += 1
+        self.halves[self.total % 2][number] += 1
+        self.total += 1
+
+    def extend(self, numbers: Iterable[int]):
+        """Учитывает несколько спинов"""
+        for number in numbers:
+            self.add(number)
+
+    def half(self, index: int) -> "DirichletPosterior":
+        """
+        Распределение только по половине спинов
+
+        Args:
+            index (int): 0 - спины 1, 3, 5, ... (выбор), 1 - спины 2, 4, 6, ... (проверка)
+        """
+        posterior = DirichletPosterior(prior=self.prior)
+        posterior.counts = self.halves[index][:]
+        posterior.total = sum(posterior.counts)
+        return posterior
+
+    @property
+    def alpha(self) -> List[float]:
+        """Параметры распределения Дирихле"""
+        return [self.prior + count for count in self.counts]
+
+    def mask_parameters(self, numbers: Iterable[int]) -> tuple:
+        """
+        Параметры бета-распределения доли набора чисел
+
+        Простыми словами: сумма нескольких вероятностей из Дирихле - это
+        бета-распределение, поэтому любую ставку можно оценить точно
+        """
+        numbers = set(numbers)
+        inside = sum(self.prior + self.counts[number] for number in numbers)
+        return inside, self.prior * 37 + self.total - inside
+
+    def mean(self, number: int) -> float:
+        """Средняя апостериорная вероятность числа"""
+        return (self.prior + self.counts[number]) / (self.prior * 37 + self.total)
+
+    def probability_above(self, numbers: Iterable[int], threshold: float) -> float:
+        """Вероятность того, что доля набора чисел больше threshold"""
+        a, b = self.mask_parameters(numbers)
+        return 1 - beta_cdf(threshold, a, b)
+
+    def edge(self, numbers: Iterable[int]) -> Dict:
+        """
+        Оценка ставки на набор чисел (выплата как в рулетке: 36 / количество чисел)
+
+        Простыми словами: ставка выгодна, если набор выпадает чаще,
+        чем len(numbers) / 36 - считаем вероятность этого
+
+        Returns:
+            Dict: probability_of_edge, expected_edge (доход на единицу ставки), posterior_mean
+        """
+        numbers = sorted(set(numbers))
+        size = len(numbers)
+        a, b = self.mask_parameters(numbers)
+        mean = a / (a + b)
+        return {
+            "numbers": numbers,
+            "posterior_mean": mean,
+            "probability_of_edge": 1 - beta_cdf(size / 36, a, b),
+            "expected_edge": mean * 36 / size - 1
+        }
+
+    def monte_carlo(self, bets: Dict[str, Iterable[int]], samples: int = 20000,
+                    seed: Optional[int] = None) -> Dict:
+        """
+        Оценка многих ставок сразу методом Монте-Карло
+
+        Простыми словами: генерируем тысячи "возможных колес" из апостериорного
+        распределения и смотрим, на скольких из них ставка выгодна
+
+        Args:
+            bets (Dict[str, Iterable[int]]): Название ставки -> числа
+            samples (int): Сколько колес сгенерировать
+            seed (int): Зерно генератора (для повторяемости)
+
+        Returns:
+            Dict: Для каждой ставки probability_of_edge, expected_edge и 95% интервал дохода
+        """
+        if not NUMPY_AVAILABLE:
+            return {"error": "Для Монте-Карло нужен numpy"}
+
+        names = list(bets)
+        masks = np.zeros((37, len(names)))
+        for column, name in enumerate(names):
+            masks[list(set(bets[name])), column] = 1
+        sizes = masks.sum(axis=0)
+
+        # Дирихле = нормированные гамма-величины
+        rng = np.random.default_rng(seed)
+        draws = rng.gamma(np.asarray(self.alpha), size=(samples, 37))
+        draws /= draws.sum(axis=1, keepdims=True)
+
+        edges = (draws @ masks) * 36 / sizes - 1
+        low, high = np.percentile(edges, [2.5, 97.5], axis=0)
+        return {name: {
+            "probability_of_edge": float((edges[:, column] > 0).mean()),
+            "expected_edge": float(edges[:, column].mean()),
+            "interval_95": (float(low[column]), float(high[column]))
+        } for column, name in enumerate(names)}
+
+    def summary(self, top: int = 5, hot_probability: float = 0.99) -> Dict:
+        """
+        Сводка по столу
+
+        Простыми словами: горячие числа ищем по первой половине спинов с
+        поправкой Бонферрони на 37 чисел, а выгодность ставки на них считаем
+        по второй половине, которая в выборе не участвовала
+
+        Args:
+            top (int): Сколько чисел показать
+            hot_probability (float): С какой вероятностью (для всех 37 чисел вместе)
+                число должно выпадать чаще 1/37, чтобы считаться горячим
+
+        Returns:
+            Dict: Числа с вероятностью "горячести", горячие числа, оценка ставки
+                на горячие числа (по проверочной половине) и стандартных ставок
+        """
+        numbers = []
+        for number in range(37):
+            a, b = self.mask_parameters([number])
+            numbers.append({
+                "number": number,
+                "count": self.counts[number],
+                "posterior_mean": a / (a + b),
+                "probability_hot": 1 - beta_cdf(1 / 37, a, b),
+                "probability_of_edge": 1 - beta_cdf(1 / 36, a, b)
+            })
+        numbers.sort(key=lambda x: x["probability_hot"], reverse=True)
+
+        # Поправка на множественное сравнение: ошибиться хотя бы в одном из 37 чисел
+        # можно не чаще, чем в одном случае из 1 / (1 - hot_probability)
+        hot_threshold = 1 - (1 - hot_probability) / 37
+        selection = self.half(0)
+        candidates = []
+        for number in range(37):
+            a, b = selection.mask_parameters([number])
+            probability_hot = 1 - beta_cdf(1 / 37, a, b)
+            if probability_hot >= hot_threshold:
+                candidates.append((probability_hot, number))
+        candidates.sort(key=lambda x: (-x[0], x[1]))
+        hot_numbers = [number for _, number in candidates[:top]]
+
+        validation = self.half(1)
+        hot_bet = None
+        if hot_numbers:
+            hot_bet = validation.edge(hot_numbers)
+            hot_bet["validation_spins"] = validation.total
+
+        return {
+            "spins": self.total,
+            "prior": self.prior,
+            "hot_threshold": hot_threshold,
+            "numbers": numbers[:top],
+            "hot_numbers": hot_numbers,
+            "hot_bet": hot_bet,
+            "bets": {name: self.edge(bet_numbers) for name, bet_numbers in STANDARD_BETS.items()}
+        }
+
+
+class BiasEstimator:
+    """Апостериорные распределения по столам (и, если нужно, по дилерам)"""
+
+    def __init__(self, prior: float = 1.0, by_dealer: bool = False):
+        """
+        Args:
+            prior (float): Априорная псевдо-частота каждого числа
+            by_dealer (bool): Вести ли отдельные оценки для пар "стол / дилер"
+        """
+        self.prior = prior
+        self.by_dealer = by_dealer
+        self.posteriors: Dict[str, DirichletPosterior] = {}
+
+    @classmethod
+    def from_tables(cls, tables: Dict[str, Iterable[int]], **kwargs) -> "BiasEstimator":
+        """Создает оценки по готовым историям столов (например DataCollector.get_numbers_by_table)"""
+        estimator = cls(**kwargs)
+        for table, numbers in tables.items():
+            estimator.posterior(table).extend(numbers)
+        return estimator
+
+    def posterior(self, key: str) -> DirichletPosterior:
+        """Распределение стола или пары "стол / дилер" (создается при первом спине)"""
+        if key not in self.posteriors:
+            self.posteriors[key] = DirichletPosterior(prior=self.prior)
+        return self.posteriors[key]
+
+    def on_spin(self, spin: Dict):
+        """
+        Обрабатывает спин из живого потока (можно передавать сборщикам как on_result)
+
+        Args:
+            spin (Dict): Спин (number, table_id / table_name и, если есть, dealer)
+        """
+        table = spin.get('table_id') or spin.get('table_name') or "default"
+        self.posterior(table).add(spin['number'])
+        if self.by_dealer and spin.get('dealer'):
+            self.posterior(f"{table} / {spin['dealer']}").add(spin['number'])
+
+    def summary(self, top: int = 5, hot_probability: float = 0.99) -> Dict[str, Dict]:
+        """Сводка DirichletPosterior.summary по всем столам"""
+        return {key: posterior.summary(top, hot_probability)
+                for key, posterior in sorted(self.posteriors.items())}
+
+
+# Тестирование
+if __name__ == "__main__":
+    import random
+    import time
+
+    print("Тестируем байесовскую оценку перекоса...")
+
+    # Стол с перекосом: число 17 выпадает в 2 раза чаще
+    estimator = BiasEstimator(by_dealer=True)
+    for i in range(5000):
+        table = "biased" if i % 2 else "fair"
+        if table == "biased" and random.random() < 1 / 37:
+            number = 17
+        else:
+            number = random.randint(0, 36)
+        estimator.on_spin({'number': number, 'table_id': table, 'dealer': f"dealer_{i // 500 % 2 + 1}"})
+
+    for key, report in estimator.summary().items():
+        top = report["numbers"][0]
+        print(f"{key}: {report['spins']} спинов, горячие {report['hot_numbers']}, "
+              f"лучшее число {top['number']} (P(горячее)={top['probability_hot']:.3f})")
+
+    posterior = estimator.posterior("biased")
+    started = time.perf_counter()
+    exact = posterior.edge([17])
+    exact_ms = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    simulated = posterior.monte_carlo({"17": [17], **STANDARD_BETS}, seed=1)
+    simulated_ms = (time.perf_counter() - started) * 1000
+    print(f"Ставка на 17: P(выгодно) = {exact['probability_of_edge']:.3f} формулой ({exact_ms:.2f} мс), "
+          f"{simulated['17']['probability_of_edge']:.3f} Монте-Карло для 13 ставок ({simulated_ms:.0f} мс)")
+
+    print("\nТест завершен!")
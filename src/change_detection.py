@@ -0,0 +1,272 @@
+"""
+ОБНАРУЖЕНИЕ СМЕНЫ ПОВЕДЕНИЯ СТОЛА
+================================
+
+Этот модуль следит за живым потоком спинов и сообщает, когда распределение
+на конкретном столе меняется (например после замены колеса или дилера).
+
+Простыми словами:
+- Для каждого числа, сектора колеса и цвета ведется накопитель CUSUM:
+  он растет, когда событие выпадает чаще нормы, и обнуляется, когда реже
+- Параллельно работает последовательный тест Вальда (SPRT):
+  он решает "норма" или "сдвиг" по мере поступления спинов
+- На каждый стол хранится фиксированное количество чисел - память
+  не растет с историей, вся история заново не пересчитывается
+- Пороги берутся из ANALYSIS_CONFIG['alert_thresholds']
+"""
+
+import sys
+import math
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Optional, Callable
+
+# Добавляем путь к корню проекта для импорта конфигурации
+sys.path.append(str(Path(__file__).parent.parent))
+from config import ANALYSIS_CONFIG
+
+from rolling_stats import METRICS
+
+
+# Во сколько раз должна вырасти частота числа, чтобы считать его "горячим"
+NUMBER_SHIFT = 1.0
+
+
+def _build_streams(deviation: float, number_threshold: float, group_threshold: float) -> List[Dict]:
+    """
+    Описание всех отслеживаемых потоков одного стола
+
+    Простыми словами: для каждого числа, сектора и цвета - ожидаемая вероятность,
+    сдвинутая вероятность и порог тревоги
+
+    Args:
+        deviation (float): Относительный сдвиг для цветов и секторов (0.1 = 10%)
+        number_threshold (float): Порог CUSUM для отдельных чисел
+        group_threshold (float): Порог CUSUM для цветов и секторов
+
+    Returns:
+        List[Dict]: Потоки (name, numbers, p0, p1, direction, threshold)
+    """
+    streams = []
+    for number in range(37):
+        streams.append({"name": f"number_{number}", "numbers": frozenset({number}),
+                        "p0": 1 / 37, "p1": (1 + NUMBER_SHIFT) / 37,
+                        "direction": "up", "threshold": number_threshold})
+
+    groups = ["red", "black"] + [metric for metric in METRICS if metric.startswith("sector_")]
+    for group in groups:
+        numbers = METRICS[group]
+        p0 = len(numbers) / 37
+        for direction, factor in (("up", 1 + deviation), ("down", 1 - deviation)):
+            streams.append({"name": group, "numbers": numbers, "p0": p0,
+                            "p1": min(p0 * factor, 0.999), "direction": direction,
+                            "threshold": group_threshold})
+    return streams
+
+
+class TableChangeDetector:
+    """CUSUM и SPRT для всех потоков одного стола"""
+
+    def __init__(self, table: str, streams: List[Dict], sprt_upper: float, sprt_lower: float):
+        """
+        Args:
+            table (str): Название стола
+            streams (List[Dict]): Потоки из _build_streams (общие для всех столов)
+            sprt_upper (float): Верхняя граница SPRT (принять "сдвиг")
+            sprt_lower (float): Нижняя граница SPRT (принять "норму")
+        """
+        self.table = table
+        self.streams = streams
+        self.sprt_upper = sprt_upper
+        self.sprt_lower = sprt_lower
+
+        size = len(streams)
+        self.spins = 0
+        self.cusum = [0.0] * size
+        self.cusum_start = [0] * size  # с какого спина копится текущий рост CUSUM
+        self.sprt = [0.0] * size
+        self.sprt_start = [0] * size
+
+        # Для каждого числа - номера потоков, в которые оно входит
+        self._streams_of = [[index for index, stream in enumerate(streams) if number in stream["numbers"]]
+                            for number in range(37)]
+
+    def update(self, number: int, timestamp: Optional[datetime] = None) -> List[Dict]:
+        """
+        Учитывает один спин
+
+        Простыми словами: к каждому накопителю добавляется логарифм отношения
+        правдоподобий "сдвиг / норма" для этого спина
+
+        Args:
+            number (int): Выпавшее число
+            timestamp (datetime): Время спина
+
+        Returns:
+            List[Dict]: Новые тревоги (пустой список, если ничего не изменилось)
+        """
+        self.spins += 1
+        hits = set(self._streams_of[number])
+        alerts = []
+
+        for index, stream in enumerate(self.streams):
+            increment = stream["llr_hit"] if index in hits else stream["llr_miss"]
+
+            # CUSUM: накопитель не опускается ниже нуля
+            value = self.cusum[index] + increment
+            if value <= 0:
+                value = 0.0
+                self.cusum_start[index] = self.spins
+            self.cusum[index] = value
+            if value >= stream["threshold"]:
+                alerts.append(self._alert("cusum", index, value, self.cusum_start[index], timestamp))
+                self.cusum[index] = 0.0
+                self.cusum_start[index] = self.spins
+
+            # SPRT: при решении "норма" начинаем новый тест, при "сдвиге" - тревога
+            value = self.sprt[index] + increment
+            if value <= self.sprt_lower:
+                value = 0.0
+                self.sprt_start[index] = self.spins
+            elif value >= self.sprt_upper:
+                alerts.append(self._alert("sprt", index, value, self.sprt_start[index], timestamp))
+                value = 0.0
+                self.sprt_start[index] = self.spins
+            self.sprt[index] = value
+
+        return alerts
+
+    def _alert(self, detector: str, index: int, statistic: float,
+               change_start: int, timestamp: Optional[datetime]) -> Dict:
+        """Формирует описание тревоги"""
+        stream = self.streams[index]
+        return {
+            "table": self.table,
+            "stream": stream["name"],
+            "direction": stream["direction"],
+            "detector": detector,
+            "statistic": statistic,
+            "expected_probability": stream["p0"],
+            "shifted_probability": stream["p1"],
+            "detected_at_spin": self.spins,
+            "estimated_change_spin": change_start + 1,
+            "detection_delay": self.spins - change_start,
+            "detected_at": timestamp or datetime.now()
+        }
+
+    def state(self) -> Dict:
+        """Текущие значения накопителей (для отладки и отчетов)"""
+        return {
+            "spins": self.spins,
+            "cusum": {f"{stream['name']}_{stream['direction']}": value
+                      for stream, value in zip(self.streams, self.cusum)},
+            "sprt": {f"{stream['name']}_{stream['direction']}": value
+                     for stream, value in zip(self.streams, self.sprt)}
+        }
+
+
+class ChangeDetectionMonitor:
+    """Детекторы смены распределения для всех столов живого потока"""
+
+    def __init__(self, thresholds: Dict = None, alpha: float = 0.001, beta: float = 0.1,
+                 on_alert: Optional[Callable[[Dict], None]] = None):
+        """
+        Инициализация монитора
+
+        Args:
+            thresholds (Dict): Пороги (по умолчанию ANALYSIS_CONFIG['alert_thresholds']):
+                deviation - относительный сдвиг частоты цвета или сектора,
+                hot_number - порог CUSUM для отдельных чисел,
+                long_streak - порог CUSUM для цветов и секторов
+            alpha (float): Вероятность ложной тревоги для SPRT
+            beta (float): Вероятность пропустить сдвиг для SPRT
+            on_alert (Callable): Вызывается для каждой новой тревоги
+        """
+        self.thresholds = dict(ANALYSIS_CONFIG['alert_thresholds'])
+        if thresholds:
+            self.thresholds.update(thresholds)
+
+        self.streams = _build_streams(self.thresholds['deviation'],
+                                      self.thresholds['hot_number'],
+                                      self.thresholds['long_streak'])
+        for stream in self.streams:
+            p0, p1 = stream["p0"], stream["p1"]
+            stream["llr_hit"] = math.log(p1 / p0)
+            stream["llr_miss"] = math.log((1 - p1) / (1 - p0))
+
+        self.sprt_upper = math.log((1 - beta) / alpha)
+        self.sprt_lower = math.log(beta / (1 - alpha))
+        self.on_alert = on_alert
+
+        self.tables: Dict[str, TableChangeDetector] = {}
+        self.alerts: List[Dict] = []
+        self._latency_last = 0
+        self._latency_max = 0
+
+    def detector(self, table: str) -> TableChangeDetector:
+        """Детектор стола (создается при первом спине стола)"""
+        if table not in self.tables:
+            self.tables[table] = TableChangeDetector(table, self.streams, self.sprt_upper, self.sprt_lower)
+        return self.tables[table]
+
+    def on_spin(self, spin: Dict) -> List[Dict]:
+        """
+        Обрабатывает спин из живого потока
+
+        Простыми словами: метод можно передавать сборщикам как обработчик on_result
+
+        Args:
+            spin (Dict): Спин (number, timestamp и table_id / table_name)
+
+        Returns:
+            List[Dict]: Новые тревоги
+        """
+        started = time.perf_counter_ns()
+
+        table = spin.get('table_id') or spin.get('table_name') or "default"
+        alerts = self.detector(table).update(spin['number'], spin.get('timestamp'))
+
+        elapsed = time.perf_counter_ns() - started
+        self._latency_last = elapsed
+        self._latency_max = max(self._latency_max, elapsed)
+
+        for alert in alerts:
+            alert["processing_us"] = elapsed / 1000
+            self.alerts.append(alert)
+            if self.on_alert:
+                self.on_alert(alert)
+        return alerts
+
+    def latency_stats(self) -> Dict:
+        """Время обработки спина в микросекундах"""
+        return {"last_us": self._latency_last / 1000, "max_us": self._latency_max / 1000,
+                "tables": len(self.tables), "streams_per_table": len(self.streams)}
+
+
+# Тестирование
+if __name__ == "__main__":
+    import random
+
+    print("Тестируем обнаружение смены поведения стола...")
+
+    monitor = ChangeDetectionMonitor()
+
+    # 3000 честных спинов, затем колесо "перекосило" в сторону 17
+    for i in range(5000):
+        if i >= 3000 and random.random() < 0.05:
+            number = 17
+        else:
+            number = random.randint(0, 36)
+        monitor.on_spin({'number': number, 'table_id': 'test_table'})
+
+    print(f"Всего тревог: {len(monitor.alerts)}")
+    for alert in monitor.alerts[:10]:
+        print(f"  спин {alert['detected_at_spin']}: {alert['stream']} ({alert['direction']}, {alert['detector']}), "
+              f"начало ~{alert['estimated_change_spin']}, задержка {alert['detection_delay']}")
+
+    latency = monitor.latency_stats()
+    print(f"Обработка спина: {latency['last_us']:.0f} мкс (максимум {latency['max_us']:.0f} мкс), "
+          f"потоков на стол: {latency['streams_per_table']}")
+
+    print("\nТест завершен!")
@@ -0,0 +1,755 @@
+"""
+ПЛАГИНЫ СБОРЩИКОВ
+================
+
+Этот модуль объединяет все способы сбора (API, веб-скрапер, консоль браузера) в одну схему.
+
+Простыми словами:
+- Раньше у каждого сборщика была своя загрузка конфигурации, свой _get_color,
+  свой разбор ответа, своя запись в базу и свой бесконечный цикл
+- Здесь любой сборщик - это цепочка: источник -> разбор -> отсев повторов -> приемник
+- Источник только получает "сырые" данные (ответ API, строку истории страницы,
+  файл или пачки из консоли), разбирает их в результаты (новые первыми) и говорит, когда
+  его опрашивать снова
+- Один супервизор запускает сколько угодно таких цепочек одновременно,
+  перезапускает упавшие с паузой и собирает статистику
+- Источники описываются в casino_setup.json, paddypower_config.json и
+  pragmatic_play_config.json (раздел "collectors") - новый стол = одна строка
+  конфигурации, а не новый скрипт
+"""
+
+import asyncio
+import json
+import sys
+import time
+import urllib.parse
+import urllib.request
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from async_collector import STATISTIC_HISTORY_URL, DEFAULT_HEADERS, CallbackSink, DataCollectorSink, QueueSink
+from dom_feed import FeedServer, SeleniumFeed, DEFAULT_FEED_HOST, DEFAULT_FEED_PORT
+from history_parser import parse_history_records, parse_game_time
+from http_client import HTTPClientError, ResilientHTTPClient, get_http_client
+from incremental_fetch import TableCursor, game_key
+from rate_limiter import PRIORITY_LIVE, PRIORITY_BACKFILL
+from utils import RouletteUtils
+
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+# Конфигурации, из которых берутся источники (по умолчанию)
+DEFAULT_CONFIG_FILES = ("casino_setup.json", "paddypower_config.json", "pragmatic_play_config.json")
+
+# Сколько последних записанных спинов стола смотреть при запуске цепочки
+RESUME_SPINS = 50
+
+# Максимальная пауза перед перезапуском упавшего источника (секунды)
+MAX_RESTART_DELAY = 300.0
+
+SOURCE_TYPES: Dict[str, type] = {}
+
+
+def register_source(kind: str) -> Callable[[type], type]:
+    """
+    Регистрирует тип источника для раздела "collectors" конфигурации
+
+    Простыми словами: @register_source("api") - и в конфиге можно писать {"type": "api", ...}
+    """
+    def decorator(cls: type) -> type:
+        cls.kind = kind
+        SOURCE_TYPES[kind] = cls
+        return cls
+    return decorator
+
+
+class CollectorSource:
+    """
+    Базовый источник результатов
+
+    Наследник реализует fetch() (сырые данные или None, если нового нет)
+    и parse() (результаты number, color, timestamp, table_id, ... новые первыми)
+    """
+
+    kind = "base"
+
+    def __init__(self, table_id: str, interval: float = 30.0, casino_name: str = None):
+        """
+        Args:
+            table_id (str): Стол, к которому относятся результаты
+            interval (float): Пауза между опросами (секунды)
+            casino_name (str): Название казино для записи в базу
+        """
+        self.table_id = table_id
+        self.interval = interval
+        self.casino_name = casino_name
+
+    @property
+    def key(self):
+        """Одинаковые источники из разных конфигов запускаются один раз"""
+        return (self.kind, self.table_id)
+
+    @property
+    def name(self) -> str:
+        return f"{self.kind}:{self.table_id}"
+
+    async def fetch(self) -> Any:
+        """Сырые данные (None - ничего нового)"""
+        raise NotImplementedError
+
+    def parse(self, raw: Any) -> List[Dict]:
+        """Результаты из сырых данных, новые первыми"""
+        raise NotImplementedError
+
+    def make_dedup(self):
+        """Отсев повторов, подходящий для этого источника"""
+        return Deduplicator()
+
+    def next_delay(self) -> float:
+        """Через сколько секунд опрашивать снова"""
+        return self.interval
+
+    async def close(self):
+        """
+        Освобождает ресурсы (браузер, соединения)
+
+        Вызывается и при остановке, и после ошибки: следующий fetch()
+        должен создать все заново
+        """
+
+    @classmethod
+    def from_config(cls, entry: Dict, config: Dict) -> "CollectorSource":
+        """
+        Создает источник по строке раздела "collectors"
+
+        Args:
+            entry (Dict): Строка раздела ({"type": ..., "table_id": ..., ...})
+            config (Dict): Весь файл конфигурации (общие заголовки, авторизация)
+        """
+        options = {key: value for key, value in entry.items() if key not in ("type", "enabled")}
+        options.setdefault("casino_name", config.get("casino_name"))
+        return cls(**options)
+
+
+@register_source("api")
+class ApiHistorySource(CollectorSource):
+    """
+    История стола из statisticHistory
+
+    Простыми словами: запрашиваем только новые игры (курсор стола из
+    incremental_fetch); если между опросами пропущен кусок - следующий
+    запрос сразу и шире
+    """
+
+    def __init__(self, table_id: str, url: str = STATISTIC_HISTORY_URL, params: Dict[str, str] = None,
+                 headers: Dict[str, str] = None, interval: float = 30.0, casino_name: str = None,
+                 initial_games: int = 50, timeout: float = 10.0, http_client: ResilientHTTPClient = None):
+        """
+        Args:
+            table_id (str): tableId стола
+            url (str): Адрес statisticHistory
+            params (Dict[str, str]): Дополнительные параметры (например JSESSIONID)
+            headers (Dict[str, str]): Заголовки запроса
+            interval (float): Пауза между опросами (секунды)
+            casino_name (str): Название казино для записи в базу
+            initial_games (int): Сколько игр запросить в первый раз
+            timeout (float): Таймаут запроса (секунды)
+            http_client (ResilientHTTPClient): Клиент с повторами (по умолчанию общий)
+        """
+        super().__init__(table_id, interval, casino_name)
+        self.url = url
+        self.params = dict(params or {})
+        self.headers = {**DEFAULT_HEADERS, **(headers or {})}
+        # Ответ читает urllib, сжатие он не распаковывает
+        self.headers.pop('Accept-Encoding', None)
+        self.timeout = timeout
+        self.http_client = http_client or get_http_client()
+        self.cursor = TableCursor(table_id, initial_games=initial_games, keep=0)
+        self._requested = 0
+        self._widened: Optional[int] = None
+
+    async def fetch(self) -> bytes:
+        self._requested = self._widened or self.cursor.games_to_request()
+        backfill = self._widened is not None or self.cursor.is_backfill()
+        query = urllib.parse.urlencode({'tableId': self.table_id, 'numberOfGames': self._requested,
+                                        **self.params})
+        request = urllib.request.Request(f"{self.url}?{query}", headers=self.headers)
+        priority = PRIORITY_BACKFILL if backfill else PRIORITY_LIVE
+        return await asyncio.to_thread(self.http_client.get, request, priority, self.timeout)
+
+    def parse(self, raw: bytes) -> List[Dict]:
+        results = parse_history_records(raw, self.table_id, source='pragmatic_api')
+        fresh = self.cursor.merge(results, self._requested)
+        if fresh is None:
+            # Последней известной игры в ответе нет - повторяем шире
+            self._widened = self.cursor.widen(self._requested)
+            return []
+        self._widened = None
+        return fresh
+
+    def next_delay(self) -> float:
+        return 0.0 if self._widened else self.interval
+
+    @classmethod
+    def from_config(cls, entry: Dict, config: Dict) -> "ApiHistorySource":
+        api = config.get('api', {})
+        options = {key: value for key, value in entry.items() if key not in ("type", "enabled")}
+        options.setdefault("casino_name", config.get("casino_name"))
+        options.setdefault("url", statistic_history_url(config))
+        options.setdefault("headers", api.get('headers'))
+        jsessionid = api.get('auth', {}).get('jsessionid')
+        if jsessionid:
+            options.setdefault("params", {'JSESSIONID': jsessionid})
+        return cls(**options)
+
+
+@register_source("scraper")
+class ScraperSource(CollectorSource):
+    """
+    Числа с открытой страницы рулетки (Selenium)
+
+    Простыми словами: берем строку истории по XPath (SingleRouletteWebScraper); на странице
+    нет gameId, поэтому новые числа находим сравнением со снимком прошлого опроса.
+    С observe=True страница сама сообщает о новых числах (MutationObserver, см. dom_feed)
+    """
+
+    def __init__(self, url: str, table_id: str = "web_scraper", xpath: str = None,
+                 interval: float = 30.0, casino_name: str = None, observe: bool = False):
+        """
+        Args:
+            url (str): Страница с рулеткой
+            table_id (str): Имя стола для записи в базу
+            xpath (str): XPath элемента с историей (по умолчанию - как в SingleRouletteWebScraper)
+            interval (float): Пауза между опросами (с observe - сколько ждать нового числа)
+            casino_name (str): Название казино для записи в базу
+            observe (bool): Наблюдать за страницей вместо опроса
+        """
+        super().__init__(table_id, interval, casino_name)
+        self.url = url
+        self.xpath = xpath
+        self.observe = observe
+        self.scraper = None
+        self.feed: Optional[SeleniumFeed] = None
+
+    def _start(self):
+        from web_scraper_single_roulette import SingleRouletteWebScraper
+
+        scraper = SingleRouletteWebScraper(self.xpath) if self.xpath else SingleRouletteWebScraper()
+        if not scraper.setup_selenium(self.url):
+            raise RuntimeError("Не удалось запустить Selenium")
+        self.scraper = scraper
+        if self.observe:
+            self.feed = SeleniumFeed(scraper.driver, xpath=scraper.target_xpath, table_id=self.table_id)
+            self.feed.install()
+
+    def _read_numbers(self) -> List[Dict]:
+        if self.scraper is None:
+            self._start()
+        if self.feed is not None:
+            # Новые числа от наблюдателя - от старых к новым
+            return self.feed.next_batch(self.interval)[::-1]
+        # Вся строка истории - одним execute_script
+        return self.scraper.extract_numbers_from_xpath()
+
+    async def fetch(self) -> List[Dict]:
+        return await asyncio.to_thread(self._read_numbers)
+
+    def parse(self, raw: List[Dict]) -> List[Dict]:
+        return [{**result, 'table_id': self.table_id} for result in raw]
+
+    def make_dedup(self):
+        # У наблюдателя свои id у каждого числа, у снимков страницы - нет
+        return Deduplicator() if self.observe else SequenceDedup()
+
+    def next_delay(self) -> float:
+        # Наблюдатель сам ждет нового числа
+        return 0.0 if self.observe else self.interval
+
+    async def close(self):
+        scraper, self.scraper, self.feed = self.scraper, None, None
+        if scraper is not None and scraper.driver:
+            # Упавший браузер может не закрыться - источник все равно начнет с нового
+            await asyncio.to_thread(scraper.driver.quit)
+
+
+@register_source("console")
+class ConsoleFileSource(CollectorSource):
+    """
+    Файл, выгруженный из консоли браузера (exportRouletteData)
+
+    Простыми словами: файл перечитывается, только когда он изменился;
+    записи в нем новые первыми ({"number", "color", "timestamp", "table"}).
+    Все записи идут в стол table_id из конфигурации - по нему же после
+    перезапуска находятся уже записанные спины, поэтому поле table из файла
+    его не подменяет
+    """
+
+    def __init__(self, file: str = "roulette_console_data.json", table_id: str = "console_collector",
+                 interval: float = 10.0, casino_name: str = None):
+        """
+        Args:
+            file (str): Путь к JSON (относительный - от корня проекта)
+            table_id (str): Стол, в который пишутся все записи файла
+            interval (float): Как часто проверять файл (секунды)
+            casino_name (str): Название казино для записи в базу
+        """
+        super().__init__(table_id, interval, casino_name)
+        path = Path(file)
+        self.path = path if path.is_absolute() else PROJECT_ROOT / path
+        self._mtime: Optional[float] = None
+
+    @property
+    def key(self):
+        return (self.kind, str(self.path))
+
+    async def fetch(self) -> Optional[str]:
+        try:
+            mtime = self.path.stat().st_mtime
+        except FileNotFoundError:
+            return None
+        if mtime == self._mtime:
+            return None
+        self._mtime = mtime
+        return await asyncio.to_thread(self.path.read_text, encoding='utf-8')
+
+    def parse(self, raw: str) -> List[Dict]:
+        now = datetime.now()
+        results = []
+        for item in json.loads(raw):
+            number = int(item['number'])
+            if not RouletteUtils.validate_number(number):
+                continue
+            moment = parse_game_time(item['timestamp']) if item.get('timestamp') else None
+            results.append({'number': number, 'color': RouletteUtils.get_color(number),
+                            'timestamp': moment[0] if moment else now,
+                            'table_id': self.table_id, 'source': 'browser_console'})
+        return results
+
+    def make_dedup(self):
+        return SequenceDedup()
+
+
+@register_source("console_feed")
+class ConsoleFeedSource(CollectorSource):
+    """
+    Числа, которые присылает консольный наблюдатель (auto_collector_observer_code.js)
+
+    Простыми словами: поднимаем локальный приемник (FeedServer) и ждем
+    пачки - страница отправляет их сразу, как только выпало новое число
+    """
+
+    def __init__(self, port: int = DEFAULT_FEED_PORT, host: str = DEFAULT_FEED_HOST, table_id: str = None,
+                 interval: float = 25.0, casino_name: str = None, allowed_origins: List[str] = None):
+        """
+        Args:
+            port (int): Порт приемника (как в endpoint консольного кода)
+            host (str): Адрес приемника
+            table_id (str): Стол для записи в базу (по умолчанию - поле table из страницы)
+            interval (float): Сколько секунд ждать пачку за один опрос
+            casino_name (str): Название казино для записи в базу
+            allowed_origins (List[str]): Сайты казино, с которых принимать пачки
+                (секрет из адреса проверяется всегда)
+        """
+        super().__init__(table_id, interval, casino_name)
+        self.host = host
+        self.port = port
+        self.allowed_origins = allowed_origins
+        self.server: Optional[FeedServer] = None
+
+    @property
+    def key(self):
+        return (self.kind, self.port)
+
+    @property
+    def name(self) -> str:
+        return f"{self.kind}:{self.port}"
+
+    async def fetch(self) -> List[Dict]:
+        if self.server is None:
+            self.server = FeedServer(self.host, self.port, allowed_origins=self.allowed_origins).start()
+            print(f"📡 Прием чисел из консоли браузера: {self.server.url.split('?')[0]}")
+        return await asyncio.to_thread(self.server.get_batch, self.interval, self.table_id)
+
+    def parse(self, raw: List[Dict]) -> List[Dict]:
+        return raw[::-1]
+
+    def next_delay(self) -> float:
+        return 0.0
+
+    async def close(self):
+        server, self.server = self.server, None
+        if server is not None:
+            await asyncio.to_thread(server.stop)
+
+
+class Deduplicator:
+    """
+    Отсев уже виденных игр по gameId (или времени и числу)
+
+    Простыми словами: помним последние keep ключей каждого стола
+    """
+
+    def __init__(self, keep: int = 5000):
+        self.keep = keep
+        self._seen = set()
+        self._order = deque()
+
+    def filter(self, results: List[Dict]) -> List[Dict]:
+        """Только новые результаты (порядок сохраняется)"""
+        fresh = []
+        for result in results:
+            key = (result.get('table_id'), game_key(result))
+            if key in self._seen:
+                continue
+            self._seen.add(key)
+            self._order.append(key)
+            fresh.append(result)
+        while len(self._order) > self.keep:
+            self._seen.discard(self._order.popleft())
+        return fresh
+
+
+class SequenceDedup:
+    """
+    Отсев повторов для источников без gameId (страница, консоль)
+
+    Простыми словами: источник каждый раз показывает последние N чисел
+    (новые первыми). Ищем, где в новом снимке начинается прошлый -
+    все, что перед ним, новое
+    """
+
+    def __init__(self, overlap: int = 5):
+        """
+        Args:
+            overlap (int): Сколько чисел прошлого снимка должны совпасть
+        """
+        self.overlap = overlap
+        self._previous: List[int] = []
+
+    def filter(self, results: List[Dict]) -> List[Dict]:
+        numbers = [result['number'] for result in results]
+        previous = self._previous
+        if numbers:
+            self._previous = numbers
+        if not previous:
+            return results
+        for shift in range(len(numbers)):
+            size = min(self.overlap, len(previous), len(numbers) - shift)
+            if numbers[shift:shift + size] == previous[:size]:
+                return results[:shift]
+        # Прошлого снимка в новом нет - все числа новые
+        return results
+
+
+class CollectorPipeline:
+    """Цепочка: источник -> разбор -> отсев повторов -> приемник"""
+
+    def __init__(self, source: CollectorSource, sink, dedup=None):
+        """
+        Args:
+            source (CollectorSource): Источник
+            sink: Приемник с асинхронным put(results) (QueueSink, DataCollectorSink)
+            dedup: Отсев повторов (по умолчанию source.make_dedup())
+        """
+        self.source = source
+        self.sink = sink
+        self.dedup = dedup or source.make_dedup()
+        self.stats = {"steps": 0, "received": 0, "new_results": 0, "errors": 0, "restarts": 0,
+                      "last_error": None}
+        self._resumed = False
+
+    @property
+    def name(self) -> str:
+        return self.source.name
+
+    async def resume(self):
+        """
+        Продолжает с того, что уже записано в базе
+
+        Простыми словами: отсев повторов запоминает последние спины стола из
+        базы - после перезапуска файл консоли или страница не записываются заново
+        (приемник без базы, например QueueSink, ничего не подсказывает)
+        """
+        self._resumed = True
+        last_results = getattr(self.sink, "last_results", None)
+        if last_results is None or not self.source.table_id:
+            return
+        saved = await last_results(self.source.table_id, RESUME_SPINS)
+        if saved:
+            self.dedup.filter(saved)
+
+    async def step(self) -> int:
+        """
+        Один опрос источника
+
+        Returns:
+            int: Сколько новых результатов отдано приемнику
+        """
+        if not self._resumed:
+            await self.resume()
+        raw = await self.source.fetch()
+        self.stats["steps"] += 1
+        if raw is None:
+            return 0
+        results = self.source.parse(raw)
+        fresh = self.dedup.filter(results)
+        self.stats["received"] += len(results)
+        if fresh:
+            # Приемнику - от старых к новым, как в async_collector
+            await self.sink.put(fresh[::-1])
+            self.stats["new_results"] += len(fresh)
+        return len(fresh)
+
+
+class CollectorSupervisor:
+    """
+    Одновременный запуск цепочек с перезапуском упавших
+
+    Простыми словами: каждая цепочка живет в своей задаче asyncio;
+    ошибка одной не останавливает остальные - источник закрывается
+    (браузер, приемник), цепочка ждет (Retry-After или растущая пауза)
+    и запускает его заново
+    """
+
+    def __init__(self, pipelines: Iterable[CollectorPipeline] = (), max_restart_delay: float = MAX_RESTART_DELAY):
+        self.pipelines: List[CollectorPipeline] = list(pipelines)
+        self.max_restart_delay = max_restart_delay
+
+    def add(self, pipeline: CollectorPipeline):
+        self.pipelines.append(pipeline)
+
+    async def _supervise(self, pipeline: CollectorPipeline, deadline: Optional[float], rounds: Optional[int]):
+        failures = 0
+        done = 0
+        while (rounds is None or done < rounds) and (deadline is None or time.monotonic() < deadline):
+            source = pipeline.source
+            try:
+                await pipeline.step()
+                failures = 0
+                delay = source.next_delay()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                failures += 1
+                pipeline.stats["errors"] += 1
+                pipeline.stats["restarts"] += 1
+                pipeline.stats["last_error"] = str(e)
+                delay = min(self.max_restart_delay, source.interval * 2 ** (failures - 1))
+                if isinstance(e, HTTPClientError) and e.retry_after:
+                    delay = max(delay, e.retry_after)
+                print(f"⚠️ {pipeline.name}: {e} (перезапуск через {delay:.0f} с)")
+                await self._restart(pipeline)
+            done += 1
+            if deadline is not None:
+                delay = min(delay, max(0.0, deadline - time.monotonic()))
+            if delay > 0 and (rounds is None or done < rounds):
+                await asyncio.sleep(delay)
+
+    async def _restart(self, pipeline: CollectorPipeline):
+        """Закрывает упавший источник - следующий опрос создаст браузер (приемник) заново"""
+        try:
+            await pipeline.source.close()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"⚠️ {pipeline.name}: ошибка закрытия: {e}")
+
+    async def run(self, duration: float = None, rounds: int = None) -> Dict[str, Dict]:
+        """
+        Запускает все цепочки
+
+        Args:
+            duration (float): Сколько секунд работать (None - пока не остановят)
+            rounds (int): Сколько опросов на цепочку (для тестов)
+
+        Returns:
+            Dict[str, Dict]: Статистика по цепочкам (см. summary)
+        """
+        deadline = time.monotonic() + duration if duration is not None else None
+        try:
+            await asyncio.gather(*(self._supervise(pipeline, deadline, rounds) for pipeline in self.pipelines))
+        finally:
+            for pipeline in self.pipelines:
+                try:
+                    await pipeline.source.close()
+                except Exception as e:
+                    print(f"⚠️ {pipeline.name}: ошибка закрытия: {e}")
+        return self.summary()
+
+    def summary(self) -> Dict[str, Dict]:
+        """Статистика по цепочкам"""
+        return {pipeline.name: dict(pipeline.stats) for pipeline in self.pipelines}
+
+
+def statistic_history_url(config: Dict) -> str:
+    """Адрес statisticHistory из раздела endpoints (без параметров запроса)"""
+    endpoints = config.get('api', {}).get('endpoints', {})
+    for endpoint in endpoints.values():
+        url = endpoint.get('url') if isinstance(endpoint, dict) else None
+        if url and 'statisticHistory' in url:
+            return url.split('?', 1)[0]
+    return STATISTIC_HISTORY_URL
+
+
+def sources_from_config(config: Dict) -> List[CollectorSource]:
+    """
+    Источники одного файла конфигурации
+
+    Простыми словами: раздел "collectors" - список строк вида
+    {"type": "api", "table_id": "roulettestura541"}. Если раздела нет,
+    но есть table_info.table_id - опрашиваем этот стол через API
+    """
+    entries = config.get('collectors')
+    if entries is None:
+        table_id = config.get('table_info', {}).get('table_id')
+        entries = [{"type": "api", "table_id": table_id}] if table_id else []
+
+    sources = []
+    for entry in entries:
+        if not entry.get('enabled', True):
+            continue
+        source_type = SOURCE_TYPES.get(entry.get('type'))
+        if source_type is None:
+            print(f"⚠️ Неизвестный тип источника: {entry.get('type')}")
+            continue
+        sources.append(source_type.from_config(entry, config))
+    return sources
+
+
+def load_sources(config_files: Iterable[str] = DEFAULT_CONFIG_FILES) -> List[CollectorSource]:
+    """
+    Источники из всех файлов конфигурации (одинаковые - один раз)
+
+    Args:
+        config_files (Iterable[str]): Пути к JSON (относительные - от корня проекта)
+
+    Returns:
+        List[CollectorSource]: Источники без повторов
+    """
+    sources = {}
+    for config_file in config_files:
+        path = Path(config_file)
+        path = path if path.is_absolute() else PROJECT_ROOT / path
+        if not path.exists():
+            print(f"⚠️ Конфигурация не найдена: {path}")
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        for source in sources_from_config(config):
+            sources.setdefault(source.key, source)
+    return list(sources.values())
+
+
+def build_supervisor(sources: Iterable[CollectorSource], sink=None,
+                     session_id: str = "collector_plugins",
+                     on_result: Optional[Callable[[Dict], None]] = None) -> CollectorSupervisor:
+    """
+    Супервизор с цепочкой на каждый источник
+
+    Args:
+        sources (Iterable[CollectorSource]): Источники
+        sink: Общий приемник (None - запись в базу DataCollector, приемник на каждое казино)
+        session_id (str): ID сессии для записи в базу
+        on_result (Callable): Обработчик каждого нового результата после приемника
+            (например, LivePaperTradingEngine.on_spin)
+    """
+    supervisor = CollectorSupervisor()
+    sinks = {}
+    data_collector = None
+    for source in sources:
+        source_sink = sink
+        if source_sink is None:
+            if data_collector is None:
+                from data_collector import DataCollector
+                data_collector = DataCollector()
+            if source.casino_name not in sinks:
+                sinks[source.casino_name] = DataCollectorSink(data_collector, source.casino_name, session_id)
+            source_sink = sinks[source.casino_name]
+        if on_result is not None:
+            source_sink = CallbackSink(on_result, source_sink)
+        supervisor.add(CollectorPipeline(source, source_sink))
+    return supervisor
+
+
+def run_collectors(config_files: Iterable[str] = DEFAULT_CONFIG_FILES, duration_minutes: float = 60,
+                   on_result: Optional[Callable[[Dict], None]] = None) -> Dict[str, Dict]:
+    """
+    Запускает все источники из конфигураций с записью в базу
+
+    Args:
+        config_files (Iterable[str]): Файлы конфигурации
+        duration_minutes (float): Продолжительность работы
+        on_result (Callable): Обработчик каждого нового результата (после записи в базу)
+
+    Returns:
+        Dict[str, Dict]: Статистика по источникам
+    """
+    sources = load_sources(config_files)
+    print(f"🚀 Запуск {len(sources)} источников: {', '.join(source.name for source in sources)}")
+    supervisor = build_supervisor(sources, on_result=on_result)
+    try:
+        summary = asyncio.run(supervisor.run(duration=duration_minutes * 60))
+    except KeyboardInterrupt:
+        print("\n⏹️  Сбор остановлен пользователем")
+        summary = supervisor.summary()
+    for name, stats in summary.items():
+        print(f"📊 {name}: новых {stats['new_results']}, опросов {stats['steps']}, ошибок {stats['errors']}")
+    return summary
+
+
+# Тестирование
+if __name__ == "__main__":
+    import tempfile
+    from replay_server import ReplayServer
+    from rate_limiter import RateLimiter
+
+    print("Тестируем плагины сборщиков...")
+
+    with ReplayServer(tables=3, spin_interval=0.5, error_rate=0.1, seed=3) as server, \
+            tempfile.TemporaryDirectory() as folder:
+        console_file = Path(folder) / "console.json"
+        console_file.write_text(json.dumps([{"number": 17, "color": "black", "table": "console_demo"},
+                                            {"number": 5, "color": "red", "table": "console_demo"}]))
+
+        tables = list(server.streams)
+        config_a = {"casino_name": "Demo A", "api": {"headers": {}},
+                    "collectors": [{"type": "api", "table_id": table, "url": server.statistic_history_url,
+                                    "interval": 0.5} for table in tables]}
+        config_b = {"casino_name": "Demo B",
+                    "collectors": [{"type": "api", "table_id": tables[0], "url": server.statistic_history_url},
+                                   {"type": "console", "file": str(console_file), "table_id": "console_demo",
+                                    "interval": 0.2},
+                                   {"type": "scraper", "url": "https://example.com", "enabled": False}]}
+        paths = []
+        for name, config in (("a.json", config_a), ("b.json", config_b)):
+            paths.append(str(Path(folder) / name))
+            Path(paths[-1]).write_text(json.dumps(config))
+
+        sources = load_sources(paths)
+        client = ResilientHTTPClient(retry_attempts=1, base_delay=0.01, rate_limiter=RateLimiter(600000))
+        for source in sources:
+            if isinstance(source, ApiHistorySource):
+                source.http_client = client
+        print(f"Источников: {len(sources)} ({', '.join(source.name for source in sources)})")
+
+        async def demo():
+            sink = QueueSink()
+            supervisor = build_supervisor(sources, sink)
+
+            async def add_console_spin():
+                await asyncio.sleep(1.0)
+                data = json.loads(console_file.read_text())
+                console_file.write_text(json.dumps([{"number": 0, "color": "green", "table": "console_demo"}] + data))
+
+            summary, _ = await asyncio.gather(supervisor.run(duration=3.0), add_console_spin())
+            for name, stats in summary.items():
+                print(f"  {name}: опросов {stats['steps']}, новых {stats['new_results']}, ошибок {stats['errors']}")
+            print(f"Всего в очереди: {sink.queue.qsize()}")
+
+        asyncio.run(demo())
+
+    print("\nТест завершен!")
@@ -20,6 +20,32 @@ from pathlib import Path
 from utils import RouletteUtils
 
 
+class SpinColumns:
+    """
+    История спинов в колоночном виде
+
+    Простыми словами: Вместо списка словарей храним отдельные списки
+    чисел, цветов и времени. Так их быстрее перебирать при анализе.
+    """
+
+    def __init__(self, numbers: List[int], colors: List[str], timestamps: List[datetime] = None):
+        self.numbers = numbers
+        self.colors = colors
+        self.timestamps = timestamps if timestamps is not None else []
+
+    @classmethod
+    def from_spins(cls, spins: List[Dict]) -> "SpinColumns":
+        """Создает колонки из списка спинов (словарей)"""
+        return cls(
+            [spin['number'] for spin in spins],
+            [spin['color'] for spin in spins],
+            [spin.get('timestamp') for spin in spins]
+        )
+
+    def __len__(self) -> int:
+        return len(self.numbers)
+
+
 class DataCollector:
     """Класс для сбора и хранения данных о рулетке"""
     
@@ -82,11 +108,28 @@ class DataCollector:
                 )
             """)
             
+            # Старые базы: добавляем колонки дилера и gameId, если их еще нет
+            cursor.execute("PRAGMA table_info(spins)")
+            existing_columns = {row[1] for row in cursor.fetchall()}
+            if "dealer" not in existing_columns:
+                cursor.execute("ALTER TABLE spins ADD COLUMN dealer TEXT")
+            if "game_id" not in existing_columns:
+                cursor.execute("ALTER TABLE spins ADD COLUMN game_id TEXT")
+            
+            # Индексы для выборок по периоду и группировок по дилеру, столу и сессии
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_spins_timestamp ON spins (timestamp)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_spins_dealer ON spins (dealer, timestamp)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_spins_table ON spins (table_name, timestamp)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_spins_session ON spins (session_id, timestamp)")
+            # Одна игра стола записывается один раз, сколько бы раз ее ни скачали
+            # (спины без gameId - NULL - не ограничиваются)
+            cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_spins_game ON spins (table_name, game_id)")
+            
             conn.commit()
             print("База данных инициализирована успешно!")
     
     def add_spin(self, number: int, timestamp: datetime = None, session_id: str = None, 
-                 casino_name: str = None, table_name: str = None) -> int:
+                 casino_name: str = None, table_name: str = None, dealer: str = None) -> int:
         """
         Добавляет результат спина в базу данных
         
@@ -98,6 +141,7 @@ class DataCollector:
             session_id (str): ID сессии игры
             casino_name (str): Название казино
             table_name (str): Название стола
+            dealer (str): Имя дилера
             
         Returns:
             int: ID записи в базе данных
@@ -118,17 +162,84 @@ class DataCollector:
             cursor = conn.cursor()
             cursor.execute("""
                 INSERT INTO spins (number, color, is_even, dozen, column_num, timestamp, 
-                                 session_id, casino_name, table_name)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                                 session_id, casino_name, table_name, dealer)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """, (number, color, is_even, dozen, column, timestamp, 
-                  session_id, casino_name, table_name))
+                  session_id, casino_name, table_name, dealer))
             
             spin_id = cursor.lastrowid
             conn.commit()
             
         print(f"Добавлен спин: число {number} ({color}), время {timestamp}")
         return spin_id
-    
+
+    def add_spins(self, spins: List[Dict], session_id: str = None, casino_name: str = None) -> int:
+        """
+        Добавляет пачку спинов одной транзакцией
+
+        Простыми словами: Когда результаты приходят сразу со многих столов,
+        записываем их одним запросом, а не открываем базу на каждый спин.
+        Игры, которые уже есть в базе (тот же стол и gameId), пропускаются
+
+        Args:
+            spins (List[Dict]): Спины (number, timestamp, table_id / table_name, dealer, game_id)
+            session_id (str): ID сессии игры
+            casino_name (str): Название казино
+
+        Returns:
+            int: Сколько спинов записано (без пропущенных повторов)
+        """
+        rows = []
+        for spin in spins:
+            number = spin['number']
+            if not self.utils.validate_number(number):
+                raise ValueError(f"Некорректное число рулетки: {number}")
+            rows.append((number, self.utils.get_color(number), self.utils.is_even(number),
+                         self.utils.get_dozen(number), self.utils.get_column(number),
+                         spin.get('timestamp') or datetime.now(), session_id, casino_name,
+                         spin.get('table_id') or spin.get('table_name'), spin.get('dealer'),
+                         spin.get('game_id') or None))
+
+        if not rows:
+            return 0
+
+        with sqlite3.connect(self.db_path) as conn:
+            before = conn.total_changes
+            conn.executemany("""
+                INSERT OR IGNORE INTO spins (number, color, is_even, dozen, column_num, timestamp,
+                                           session_id, casino_name, table_name, dealer, game_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            saved = conn.total_changes - before
+            conn.commit()
+
+        return saved
+
+    def get_last_spins(self, table_name: str, limit: int = 50) -> List[Dict]:
+        """
+        Последние записанные спины стола
+
+        Простыми словами: с чего продолжать сбор после перезапуска -
+        источники без gameId по ним понимают, что уже записано
+
+        Args:
+            table_name (str): Стол
+            limit (int): Сколько спинов вернуть
+
+        Returns:
+            List[Dict]: Спины (number, timestamp, table_id, game_id), новые первыми
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT number, timestamp, game_id FROM spins
+                WHERE table_name = ?
+                ORDER BY id DESC
+                LIMIT ?
+            """, (table_name, limit))
+            return [{'number': number, 'timestamp': timestamp, 'table_id': table_name, 'game_id': game_id}
+                    for number, timestamp, game_id in cursor.fetchall()]
+
     def generate_random_spins(self, count: int, start_date: datetime = None, 
                             session_id: str = "simulation") -> List[int]:
         """
@@ -211,6 +322,77 @@ class DataCollector:
         print(f"Найдено {len(spins)} спинов за период с {start_date} по {end_date}")
         return spins
     
+    def get_spin_columns(self, start_date: datetime, end_date: datetime = None) -> SpinColumns:
+        """
+        Получает спины за период сразу в колоночном виде
+        
+        Простыми словами: То же что get_spins_by_period, но без создания словаря
+        на каждый спин - только нужные для анализа колонки
+        
+        Args:
+            start_date (datetime): Начальная дата
+            end_date (datetime): Конечная дата (если не указана - до текущего момента)
+            
+        Returns:
+            SpinColumns: Числа, цвета и время спинов
+        """
+        if end_date is None:
+            end_date = datetime.now()
+        
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT number, color, timestamp FROM spins 
+                WHERE timestamp BETWEEN ? AND ?
+                ORDER BY timestamp
+            """, (start_date, end_date))
+            
+            rows = cursor.fetchall()
+        
+        if rows:
+            numbers, colors, timestamps = (list(column) for column in zip(*rows))
+            timestamps = [datetime.fromisoformat(value) for value in timestamps]
+        else:
+            numbers, colors, timestamps = [], [], []
+        
+        print(f"Найдено {len(numbers)} спинов за период с {start_date} по {end_date}")
+        return SpinColumns(numbers, colors, timestamps)
+    
+    def get_numbers_by_table(self, start_date: datetime, end_date: datetime = None) -> Dict[str, List[int]]:
+        """
+        Получает выпавшие числа за период отдельно по каждому столу
+        
+        Простыми словами: Для проверки всех столов сразу - у каждого стола свой список чисел
+        
+        Args:
+            start_date (datetime): Начальная дата
+            end_date (datetime): Конечная дата (если не указана - до текущего момента)
+            
+        Returns:
+            Dict[str, List[int]]: Название стола -> числа в порядке выпадения
+        """
+        if end_date is None:
+            end_date = datetime.now()
+        
+        tables = {}
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT CASE
+                           WHEN casino_name IS NOT NULL AND table_name IS NOT NULL
+                           THEN casino_name || ' / ' || table_name
+                           ELSE COALESCE(table_name, casino_name, 'Без названия')
+                       END, number
+                FROM spins 
+                WHERE timestamp BETWEEN ? AND ?
+                ORDER BY timestamp
+            """, (start_date, end_date))
+            
+            for table, number in cursor.fetchall():
+                tables.setdefault(table, []).append(number)
+        
+        return tables
+    
     def get_statistics(self, start_date: datetime, end_date: datetime = None) -> Dict:
         """
         Получает статистику за период
@@ -0,0 +1,284 @@
+"""
+ЧАСТОТЫ С ЗАТУХАНИЕМ
+====================
+
+Этот модуль считает "свежие" частоты чисел: недавние спины весят больше старых.
+
+Простыми словами:
+- Окно "последние 50 спинов" резко забывает старый всплеск, когда он выходит
+  из окна, и требует хранить все 50 спинов
+- Здесь вес спина плавно уменьшается вдвое каждые half_life спинов
+- На каждый период полураспада хранится всего 37 чисел, обновление - O(1):
+  вместо умножения всех весов на коэффициент растет общий масштаб,
+  а веса изредка перенормируются
+- Можно вести сразу несколько периодов полураспада
+- walk_forward проверяет ставку на свежие горячие числа "вперед": каждый
+  спин угадывается только по спинам до него
+"""
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+import math
+from typing import List, Dict, Iterable, Optional
+
+
+# Периоды полураспада по умолчанию (в спинах)
+HALF_LIVES = (25, 100)
+
+# Когда масштаб становится таким большим, веса перенормируются
+RESCALE_LIMIT = 1e100
+
+
+class DecayTracker:
+    """Частоты чисел с экспоненциальным затуханием для нескольких периодов полураспада"""
+
+    def __init__(self, numbers: Optional[Iterable[int]] = None, half_lives: Iterable[float] = HALF_LIVES):
+        """
+        Args:
+            numbers (Iterable[int]): Начальная история чисел
+            half_lives (Iterable[float]): Через сколько спинов вес спина уменьшается вдвое
+        """
+        self.half_lives = list(half_lives)
+        self._growth = [2 ** (1 / half_life) for half_life in self.half_lives]
+        self.reset()
+        if numbers is not None:
+            self.extend(numbers)
+
+    @classmethod
+    def from_spins(cls, spins: List[Dict], **kwargs) -> "DecayTracker":
+        """Создает трекер по списку спинов"""
+        return cls([spin['number'] for spin in spins], **kwargs)
+
+    def reset(self):
+        """Очищает все веса"""
+        size = len(self.half_lives)
+        self.total = 0
+        # Настоящий вес числа = raw / scale (самый свежий спин весит 1)
+        self._raw = [[0.0] * 37 for _ in range(size)]
+        self._raw_total = [0.0] * size
+        self._scale = [1.0] * size
+        self._head = None
+
+    def _index(self, half_life: float) -> int:
+        """Номер периода полураспада"""
+        return self.half_lives.index(half_life)
+
+    def add(self, number: int):
+        """
+        Учитывает один спин
+
+        Простыми словами: вместо того чтобы "состарить" все 37 весов,
+        увеличиваем масштаб и добавляем новому спину вес, равный масштабу
+        """
+        for index, growth in enumerate(self._growth):
+            scale = self._scale[index] * growth
+            raw = self._raw[index]
+            if scale > RESCALE_LIMIT:
+                for i in range(37):
+                    raw[i] /= scale
+                self._raw_total[index] /= scale
+                scale = 1.0
+            raw[number] += scale
+            self._raw_total[index] += scale
+            self._scale[index] = scale
+        self.total += 1
+
+    def extend(self, numbers: Iterable[int]):
+        """
+        Учитывает несколько спинов
+
+        Простыми словами: с numpy вся пачка сворачивается одной взвешенной
+        гистограммой, а старые веса один раз умножаются на затухание
+        """
+        if not NUMPY_AVAILABLE:
+            for number in numbers:
+                self.add(number)
+            return
+
+        numbers = np.asarray(list(numbers) if not isinstance(numbers, np.ndarray) else numbers, dtype=np.int64)
+        size = len(numbers)
+        if not size:
+            return
+
+        for index, growth in enumerate(self._growth):
+            decay = 1 / growth
+            # Самый свежий спин пачки весит 1, предыдущий - decay и т.д.
+            ages = np.arange(size - 1, -1, -1, dtype=float)
+            weights = decay ** ages
+            scale = self._scale[index]
+            old = np.asarray(self._raw[index]) / scale * decay ** size
+            self._raw[index] = (old + np.bincount(numbers, weights=weights, minlength=37)).tolist()
+            self._raw_total[index] = self._raw_total[index] / scale * decay ** size + float(weights.sum())
+            self._scale[index] = 1.0
+        self.total += size
+
+    def sync(self, spins: List[Dict]):
+        """
+        Догоняет трекер до истории спинов стратегии
+
+        Простыми словами: если история выросла - дописываем новые спины,
+        если это другая (или укороченная) история - считаем заново
+        """
+        head = spins[0] if spins else None
+        if len(spins) < self.total or head is not self._head:
+            self.reset()
+            self._head = head
+        new_spins = spins[self.total:]
+        if len(new_spins) > 1:
+            self.extend([spin['number'] for spin in new_spins])
+        elif new_spins:
+            self.add(new_spins[0]['number'])
+
+    def weights(self, half_life: float) -> List[float]:
+        """Вес каждого числа 0-36 (сколько раз выпадало с учетом затухания)"""
+        index = self._index(half_life)
+        scale = self._scale[index]
+        return [value / scale for value in self._raw[index]]
+
+    def effective_spins(self, half_life: float) -> float:
+        """Суммарный вес всех спинов - сколько спинов "помнит" трекер"""
+        index = self._index(half_life)
+        return self._raw_total[index] / self._scale[index]
+
+    def hot_numbers(self, half_life: float, top: int = 3, min_ratio: float = 1.5) -> List[int]:
+        """
+        Самые "свежие" горячие числа
+
+        Args:
+            half_life (float): Период полураспада
+            top (int): Сколько чисел вернуть
+            min_ratio (float): Во сколько раз вес числа должен превышать ожидаемый
+
+        Returns:
+            List[int]: Числа по убыванию веса (при равенстве - меньшее число первым)
+        """
+        weights = self.weights(half_life)
+        expected = self.effective_spins(half_life) / 37
+        if not expected:
+            return []
+        ranked = sorted(range(37), key=lambda number: (-weights[number], number))
+        return [number for number in ranked[:top] if weights[number] >= expected * min_ratio]
+
+    def summary(self, top: int = 5) -> Dict:
+        """
+        Сводка по всем периодам полураспада
+
+        Returns:
+            Dict: Для каждого периода - сколько спинов помнит трекер,
+                горячие числа и самые "остывшие" числа с их весами относительно нормы
+        """
+        result = {}
+        for half_life in self.half_lives:
+            weights = self.weights(half_life)
+            expected = self.effective_spins(half_life) / 37
+            ratios = [weight / expected if expected else 0.0 for weight in weights]
+            ranked = sorted(range(37), key=lambda number: (-weights[number], number))
+            result[half_life] = {
+                "effective_spins": self.effective_spins(half_life),
+                "hot_numbers": self.hot_numbers(half_life, top),
+                "hottest": [(number, ratios[number]) for number in ranked[:top]],
+                "coldest": [(number, ratios[number]) for number in ranked[::-1][:top]]
+            }
+        return result
+
+
+def walk_forward(numbers: Iterable[int], half_life: float, top: int = 3, min_ratio: float = 1.5) -> Dict:
+    """
+    Проверка ставки на свежие горячие числа "вперед"
+
+    Простыми словами: перед каждым спином берем hot_numbers по спинам до него
+    и ставим по единице на каждое; числа не выбираются по тем же спинам,
+    на которых проверяется ставка
+
+    Args:
+        numbers (Iterable[int]): История чисел по порядку
+        half_life (float): Период полураспада
+        top (int): Сколько горячих чисел ставить
+        min_ratio (float): Порог горячести (как в hot_numbers)
+
+    Returns:
+        Dict: Сколько спинов была ставка, попадания, доход на единицу ставки
+            и одностороннее p-value превышения честной доли попаданий
+    """
+    tracker = DecayTracker(half_lives=[half_life])
+    bets = 0
+    staked = 0
+    hits = 0
+    expected = 0.0
+    variance = 0.0
+    for number in numbers:
+        hot = tracker.hot_numbers(half_life, top, min_ratio)
+        if hot:
+            bets += 1
+            staked += len(hot)
+            hits += number in hot
+            share = len(hot) / 37
+            expected += share
+            variance += share * (1 - share)
+        tracker.add(number)
+
+    # Одностороннее z-приближение: угадывали ли чаще, чем честные len(hot)/37
+    if variance:
+        z_score = (hits - expected) / math.sqrt(variance)
+        p_value = 0.5 * math.erfc(z_score / math.sqrt(2))
+    else:
+        p_value = 1.0
+
+    return {
+        "half_life": half_life,
+        "top": top,
+        "min_ratio": min_ratio,
+        "bets": bets,
+        "hits": hits,
+        "hit_rate": hits / bets if bets else 0.0,
+        # Выигрыш 36 единиц на угаданное число из staked потраченных
+        "edge_per_unit": hits * 36 / staked - 1 if staked else -1.0,
+        "p_value": p_value
+    }
+
+
+# Тестирование
+if __name__ == "__main__":
+    import random
+    import time
+
+    print("Тестируем частоты с затуханием...")
+
+    # Всплеск числа 7 в начале, потом всплеск числа 23
+    numbers = []
+    for i in range(3000):
+        if 500 <= i < 800 and random.random() < 0.1:
+            numbers.append(7)
+        elif i >= 2800 and random.random() < 0.1:
+            numbers.append(23)
+        else:
+            numbers.append(random.randint(0, 36))
+
+    started = time.perf_counter()
+    single = DecayTracker()
+    for number in numbers:
+        single.add(number)
+    single_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    bulk = DecayTracker(numbers)
+    bulk_ms = (time.perf_counter() - started) * 1000
+
+    same = all(abs(a - b) < 1e-9 for half_life in HALF_LIVES
+               for a, b in zip(single.weights(half_life), bulk.weights(half_life)))
+    print(f"По одному: {single_ms:.1f} мс, пачкой: {bulk_ms:.1f} мс, совпадает: {same}")
+
+    for half_life, info in bulk.summary().items():
+        print(f"Полураспад {half_life}: помнит ~{info['effective_spins']:.0f} спинов, "
+              f"горячие {info['hot_numbers']}")
+
+    for half_life in HALF_LIVES:
+        check = walk_forward(numbers, half_life)
+        print(f"Ставка на горячие (полураспад {half_life}) вперед: {check['bets']} ставок, "
+              f"доход на единицу {check['edge_per_unit']:+.3f}, p={check['p_value']:.3f}")
+
+    print("\nТест завершен!")
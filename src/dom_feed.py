@@ -0,0 +1,583 @@
+"""
+ЛЕНТА НОВЫХ ЧИСЕЛ ИЗ БРАУЗЕРА (MutationObserver)
+===============================================
+
+Этот модуль доставляет новые числа со страницы рулетки в Python без опроса страницы.
+
+Простыми словами:
+- Раньше консольный сборщик раз в 30 секунд перечитывал строку истории
+  (setInterval), а Selenium-скрапер раз в 30 секунд заново ее извлекал:
+  до 30 секунд задержки и лишняя работа, когда на странице ничего не менялось
+- Теперь в страницу внедряется скрипт с MutationObserver: браузер сам
+  сообщает, что строка истории изменилась, скрипт сравнивает ее с прошлым
+  снимком и выдает только новые числа, появившиеся в начале строки
+- В Python новые числа приходят пачками одним из двух способов:
+  * Selenium: execute_async_script ждет, пока появится новое (long-poll)
+  * Консоль браузера: скрипт отправляет пачки POST-запросом на локальный
+    адрес (FeedServer). Адрес содержит случайный секрет (data/feed_token.txt):
+    чужие страницы, открытые в том же браузере, не могут подсунуть свои числа
+"""
+
+import hmac
+import json
+import queue
+import secrets
+import threading
+import urllib.parse
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from history_parser import parse_game_time
+from utils import RouletteUtils
+
+
+# Адрес локального приемника для консольного сборщика
+DEFAULT_FEED_HOST = "127.0.0.1"
+DEFAULT_FEED_PORT = 8765
+DEFAULT_FEED_PATH = "/feed"
+DEFAULT_FEED_URL = f"http://{DEFAULT_FEED_HOST}:{DEFAULT_FEED_PORT}{DEFAULT_FEED_PATH}"
+
+# Секрет приемника: создается один раз на компьютере и в репозиторий не попадает
+FEED_TOKEN_FILE = Path(__file__).parent.parent / "data" / "feed_token.txt"
+
+# Сколько последних чисел передавать в страницу при переустановке (для сравнения снимков)
+PREVIOUS_NUMBERS = 20
+
+# Ядро наблюдателя: startRouletteFeed(options) -> window.__rouletteFeed
+OBSERVER_JS = r"""
+function startRouletteFeed(options) {
+    const opts = Object.assign({
+        selector: null,          // CSS-селектор строки истории
+        xpath: null,             // или XPath
+        table: 'dom_observer',   // имя стола в результатах
+        endpoint: null,          // адрес для POST пачек (null - забирает Python через drain)
+        debounceMs: 150,         // пауза после изменения, чтобы страница дорисовалась
+        overlap: 5,              // сколько чисел прошлого снимка должны совпасть
+        maxQueue: 1000,          // максимум неотданных результатов
+        emitInitial: true,       // отдать числа, уже видимые при запуске
+        previous: null,          // последние известные числа (новые первыми)
+        onResults: null          // функция(results) для каждой новой пачки
+    }, options || {});
+
+    if (window.__rouletteFeed) {
+        window.__rouletteFeed.stop();
+    }
+
+    const SCANNER = /(?:#|№)?\b(3[0-6]|[12][0-9]|[0-9])\b/;
+    const SCANNER_ALL = /(?:#|№)?\b(3[0-6]|[12][0-9]|[0-9])\b/g;
+    const REDS = new Set([1, 3, 5, 7, 9, 12, 14, 16, 18, 19, 21, 23, 25, 27, 30, 32, 34, 36]);
+
+    const feed = {
+        queue: [], waiter: null, node: null, observer: null, timer: null, watchdog: null,
+        previous: opts.previous && opts.previous.length ? opts.previous : null,
+        counter: 0, started: Date.now(), sending: false, retryDelay: 2000, stopped: false,
+        stats: {mutations: 0, checks: 0, emitted: 0, posted: 0, postErrors: 0}
+    };
+
+    function findElement() {
+        if (opts.xpath) {
+            return document.evaluate(opts.xpath, document, null,
+                                     XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        }
+        return document.querySelector(opts.selector);
+    }
+
+    // Одна ячейка истории - одно число; ячеек нет - все числа текста
+    function readNumbers(node) {
+        const numbers = [];
+        for (const child of node.children) {
+            const text = child.getAttribute('data-value') || child.getAttribute('data-number') ||
+                         child.innerText || child.textContent || '';
+            const match = text.match(SCANNER);
+            if (match) {
+                numbers.push(parseInt(match[1], 10));
+            }
+        }
+        if (numbers.length) {
+            return numbers;
+        }
+        const text = node.innerText || node.textContent || '';
+        return Array.from(text.matchAll(SCANNER_ALL), match => parseInt(match[1], 10));
+    }
+
+    // Новые числа - те, что стоят перед началом прошлого снимка
+    function prepended(current, previous) {
+        if (!previous) {
+            return opts.emitInitial ? current : [];
+        }
+        for (let shift = 0; shift < current.length; shift++) {
+            const size = Math.min(opts.overlap, previous.length, current.length - shift);
+            let same = true;
+            for (let i = 0; i < size; i++) {
+                if (current[shift + i] !== previous[i]) {
+                    same = false;
+                    break;
+                }
+            }
+            if (same) {
+                return current.slice(0, shift);
+            }
+        }
+        return current;
+    }
+
+    function attach(node) {
+        if (feed.observer) {
+            feed.observer.disconnect();
+        }
+        feed.node = node;
+        feed.observer = new MutationObserver(schedule);
+        feed.observer.observe(node, {childList: true, subtree: true, characterData: true});
+    }
+
+    function schedule() {
+        feed.stats.mutations++;
+        if (!feed.timer) {
+            feed.timer = setTimeout(check, opts.debounceMs);
+        }
+    }
+
+    function check() {
+        feed.timer = null;
+        if (feed.stopped) {
+            return;
+        }
+        feed.stats.checks++;
+        const node = findElement();
+        if (!node) {
+            return;
+        }
+        if (node !== feed.node) {
+            // Страница перерисовала строку истории - следим за новым элементом
+            attach(node);
+        }
+        const current = readNumbers(node);
+        const fresh = prepended(current, feed.previous);
+        if (current.length) {
+            feed.previous = current;
+        }
+        if (!fresh.length) {
+            return;
+        }
+
+        const timestamp = new Date().toISOString();
+        // Пачка от старых к новым
+        const results = fresh.slice().reverse().map(number => ({
+            id: feed.started + '-' + (feed.counter++),
+            number: number,
+            color: number === 0 ? 'green' : (REDS.has(number) ? 'red' : 'black'),
+            timestamp: timestamp,
+            table: opts.table
+        }));
+        feed.stats.emitted += results.length;
+        feed.queue.push(...results);
+        if (feed.queue.length > opts.maxQueue) {
+            feed.queue.splice(0, feed.queue.length - opts.maxQueue);
+        }
+        if (opts.onResults) {
+            try {
+                opts.onResults(results);
+            } catch (e) {
+                console.error('❌ Ошибка обработчика новых чисел:', e);
+            }
+        }
+        if (opts.endpoint) {
+            flush();
+        }
+        if (feed.waiter) {
+            feed.waiter();
+        }
+    }
+
+    // Отправка пачки в Python; при ошибке - повтор с растущей паузой
+    function flush() {
+        if (feed.sending || !feed.queue.length || feed.stopped) {
+            return;
+        }
+        const batch = feed.queue.splice(0, feed.queue.length);
+        feed.sending = true;
+        fetch(opts.endpoint, {method: 'POST', body: JSON.stringify(batch),
+                              headers: {'Content-Type': 'text/plain'}})
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error('HTTP ' + response.status);
+                }
+                feed.stats.posted += batch.length;
+                feed.retryDelay = 2000;
+                feed.sending = false;
+                flush();
+            })
+            .catch(() => {
+                feed.stats.postErrors++;
+                feed.queue.unshift(...batch);
+                feed.sending = false;
+                setTimeout(flush, feed.retryDelay);
+                feed.retryDelay = Math.min(feed.retryDelay * 2, 30000);
+            });
+    }
+
+    feed.drain = function(limit) {
+        return feed.queue.splice(0, limit || feed.queue.length);
+    };
+
+    feed.status = function() {
+        return {attached: !!feed.node, queued: feed.queue.length, stats: feed.stats};
+    };
+
+    feed.stop = function() {
+        feed.stopped = true;
+        if (feed.observer) {
+            feed.observer.disconnect();
+        }
+        clearTimeout(feed.timer);
+        clearInterval(feed.watchdog);
+        if (feed.waiter) {
+            feed.waiter();
+        }
+        if (window.__rouletteFeed === feed) {
+            window.__rouletteFeed = null;
+        }
+    };
+
+    window.__rouletteFeed = feed;
+    // Редкая проверка, что элемент еще на странице (SPA может заменить его целиком)
+    feed.watchdog = setInterval(() => {
+        if (!feed.node || !feed.node.isConnected) {
+            check();
+        }
+    }, 5000);
+    check();
+    return feed;
+}
+"""
+
+# Установка наблюдателя через Selenium (execute_script)
+INSTALL_JS = OBSERVER_JS + "\nreturn startRouletteFeed(arguments[0]).status();"
+
+# Ожидание новой пачки через Selenium (execute_async_script): отдает сразу, как появится
+NEXT_BATCH_JS = r"""
+const wait = arguments[0], limit = arguments[1], done = arguments[arguments.length - 1];
+const feed = window.__rouletteFeed;
+if (!feed) { done(null); return; }
+if (feed.queue.length || feed.stopped) { done(feed.drain(limit)); return; }
+const timer = setTimeout(() => { feed.waiter = null; done([]); }, wait);
+feed.waiter = () => { clearTimeout(timer); feed.waiter = null; done(feed.drain(limit)); };
+"""
+
+
+def observer_script(**options) -> str:
+    """
+    Скрипт для вставки в консоль: ядро наблюдателя и его запуск
+
+    Args:
+        **options: Настройки startRouletteFeed (selector, xpath, table, endpoint, debounceMs, ...)
+
+    Returns:
+        str: JavaScript
+    """
+    return OBSERVER_JS + f"\nstartRouletteFeed({json.dumps(options, ensure_ascii=False)});\n"
+
+
+def load_feed_token(path: Path = FEED_TOKEN_FILE) -> str:
+    """
+    Секрет локального приемника
+
+    Простыми словами: при первом вызове создается случайная строка и
+    сохраняется в файл - ее знают только консольный код, сгенерированный
+    на этом компьютере, и FeedServer
+
+    Returns:
+        str: Секрет для параметра token адреса приемника
+    """
+    path = Path(path)
+    try:
+        token = path.read_text(encoding='utf-8').strip()
+        if token:
+            return token
+    except FileNotFoundError:
+        pass
+    token = secrets.token_urlsafe(24)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(token, encoding='utf-8')
+    return token
+
+
+def feed_url(host: str = DEFAULT_FEED_HOST, port: int = DEFAULT_FEED_PORT, path: str = DEFAULT_FEED_PATH,
+             token: str = None) -> str:
+    """Адрес приемника вместе с секретом (его и вставляем в консольный код)"""
+    token = token or load_feed_token()
+    return f"http://{host}:{port}{path}?{urllib.parse.urlencode({'token': token})}"
+
+
+def batch_to_results(batch: List[Dict], table_id: str = None, source: str = 'dom_observer') -> List[Dict]:
+    """
+    Пачка из страницы -> результаты в формате сборщиков
+
+    Args:
+        batch (List[Dict]): {"id", "number", "color", "timestamp", "table"} от старых к новым
+        table_id (str): Стол (по умолчанию - поле table из страницы)
+        source (str): Значение поля source
+
+    Returns:
+        List[Dict]: number, color, timestamp, table_id, game_id, source (от старых к новым)
+    """
+    results = []
+    for item in batch:
+        try:
+            number = int(item['number'])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if not RouletteUtils.validate_number(number):
+            continue
+        moment = parse_game_time(item['timestamp']) if item.get('timestamp') else None
+        results.append({
+            'number': number,
+            'color': RouletteUtils.get_color(number),
+            'timestamp': moment[0] if moment else datetime.now(),
+            'table_id': table_id or item.get('table'),
+            'game_id': item.get('id'),
+            'source': source
+        })
+    return results
+
+
+class SeleniumFeed:
+    """
+    Лента новых чисел из страницы, открытой в Selenium
+
+    Простыми словами: install() внедряет наблюдатель, next_batch() ждет
+    новые числа (до wait секунд) и отдает их, как только они появились
+    """
+
+    def __init__(self, driver, xpath: str = None, selector: str = None, table_id: str = 'dom_observer',
+                 debounce_ms: int = 150):
+        """
+        Args:
+            driver: Selenium WebDriver
+            xpath (str): XPath строки истории
+            selector (str): Или CSS-селектор строки истории
+            table_id (str): Стол для результатов
+            debounce_ms (int): Пауза после изменения страницы (мс)
+        """
+        if not xpath and not selector:
+            raise ValueError("Нужен xpath или selector строки истории")
+        self.driver = driver
+        self.xpath = xpath
+        self.selector = selector
+        self.table_id = table_id
+        self.debounce_ms = debounce_ms
+        self._last_numbers: List[int] = []
+        self.installs = 0
+
+    def install(self) -> Dict:
+        """
+        Внедряет наблюдатель (повторно - без повторной выдачи уже полученных чисел)
+
+        Returns:
+            Dict: Состояние наблюдателя (attached, queued, stats)
+        """
+        options = {'xpath': self.xpath, 'selector': self.selector, 'table': self.table_id,
+                   'debounceMs': self.debounce_ms,
+                   'previous': self._last_numbers[::-1] or None}
+        self.installs += 1
+        return self.driver.execute_script(INSTALL_JS, options)
+
+    def next_batch(self, wait: float = 25.0, limit: int = 500) -> List[Dict]:
+        """
+        Ждет новые числа
+
+        Args:
+            wait (float): Сколько секунд ждать, если нового нет
+            limit (int): Максимум результатов за раз
+
+        Returns:
+            List[Dict]: Новые результаты (от старых к новым), пусто - за wait ничего не выпало
+        """
+        self.driver.set_script_timeout(wait + 5)
+        batch = self.driver.execute_async_script(NEXT_BATCH_JS, int(wait * 1000), limit)
+        if batch is None:
+            # Страница перезагрузилась - наблюдателя больше нет
+            print("🔄 Наблюдатель потерян (перезагрузка страницы), устанавливаем заново")
+            self.install()
+            return []
+        results = batch_to_results(batch, self.table_id)
+        if results:
+            self._last_numbers = (self._last_numbers + [r['number'] for r in results])[-PREVIOUS_NUMBERS:]
+        return results
+
+    def stop(self):
+        """Отключает наблюдатель в странице"""
+        self.driver.execute_script("if (window.__rouletteFeed) { window.__rouletteFeed.stop(); }")
+
+
+class FeedServer:
+    """
+    Локальный приемник пачек, которые отправляет консольный наблюдатель (POST)
+
+    Простыми словами: страница казино сама присылает новые числа на
+    http://127.0.0.1:8765/feed?token=..., Python забирает их через get_batch().
+    Запрос без правильного секрета (или с чужого сайта, если задан
+    allowed_origins) отклоняется
+    """
+
+    def __init__(self, host: str = DEFAULT_FEED_HOST, port: int = DEFAULT_FEED_PORT, path: str = DEFAULT_FEED_PATH,
+                 token: str = None, allowed_origins: Iterable[str] = None):
+        """
+        Args:
+            host (str): Адрес приемника
+            port (int): Порт приемника (0 - любой свободный)
+            path (str): Путь приемника
+            token (str): Секрет из адреса (по умолчанию - load_feed_token())
+            allowed_origins (Iterable[str]): Сайты казино, с которых принимать пачки
+                (например "https://casino.example"; None - с любого, но только с секретом)
+        """
+        self.path = path
+        self.token = token or load_feed_token()
+        self.allowed_origins = {origin.rstrip('/') for origin in allowed_origins} if allowed_origins else None
+        self._queue: "queue.Queue[List[Dict]]" = queue.Queue()
+        self.stats = {"batches": 0, "results": 0, "rejected": 0, "forbidden": 0}
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    def allows(self, request_path: str, origin: Optional[str]) -> bool:
+        """Правильный ли путь и секрет запроса и разрешен ли сайт, с которого он пришел"""
+        path, _, query = request_path.partition('?')
+        if path != self.path:
+            return False
+        token = urllib.parse.parse_qs(query).get('token', [''])[0]
+        if not hmac.compare_digest(token.encode(), self.token.encode()):
+            return False
+        return self.allowed_origins is None or (origin or '').rstrip('/') in self.allowed_origins
+
+    @property
+    def url(self) -> str:
+        """Адрес для консольного кода (с секретом)"""
+        host, port = self._httpd.server_address[:2]
+        return feed_url(host, port, self.path, self.token)
+
+    def start(self) -> "FeedServer":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FeedServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def get_batch(self, timeout: float = None, table_id: str = None) -> List[Dict]:
+        """
+        Ждет пачку и забирает все, что накопилось
+
+        Args:
+            timeout (float): Сколько секунд ждать (None - без ограничения)
+            table_id (str): Стол для результатов (по умолчанию - из страницы)
+
+        Returns:
+            List[Dict]: Результаты от старых к новым (пусто - за timeout ничего не пришло)
+        """
+        try:
+            batch = list(self._queue.get(timeout=timeout))
+        except queue.Empty:
+            return []
+        while True:
+            try:
+                batch.extend(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch_to_results(batch, table_id, source='console_observer')
+
+    def _make_handler(self):
+        server = self
+
+        class FeedHandler(BaseHTTPRequestHandler):
+            def _reply(self, status: int, allowed: bool):
+                self.send_response(status)
+                if allowed:
+                    # Страница казино открыта с другого адреса - разрешаем писать сюда только ей
+                    self.send_header("Access-Control-Allow-Origin", self.headers.get('Origin') or "null")
+                    self.send_header("Vary", "Origin")
+                    self.send_header("Access-Control-Allow-Methods", "POST, OPTIONS")
+                    self.send_header("Access-Control-Allow-Headers", "Content-Type")
+                    self.send_header("Access-Control-Allow-Private-Network", "true")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def _allowed(self) -> bool:
+                if server.allows(self.path, self.headers.get('Origin')):
+                    return True
+                server.stats["forbidden"] += 1
+                return False
+
+            def do_OPTIONS(self):
+                allowed = self._allowed()
+                self._reply(204 if allowed else 403, allowed)
+
+            def do_POST(self):
+                if not self._allowed():
+                    self._reply(403, False)
+                    return
+                status = 204
+                try:
+                    batch = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                    if not isinstance(batch, list):
+                        raise ValueError("ожидается список")
+                    server._queue.put(batch)
+                    server.stats["batches"] += 1
+                    server.stats["results"] += len(batch)
+                except ValueError:
+                    server.stats["rejected"] += 1
+                    status = 400
+                self._reply(status, True)
+
+            def log_message(self, *args):
+                pass
+
+        return FeedHandler
+
+
+# Тестирование
+if __name__ == "__main__":
+    import urllib.error
+    import urllib.request
+
+    print("Тестируем ленту новых чисел...")
+
+    # Так пачку отправляет страница
+    with FeedServer(port=0, token="demo-token", allowed_origins=["https://casino.example"]) as server:
+        batch = [{"id": "1-0", "number": 32, "color": "red", "timestamp": "2026-01-01T12:00:00.000Z",
+                  "table": "console_collector"},
+                 {"id": "1-1", "number": 0, "color": "green", "timestamp": "2026-01-01T12:00:45.000Z",
+                  "table": "console_collector"}]
+
+        def post(url: str, origin: str) -> int:
+            request = urllib.request.Request(url, data=json.dumps(batch).encode(),
+                                             headers={'Content-Type': 'text/plain', 'Origin': origin})
+            try:
+                with urllib.request.urlopen(request, timeout=5) as response:
+                    return response.status
+            except urllib.error.HTTPError as e:
+                return e.code
+
+        print(f"POST страницы казино: {post(server.url, 'https://casino.example')}")
+        print(f"POST без секрета: {post(server.url.split('?')[0], 'https://casino.example')}, "
+              f"с чужого сайта: {post(server.url, 'https://evil.example')}")
+        results = server.get_batch(timeout=1)
+        print(f"Получено: {[(r['number'], r['color'], r['timestamp'].strftime('%H:%M:%S')) for r in results]}")
+        print(f"Пусто при ожидании: {server.get_batch(timeout=0.1)}, статистика: {server.stats}")
+
+    print(f"Скрипт для консоли: {len(observer_script(selector='.history'))} символов")
+
+    print("\nТест завершен!")
@@ -0,0 +1,253 @@
+"""
+ИНДЕКС ЧАСТОТ ЧИСЕЛ
+==================
+
+Этот модуль позволяет мгновенно узнать сколько раз выпало каждое число
+в любом отрезке истории.
+
+Простыми словами:
+- Храним накопленные счетчики 37 чисел (сколько раз каждое выпало с начала)
+- Счетчики за отрезок [i, j) = счетчики до j минус счетчики до i
+- Чтобы не хранить 37 чисел на каждый спин, сохраняем их только раз в блок
+  (например каждые 64 спина), а остаток блока досчитываем
+- Новые спины просто дописываются в конец
+"""
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+from collections import Counter
+from typing import List, Dict, Iterable, Optional
+
+
+class FrequencyIndex:
+    """Блочный накопленный индекс частот чисел 0-36"""
+
+    def __init__(self, numbers: Optional[Iterable[int]] = None, block_size: int = 64):
+        """
+        Инициализация индекса
+
+        Args:
+            numbers (Iterable[int]): Начальная история чисел
+            block_size (int): Через сколько спинов сохранять полный счетчик
+                (1 - полная матрица n x 37, больше - меньше памяти)
+        """
+        if block_size < 1:
+            raise ValueError("block_size должен быть не меньше 1")
+
+        self.block_size = block_size
+        self.numbers: List[int] = []
+        self._checkpoints: List[List[int]] = [[0] * 37]  # счетчики до позиции k * block_size
+        self._running = [0] * 37                          # счетчики до конца истории
+        self._head = None                                 # первый спин источника (для sync)
+
+        if numbers is not None:
+            self.extend(numbers)
+
+    @classmethod
+    def from_spins(cls, spins: List[Dict], block_size: int = 64) -> "FrequencyIndex":
+        """Создает индекс из списка спинов (словарей)"""
+        index = cls([spin['number'] for spin in spins], block_size)
+        index._head = spins[0] if spins else None
+        return index
+
+    def __len__(self) -> int:
+        return len(self.numbers)
+
+    def append(self, number: int):
+        """Добавляет один спин в конец истории"""
+        self.numbers.append(number)
+        self._running[number] += 1
+        if len(self.numbers) % self.block_size == 0:
+            self._checkpoints.append(self._running[:])
+
+    def extend(self, numbers: Iterable[int]):
+        """
+        Добавляет несколько спинов
+
+        Простыми словами: большие пачки считаем через numpy одним действием,
+        маленькие - по одному спину
+        """
+        numbers = list(numbers)
+        if not numbers:
+            return
+
+        if not NUMPY_AVAILABLE or len(numbers) < self.block_size * 4:
+            for number in numbers:
+                self.append(number)
+            return
+
+        # Дописываем до границы текущего блока по одному
+        fill = (-len(self.numbers)) % self.block_size
+        for number in numbers[:fill]:
+            self.append(number)
+        rest = numbers[fill:]
+
+        # Полные блоки: счетчики каждого блока через bincount, затем накопленная сумма
+        full_blocks = len(rest) // self.block_size
+        if full_blocks:
+            block_part = np.asarray(rest[:full_blocks * self.block_size], dtype=np.int64)
+            block_ids = np.repeat(np.arange(full_blocks), self.block_size)
+            per_block = np.bincount(block_ids * 37 + block_part,
+                                    minlength=full_blocks * 37).reshape(full_blocks, 37)
+            cumulative = per_block.cumsum(axis=0) + np.asarray(self._running, dtype=np.int64)
+
+            self.numbers.extend(rest[:full_blocks * self.block_size])
+            self._checkpoints.extend(cumulative.tolist())
+            self._running = self._checkpoints[-1][:]
+
+        for number in rest[full_blocks * self.block_size:]:
+            self.append(number)
+
+    def sync(self, spins: List[Dict]):
+        """
+        Догоняет индекс до истории спинов стратегии
+
+        Простыми словами: если история выросла - дописываем новые спины,
+        если это другая (или укороченная) история - строим индекс заново
+
+        Args:
+            spins (List[Dict]): История спинов (растущий список или его срезы)
+        """
+        head = spins[0] if spins else None
+        if len(spins) < len(self.numbers) or head is not self._head:
+            self.numbers = []
+            self._checkpoints = [[0] * 37]
+            self._running = [0] * 37
+            self._head = head
+
+        if len(spins) > len(self.numbers):
+            self.extend(spin['number'] for spin in spins[len(self.numbers):])
+
+    def prefix(self, position: int) -> List[int]:
+        """
+        Счетчики всех чисел в первых position спинах
+
+        Args:
+            position (int): Позиция в истории (0..len)
+
+        Returns:
+            List[int]: 37 счетчиков
+        """
+        position = max(0, min(position, len(self.numbers)))
+        if position == len(self.numbers):
+            return self._running[:]
+
+        block = position // self.block_size
+        counts = self._checkpoints[block][:]
+        for number in self.numbers[block * self.block_size:position]:
+            counts[number] += 1
+        return counts
+
+    def counts(self, start: int, end: int) -> List[int]:
+        """
+        Счетчики всех чисел на отрезке истории [start, end)
+
+        Args:
+            start (int): Начало отрезка (включительно)
+            end (int): Конец отрезка (не включительно)
+
+        Returns:
+            List[int]: 37 счетчиков
+        """
+        upper = self.prefix(end)
+        lower = self.prefix(start)
+        return [upper[number] - lower[number] for number in range(37)]
+
+    def last(self, window: int) -> List[int]:
+        """Счетчики чисел в последних window спинах"""
+        total = len(self.numbers)
+        return self.counts(max(0, total - window), total)
+
+    def first_seen(self, start: int, end: int, counts: Optional[List[int]] = None) -> List[int]:
+        """
+        Выпавшие на отрезке [start, end) числа в порядке первого появления
+
+        Простыми словами: идем по отрезку с начала, пока не встретим все
+        выпавшие числа (обычно хватает пары сотен спинов даже в длинном окне)
+
+        Args:
+            start (int): Начало отрезка (включительно)
+            end (int): Конец отрезка (не включительно)
+            counts (List[int]): Уже посчитанные счетчики отрезка (если есть)
+
+        Returns:
+            List[int]: Числа в порядке первого появления
+        """
+        if counts is None:
+            counts = self.counts(start, end)
+        remaining = sum(1 for count in counts if count)
+        order = []
+        seen = [False] * 37
+        for number in self.numbers[max(0, start):end]:
+            if remaining == 0:
+                break
+            if not seen[number]:
+                seen[number] = True
+                order.append(number)
+                remaining -= 1
+        return order
+
+    def counter(self, start: int, end: int) -> Counter:
+        """
+        То же что counts, но в виде Counter (только выпавшие числа)
+
+        Простыми словами: совместимо с кодом, который раньше делал
+        Counter по срезу истории - числа идут в порядке первого появления,
+        поэтому most_common при равных частотах дает тот же порядок
+        """
+        counts = self.counts(start, end)
+        return Counter({number: counts[number] for number in self.first_seen(start, end, counts)})
+
+    def hot_numbers(self, window: int, top: int = 3, min_count: int = 2) -> List[int]:
+        """
+        Самые частые числа в последних window спинах
+
+        Args:
+            window (int): Сколько последних спинов смотреть
+            top (int): Сколько чисел вернуть максимум
+            min_count (int): Минимальное количество выпадений
+
+        Returns:
+            List[int]: Числа по убыванию частоты (при равенстве - в порядке
+                первого появления в окне, как при подсчете словарем)
+        """
+        total = len(self.numbers)
+        start = max(0, total - window)
+        counts = self.counts(start, total)
+        ranked = sorted(self.first_seen(start, total, counts), key=counts.__getitem__, reverse=True)
+        return [number for number in ranked[:top] if counts[number] >= min_count]
+
+
+# Тестирование
+if __name__ == "__main__":
+    import random
+    import time
+
+    print("Тестируем индекс частот...")
+
+    numbers = [random.randint(0, 36) for _ in range(100000)]
+
+    started = time.perf_counter()
+    index = FrequencyIndex(numbers)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    for _ in range(10000):
+        i = random.randint(0, len(numbers) - 1)
+        j = random.randint(i, len(numbers))
+        index.counts(i, j)
+    query_us = (time.perf_counter() - started) / 10000 * 1e6
+
+    i, j = 1234, 56789
+    assert index.counts(i, j) == [numbers[i:j].count(n) for n in range(37)]
+    assert index.counter(i, j).most_common() == Counter(numbers[i:j]).most_common()
+
+    print(f"Спинов: {len(index)}, блок: {index.block_size}, сохраненных строк: {len(index._checkpoints)}")
+    print(f"Построение: {build_ms:.1f} мс, запрос отрезка: {query_us:.1f} мкс")
+    print(f"Горячие числа за 50 спинов: {index.hot_numbers(50)}")
+
+    print("\nТест завершен!")
@@ -0,0 +1,379 @@
+"""
+ОБЪЕДИНЕННЫЙ АНАЛИЗ ИСТОРИИ
+==========================
+
+Этот модуль считает всю аналитику ИИ-ассистента по колоночной истории.
+
+Простыми словами:
+- Раньше каждый вид анализа заново перебирал все спины
+- Здесь базовые счетчики (цвета, чет/нечет, дюжины, колонки, частоты чисел,
+  секторы) собираются в одном цикле
+- Серии считаются кодированием длин серий, скользящие окна и частоты
+  периодов - по накопленным суммам
+- Разделы basic_statistics, color_patterns, number_frequency, sector_patterns,
+  anomalies и volatility совпадают с отдельными функциями PatternAnalyzer
+- Дополнительные разделы (тесты случайности, переходы, секторы любой ширины,
+  смещение, недавняя частота и ее проверка "вперед") считают свои модули -
+  каждый своим проходом по тем же колонкам, поэтому это уже не один проход
+"""
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+import math
+from collections import Counter
+from datetime import datetime
+from typing import List, Dict, Tuple, Iterable
+
+from data_collector import SpinColumns
+from utils import RouletteUtils
+from rolling_stats import RollingStatistics
+from frequency_index import FrequencyIndex
+from sector_engine import SectorEngine
+from randomness_tests import RandomnessTestSuite
+from transition_analysis import TransitionAnalyzer
+from streak_engine import StreakEngine
+from bias_estimator import DirichletPosterior
+from decay_tracker import DecayTracker, HALF_LIVES, walk_forward
+
+
+# Размер сектора колеса и окна волатильности, которые использует ИИ-ассистент
+SECTOR_SIZE = 5
+VOLATILITY_WINDOW = 20
+ROLLING_WINDOWS = (20, 50)
+LONG_STREAK = 7
+# Самый длинный контекст переходов - один и тот же в анализе и в стратегии следования переходам
+TRANSITION_ORDER = 2
+
+
+def wheel_sectors(sector_size: int = SECTOR_SIZE) -> List[Tuple[str, List[int]]]:
+    """
+    Делит колесо на секторы подряд идущих чисел
+
+    Args:
+        sector_size (int): Сколько чисел в секторе
+
+    Returns:
+        List[Tuple[str, List[int]]]: Пары (название сектора, числа сектора)
+    """
+    wheel_order = RouletteUtils.WHEEL_ORDER
+    sectors = []
+    for start_pos in range(0, 37, sector_size):
+        end_pos = min(start_pos + sector_size, 37)
+        sectors.append((f"sector_{start_pos//sector_size + 1}", wheel_order[start_pos:end_pos]))
+    return sectors
+
+
+def summarize_sectors(sector_hits: List[int], total_spins: int,
+                      sector_size: int = SECTOR_SIZE) -> Dict:
+    """
+    Формирует отчет по секторам из готовых счетчиков попаданий
+
+    Args:
+        sector_hits (List[int]): Попадания в каждый сектор (в порядке wheel_sectors)
+        total_spins (int): Всего спинов
+
+    Returns:
+        Dict: Анализ секторов в формате PatternAnalyzer.analyze_sector_patterns
+    """
+    sectors = {}
+    for (sector_name, sector_numbers), hits in zip(wheel_sectors(sector_size), sector_hits):
+        expected_hits = total_spins * (len(sector_numbers) / 37)
+        sectors[sector_name] = {
+            "numbers": sector_numbers,
+            "hits": hits,
+            "expected": expected_hits,
+            "deviation": hits - expected_hits,
+            "activity_ratio": hits / expected_hits if expected_hits > 0 else 0
+        }
+    return sectors
+
+
+def summarize_frequency(number_counts: Counter, period: int) -> Dict:
+    """
+    Формирует отчет о горячих и холодных числах за период
+
+    Args:
+        number_counts (Counter): Сколько раз выпало каждое число за период
+        period (int): Длина периода в спинах
+
+    Returns:
+        Dict: Отчет в формате PatternAnalyzer.analyze_number_frequency
+    """
+    # Ожидаемая частота для справедливой рулетки
+    expected_freq = period / 37
+
+    hot_numbers = []
+    cold_numbers = []
+
+    for number in range(37):
+        actual_freq = number_counts.get(number, 0)
+        deviation = actual_freq - expected_freq
+
+        if actual_freq >= expected_freq * 1.5:  # Выше нормы на 50%+
+            hot_numbers.append((number, actual_freq, deviation))
+        elif actual_freq <= expected_freq * 0.5:  # Ниже нормы на 50%+
+            cold_numbers.append((number, actual_freq, deviation))
+
+    return {
+        "hot_numbers": sorted(hot_numbers, key=lambda x: x[2], reverse=True)[:10],
+        "cold_numbers": sorted(cold_numbers, key=lambda x: x[2])[:10],
+        "most_frequent": number_counts.most_common(10),
+        "least_frequent": number_counts.most_common()[:-11:-1]
+    }
+
+
+def summarize_color_streaks(streaks: StreakEngine) -> Dict:
+    """
+    Статистика серий красного и черного
+
+    Args:
+        streaks (StreakEngine): Серии по истории (последняя серия тоже учитывается)
+
+    Returns:
+        Dict: Анализ в формате PatternAnalyzer.analyze_color_patterns
+    """
+    return streaks.summary("color")
+
+
+def summarize_long_streaks(streaks: StreakEngine) -> List[Dict]:
+    """Закончившиеся длинные серии цветов в формате AIAssistant._detect_anomalies"""
+    return [{
+        "color": run["value"],
+        "length": run["length"],
+        "significance": "high" if run["length"] >= 10 else "medium"
+    } for run in streaks.long_runs("color")]
+
+
+def summarize_streaks(streaks: StreakEngine) -> Dict:
+    """Гистограммы длин серий и самые длинные серии всех свойств (цвет, четность, дюжины...)"""
+    return {
+        "longest": streaks.longest_runs(),
+        "histograms": {prop: streaks.histogram(prop) for prop in streaks.properties}
+    }
+
+
+def summarize_volatility(red_percentages: List[float]) -> Dict:
+    """
+    Оценка волатильности по доле красных в скользящих окнах
+
+    Args:
+        red_percentages (List[float]): Процент красных в каждом окне
+
+    Returns:
+        Dict: Волатильность в формате AIAssistant._calculate_volatility
+    """
+    if not red_percentages:
+        return {"error": "Недостаточно данных для окон"}
+
+    if NUMPY_AVAILABLE:
+        color_volatility = np.std(red_percentages)
+    else:
+        # Вычисляем стандартное отклонение вручную
+        mean_val = sum(red_percentages) / len(red_percentages)
+        variance = sum((x - mean_val) ** 2 for x in red_percentages) / len(red_percentages)
+        color_volatility = math.sqrt(variance)
+
+    volatility = {
+        "color_volatility": color_volatility,
+        "trend": "stable",
+        "predictability": "medium"
+    }
+
+    # Определяем тренд
+    if volatility["color_volatility"] > 15:
+        volatility["trend"] = "volatile"
+        volatility["predictability"] = "low"
+    elif volatility["color_volatility"] < 8:
+        volatility["trend"] = "stable"
+        volatility["predictability"] = "high"
+
+    return volatility
+
+
+def summarize_basic_statistics(total: int, start_date: datetime, end_date: datetime,
+                               color_counts: Dict, even_odd: Dict, dozens: Dict,
+                               columns_count: Dict, number_counts: Dict) -> Dict:
+    """Статистика в формате DataCollector.get_statistics"""
+    if not total:
+        return {"error": "Нет данных за указанный период"}
+
+    stats = {
+        "total_spins": total,
+        "period": {
+            "start": start_date,
+            "end": end_date or datetime.now()
+        },
+        "colors": color_counts,
+        "even_odd": even_odd,
+        "dozens": dozens,
+        "columns": columns_count,
+        "numbers": number_counts,
+        "most_frequent": [],
+        "least_frequent": [],
+        "longest_streaks": {
+            "red": 0, "black": 0, "even": 0, "odd": 0
+        }
+    }
+
+    number_list = sorted(number_counts.items(), key=lambda x: x[1], reverse=True)
+    stats["most_frequent"] = number_list[:5]
+    stats["least_frequent"] = number_list[-5:]
+
+    stats["percentages"] = {
+        "colors": {color: round(count/total*100, 2) for color, count in color_counts.items()},
+        "even_odd": {key: round(count/total*100, 2) for key, count in even_odd.items()},
+        "dozens": {key: round(count/total*100, 2) for key, count in dozens.items()},
+        "columns": {key: round(count/total*100, 2) for key, count in columns_count.items()}
+    }
+
+    return stats
+
+
+def summarize_anomalies(zero_count: int, total: int, long_streaks: List[Dict],
+                        randomness: Dict = None) -> Dict:
+    """
+    Аномалии в формате AIAssistant._detect_anomalies
+
+    Args:
+        zero_count (int): Сколько раз выпало зеро
+        total (int): Всего спинов
+        long_streaks (List[Dict]): Закончившиеся длинные серии цветов
+        randomness (Dict): Результат RandomnessTestSuite.run_single (если считали)
+    """
+    anomalies = {
+        "zero_frequency": 0,
+        "long_color_streaks": long_streaks,
+        "number_gaps": [],
+        "unusual_patterns": []
+    }
+
+    if randomness is not None:
+        anomalies["randomness_tests"] = randomness
+        for test in randomness.get("flagged", []):
+            result = randomness["tests"][test]
+            anomalies["unusual_patterns"].append({
+                "type": "randomness_test",
+                "test": test,
+                "p_value": result["p_value"],
+                "adjusted_p_value": result["adjusted_p_value"],
+                "significance": "high" if result["adjusted_p_value"] < 0.01 else "medium"
+            })
+
+    expected_zero = total / 37
+    if zero_count > expected_zero * 1.5:
+        anomalies["zero_frequency"] = {
+            "actual": zero_count,
+            "expected": expected_zero,
+            "significance": "high"
+        }
+
+    return anomalies
+
+
+def summarize_transitions(transitions: TransitionAnalyzer) -> Dict:
+    """Тесты переходов между числами вместе с признаками для генератора стратегий"""
+    report = transitions.analyze()
+    if "error" not in report:
+        report["features"] = transitions.features()
+    return report
+
+
+class FusedAnalyzer:
+    """Вся аналитика ИИ-ассистента за один проход по колоночной истории"""
+
+    def __init__(self, periods: Iterable[int] = (50, 100, 200)):
+        """
+        Args:
+            periods (Iterable[int]): Периоды для анализа частоты чисел
+        """
+        self.periods = list(periods)
+        self.sectors = wheel_sectors()
+        self.randomness_suite = RandomnessTestSuite()
+
+        # Номер сектора для каждого числа вместо проверки "число в списке"
+        self.sector_of = [0] * 37
+        for index, (_, sector_numbers) in enumerate(self.sectors):
+            for number in sector_numbers:
+                self.sector_of[number] = index
+
+    def analyze(self, columns: SpinColumns, start_date: datetime, end_date: datetime = None) -> Dict:
+        """
+        Считает всю аналитику по истории
+
+        Простыми словами: базовые счетчики заполняются за один проход по спинам,
+        остальные разделы строят свои модули (каждый - отдельным проходом)
+
+        Args:
+            columns (SpinColumns): История спинов в колоночном виде
+            start_date (datetime): Начальная дата периода (для basic_statistics)
+            end_date (datetime): Конечная дата периода
+
+        Returns:
+            Dict: Ключи basic_statistics, color_patterns, number_frequency,
+                sector_patterns, anomalies, volatility, rolling_volatility,
+                circular_sectors, transitions, streaks, bias и recency
+        """
+        numbers = columns.numbers
+        colors = columns.colors
+        total = len(numbers)
+
+        color_counts = {"red": 0, "black": 0, "green": 0}
+        even_odd = {"even": 0, "odd": 0, "zero": 0}
+        dozens = {1: 0, 2: 0, 3: 0, "zero": 0}
+        columns_count = {1: 0, 2: 0, 3: 0, "zero": 0}
+        number_counts = {i: 0 for i in range(37)}
+        sector_hits = [0] * len(self.sectors)
+        sector_of = self.sector_of
+
+        for i in range(total):
+            number = numbers[i]
+            color = colors[i]
+
+            # Базовая статистика
+            color_counts[color] += 1
+            if number == 0:
+                even_odd["zero"] += 1
+                dozens["zero"] += 1
+                columns_count["zero"] += 1
+            else:
+                if number % 2 == 0:
+                    even_odd["even"] += 1
+                else:
+                    even_odd["odd"] += 1
+                dozens[(number - 1) // 12 + 1] += 1
+                columns_count[((number - 1) % 3) + 1] += 1
+            number_counts[number] += 1
+
+            # Секторы колеса
+            sector_hits[sector_of[number]] += 1
+
+        # Серии - кодированием длин серий, скользящие окна и частоты периодов -
+        # по накопленным суммам, а не перебором
+        streaks = StreakEngine(numbers, long_run=LONG_STREAK)
+        rolling = RollingStatistics(numbers)
+        index = FrequencyIndex(numbers)
+
+        return {
+            "basic_statistics": summarize_basic_statistics(total, start_date, end_date, color_counts,
+                                                           even_odd, dozens, columns_count, number_counts),
+            "color_patterns": (summarize_color_streaks(streaks) if total >= 10
+                               else {"error": "Недостаточно данных"}),
+            "number_frequency": {f"last_{period}": summarize_frequency(index.counter(total - period, total), period)
+                                 for period in self.periods if total >= period},
+            "sector_patterns": summarize_sectors(sector_hits, total),
+            "anomalies": summarize_anomalies(number_counts[0], total, summarize_long_streaks(streaks),
+                                             self.randomness_suite.run_single(numbers)),
+            "volatility": (summarize_volatility(rolling.window_shares("red", VOLATILITY_WINDOW))
+                           if total >= VOLATILITY_WINDOW else {"error": "Недостаточно данных"}),
+            "rolling_volatility": rolling.analyze(ROLLING_WINDOWS),
+            "circular_sectors": SectorEngine.from_counts(number_counts).analyze(),
+            "transitions": summarize_transitions(TransitionAnalyzer(numbers, max_order=TRANSITION_ORDER)),
+            "streaks": summarize_streaks(streaks),
+            "bias": DirichletPosterior(numbers).summary(),
+            "recency": DecayTracker(numbers).summary(),
+            "recency_validation": {half_life: walk_forward(numbers, half_life) for half_life in HALF_LIVES}
+        }
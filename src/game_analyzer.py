@@ -11,6 +11,12 @@
 - Помогает найти лучшие схемы игры
 """
 
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Callable, Optional
 import json
@@ -18,6 +24,8 @@ from pathlib import Path
 
 from data_collector import DataCollector
 from utils import RouletteUtils
+from frequency_index import FrequencyIndex
+from decay_tracker import DecayTracker
 
 
 class GameStrategy:
@@ -168,7 +176,7 @@ class PredefinedStrategies:
         return strategy
     
     @staticmethod
-    def hot_numbers(initial_bet: float = 5, look_back: int = 50) -> GameStrategy:
+    def hot_numbers(initial_bet: float = 5, look_back: int = 50, half_life: float = None) -> GameStrategy:
         """
         Стратегия горячих чисел
         
@@ -177,31 +185,40 @@ class PredefinedStrategies:
         Args:
             initial_bet (float): Размер ставки на число
             look_back (int): Сколько последних спинов анализировать
+            half_life (float): Если задан - вместо окна используются частоты с затуханием:
+                вес спина уменьшается вдвое каждые half_life спинов
             
         Returns:
             GameStrategy: Настроенная стратегия
         """
+        if half_life:
+            description = f"Ставки на 3 самых частых числа с затуханием (полураспад {half_life} спинов)"
+        else:
+            description = f"Ставки на {look_back} самых частых чисел из последних {look_back} спинов"
         strategy = GameStrategy(
             name="Горячие Числа",
-            description=f"Ставки на {look_back} самых частых чисел из последних {look_back} спинов"
+            description=description
         )
         
+        # Индекс частот дописывается новыми спинами, а не пересчитывается на каждом спине
+        strategy.frequency_index = FrequencyIndex()
+        # Частоты с затуханием: 37 весов вместо окна спинов
+        strategy.decay_tracker = DecayTracker(half_lives=[half_life]) if half_life else None
+        
         def make_bet_logic(spin_number: int, history: List[Dict]) -> Dict:
             if len(history) < 10:  # Недостаточно данных
                 return {"type": "color", "numbers": ["red"], "amount": initial_bet}
             
-            # Анализируем последние спины
-            recent_history = history[-look_back:] if len(history) >= look_back else history
-            
-            # Считаем частоту чисел
-            number_counts = {}
-            for spin in recent_history:
-                num = spin['number']
-                number_counts[num] = number_counts.get(num, 0) + 1
-            
-            # Находим самые частые числа
-            hot_numbers = sorted(number_counts.items(), key=lambda x: x[1], reverse=True)[:3]
-            hot_nums = [num for num, count in hot_numbers if count > 1]
+            if strategy.decay_tracker:
+                # Числа, которые недавно выпадали заметно чаще нормы
+                strategy.decay_tracker.sync(history)
+                hot_nums = strategy.decay_tracker.hot_numbers(half_life, top=3)
+            else:
+                # Анализируем последние спины
+                strategy.frequency_index.sync(history)
+                
+                # Находим самые частые числа (выпавшие больше одного раза)
+                hot_nums = strategy.frequency_index.hot_numbers(look_back, top=3, min_count=2)
             
             if not hot_nums:
                 # Если нет горячих чисел, ставим на красное
@@ -325,6 +342,135 @@ class GameAnalyzer:
         
         return results
     
+    def test_strategy_batch(self, strategy_factory: Callable[[float], GameStrategy],
+                            start_date: datetime, end_date: datetime = None,
+                            initial_balances: List[float] = None,
+                            base_bets: List[float] = None) -> List[Dict]:
+        """
+        Тестирует одну стратегию сразу для многих банкроллов и базовых ставок
+
+        Простыми словами: Вместо 200 отдельных прогонов test_strategy проходим историю
+        один раз и считаем все комбинации (баланс, ставка) одновременно.
+
+        Стратегия должна быть "линейной по ставке": куда ставить и во сколько раз
+        ставка больше базовой решается только по истории спинов, а баланс лишь
+        ограничивает сумму сверху. Так устроены все готовые и пользовательские стратегии.
+
+        Args:
+            strategy_factory (Callable): Функция, создающая стратегию по базовой ставке,
+                например lambda bet: PredefinedStrategies.martingale_red(bet)
+            start_date (datetime): Начальная дата периода
+            end_date (datetime): Конечная дата периода
+            initial_balances (List[float]): Начальные балансы (по умолчанию [1000])
+            base_bets (List[float]): Базовые ставки (по умолчанию [10])
+
+        Returns:
+            List[Dict]: Результаты для каждой пары (баланс, ставка) в формате test_strategy
+        """
+        initial_balances = list(initial_balances) if initial_balances else [1000.0]
+        base_bets = list(base_bets) if base_bets else [10.0]
+        spins = self.data_collector.get_spins_by_period(start_date, end_date)
+
+        if len(spins) < 10:
+            return [{"error": "Недостаточно данных для тестирования"}]
+
+        # Один раз прогоняем стратегию с единичной ставкой и "бесконечным" балансом,
+        # чтобы узнать множитель ставки и коэффициент выплаты на каждом спине
+        strategy = strategy_factory(1.0)
+        strategy.reset(float('inf'))
+
+        units = []
+        factors = []
+        history = []
+        for i, spin in enumerate(spins):
+            strategy.current_spin = i + 1
+            bet_info = strategy.make_bet(i + 1, history)
+            history.append(spin)
+
+            unit = bet_info.get("amount", 0)
+            if bet_info.get("type") == "skip" or unit <= 0:
+                continue
+
+            factor = self.utils.calculate_payout(bet_info.get("type", "color"), 1.0,
+                                                 spin['number'], bet_info.get("numbers", []))
+            units.append(unit)
+            factors.append(factor)
+
+        configs = [(balance, bet) for balance in initial_balances for bet in base_bets]
+
+        print(f"Тестируем стратегию '{strategy.name}' на {len(spins)} спинах "
+              f"для {len(configs)} комбинаций баланса и ставки...")
+
+        if NUMPY_AVAILABLE:
+            initial = np.array([balance for balance, _ in configs], dtype=float)
+            bases = np.array([bet for _, bet in configs], dtype=float)
+            balance = initial.copy()
+            peak = initial.copy()
+            max_drawdown = np.zeros(len(configs))
+            total_bets = np.zeros(len(configs), dtype=int)
+            winning_bets = np.zeros(len(configs), dtype=int)
+
+            for unit, factor in zip(units, factors):
+                # Разорившиеся конфигурации больше не ставят
+                amount = np.where(balance > 0, np.minimum(bases * unit, balance), 0.0)
+                placed = amount > 0
+                balance += amount * (factor - 1.0)
+                total_bets += placed
+                if factor > 0:
+                    winning_bets += placed
+                np.maximum(peak, np.where(placed, balance, peak), out=peak)
+                np.maximum(max_drawdown, np.where(placed, peak - balance, 0.0), out=max_drawdown)
+
+            final_balances = balance.tolist()
+            drawdowns = max_drawdown.tolist()
+            bets_counts = total_bets.tolist()
+            wins_counts = winning_bets.tolist()
+        else:
+            final_balances, drawdowns, bets_counts, wins_counts = [], [], [], []
+            for initial_balance, base_bet in configs:
+                balance = peak = initial_balance
+                max_drawdown = 0.0
+                total_bets = winning_bets = 0
+                for unit, factor in zip(units, factors):
+                    if balance <= 0:
+                        break
+                    amount = min(base_bet * unit, balance)
+                    balance += amount * (factor - 1.0)
+                    total_bets += 1
+                    if factor > 0:
+                        winning_bets += 1
+                    peak = max(peak, balance)
+                    max_drawdown = max(max_drawdown, peak - balance)
+                final_balances.append(balance)
+                drawdowns.append(max_drawdown)
+                bets_counts.append(total_bets)
+                wins_counts.append(winning_bets)
+
+        results = []
+        for k, (initial_balance, base_bet) in enumerate(configs):
+            total_profit = final_balances[k] - initial_balance
+            total_bets = bets_counts[k]
+            winning_bets = wins_counts[k]
+
+            results.append({
+                "strategy_name": strategy.name,
+                "period": {"start": start_date, "end": end_date or datetime.now()},
+                "initial_balance": initial_balance,
+                "base_bet": base_bet,
+                "final_balance": final_balances[k],
+                "total_profit": total_profit,
+                "profit_percentage": (total_profit / initial_balance * 100),
+                "total_bets": total_bets,
+                "winning_bets": winning_bets,
+                "losing_bets": total_bets - winning_bets,
+                "win_rate": (winning_bets / total_bets * 100) if total_bets > 0 else 0,
+                "max_drawdown": drawdowns[k],
+                "spins_tested": len(spins),
+                "bets_history": []  # Подробная история в пакетном режиме не сохраняется
+            })
+
+        return results
+    
     def _calculate_bet_result(self, bet_info: Dict, winning_number: int) -> Dict:
         """
         Рассчитывает результат ставки
@@ -0,0 +1,292 @@
+"""
+БЫСТРЫЙ РАЗБОР ИСТОРИИ СТОЛА
+===========================
+
+Этот модуль разбирает ответ statisticHistory ({"history": [...]}) для всех сборщиков.
+
+Простыми словами:
+- Раньше четыре сборщика разбирали ответ каждый по-своему: split() строки
+  результата, datetime.fromisoformat для каждой игры, print на каждую запись
+  и сортировка в конце
+- Здесь ответ разбирается за один проход в "колонки" (числа, цвета, время,
+  gameId отдельными списками)
+- Строка результата разбирается заранее скомпилированным шаблоном, время
+  игры - с запоминанием (одни и те же игры приходят в соседних опросах)
+- API отдает игры от новых к старым, поэтому сортировка нужна только
+  если порядок нарушен
+- Если установлен orjson, JSON декодируется им (в несколько раз быстрее)
+"""
+
+import json
+import re
+from datetime import datetime
+from functools import lru_cache
+from typing import List, Dict, Optional, Tuple, Union, Any
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+from utils import RouletteUtils
+
+
+# "25 Red", "0 Green", "12 black" - число и (необязательно) цвет
+RESULT_PATTERN = re.compile(r"\s*(\d{1,2})(?:\s+([A-Za-z]+))?\s*$")
+
+VALID_COLORS = {"red": "red", "black": "black", "green": "green"}
+
+# Цвет каждого числа 0-36
+NUMBER_COLORS = tuple(RouletteUtils.get_color(number) for number in range(37))
+
+# Готовые ответы на все варианты gameResult, которые отдает API ("25 Red", "25 red", "25")
+RESULT_TABLE: Dict[str, Tuple[int, str]] = {}
+for _number, _color in enumerate(NUMBER_COLORS):
+    for _text in (f"{_number} {_color.title()}", f"{_number} {_color}", f"{_number} {_color.upper()}", str(_number)):
+        RESULT_TABLE[_text] = (_number, _color)
+
+# Сколько нестандартных строк результата запоминать
+RESULT_TABLE_LIMIT = 4096
+
+
+def loads(payload: Union[bytes, str]) -> Any:
+    """Декодирует JSON (orjson, если установлен)"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+
+def parse_game_result(text: Any) -> Optional[Tuple[int, str]]:
+    """
+    Число и цвет из строки gameResult
+
+    Простыми словами: обычные строки берутся из готовой таблицы,
+    необычные ("  7   RED ") разбираются шаблоном и тоже запоминаются
+
+    Args:
+        text: Значение gameResult
+
+    Returns:
+        Optional[Tuple[int, str]]: (число, цвет) или None, если строка не распознана
+    """
+    parsed = RESULT_TABLE.get(text)
+    if parsed is not None:
+        return parsed
+    match = RESULT_PATTERN.match(str(text))
+    if match is None or int(match.group(1)) > 36:
+        return None
+    number = int(match.group(1))
+    api_color = match.group(2)
+    color = VALID_COLORS.get(api_color.lower()) if api_color else None
+    parsed = (number, color or NUMBER_COLORS[number])
+    if isinstance(text, str) and len(RESULT_TABLE) < RESULT_TABLE_LIMIT:
+        RESULT_TABLE[text] = parsed
+    return parsed
+
+
+@lru_cache(maxsize=8192)
+def parse_game_time(text: str) -> Optional[Tuple[datetime, float]]:
+    """
+    Время игры из gameTime (ISO 8601, в том числе с 'Z')
+
+    Простыми словами: результат запоминается - при повторных опросах
+    одни и те же игры не разбираются заново
+
+    Returns:
+        Optional[Tuple[datetime, float]]: (время, unix-время для сравнения) или None
+    """
+    try:
+        moment = datetime.fromisoformat(text.replace('Z', '+00:00'))
+    except (ValueError, AttributeError, TypeError):
+        return None
+    return moment, moment.timestamp()
+
+
+class HistoryBatch:
+    """Разобранная история стола в виде колонок"""
+
+    __slots__ = ("table_id", "numbers", "colors", "timestamps", "game_ids", "dealers",
+                 "received", "skipped", "descending")
+
+    def __init__(self, table_id: str):
+        self.table_id = table_id
+        self.numbers: List[int] = []
+        self.colors: List[str] = []
+        self.timestamps: List[datetime] = []
+        self.game_ids: List[str] = []
+        self.dealers: List[Optional[str]] = []
+        # Сколько записей было в ответе и сколько из них пропущено
+        self.received = 0
+        self.skipped = 0
+        # Игры идут от новых к старым (сортировать не нужно)
+        self.descending = True
+
+    def __len__(self) -> int:
+        return len(self.numbers)
+
+    def numbers_array(self):
+        """Числа массивом numpy (или списком, если numpy не установлен)"""
+        if NUMPY_AVAILABLE:
+            return np.asarray(self.numbers, dtype=np.int8)
+        return list(self.numbers)
+
+    def _order(self) -> List[int]:
+        """Индексы игр от новых к старым"""
+        indexes = range(len(self.numbers))
+        if self.descending:
+            return list(indexes)
+        # Время из ответа с часовым поясом, время "сейчас" для игр без gameTime - без;
+        # сравниваем как unix-время
+        keys = [moment.timestamp() for moment in self.timestamps]
+        return sorted(indexes, key=keys.__getitem__, reverse=True)
+
+    def to_records(self, source: str = 'pragmatic_api', sort: bool = True, **extra) -> List[Dict]:
+        """
+        Результаты в привычном для сборщиков виде (словарь на игру)
+
+        Args:
+            source (str): Значение поля source
+            sort (bool): Упорядочить от новых к старым (False - порядок ответа)
+            **extra: Дополнительные поля с одинаковым значением для всех игр
+                (например dealer=...); заменяют поля из ответа
+
+        Returns:
+            List[Dict]: number, color, timestamp, table_id, game_id, source, dealer
+        """
+        numbers, colors, timestamps = self.numbers, self.colors, self.timestamps
+        game_ids, dealers, table_id = self.game_ids, self.dealers, self.table_id
+        order = self._order() if sort else range(len(numbers))
+        return [{
+            'number': numbers[i],
+            'color': colors[i],
+            'timestamp': timestamps[i],
+            'table_id': table_id,
+            'game_id': game_ids[i],
+            'source': source,
+            'dealer': dealers[i],
+            **extra
+        } for i in order]
+
+
+def parse_history(payload: Union[bytes, str, Dict], table_id: str) -> HistoryBatch:
+    """
+    Разбирает ответ statisticHistory за один проход
+
+    Args:
+        payload: Тело ответа (bytes/str) или уже декодированный JSON
+        table_id (str): Стол, для которого делался запрос (все игры привязываются к нему)
+
+    Returns:
+        HistoryBatch: Колонки с играми в порядке ответа
+    """
+    data = loads(payload) if isinstance(payload, (bytes, bytearray, str)) else payload
+    batch = HistoryBatch(table_id)
+    history = data.get('history') if isinstance(data, dict) else None
+    if not isinstance(history, list):
+        return batch
+
+    batch.received = len(history)
+    lookup_result = RESULT_TABLE.get
+    numbers, colors, timestamps = batch.numbers, batch.colors, batch.timestamps
+    game_ids, dealers = batch.game_ids, batch.dealers
+    now = None
+    previous = float('inf')
+
+    for game in history:
+        try:
+            result = game.get('gameResult')
+            parsed = lookup_result(result) or parse_game_result(result)
+        except (AttributeError, TypeError):
+            parsed = None
+        if parsed is None:
+            batch.skipped += 1
+            continue
+
+        game_time = game.get('gameTime')
+        moment = parse_game_time(game_time) if game_time else None
+        if moment is None:
+            if now is None:
+                now_time = datetime.now()
+                now = (now_time, now_time.timestamp())
+            moment = now
+        if moment[1] > previous:
+            batch.descending = False
+        previous = moment[1]
+
+        numbers.append(parsed[0])
+        colors.append(parsed[1])
+        timestamps.append(moment[0])
+        game_ids.append(str(game.get('gameId', '')))
+        dealers.append(game.get('dealerName') or game.get('dealer'))
+
+    return batch
+
+
+def parse_history_records(payload: Union[bytes, str, Dict], table_id: str, source: str = 'pragmatic_api',
+                          sort: bool = True, **extra) -> List[Dict]:
+    """Разбор ответа сразу в список словарей (см. HistoryBatch.to_records)"""
+    return parse_history(payload, table_id).to_records(source, sort, **extra)
+
+
+# Тестирование
+if __name__ == "__main__":
+    import random
+    import time
+    from datetime import timedelta
+
+    print("Тестируем быстрый разбор истории...")
+
+    def make_payload(games: int = 500) -> bytes:
+        start = datetime(2026, 1, 1, 12, 0)
+        history = []
+        for i in range(games):
+            number = random.randint(0, 36)
+            moment = start - timedelta(seconds=45 * i)
+            history.append({"gameId": str(9000000 - i),
+                            "gameResult": f"{number} {NUMBER_COLORS[number].title()}",
+                            "gameTime": moment.isoformat() + ".000Z"})
+        return json.dumps({"history": history}).encode()
+
+    def legacy_parse(body: bytes, table_id: str) -> List[Dict]:
+        """Старый способ: json + split + fromisoformat на каждую запись + сортировка"""
+        data = json.loads(body.decode('utf-8'))
+        results = []
+        for game in data['history']:
+            parts = game['gameResult'].split()
+            number = int(parts[0])
+            color = parts[1].lower()
+            timestamp = datetime.fromisoformat(game['gameTime'].replace('Z', '+00:00'))
+            results.append({'number': number, 'color': color, 'timestamp': timestamp,
+                            'table_id': table_id, 'game_id': game.get('gameId', '')})
+        results.sort(key=lambda x: x['timestamp'], reverse=True)
+        return results
+
+    body = make_payload()
+    rounds = 200
+
+    def measure(func) -> float:
+        started = time.perf_counter()
+        for _ in range(rounds):
+            func()
+        return (time.perf_counter() - started) / rounds * 1000
+
+    legacy_ms = measure(lambda: legacy_parse(body, "demo"))
+    batch_ms = measure(lambda: parse_history(body, "demo"))
+    records_ms = measure(lambda: parse_history_records(body, "demo"))
+
+    same = [(r['number'], r['color'], r['timestamp'], r['game_id']) for r in legacy_parse(body, "demo")] == \
+           [(r['number'], r['color'], r['timestamp'], r['game_id']) for r in parse_history_records(body, "demo")]
+    print(f"Ответ на 500 игр ({len(body) // 1024} КБ), orjson: {ORJSON_AVAILABLE}")
+    print(f"Старый разбор: {legacy_ms:.2f} мс")
+    print(f"Колонки: {batch_ms:.2f} мс (x{legacy_ms / batch_ms:.1f})")
+    print(f"Колонки + словари: {records_ms:.2f} мс (x{legacy_ms / records_ms:.1f})")
+    print(f"Результаты совпадают: {same}")
+
+    print("\nТест завершен!")
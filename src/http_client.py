@@ -0,0 +1,433 @@
+"""
+НАДЕЖНЫЙ HTTP-КЛИЕНТ
+====================
+
+Этот модуль - общий слой повторов и "предохранителей" для всех сборщиков.
+
+Простыми словами:
+- Временная ошибка (таймаут, обрыв, 5xx, 429) повторяется не больше
+  CONNECTION_CONFIG['retry_attempts'] раз, паузы между попытками растут
+  вдвое и случайно разбросаны (чтобы сборщики не повторяли хором)
+- Для каждого endpoint (сервер + путь) есть предохранитель (circuit breaker):
+  после серии неудач он "выбивается" и запросы сразу получают ошибку,
+  не тратя время и лимит запросов
+- Через reset_timeout секунд предохранитель пропускает один пробный запрос
+  (half-open): успех - снова все работает, неудача - ждем дальше
+- Ошибки не подменяются симуляцией: вызывающий код получает исключение
+  HTTPClientError и сам решает, что делать
+"""
+
+import json
+import random
+import socket
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from pathlib import Path
+from typing import Callable, Dict, Optional, Union, Any
+
+# Добавляем путь к корню проекта для импорта конфигурации
+sys.path.append(str(Path(__file__).parent.parent))
+from config import CONNECTION_CONFIG
+
+from rate_limiter import RateLimiter, get_rate_limiter, PRIORITY_LIVE
+
+
+# Состояния предохранителя
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class HTTPClientError(Exception):
+    """Запрос не удался (после всех повторов или предохранитель выбит)"""
+
+    def __init__(self, message: str, endpoint: str = "", retry_after: float = 0.0):
+        super().__init__(message)
+        self.endpoint = endpoint
+        # Через сколько секунд имеет смысл пробовать снова
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(HTTPClientError):
+    """Предохранитель endpoint выбит - запрос даже не отправлялся"""
+
+
+class RequestFailedError(HTTPClientError):
+    """Все попытки запроса закончились ошибкой"""
+
+    def __init__(self, message: str, endpoint: str = "", retry_after: float = 0.0,
+                 attempts: int = 0, status: Optional[int] = None):
+        super().__init__(message, endpoint, retry_after)
+        self.attempts = attempts
+        self.status = status
+
+
+def endpoint_key(target) -> str:
+    """Endpoint запроса: сервер и путь без параметров"""
+    url = target.full_url if isinstance(target, urllib.request.Request) else target
+    parts = urllib.parse.urlsplit(url)
+    return f"{parts.netloc}{parts.path}".lower()
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Стоит ли повторять запрос после этой ошибки
+
+    Простыми словами: повторяем сбои сети и сервера (таймауты, 5xx, 429);
+    ошибки запроса (400, 401, 403, 404) повтор не исправит
+    """
+    status = getattr(error, 'code', None) or getattr(error, 'status', None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    return isinstance(error, (urllib.error.URLError, socket.timeout, TimeoutError,
+                              ConnectionError, OSError, EOFError))
+
+
+def retry_after_header(error: BaseException) -> float:
+    """
+    Retry-After из ответа сервера, приложенного к ошибке (0 - заголовка нет)
+
+    Простыми словами: заголовки есть и у urllib.error.HTTPError, и у
+    async_collector.HTTPError; учитываем только паузу в секундах
+    """
+    headers = getattr(error, 'headers', None)
+    if not headers:
+        return 0.0
+    value = headers.get('Retry-After') or headers.get('retry-after')
+    try:
+        return max(0.0, float(value)) if value is not None else 0.0
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def backoff_delay(attempt: int, base_delay: float = 0.5, max_delay: float = 30.0,
+                  rng: random.Random = None) -> float:
+    """
+    Пауза перед повтором: экспонента со случайным разбросом ("full jitter")
+
+    Args:
+        attempt (int): Номер неудачной попытки (с 0)
+        base_delay (float): Пауза после первой неудачи (верхняя граница)
+        max_delay (float): Максимальная пауза
+
+    Returns:
+        float: Пауза в секундах от 0 до min(max_delay, base_delay * 2^attempt)
+    """
+    return (rng or random).uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """Предохранитель одного endpoint"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        Args:
+            failure_threshold (int): После скольких неудач подряд выбивать предохранитель
+            reset_timeout (float): Через сколько секунд пропустить пробный запрос
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        self.stats = {"opened": 0, "rejected": 0}
+
+    def retry_after(self) -> float:
+        """Сколько секунд осталось до пробного запроса"""
+        if self.state == CLOSED:
+            return 0.0
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def allow(self) -> bool:
+        """
+        Можно ли отправить запрос сейчас
+
+        Простыми словами: закрыт - да; выбит - нет, пока не прошел reset_timeout;
+        потом - только один пробный запрос за раз
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self._probing = False
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            self.stats["rejected"] += 1
+            return False
+
+    def record_success(self):
+        """Запрос удался - предохранитель закрывается"""
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def release(self):
+        """Пробный запрос отменен, так и не получив ответа - следующий запрос может стать пробным"""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probing = False
+
+    def record_failure(self):
+        """Запрос не удался - после failure_threshold неудач (или неудачной пробы) выбиваем"""
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.stats["opened"] += 1
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                self._probing = False
+
+
+class ResilientHTTPClient:
+    """Повторы с паузами и предохранители для всех запросов сборщиков"""
+
+    def __init__(self, retry_attempts: int = None, timeout: float = None, base_delay: float = 0.5,
+                 max_delay: float = 30.0, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 rate_limiter: RateLimiter = None, rng: random.Random = None):
+        """
+        Args:
+            retry_attempts (int): Сколько всего попыток на запрос (по умолчанию из CONNECTION_CONFIG)
+            timeout (float): Таймаут одной попытки (по умолчанию из CONNECTION_CONFIG)
+            base_delay (float): Пауза после первой неудачи (верхняя граница разброса)
+            max_delay (float): Максимальная пауза между попытками
+            failure_threshold (int): Неудач подряд до срабатывания предохранителя
+            reset_timeout (float): Через сколько секунд пробовать выбитый endpoint
+            rate_limiter (RateLimiter): Ограничитель частоты (по умолчанию общий для процесса)
+            rng (random.Random): Генератор случайных чисел (для воспроизводимых тестов)
+        """
+        self.retry_attempts = max(1, retry_attempts or CONNECTION_CONFIG.get('retry_attempts', 3))
+        self.timeout = timeout or CONNECTION_CONFIG.get('timeout', 30)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.rate_limiter = rate_limiter
+        self.rng = rng or random.Random()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict] = {}
+
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        """Предохранитель endpoint"""
+        with self._lock:
+            breaker = self._breakers.get(endpoint)
+            if breaker is None:
+                breaker = self._breakers[endpoint] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return breaker
+
+    def _count(self, endpoint: str, name: str):
+        with self._lock:
+            stats = self._stats.setdefault(endpoint, {"requests": 0, "successes": 0, "failures": 0,
+                                                      "retries": 0, "rejected": 0})
+            stats[name] += 1
+
+    def _retry_delay(self, attempt: int, error: BaseException) -> float:
+        """Пауза перед повтором; для 429 и 503 учитываем Retry-After сервера"""
+        delay = backoff_delay(attempt, self.base_delay, self.max_delay, self.rng)
+        return max(delay, min(self.max_delay, retry_after_header(error)))
+
+    def _start(self, endpoint: str, breaker: CircuitBreaker):
+        """Проверяет предохранитель перед попыткой"""
+        if not breaker.allow():
+            self._count(endpoint, "rejected")
+            raise CircuitOpenError(f"Предохранитель {endpoint} выбит, повтор через "
+                                   f"{breaker.retry_after():.1f} с", endpoint, breaker.retry_after())
+        self._count(endpoint, "requests")
+
+    def _failed(self, endpoint: str, breaker: CircuitBreaker, error: BaseException, attempt: int) -> bool:
+        """
+        Учитывает неудачную попытку
+
+        Returns:
+            bool: True - нужно повторить, иначе ошибка передается вызывающему коду
+        """
+        retryable = is_retryable(error)
+        if retryable:
+            breaker.record_failure()
+        else:
+            # Ошибка запроса - сервер при этом ответил, endpoint жив
+            breaker.record_success()
+        self._count(endpoint, "failures")
+        if retryable and attempt + 1 < self.retry_attempts and breaker.state == CLOSED:
+            self._count(endpoint, "retries")
+            return True
+        return False
+
+    def _give_up(self, endpoint: str, breaker: CircuitBreaker, error: BaseException, attempt: int):
+        status = getattr(error, 'code', None) or getattr(error, 'status', None)
+        retry_after = max(breaker.retry_after(), retry_after_header(error))
+        return RequestFailedError(f"{endpoint}: {error} (попыток: {attempt + 1})", endpoint,
+                                  retry_after, attempt + 1, status)
+
+    def call(self, endpoint: str, func: Callable[[], Any]) -> Any:
+        """
+        Выполняет запрос с повторами и предохранителем
+
+        Args:
+            endpoint (str): Ключ предохранителя (см. endpoint_key)
+            func (Callable): Одна попытка запроса
+
+        Returns:
+            Any: Результат func
+
+        Raises:
+            CircuitOpenError: Предохранитель выбит
+            RequestFailedError: Все попытки неудачны (или ошибка, которую повтор не исправит)
+        """
+        breaker = self.breaker(endpoint)
+        attempt = 0
+        while True:
+            self._start(endpoint, breaker)
+            try:
+                result = func()
+            except Exception as error:
+                if not self._failed(endpoint, breaker, error, attempt):
+                    raise self._give_up(endpoint, breaker, error, attempt) from error
+                time.sleep(self._retry_delay(attempt, error))
+                attempt += 1
+                continue
+            except BaseException:
+                # Ctrl+C во время пробы не должен оставить предохранитель "занятым" навсегда
+                breaker.release()
+                raise
+            breaker.record_success()
+            self._count(endpoint, "successes")
+            return result
+
+    async def call_async(self, endpoint: str, func: Callable[[], Any]) -> Any:
+        """То же, что call, для асинхронной попытки (func возвращает корутину)"""
+        import asyncio
+
+        breaker = self.breaker(endpoint)
+        attempt = 0
+        while True:
+            self._start(endpoint, breaker)
+            try:
+                result = await func()
+            except asyncio.CancelledError:
+                # Отмененная проба не должна оставить предохранитель "занятым" навсегда
+                breaker.release()
+                raise
+            except Exception as error:
+                if not self._failed(endpoint, breaker, error, attempt):
+                    raise self._give_up(endpoint, breaker, error, attempt) from error
+                await asyncio.sleep(self._retry_delay(attempt, error))
+                attempt += 1
+                continue
+            breaker.record_success()
+            self._count(endpoint, "successes")
+            return result
+
+    def get(self, request: Union[str, urllib.request.Request], priority: int = PRIORITY_LIVE,
+            timeout: float = None) -> bytes:
+        """
+        GET-запрос с повторами, предохранителем и общим лимитом частоты
+
+        Args:
+            request: Адрес или urllib.request.Request
+            priority (int): Приоритет в очереди ограничителя частоты
+            timeout (float): Таймаут попытки (по умолчанию self.timeout)
+
+        Returns:
+            bytes: Тело ответа
+        """
+        limiter = self.rate_limiter or get_rate_limiter()
+
+        def attempt() -> bytes:
+            limiter.acquire(request, priority)
+            with urllib.request.urlopen(request, timeout=timeout or self.timeout) as response:
+                return response.read()
+
+        return self.call(endpoint_key(request), attempt)
+
+    def get_json(self, request: Union[str, urllib.request.Request], priority: int = PRIORITY_LIVE,
+                 timeout: float = None) -> Any:
+        """GET-запрос, ответ разбирается как JSON"""
+        return json.loads(self.get(request, priority, timeout).decode('utf-8'))
+
+    def stats(self) -> Dict[str, Dict]:
+        """
+        Статистика по endpoint
+
+        Returns:
+            Dict[str, Dict]: Попытки, успехи, неудачи, повторы, отклоненные
+                предохранителем запросы и его текущее состояние
+        """
+        with self._lock:
+            return {endpoint: {**stats, "circuit": self._breakers[endpoint].state,
+                               "circuit_opened": self._breakers[endpoint].stats["opened"]}
+                    for endpoint, stats in self._stats.items()}
+
+
+_shared_client: Optional[ResilientHTTPClient] = None
+_shared_lock = threading.Lock()
+
+
+def get_http_client() -> ResilientHTTPClient:
+    """Общий клиент процесса (предохранители общие для всех сборщиков)"""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = ResilientHTTPClient()
+        return _shared_client
+
+
+# Тестирование
+if __name__ == "__main__":
+    import threading as _threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    print("Тестируем надежный HTTP-клиент...")
+
+    state = {"fail": 2, "down": False}
+
+    class FlakyHandler(BaseHTTPRequestHandler):
+        """Сервер, который иногда отвечает 503"""
+
+        def do_GET(self):
+            if state["down"] or state["fail"] > 0:
+                state["fail"] -= 1
+                self.send_response(503)
+                self.end_headers()
+                return
+            body = b'{"ok": true}'
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FlakyHandler)
+    _threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/api/history"
+
+    client = ResilientHTTPClient(retry_attempts=3, base_delay=0.05, failure_threshold=3, reset_timeout=0.5,
+                                 rate_limiter=RateLimiter(rate_per_minute=60000))
+    print(f"Две ошибки 503, потом успех: {client.get_json(url)}")
+
+    state["down"] = True
+    for _ in range(3):
+        try:
+            client.get(url)
+        except HTTPClientError as e:
+            print(f"{type(e).__name__}: {e}")
+
+    time.sleep(0.6)
+    state["down"] = False
+    print(f"После паузы пробный запрос: {client.get_json(url)}")
+    print(f"Статистика: {client.stats()}")
+    server.shutdown()
+
+    print("\nТест завершен!")
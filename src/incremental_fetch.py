@@ -0,0 +1,260 @@
+"""
+ИНКРЕМЕНТАЛЬНАЯ ЗАГРУЗКА ИСТОРИИ
+===============================
+
+Этот модуль помогает запрашивать у statisticHistory только новые игры стола.
+
+Простыми словами:
+- Раньше каждый опрос скачивал до 500 игр, хотя новых обычно одна-две
+- Курсор стола помнит последнюю увиденную игру (gameId и время) и время опроса
+- По прошедшему времени и среднему интервалу между спинами он выбирает
+  маленький numberOfGames (например 3-5 вместо 500)
+- Если последней известной игры в ответе нет - значит пропущен кусок истории:
+  запрос автоматически расширяется (x4), пока разрыв не закроется
+- Курсор хранит последние игры, поэтому "дай последние 100" не требует
+  скачивать 100 игр заново
+"""
+
+import math
+import time
+from collections import deque
+from typing import List, Dict, Optional, Callable, Awaitable
+
+
+# Типичный интервал между спинами живой рулетки в секундах
+SPIN_INTERVAL = 45.0
+
+# Границы numberOfGames
+MIN_GAMES = 3
+MAX_GAMES = 500
+
+# Запас к ожидаемому числу новых игр
+MARGIN_GAMES = 2
+
+# Во сколько раз расширять запрос при разрыве
+WIDEN_FACTOR = 4
+
+
+def game_key(result: Dict):
+    """Ключ игры: gameId, а если его нет - время и число"""
+    return result.get('game_id') or (str(result.get('timestamp')), result.get('number'))
+
+
+class TableCursor:
+    """Состояние инкрементальной загрузки одного стола"""
+
+    def __init__(self, table_id: str, initial_games: int = 50, keep: int = MAX_GAMES,
+                 min_games: int = MIN_GAMES, max_games: int = MAX_GAMES,
+                 spin_interval: float = SPIN_INTERVAL):
+        """
+        Args:
+            table_id (str): Стол
+            initial_games (int): Сколько игр запросить в первый раз
+            keep (int): Сколько последних игр хранить для recent()
+            min_games (int): Минимальный numberOfGames
+            max_games (int): Максимальный numberOfGames (ограничение API)
+            spin_interval (float): Начальная оценка интервала между спинами в секундах
+        """
+        self.table_id = table_id
+        self.initial_games = initial_games
+        self.min_games = min_games
+        self.max_games = max_games
+        self.spin_interval = spin_interval
+
+        self.last_key = None
+        self.last_game_time = None
+        self.last_poll: Optional[float] = None
+        self._recent = deque(maxlen=keep)
+        self.stats = {"polls": 0, "requests": 0, "games_received": 0, "new_games": 0,
+                      "widenings": 0, "gaps": 0}
+
+    def _clamp(self, games: int) -> int:
+        return max(self.min_games, min(self.max_games, games))
+
+    def games_to_request(self, want: int = 0, now: float = None) -> int:
+        """
+        Сколько игр запросить сейчас
+
+        Args:
+            want (int): Сколько последних игр нужно вызывающему коду
+            now (float): Текущее время (time.time), для тестов
+
+        Returns:
+            int: numberOfGames для запроса
+        """
+        if self.last_key is None:
+            return self._clamp(max(want, self.initial_games))
+        if want > len(self._recent):
+            # Хранимых игр не хватает - докачиваем нужную глубину
+            return self._clamp(want)
+
+        elapsed = (now if now is not None else time.time()) - self.last_poll
+        expected = max(0.0, elapsed) / self.spin_interval
+        return self._clamp(math.ceil(expected) + MARGIN_GAMES)
+
+    def is_backfill(self, want: int = 0) -> bool:
+        """Догрузка истории (первый запрос или не хватает хранимых игр), а не обычный опрос"""
+        return self.last_key is None or want > len(self._recent)
+
+    def widen(self, requested: int) -> int:
+        """Размер следующего запроса при обнаруженном разрыве"""
+        self.stats["widenings"] += 1
+        return self._clamp(requested * WIDEN_FACTOR)
+
+    def merge(self, results: List[Dict], requested: int, now: float = None) -> Optional[List[Dict]]:
+        """
+        Принимает ответ API и выделяет новые игры
+
+        Простыми словами: ищем в ответе последнюю известную игру - все, что
+        новее нее, новое. Если ее нет, а ответ заполнен целиком, то между
+        опросами прошло больше игр, чем мы запросили - нужен запрос шире.
+        Игры старше самой старой хранимой (догрузка истории) дописываются
+        в начало хранилища, но новыми не считаются
+
+        Args:
+            results (List[Dict]): Игры из ответа, новые первыми
+            requested (int): Какой numberOfGames запрашивали
+            now (float): Время опроса (time.time), для тестов
+
+        Returns:
+            Optional[List[Dict]]: Новые игры (новые первыми) или None, если нужен
+                запрос шире (см. widen)
+        """
+        self.stats["requests"] += 1
+        self.stats["games_received"] += len(results)
+
+        fresh = results
+        older = []
+        if self.last_key is not None:
+            keys = [game_key(result) for result in results]
+            if self.last_key in keys:
+                fresh = results[:keys.index(self.last_key)]
+                # Догрузка глубже хранимого: игры старше самой старой хранимой
+                oldest = game_key(self._recent[0]) if self._recent else self.last_key
+                if oldest in keys:
+                    older = results[keys.index(oldest) + 1:]
+            elif len(results) >= requested and requested < self.max_games:
+                return None
+            elif len(results) >= requested:
+                # Шире запросить нельзя - часть истории потеряна
+                self.stats["gaps"] += 1
+
+        self.stats["polls"] += 1
+        self.stats["new_games"] += len(fresh)
+        self.last_poll = now if now is not None else time.time()
+        if results:
+            self.last_key = game_key(results[0])
+            self.last_game_time = results[0].get('timestamp')
+        self._update_interval(results)
+        # Хранилище - от старых к новым; более старые игры - в свободное место в начале
+        self._recent.extend(reversed(fresh))
+        room = self._recent.maxlen - len(self._recent)
+        if older and room > 0:
+            self._recent.extendleft(older[:room])
+        return fresh
+
+    def _update_interval(self, results: List[Dict]):
+        """Уточняет средний интервал между спинами по времени игр в ответе"""
+        gaps = []
+        for newer, older in zip(results, results[1:]):
+            try:
+                seconds = (newer['timestamp'] - older['timestamp']).total_seconds()
+            except (KeyError, TypeError, AttributeError):
+                continue
+            if seconds >= 1:
+                gaps.append(seconds)
+        if gaps:
+            gaps.sort()
+            median = gaps[len(gaps) // 2]
+            self.spin_interval = 0.7 * self.spin_interval + 0.3 * median
+
+    def recent(self, limit: int) -> List[Dict]:
+        """Последние limit игр, новые первыми"""
+        if limit <= 0:
+            return []
+        return list(self._recent)[::-1][:limit]
+
+
+def fetch_new(cursor: TableCursor, fetch: Callable[[int, bool], List[Dict]], want: int = 0) -> List[Dict]:
+    """
+    Загружает новые игры стола, при разрыве расширяя запрос
+
+    Args:
+        cursor (TableCursor): Курсор стола
+        fetch (Callable[[int, bool], List[Dict]]): Запрос истории: (numberOfGames, догрузка ли это)
+            -> игры (новые первыми); догрузку можно пропускать после живых опросов
+        want (int): Сколько последних игр нужно вызывающему коду
+
+    Returns:
+        List[Dict]: Новые игры, новые первыми
+    """
+    requested = cursor.games_to_request(want)
+    backfill = cursor.is_backfill(want)
+    while True:
+        fresh = cursor.merge(fetch(requested, backfill), requested)
+        if fresh is not None:
+            return fresh
+        requested = cursor.widen(requested)
+        backfill = True
+
+
+async def fetch_new_async(cursor: TableCursor, fetch: Callable[[int, bool], Awaitable[List[Dict]]],
+                          want: int = 0) -> List[Dict]:
+    """То же, что fetch_new, для асинхронного запроса"""
+    requested = cursor.games_to_request(want)
+    backfill = cursor.is_backfill(want)
+    while True:
+        fresh = cursor.merge(await fetch(requested, backfill), requested)
+        if fresh is not None:
+            return fresh
+        requested = cursor.widen(requested)
+        backfill = True
+
+
+# Тестирование
+if __name__ == "__main__":
+    import random
+    from datetime import datetime, timedelta
+
+    print("Тестируем инкрементальную загрузку...")
+
+    history = []
+    started = datetime(2026, 1, 1, 12, 0)
+
+    def play(count):
+        for _ in range(count):
+            history.insert(0, {'number': random.randint(0, 36),
+                               'timestamp': started + timedelta(seconds=45 * len(history)),
+                               'game_id': str(len(history))})
+
+    def fetch(games):
+        return history[:games]
+
+    play(600)
+    cursor = TableCursor("demo", initial_games=100)
+    clock = 0.0
+    fresh = cursor.merge(fetch(100), 100, now=clock)
+    print(f"Первый запрос: {len(fresh)} игр")
+
+    received = 0
+    for step in range(200):
+        # Обычно между опросами 30 секунд, иногда - долгий перерыв
+        pause = 3600 if step == 150 else 30
+        clock += pause
+        play(int(pause / 45 + random.random()))
+        requested = cursor.games_to_request(now=clock)
+        while True:
+            page = fetch(requested)
+            received += len(page)
+            fresh = cursor.merge(page, requested, now=clock)
+            if fresh is not None:
+                break
+            requested = cursor.widen(requested)
+
+    stats = cursor.stats
+    print(f"Опросов: {stats['polls']}, новых игр: {stats['new_games']}, получено игр: {received}")
+    print(f"Расширений: {stats['widenings']}, потерянных разрывов: {stats['gaps']}")
+    print(f"Без курсора было бы получено: {stats['polls'] * 500} игр")
+    print(f"Последние 3 игры совпадают: {cursor.recent(3) == history[:3]}")
+
+    print("\nТест завершен!")
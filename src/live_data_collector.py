@@ -6,12 +6,18 @@ import time
 import json
 import os
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 import random
 import urllib.request
 import urllib.error
+import sys
 from pathlib import Path
 
+# Добавляем путь к корню проекта для импорта конфигурации
+sys.path.append(str(Path(__file__).parent.parent))
+from config import CONNECTION_CONFIG
+
+
 class LiveDataCollector:
     """Класс для получения реальных данных рулетки"""
     
@@ -25,6 +31,8 @@ class LiveDataCollector:
             'live_roulette': 'https://live-roulette-results.com'
         }
         self.config = self._load_casino_config()
+        # Курсоры инкрементальной загрузки по столам (см. incremental_fetch)
+        self._cursors = {}
     
     def _load_casino_config(self) -> Dict:
         """Загрузка конфигурации казино"""
@@ -55,6 +63,9 @@ class LiveDataCollector:
             
         Returns:
             Список результатов спинов
+
+        Raises:
+            HTTPClientError: Источник 'api' недоступен (симуляция при этом не подставляется)
         """
         if source == 'mock':
             return self._get_mock_live_data(limit)
@@ -177,107 +188,76 @@ class LiveDataCollector:
         return self._fallback_single_table_data(limit)
     
     def _fallback_single_table_data(self, limit: int) -> List[Dict]:
-        """Фоллбэк метод с дополнительной фильтрацией"""
-        try:
-            target_table = "roulettestura541"  # ТОЛЬКО этот стол
-            print(f"🎯 Фоллбэк: получение данных стола {target_table}...")
-            
-            # Используем API статистики для конкретного стола
-            auth = self.config['api']['auth']
-            base_url = "https://games.pragmaticplaylive.net/api/ui/statisticHistory"
-            
-            import urllib.parse
-            params = {
-                'tableId': target_table,  # СТРОГО наш стол
-                'numberOfGames': min(limit, 500)
-            }
-            
-            url = f"{base_url}?" + urllib.parse.urlencode(params)
-            
-            req = urllib.request.Request(url)
-            req.add_header('User-Agent', self.config['api']['headers']['User-Agent'])
-            req.add_header('Accept', 'application/json, text/plain, */*')
-            
-            with urllib.request.urlopen(req, timeout=10) as response:
-                if response.getcode() == 200:
-                    data = json.loads(response.read().decode('utf-8'))
-                    results = self._parse_api_history(data, target_table)
-                    
-                    # СТРОГАЯ ФИЛЬТРАЦИЯ: убираем все что не с нашего стола
-                    filtered_results = []
-                    for result in results:
-                        if result.get('table_id') == target_table:
-                            filtered_results.append(result)
-                        else:
-                            print(f"🚫 ОТФИЛЬТРОВАН: {result.get('table_id')} (нужен {target_table})")
-                    
-                    print(f"✅ После фильтрации: {len(filtered_results)} результатов с стола {target_table}")
-                    return filtered_results
-                else:
-                    print(f"❌ API вернул код {response.getcode()}")
-                    
-        except Exception as e:
-            print(f"❌ Ошибка фоллбэк API: {e}")
+        """
+        Фоллбэк метод с дополнительной фильтрацией
+
+        Простыми словами: полную историю (до limit игр) скачиваем один раз,
+        дальше запрашиваем только игры, появившиеся после последней известной.
+        Если API недоступен - это ошибка, а не повод подставить симуляцию
+
+        Raises:
+            HTTPClientError: API недоступен (после всех повторов) или предохранитель выбит
+        """
+        from incremental_fetch import TableCursor, fetch_new
+
+        target_table = "roulettestura541"  # ТОЛЬКО этот стол
+        print(f"🎯 Фоллбэк: получение данных стола {target_table}...")
+
+        cursor = self._cursors.get(target_table)
+        if cursor is None:
+            cursor = self._cursors[target_table] = TableCursor(target_table, initial_games=min(limit, 500))
+
+        fresh = fetch_new(cursor, lambda games, backfill: self._request_table_history(target_table, games, backfill),
+                          want=limit)
+        print(f"✅ Новых игр: {len(fresh)}, всего получено игр из API: {cursor.stats['games_received']}")
+        return cursor.recent(limit)
+
+    def _request_table_history(self, target_table: str, number_of_games: int, backfill: bool = False) -> List[Dict]:
+        """Запрашивает последние number_of_games игр стола (новые первыми)"""
+        import urllib.parse
+        from http_client import get_http_client
+        from rate_limiter import PRIORITY_LIVE, PRIORITY_BACKFILL
+
+        # Используем API статистики для конкретного стола
+        base_url = "https://games.pragmaticplaylive.net/api/ui/statisticHistory"
+        params = {
+            'tableId': target_table,  # СТРОГО наш стол
+            'numberOfGames': number_of_games
+        }
+        
+        url = f"{base_url}?" + urllib.parse.urlencode(params)
+        
+        req = urllib.request.Request(url)
+        req.add_header('User-Agent', self.config['api']['headers']['User-Agent'])
+        req.add_header('Accept', 'application/json, text/plain, */*')
         
-        return self._get_mock_live_data(limit)
+        priority = PRIORITY_BACKFILL if backfill else PRIORITY_LIVE
+        body = get_http_client().get(req, priority=priority, timeout=10)
+        results = self._parse_api_history(body, target_table)
+        
+        # СТРОГАЯ ФИЛЬТРАЦИЯ: убираем все что не с нашего стола
+        filtered_results = []
+        for result in results:
+            if result.get('table_id') == target_table:
+                filtered_results.append(result)
+            else:
+                print(f"🚫 ОТФИЛЬТРОВАН: {result.get('table_id')} (нужен {target_table})")
+        return filtered_results
     
-    def _parse_api_history(self, data: Dict, table_id: str) -> List[Dict]:
+    def _parse_api_history(self, data, table_id: str) -> List[Dict]:
         """
-        Парсит историю игр из API ответа
+        Парсит историю игр из API ответа (тело ответа или JSON), новые сначала
         """
-        results = []
-        
+        from history_parser import parse_history
+
         try:
-            if 'history' in data and isinstance(data['history'], list):
-                print(f"📊 Получено {len(data['history'])} записей с стола {table_id}")
-                
-                for game in data['history']:
-                    if isinstance(game, dict):
-                        # Парсим gameResult (формат: "25 Red", "0 Green", "12 Black")
-                        winning_number = None
-                        api_color = None
-                        
-                        if 'gameResult' in game:
-                            try:
-                                parts = game['gameResult'].split()
-                                if len(parts) >= 2:
-                                    winning_number = int(parts[0])
-                                    api_color = parts[1].lower()
-                            except (ValueError, IndexError):
-                                continue
-                        
-                        if winning_number is not None and 0 <= winning_number <= 36:
-                            # Используем цвет из API или рассчитываем
-                            color = api_color if api_color in ['red', 'black', 'green'] else self._get_color(winning_number)
-                            
-                            # Время игры
-                            timestamp = datetime.now()
-                            if 'gameTime' in game:
-                                try:
-                                    timestamp = datetime.fromisoformat(game['gameTime'].replace('Z', '+00:00'))
-                                except:
-                                    pass
-                            
-                            result = {
-                                'number': winning_number,
-                                'color': color,
-                                'timestamp': timestamp,
-                                'source': 'pragmatic_api',
-                                'table_id': table_id,
-                                'game_id': game.get('gameId', ''),
-                                'dealer': f'dealer_{table_id}'
-                            }
-                            
-                            results.append(result)
-                
-                # Сортируем по времени (новые сначала)
-                results.sort(key=lambda x: x['timestamp'], reverse=True)
-                print(f"✅ Обработано {len(results)} результатов стола {table_id}")
-                
-        except Exception as e:
+            batch = parse_history(data, table_id)
+        except ValueError as e:
             print(f"❌ Ошибка парсинга: {e}")
-        
-        return results
+            return []
+
+        print(f"📊 Стол {table_id}: получено {batch.received} записей, обработано {len(batch)}")
+        return batch.to_records('pragmatic_api', dealer=f'dealer_{table_id}')
     
     def _scrape_live_data(self, limit: int) -> List[Dict]:
         """
@@ -309,12 +289,15 @@ class LiveDataCollector:
         red_numbers = {1, 3, 5, 7, 9, 12, 14, 16, 18, 19, 21, 23, 25, 27, 30, 32, 34, 36}
         return 'red' if number in red_numbers else 'black'
     
-    def get_live_stream(self, duration_minutes: int = 60) -> List[Dict]:
+    def get_live_stream(self, duration_minutes: int = 60,
+                        on_result: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
         """
         Симулирует получение данных в реальном времени
         
         Args:
             duration_minutes: Продолжительность получения данных в минутах
+            on_result: Обработчик, который вызывается для каждого нового спина
+                (например LivePaperTradingEngine.on_spin)
             
         Returns:
             Список результатов спинов в хронологическом порядке
@@ -346,10 +329,62 @@ class LiveDataCollector:
                 
                 # Можно добавлять результат сразу в базу данных
                 self._save_live_result(result)
+                
+                # Передаем спин подписчику (например, бумажной торговле)
+                if on_result:
+                    on_result(result)
         
         print(f"✅ Получено {len(results)} результатов за {duration_minutes} минут")
         return results
-    
+
+    def collect_tables(self, table_ids: List[str], duration_minutes: float = 60,
+                       interval: Optional[float] = None, tradeoff: Optional[float] = None,
+                       max_per_host: int = 8, on_result: Optional[Callable[[Dict], None]] = None) -> Dict:
+        """
+        Одновременно собирает историю многих столов и сохраняет ее в базу
+
+        Простыми словами: вместо одного стола с паузой 30 секунд опрашиваем
+        сразу все столы асинхронно через общие постоянные соединения, а каждый
+        стол - в момент, когда на нем ожидается следующий спин
+
+        Args:
+            table_ids: Список tableId
+            duration_minutes: Сколько минут собирать
+            interval: Постоянная пауза между опросами стола в секундах (None - адаптивное
+                расписание по ритму спинов, а если adaptive_polling в CONNECTION_CONFIG
+                выключен - update_interval)
+            tradeoff: Для адаптивного расписания: 0 - быстрее узнавать о спине, 1 - меньше запросов
+                (None - poll_tradeoff из CONNECTION_CONFIG)
+            max_per_host: Сколько запросов к серверу одновременно
+            on_result: Функция, которая вызывается для каждого нового результата
+                после записи в базу (например, бумажная торговля)
+
+        Returns:
+            Статистика сбора (запросы, ошибки, новые результаты, сохранено)
+        """
+        import asyncio
+        from async_collector import AsyncTableCollector, DataCollectorSink, CallbackSink
+        from data_collector import DataCollector
+        from poll_scheduler import PollScheduler
+
+        if interval is None and not CONNECTION_CONFIG.get('adaptive_polling', True):
+            interval = CONNECTION_CONFIG.get('update_interval', 30)
+        if tradeoff is None:
+            tradeoff = CONNECTION_CONFIG.get('poll_tradeoff', 0.5)
+        
+        sink = DataCollectorSink(DataCollector(), self.config.get('casino_name'))
+        collector = AsyncTableCollector.from_config(self.config, table_ids,
+                                                    CallbackSink(on_result, sink) if on_result else sink,
+                                                    interval=interval or 30, max_per_host=max_per_host,
+                                                    scheduler=None if interval else PollScheduler(tradeoff))
+        print(f"🎰 Асинхронный сбор с {len(collector.table_ids)} столов на {duration_minutes} минут...")
+        asyncio.run(collector.run(duration=duration_minutes * 60))
+
+        stats = collector.latency_stats()
+        stats['saved'] = sink.saved
+        print(f"✅ Запросов: {stats['requests']}, ошибок: {stats['errors']}, сохранено: {sink.saved}")
+        return stats
+
     def _save_live_result(self, result: Dict):
         """Сохраняет результат в базу данных"""
         try:
@@ -358,7 +393,9 @@ class LiveDataCollector:
             db = DataCollector()
             db.add_spin(
                 number=result['number'],
-                timestamp=result['timestamp']
+                timestamp=result['timestamp'],
+                table_name=result.get('table_id'),
+                dealer=result.get('dealer')
             )
             print(f"💾 Результат сохранен: {result['number']} ({result['color']})")
             
@@ -427,8 +464,10 @@ class LiveDataCollector:
         
         # Тест веб-скрапинга
         try:
+            from rate_limiter import rate_limited_urlopen, PRIORITY_DISCOVERY
+
             req = urllib.request.Request('https://httpbin.org/get', headers=self.headers)
-            with urllib.request.urlopen(req, timeout=5) as response:
+            with rate_limited_urlopen(req, timeout=5, priority=PRIORITY_DISCOVERY) as response:
                 if response.status == 200:
                     results['scrape'] = True
                     print("🌐 Веб-скрапинг: Соединение доступно")
@@ -26,6 +26,12 @@ try:
     from utils import RouletteUtils, print_roulette_info
     from user_strategies import UserStrategies, get_all_user_strategies
     from live_data_collector import LiveDataCollector
+    from portfolio_analyzer import PortfolioAnalyzer
+    from paper_trading import LivePaperTradingEngine
+    from online_analyzer import OnlinePatternAnalyzer
+    from change_detection import ChangeDetectionMonitor
+    from bias_estimator import BiasEstimator
+    from collector_plugins import run_collectors, DEFAULT_CONFIG_FILES
 except ImportError as e:
     print(f"Ошибка импорта: {e}")
     print("Убедитесь что все файлы находятся в папке src/")
@@ -44,6 +50,7 @@ class RouletteAnalysisSystem:
         self.data_collector = DataCollector("../data/roulette_history.db")
         self.game_analyzer = GameAnalyzer(self.data_collector)
         self.ai_assistant = AIAssistant(self.data_collector, self.game_analyzer)
+        self.portfolio_analyzer = PortfolioAnalyzer(self.data_collector)
         self.utils = RouletteUtils()
         self.live_collector = LiveDataCollector()
         
@@ -102,6 +109,7 @@ class RouletteAnalysisSystem:
             print("2. Создать свою стратегию")
             print("3. Сравнить стратегии")
             print("4. История тестирований")
+            print("5. Портфель стратегий (общий банкролл)")
             print("0. Назад")
             
             choice = input("\nВыберите действие: ").strip()
@@ -112,6 +120,8 @@ class RouletteAnalysisSystem:
                 self.create_custom_strategy()
             elif choice == "3":
                 self.compare_strategies()
+            elif choice == "5":
+                self.test_strategy_portfolio()
             elif choice == "0":
                 break
     
@@ -123,6 +133,8 @@ class RouletteAnalysisSystem:
             print("2. Генерация стратегий ИИ")
             print("3. Тестирование ИИ стратегий")
             print("4. Полный ИИ отчет")
+            print("5. Проверка столов на случайность")
+            print("6. Сравнение дилеров / часов / сессий")
             print("0. Назад")
             
             choice = input("\nВыберите действие: ").strip()
@@ -135,6 +147,10 @@ class RouletteAnalysisSystem:
                 self.ai_test_strategies()
             elif choice == "4":
                 self.ai_full_report()
+            elif choice == "5":
+                self.ai_scan_tables()
+            elif choice == "6":
+                self.ai_segments()
             elif choice == "0":
                 break
     
@@ -328,6 +344,10 @@ class RouletteAnalysisSystem:
                 print(f"\nДлинные серии:")
                 for streak in anomalies['long_color_streaks'][:3]:
                     print(f"  {streak['color']}: {streak['length']} подряд")
+            if anomalies.get('unusual_patterns'):
+                print(f"\nПровалены тесты случайности:")
+                for pattern in anomalies['unusual_patterns']:
+                    print(f"  {pattern['test']}: p={pattern['adjusted_p_value']:.4f} ({pattern['significance']})")
             
             # Волатильность
             volatility = analysis.get('volatility', {})
@@ -340,6 +360,74 @@ class RouletteAnalysisSystem:
         except Exception as e:
             print(f"Ошибка: {e}")
     
+    def ai_scan_tables(self):
+        """Проверка всех столов статистическими тестами случайности"""
+        print("\n--- ПРОВЕРКА СТОЛОВ НА СЛУЧАЙНОСТЬ ---")
+        
+        try:
+            days_back = int(input("За сколько дней проверять (по умолчанию 7): ") or "7")
+            start_date = datetime.now() - timedelta(days=days_back)
+            
+            report = self.ai_assistant.scan_tables_randomness(start_date)
+            
+            if "error" in report:
+                print(f"Ошибка: {report['error']}")
+                return
+            
+            summary = report['summary']
+            print(f"\nПроверено столов: {summary['tables_tested']} (пропущено: {summary['tables_skipped']})")
+            print(f"Выполнено тестов: {summary['tests_run']}")
+            
+            if not report['flagged']:
+                print("✅ Все столы выглядят случайными")
+                return
+            
+            print(f"\n⚠️  Провалены тесты (после поправки на множественное сравнение):")
+            for item in report['flagged'][:20]:
+                print(f"  {item['table']}: {item['test']} (p={item['adjusted_p_value']:.4f})")
+                
+        except ValueError:
+            print("Ошибка: введите корректное число дней")
+        except Exception as e:
+            print(f"Ошибка: {e}")
+    
+    def ai_segments(self):
+        """Сравнение статистики по дилерам, часам суток, сессиям и столам"""
+        print("\n--- СРАВНЕНИЕ СЕГМЕНТОВ ---")
+        
+        try:
+            by = input("Группировать по (dealer/hour/session/table, по умолчанию dealer): ").strip() or "dealer"
+            days_back = int(input("За сколько дней анализировать (по умолчанию 7): ") or "7")
+            start_date = datetime.now() - timedelta(days=days_back)
+            
+            report = self.ai_assistant.analyze_segments(by, start_date)
+            
+            if "error" in report:
+                print(f"Ошибка: {report['error']}")
+                return
+            
+            print(f"\nСегментов: {len(report['segments'])} "
+                  f"(пересчитано: {report['cache']['recomputed']}, из кеша: {report['cache']['reused']})")
+            for name, segment in list(report['segments'].items())[:30]:
+                colors = segment['colors']
+                streaks = segment['streaks']
+                print(f"  {name}: {segment['spins']} спинов, 🔴 {colors['red']}% ⚫ {colors['black']}% 🟢 {colors['green']}%, "
+                      f"ср. расстояние {segment['wheel_distance']['mean']:.1f}, "
+                      f"макс. серия {max(streaks['max_red'], streaks['max_black'])}")
+            
+            if not report['flagged']:
+                print("✅ Подозрительных сегментов не найдено")
+                return
+            
+            print(f"\n⚠️  Подозрительные сегменты (после поправки на множественное сравнение):")
+            for item in report['flagged'][:20]:
+                print(f"  {item['segment']}: {item['test']} (p={item['adjusted_p_value']:.4f})")
+                
+        except ValueError:
+            print("Ошибка: введите корректное число дней")
+        except Exception as e:
+            print(f"Ошибка: {e}")
+    
     def ai_generate_strategies(self):
         """ИИ генерация стратегий"""
         print("\n--- ИИ ГЕНЕРАЦИЯ СТРАТЕГИЙ ---")
@@ -496,6 +584,8 @@ class RouletteAnalysisSystem:
         print("1. Получить последние результаты")
         print("2. Загрузить исторические данные")
         print("3. Тест источников данных")
+        print("4. Сбор по файлам конфигурации (API, консоль, страница)")
+        print("5. Асинхронный сбор истории многих столов")
         print("0. Назад")
         
         choice = input("\nВыберите действие: ").strip()
@@ -506,6 +596,10 @@ class RouletteAnalysisSystem:
             self._load_historical_data()
         elif choice == "3":
             self._test_data_sources()
+        elif choice == "4":
+            self._run_config_collectors()
+        elif choice == "5":
+            self._collect_many_tables()
         elif choice == "0":
             return
     
@@ -521,18 +615,43 @@ class RouletteAnalysisSystem:
             print(f"\n🎰 Запускаем мониторинг на {duration} минут...")
             print("   Нажмите Ctrl+C для остановки")
             
+            # Все стратегии играют виртуально прямо во время мониторинга
+            paper_engine = self._create_paper_engine()
+            
+            # Аналитика обновляется по каждому спину, без пересчета истории
+            online_analyzer = OnlinePatternAnalyzer()
+            
+            # Детекторы смены распределения (CUSUM / SPRT) по каждому столу
+            change_monitor = ChangeDetectionMonitor()
+            
+            # Байесовская оценка перекоса по столам и дилерам
+            bias_estimator = BiasEstimator(by_dealer=True)
+            
+            def on_new_spin(result):
+                paper_engine.on_spin(result)
+                online_analyzer.add_spin(result)
+                bias_estimator.on_spin(result)
+                for alert in change_monitor.on_spin(result):
+                    print(f"   🔔 Сдвиг на столе {alert['table']}: {alert['stream']} ({alert['direction']}, "
+                          f"{alert['detector']}), примерно с {alert['estimated_change_spin']}-го спина")
+                leader = paper_engine.leaderboard(1)[0]
+                print(f"   🏆 Лидер: {leader['strategy_name']} ({leader['profit']:+.2f}), "
+                      f"обработка {paper_engine.latency_stats()['last_us']:.0f} мкс")
+            
             # Запускаем получение данных в реальном времени
-            results = self.live_collector.get_live_stream(duration)
+            try:
+                results = self.live_collector.get_live_stream(duration, on_result=on_new_spin)
+            finally:
+                paper_engine.save_state()
             
             print(f"\n✅ Мониторинг завершен. Получено {len(results)} результатов")
             
             # Показываем статистику полученных данных
             if results:
                 self._show_live_data_stats(results)
-                
-                test_choice = input("\nПротестировать стратегии на новых данных? (y/n): ").strip().lower()
-                if test_choice == 'y':
-                    self.test_predefined_strategies()
+                self._show_paper_leaderboard(paper_engine)
+                self._show_online_snapshot(online_analyzer)
+                self._show_bias_estimates(bias_estimator)
                     
         except KeyboardInterrupt:
             print("\n⏹️  Мониторинг остановлен пользователем")
@@ -541,6 +660,63 @@ class RouletteAnalysisSystem:
         except Exception as e:
             print(f"Ошибка мониторинга: {e}")
     
+    def _create_paper_engine(self) -> LivePaperTradingEngine:
+        """Бумажная торговля всеми пользовательскими и несколькими готовыми стратегиями"""
+        paper_engine = LivePaperTradingEngine(1000.0, "../data/paper_trading_state.json")
+        paper_engine.register_many(get_all_user_strategies(10))
+        paper_engine.register_many([
+            PredefinedStrategies.martingale_red(10),
+            PredefinedStrategies.dozen_rotation(15),
+            PredefinedStrategies.hot_numbers(5, 30)
+        ])
+        return paper_engine
+    
+    def _show_paper_leaderboard(self, paper_engine: LivePaperTradingEngine):
+        """Показать таблицу лидеров бумажной торговли"""
+        print(f"\n🏆 ТАБЛИЦА ЛИДЕРОВ (виртуальные ставки):")
+        print("=" * 40)
+        for i, row in enumerate(paper_engine.leaderboard(), 1):
+            print(f"{i:2d}. {row['strategy_name']}: баланс {row['balance']:.2f}, "
+                  f"прибыль {row['profit']:+.2f}, ставок {row['total_bets']}")
+        
+        latency = paper_engine.latency_stats()
+        print(f"\n⏱️  Обработка спина: в среднем {latency['avg_us']:.0f} мкс, "
+              f"максимум {latency['max_us']:.0f} мкс")
+    
+    def _show_online_snapshot(self, online_analyzer: OnlinePatternAnalyzer):
+        """Показать сводку онлайн-анализатора"""
+        snapshot = online_analyzer.snapshot()
+        if "error" in snapshot:
+            print(f"\n📈 Онлайн-анализ: {snapshot['error']}")
+            return
+        
+        print(f"\n📈 ОНЛАЙН-АНАЛИЗ ({snapshot['total_spins']} спинов):")
+        volatility = snapshot['volatility']
+        if "error" not in volatility:
+            print(f"   Волатильность цветов: {volatility['color_volatility']:.2f} ({volatility['trend']})")
+        
+        hot = snapshot['number_frequency'].get('last_50', {}).get('hot_numbers', [])
+        if hot:
+            print(f"   Горячие числа (50 спинов): {[number for number, _, _ in hot[:5]]}")
+        
+        for half_life, recency in snapshot['recency'].items():
+            print(f"   Свежие горячие числа (полураспад {half_life} спинов): {recency['hot_numbers']}")
+        
+        gaps = snapshot['gaps']['current']
+        longest = max(gaps, key=gaps.get)
+        print(f"   Дольше всех не выпадает: {longest} ({gaps[longest]} спинов)")
+    
+    def _show_bias_estimates(self, bias_estimator: BiasEstimator):
+        """Показать байесовскую оценку перекоса по столам"""
+        print(f"\n🎯 ОЦЕНКА ПЕРЕКОСА ПО СТОЛАМ:")
+        for key, report in bias_estimator.summary().items():
+            top = report['numbers'][0]
+            line = (f"   {key}: {report['spins']} спинов, число {top['number']} "
+                    f"горячее с вероятностью {top['probability_hot']:.0%}")
+            if report['hot_bet']:
+                line += f", ставка на {report['hot_numbers']} выгодна с вероятностью {report['hot_bet']['probability_of_edge']:.0%}"
+            print(line)
+    
     def _get_recent_results(self):
         """Получить последние результаты"""
         try:
@@ -617,6 +793,53 @@ class RouletteAnalysisSystem:
         except Exception as e:
             print(f"Ошибка: {e}")
     
+    def _run_config_collectors(self):
+        """Сбор всеми источниками из файлов конфигурации с записью в базу"""
+        print(f"\n🔌 Источники берутся из: {', '.join(DEFAULT_CONFIG_FILES)}")
+        print("   Повторы отсеиваются, после перезапуска сбор продолжается с записанного")
+        
+        try:
+            duration = float(input("На сколько минут запустить сбор (по умолчанию 60): ") or "60")
+        except ValueError:
+            print("Ошибка: введите корректное число минут")
+            return
+        
+        # Бумажная торговля ведет одну историю спинов, поэтому играет на одном столе
+        paper_table = input("Стол для бумажной торговли (tableId, Enter - без нее): ").strip()
+        paper_engine = self._create_paper_engine() if paper_table else None
+        
+        def on_new_spin(result):
+            if result.get('table_id') == paper_table:
+                paper_engine.on_spin(result)
+        
+        print("   Нажмите Ctrl+C для остановки")
+        try:
+            run_collectors(duration_minutes=duration, on_result=on_new_spin if paper_engine else None)
+        finally:
+            if paper_engine:
+                paper_engine.save_state()
+        
+        if paper_engine and paper_engine.spins_processed:
+            self._show_paper_leaderboard(paper_engine)
+    
+    def _collect_many_tables(self):
+        """Асинхронный сбор истории нескольких столов Pragmatic Play с записью в базу"""
+        tables = input("Столы через запятую (tableId, по умолчанию roulettestura541): ").strip()
+        table_ids = [table.strip() for table in tables.split(",") if table.strip()] or ["roulettestura541"]
+        
+        try:
+            duration = float(input("На сколько минут запустить сбор (по умолчанию 60): ") or "60")
+        except ValueError:
+            print("Ошибка: введите корректное число минут")
+            return
+        
+        print("   Опрос каждого стола подстраивается под ритм его спинов (см. config.py)")
+        print("   Нажмите Ctrl+C для остановки")
+        try:
+            self.live_collector.collect_tables(table_ids, duration)
+        except KeyboardInterrupt:
+            print("\n⏹️  Сбор остановлен пользователем")
+    
     def _test_data_sources(self):
         """Тестирование источников данных"""
         print("\n🔌 Тестирование источников данных...")
@@ -722,6 +945,42 @@ class RouletteAnalysisSystem:
             print("Ошибка: введите корректные числа")
         except Exception as e:
             print(f"Ошибка: {e}")
+    
+    def test_strategy_portfolio(self):
+        """Тестирование портфеля стратегий с общим банкроллом"""
+        print("\n--- ПОРТФЕЛЬ СТРАТЕГИЙ ---")
+        
+        try:
+            days_back = int(input("За сколько дней тестировать (по умолчанию 7): ") or "7")
+            initial_balance = float(input("Общий банкролл (по умолчанию из настроек): ") or "0") or None
+            
+            start_date = datetime.now() - timedelta(days=days_back)
+            strategies = get_all_user_strategies(10)
+            
+            print(f"\nТестирую портфель из {len(strategies)} стратегий на данных за {days_back} дней...")
+            
+            results = self.portfolio_analyzer.test_portfolio(strategies, start_date, None, initial_balance)
+            
+            if "error" in results:
+                print(f"Ошибка: {results['error']}")
+                return
+            
+            print(f"\n=== РЕЗУЛЬТАТЫ ПОРТФЕЛЯ ===")
+            print(f"Начальный банкролл: {results['initial_balance']:.2f}")
+            print(f"Итоговый баланс: {results['final_balance']:.2f}")
+            print(f"Прибыль: {results['total_profit']:.2f} ({results['profit_percentage']:.1f}%)")
+            print(f"Максимальная просадка: {results['max_drawdown']:.2f}")
+            if results['stop_reason']:
+                print(f"Остановка: {results['stop_reason']}")
+            
+            for result in results['strategies']:
+                print(f"  {result['strategy_name']}: прибыль {result['total_profit']:.2f}, "
+                      f"ставок {result['total_bets']}, побед {result['win_rate']:.1f}%")
+                
+        except ValueError:
+            print("Ошибка: введите корректные числа")
+        except Exception as e:
+            print(f"Ошибка: {e}")
 
 
 def main():
@@ -0,0 +1,327 @@
+"""
+ОНЛАЙН-АНАЛИЗАТОР ПАТТЕРНОВ
+==========================
+
+Этот модуль обновляет аналитику по одному спину, без пересчета всей истории.
+
+Простыми словами:
+- Живой сбор добавляет один спин раз в минуту-две
+- Раньше каждый анализ заново перебирал всю историю
+- Здесь каждый новый спин только поправляет счетчики: серии, частоты в окнах,
+  секторы, пропуски чисел, переходы и волатильность
+- Снимок в формате AIAssistant.analyze_data можно получить в любой момент,
+  и он не зависит от длины истории
+"""
+
+import math
+from datetime import datetime
+from collections import Counter
+from typing import List, Dict, Iterable, Union
+
+from utils import RouletteUtils
+from rolling_stats import METRICS, classify_volatility
+from sector_engine import SectorEngine
+from transition_analysis import TransitionAnalyzer
+from streak_engine import StreakEngine
+from bias_estimator import DirichletPosterior
+from decay_tracker import DecayTracker
+from fused_analysis import (wheel_sectors, summarize_sectors, summarize_frequency,
+                            summarize_basic_statistics, summarize_anomalies, summarize_transitions,
+                            summarize_color_streaks, summarize_long_streaks, summarize_streaks,
+                            LONG_STREAK, VOLATILITY_WINDOW, ROLLING_WINDOWS, TRANSITION_ORDER)
+
+
+class WelfordState:
+    """
+    Среднее и дисперсия потока значений (алгоритм Уэлфорда)
+
+    Простыми словами: считаем std без хранения всех значений
+    """
+
+    __slots__ = ("count", "mean", "m2")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, value: float):
+        """Добавляет значение"""
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def std(self) -> float:
+        """Стандартное отклонение (по всей совокупности, как np.std)"""
+        return math.sqrt(self.m2 / self.count) if self.count else 0.0
+
+
+class OnlinePatternAnalyzer:
+    """Аналитика ИИ-ассистента, обновляемая по одному спину"""
+
+    def __init__(self, periods: Iterable[int] = (50, 100, 200),
+                 windows: Iterable[int] = ROLLING_WINDOWS):
+        """
+        Инициализация анализатора
+
+        Args:
+            periods (Iterable[int]): Периоды для частоты чисел
+            windows (Iterable[int]): Окна для скользящей волатильности метрик
+        """
+        self.periods = list(periods)
+        self.windows = sorted(set(windows) | {VOLATILITY_WINDOW})
+        self.metrics = list(METRICS)
+
+        # Для каждого числа - номера метрик, в которые оно попадает
+        self._metrics_of = [[index for index, metric in enumerate(self.metrics) if number in METRICS[metric]]
+                            for number in range(37)]
+
+        self.sectors = wheel_sectors()
+        self._sector_of = [0] * 37
+        for index, (_, sector_numbers) in enumerate(self.sectors):
+            for number in sector_numbers:
+                self._sector_of[number] = index
+
+        # Кольцевой буфер последних чисел (хватает на самый длинный период или окно)
+        self._capacity = max(self.periods + self.windows)
+        self._ring = [0] * self._capacity
+
+        self.reset()
+
+    def reset(self):
+        """Очищает все накопленное состояние"""
+        self.total = 0
+        self.first_timestamp = None
+        self.last_timestamp = None
+
+        # Базовая статистика
+        self.color_counts = {"red": 0, "black": 0, "green": 0}
+        self.even_odd = {"even": 0, "odd": 0, "zero": 0}
+        self.dozens = {1: 0, 2: 0, 3: 0, "zero": 0}
+        self.columns = {1: 0, 2: 0, 3: 0, "zero": 0}
+        self.number_counts = {i: 0 for i in range(37)}
+
+        # Частоты в окнах последних N спинов
+        self.period_counts = {period: [0] * 37 for period in self.periods}
+
+        # Секторы колеса
+        self.sector_hits = [0] * len(self.sectors)
+
+        # Серии цвета, четности, дюжин и т.д.: закрытые серии сворачиваются в гистограммы
+        self.streaks = StreakEngine(long_run=LONG_STREAK)
+
+        # Апостериорное распределение Дирихле для оценки перекоса колеса
+        self.bias = DirichletPosterior()
+
+        # Частоты с затуханием (без хранения окна спинов)
+        self.recency = DecayTracker()
+
+        # Пропуски: когда число выпадало последний раз и самый длинный пропуск
+        self.last_seen = [-1] * 37
+        self.max_gap = [0] * 37
+
+        # Переходы между числами (матрица 37 x 37 и длинные контексты)
+        self.transitions = TransitionAnalyzer(max_order=TRANSITION_ORDER)
+
+        # Скользящие счетчики метрик и их волатильность
+        self.window_counts = {window: [0] * len(self.metrics) for window in self.windows}
+        self.window_volatility = {window: [WelfordState() for _ in self.metrics] for window in self.windows}
+
+    @classmethod
+    def from_spins(cls, spins: List[Dict], **kwargs) -> "OnlinePatternAnalyzer":
+        """Создает анализатор и прогоняет через него историю"""
+        analyzer = cls(**kwargs)
+        for spin in spins:
+            analyzer.add_spin(spin)
+        return analyzer
+
+    def add_spin(self, spin: Union[Dict, int]):
+        """
+        Учитывает один новый спин
+
+        Простыми словами: поправляем все счетчики за постоянное время.
+        Метод можно передавать сборщикам как обработчик on_result.
+
+        Args:
+            spin: Словарь спина (number, color, timestamp) или просто число
+        """
+        if isinstance(spin, dict):
+            number = spin['number']
+            color = spin.get('color') or RouletteUtils.get_color(number)
+            timestamp = spin.get('timestamp')
+        else:
+            number = spin
+            color = RouletteUtils.get_color(number)
+            timestamp = None
+
+        position = self.total
+        ring = self._ring
+        capacity = self._capacity
+
+        if timestamp is not None:
+            if self.first_timestamp is None:
+                self.first_timestamp = timestamp
+            self.last_timestamp = timestamp
+
+        # Базовая статистика
+        self.color_counts[color] += 1
+        if number == 0:
+            self.even_odd["zero"] += 1
+            self.dozens["zero"] += 1
+            self.columns["zero"] += 1
+        else:
+            self.even_odd["even" if number % 2 == 0 else "odd"] += 1
+            self.dozens[(number - 1) // 12 + 1] += 1
+            self.columns[((number - 1) % 3) + 1] += 1
+        self.number_counts[number] += 1
+        self.sector_hits[self._sector_of[number]] += 1
+
+        # Частоты периодов: новое число входит, выпавшее из периода - уходит
+        for period, counts in self.period_counts.items():
+            counts[number] += 1
+            if position >= period:
+                counts[ring[(position - period) % capacity]] -= 1
+
+        # Скользящие окна метрик и волатильность по Уэлфорду
+        new_metrics = self._metrics_of[number]
+        for window in self.windows:
+            counts = self.window_counts[window]
+            for index in new_metrics:
+                counts[index] += 1
+            if position >= window:
+                for index in self._metrics_of[ring[(position - window) % capacity]]:
+                    counts[index] -= 1
+            if position >= window - 1:
+                states = self.window_volatility[window]
+                for index, count in enumerate(counts):
+                    states[index].add(count / window * 100)
+
+        ring[position % capacity] = number
+        self.transitions.add(number)
+
+        # Пропуски чисел
+        gap = position - self.last_seen[number] - 1 if self.last_seen[number] >= 0 else position
+        if gap > self.max_gap[number]:
+            self.max_gap[number] = gap
+        self.last_seen[number] = position
+
+        # Серии (зеро прерывает серию и само не считается)
+        self.streaks.add(number)
+        self.bias.add(number)
+        self.recency.add(number)
+
+        self.total += 1
+
+    # Совместимость с обработчиками живого сбора (как LivePaperTradingEngine.on_spin)
+    on_spin = add_spin
+
+    def _color_patterns(self) -> Dict:
+        """Статистика серий, включая текущую незакрытую серию"""
+        if self.total < 10:
+            return {"error": "Недостаточно данных"}
+        return summarize_color_streaks(self.streaks)
+
+    def _metric_volatility(self, window: int, index: int) -> Dict:
+        """Волатильность одной метрики в одном окне"""
+        state = self.window_volatility[window][index]
+        if not state.count:
+            return {"error": "Недостаточно данных для окон"}
+        return classify_volatility(self.metrics[index], window, state.mean, state.std())
+
+    def gaps(self) -> Dict:
+        """
+        Пропуски чисел
+
+        Returns:
+            Dict: current - сколько спинов число не выпадает, max - самый длинный пропуск
+        """
+        current = {number: (self.total - self.last_seen[number] - 1 if self.last_seen[number] >= 0 else self.total)
+                   for number in range(37)}
+        longest = {number: max(self.max_gap[number], current[number]) for number in range(37)}
+        return {"current": current, "max": longest}
+
+    def snapshot(self) -> Dict:
+        """
+        Снимок аналитики в формате AIAssistant.analyze_data
+
+        Простыми словами: собираем отчет из готовых счетчиков,
+        время не зависит от количества спинов
+
+        Returns:
+            Dict: Полный анализ (или ошибка, если данных мало)
+        """
+        if self.total < 50:
+            return {"error": "Недостаточно данных для анализа (минимум 50 спинов)"}
+
+        start = self.first_timestamp
+        end = self.last_timestamp or datetime.now()
+
+        red_index = self.metrics.index("red")
+        red_volatility = self._metric_volatility(VOLATILITY_WINDOW, red_index)
+        if "error" in red_volatility:
+            volatility = {"error": "Недостаточно данных"}
+        else:
+            volatility = {
+                "color_volatility": red_volatility["std"],
+                "trend": red_volatility["trend"],
+                "predictability": red_volatility["predictability"]
+            }
+
+        return {
+            "period": {"start": start, "end": end},
+            "total_spins": self.total,
+            "basic_statistics": summarize_basic_statistics(
+                self.total, start, end, dict(self.color_counts), dict(self.even_odd),
+                dict(self.dozens), dict(self.columns), dict(self.number_counts)),
+            "color_patterns": self._color_patterns(),
+            "number_frequency": {
+                f"last_{period}": summarize_frequency(
+                    Counter({number: count for number, count in enumerate(counts) if count}), period)
+                for period, counts in self.period_counts.items() if self.total >= period
+            },
+            "sector_patterns": summarize_sectors(self.sector_hits, self.total),
+            "anomalies": summarize_anomalies(self.number_counts[0], self.total,
+                                             summarize_long_streaks(self.streaks)),
+            "volatility": volatility,
+            "rolling_volatility": {
+                window: {metric: self._metric_volatility(window, index)
+                         for index, metric in enumerate(self.metrics)}
+                for window in self.windows
+            },
+            "circular_sectors": SectorEngine.from_counts(self.number_counts).analyze(),
+            "transitions": summarize_transitions(self.transitions),
+            "streaks": summarize_streaks(self.streaks),
+            "bias": self.bias.summary(),
+            "recency": self.recency.summary(),
+            "gaps": self.gaps(),
+            "analysis_timestamp": datetime.now()
+        }
+
+
+# Тестирование
+if __name__ == "__main__":
+    import random
+    import time
+
+    print("Тестируем онлайн-анализатор...")
+
+    analyzer = OnlinePatternAnalyzer()
+
+    started = time.perf_counter()
+    for _ in range(5000):
+        analyzer.add_spin(random.randint(0, 36))
+    per_spin_us = (time.perf_counter() - started) / 5000 * 1e6
+
+    started = time.perf_counter()
+    snapshot = analyzer.snapshot()
+    snapshot_ms = (time.perf_counter() - started) * 1000
+
+    print(f"Спинов: {snapshot['total_spins']}")
+    print(f"Обработка спина: {per_spin_us:.1f} мкс, снимок: {snapshot_ms:.2f} мс")
+    print(f"Волатильность: {snapshot['volatility']}")
+    print(f"Горячие числа (50): {snapshot['number_frequency']['last_50']['hot_numbers'][:3]}")
+    longest = max(snapshot['gaps']['current'].items(), key=lambda x: x[1])
+    print(f"Дольше всех не выпадает: {longest[0]} ({longest[1]} спинов)")
+
+    print("\nТест завершен!")
@@ -0,0 +1,252 @@
+"""
+БУМАЖНАЯ ТОРГОВЛЯ В РЕАЛЬНОМ ВРЕМЕНИ
+===================================
+
+Этот модуль ведет все зарегистрированные стратегии прямо во время мониторинга,
+не дожидаясь окончания сбора данных.
+
+Простыми словами:
+- Каждая стратегия "ставит" виртуальные деньги на следующий спин
+- Когда приходит новый результат, ставки сразу рассчитываются
+- Балансы и таблица лидеров всегда в памяти
+- Состояние периодически сохраняется в JSON файл
+- Замеряется время обработки одного спина (в микросекундах)
+"""
+
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Optional
+
+from game_analyzer import GameStrategy, PredefinedStrategies
+from utils import RouletteUtils
+
+
+class PaperAccount:
+    """Виртуальный счет одной стратегии"""
+
+    __slots__ = ("strategy", "initial_balance", "balance", "pending_bet",
+                 "total_bets", "winning_bets", "peak_balance", "max_drawdown")
+
+    def __init__(self, strategy: GameStrategy, initial_balance: float):
+        self.strategy = strategy
+        self.initial_balance = initial_balance
+        self.balance = initial_balance
+        self.pending_bet = None  # (тип, числа, сумма) ставки на следующий спин
+        self.total_bets = 0
+        self.winning_bets = 0
+        self.peak_balance = initial_balance
+        self.max_drawdown = 0.0
+
+
+class LivePaperTradingEngine:
+    """Движок, который продвигает все стратегии на каждом новом спине"""
+
+    def __init__(self, initial_balance: float = 1000.0,
+                 state_path: str = "../data/paper_trading_state.json",
+                 persist_every: int = 10):
+        """
+        Инициализация движка
+
+        Args:
+            initial_balance (float): Стартовый баланс каждой стратегии по умолчанию
+            state_path (str): Файл для сохранения балансов и таблицы лидеров
+            persist_every (int): Сохранять состояние каждые N спинов (0 - не сохранять)
+        """
+        self.initial_balance = initial_balance
+        self.state_path = Path(state_path)
+        self.persist_every = persist_every
+        self.accounts: List[PaperAccount] = []
+        self.history: List[Dict] = []
+        self.spins_processed = 0
+        self.utils = RouletteUtils()
+
+        # Статистика задержки обработки спина (наносекунды)
+        self._latency_last = 0
+        self._latency_total = 0
+        self._latency_max = 0
+
+    def register(self, strategy: GameStrategy, initial_balance: float = None):
+        """
+        Регистрирует стратегию в движке
+
+        Простыми словами: Стратегия сразу делает ставку на следующий спин
+
+        Args:
+            strategy (GameStrategy): Стратегия
+            initial_balance (float): Стартовый баланс (по умолчанию общий для движка)
+        """
+        balance = self.initial_balance if initial_balance is None else initial_balance
+        strategy.reset(balance)
+
+        account = PaperAccount(strategy, balance)
+        self.accounts.append(account)
+        self._place_bet(account)
+
+    def register_many(self, strategies: List[GameStrategy]):
+        """Регистрирует несколько стратегий с балансом по умолчанию"""
+        for strategy in strategies:
+            self.register(strategy)
+
+    def on_spin(self, spin: Dict):
+        """
+        Обрабатывает новый результат спина
+
+        Простыми словами: Рассчитываем ставки всех стратегий и сразу делаем новые.
+        Этот метод можно передавать сборщикам данных как обработчик новых спинов.
+
+        Args:
+            spin (Dict): Результат спина (нужен как минимум ключ 'number')
+        """
+        started = time.perf_counter_ns()
+
+        winning_number = spin['number']
+        calculate_payout = self.utils.calculate_payout
+
+        # 1. Рассчитываем ставки, сделанные на этот спин
+        for account in self.accounts:
+            bet = account.pending_bet
+            if bet is None:
+                continue
+
+            bet_type, bet_numbers, amount = bet
+            payout = calculate_payout(bet_type, amount, winning_number, bet_numbers)
+            account.balance += payout - amount
+            account.total_bets += 1
+            if payout > 0:
+                account.winning_bets += 1
+
+            if account.balance > account.peak_balance:
+                account.peak_balance = account.balance
+            elif account.peak_balance - account.balance > account.max_drawdown:
+                account.max_drawdown = account.peak_balance - account.balance
+
+        # 2. Дополняем общую историю (список только растет, копий не делаем)
+        self.history.append(spin)
+        self.spins_processed += 1
+
+        # 3. Стратегии делают ставки на следующий спин
+        for account in self.accounts:
+            self._place_bet(account)
+
+        elapsed = time.perf_counter_ns() - started
+        self._latency_last = elapsed
+        self._latency_total += elapsed
+        if elapsed > self._latency_max:
+            self._latency_max = elapsed
+
+        if self.persist_every and self.spins_processed % self.persist_every == 0:
+            self.save_state()
+
+    def _place_bet(self, account: PaperAccount):
+        """Запрашивает у стратегии ставку на следующий спин"""
+        account.pending_bet = None
+
+        if account.balance <= 0:
+            return
+
+        strategy = account.strategy
+        spin_number = len(self.history) + 1
+        strategy.current_spin = spin_number
+        strategy.balance = account.balance
+
+        bet_info = strategy.make_bet(spin_number, self.history)
+        amount = min(bet_info.get("amount", 0), account.balance)
+
+        if bet_info.get("type") == "skip" or amount <= 0:
+            return
+
+        account.pending_bet = (bet_info.get("type", "color"), bet_info.get("numbers", []), amount)
+
+    def leaderboard(self, top: Optional[int] = None) -> List[Dict]:
+        """
+        Таблица лидеров по прибыли
+
+        Args:
+            top (int): Сколько лучших стратегий вернуть (по умолчанию все)
+
+        Returns:
+            List[Dict]: Стратегии, отсортированные по прибыли
+        """
+        board = []
+        for account in self.accounts:
+            profit = account.balance - account.initial_balance
+            board.append({
+                "strategy_name": account.strategy.name,
+                "initial_balance": account.initial_balance,
+                "balance": account.balance,
+                "profit": profit,
+                "profit_percentage": profit / account.initial_balance * 100 if account.initial_balance else 0,
+                "total_bets": account.total_bets,
+                "win_rate": account.winning_bets / account.total_bets * 100 if account.total_bets else 0,
+                "max_drawdown": account.max_drawdown,
+                "active": account.balance > 0
+            })
+
+        board.sort(key=lambda x: x["profit"], reverse=True)
+        return board[:top] if top else board
+
+    def latency_stats(self) -> Dict:
+        """
+        Статистика времени обработки спина
+
+        Returns:
+            Dict: Последняя, средняя и максимальная задержка в микросекундах
+        """
+        average = self._latency_total / self.spins_processed if self.spins_processed else 0
+        return {
+            "last_us": self._latency_last / 1000,
+            "avg_us": average / 1000,
+            "max_us": self._latency_max / 1000,
+            "strategies": len(self.accounts)
+        }
+
+    def save_state(self):
+        """Сохраняет балансы и таблицу лидеров в JSON файл"""
+        state = {
+            "updated_at": datetime.now().isoformat(),
+            "spins_processed": self.spins_processed,
+            "latency": self.latency_stats(),
+            "leaderboard": self.leaderboard()
+        }
+
+        try:
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            # Пишем во временный файл, чтобы не оставить битый JSON при сбое
+            temp_path = self.state_path.with_suffix(".tmp")
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f, ensure_ascii=False, indent=2)
+            temp_path.replace(self.state_path)
+        except OSError as e:
+            print(f"❌ Ошибка сохранения состояния бумажной торговли: {e}")
+
+
+# Тестирование
+if __name__ == "__main__":
+    import random
+
+    print("Тестируем бумажную торговлю...")
+
+    engine = LivePaperTradingEngine(1000.0, "../data/test_paper_trading.json", persist_every=100)
+
+    # Сотни стратегий для проверки скорости
+    for bet in range(1, 101):
+        engine.register(PredefinedStrategies.martingale_red(bet))
+        engine.register(PredefinedStrategies.dozen_rotation(bet))
+        engine.register(PredefinedStrategies.hot_numbers(bet, 30))
+
+    for _ in range(500):
+        number = random.randint(0, 36)
+        engine.on_spin({'number': number, 'color': RouletteUtils.get_color(number)})
+
+    print(f"\nОбработано спинов: {engine.spins_processed}")
+    latency = engine.latency_stats()
+    print(f"Стратегий: {latency['strategies']}")
+    print(f"Задержка на спин: средняя {latency['avg_us']:.0f} мкс, максимальная {latency['max_us']:.0f} мкс")
+
+    print("\nТоп-5 стратегий:")
+    for row in engine.leaderboard(5):
+        print(f"  {row['strategy_name']}: баланс {row['balance']:.2f}, прибыль {row['profit']:.2f}")
+
+    print("\nТест завершен!")
@@ -0,0 +1,229 @@
+"""
+АДАПТИВНОЕ РАСПИСАНИЕ ОПРОСА
+===========================
+
+Этот модуль решает, когда опрашивать стол в следующий раз.
+
+Простыми словами:
+- Раньше опрос шел с постоянной паузой (30 или 120 секунд), не глядя на то,
+  как часто на столе на самом деле крутят рулетку
+- Планировщик запоминает интервалы между спинами каждого стола (по gameTime)
+  и опрашивает стол сразу после того, как должен появиться следующий результат
+- Небольшой случайный разброс (jitter) не дает всем столам опрашиваться одновременно
+- Если стол "молчит" (перерыв, смена дилера), паузы постепенно растут
+- Настройка tradeoff: 0 - узнавать о спине как можно быстрее (больше запросов),
+  1 - меньше запросов (результат приходит позже)
+"""
+
+import random
+import time
+from collections import deque
+from datetime import datetime
+from typing import List, Dict, Optional
+
+
+# Интервал между спинами, пока о столе ничего не известно (секунды)
+DEFAULT_SPIN_INTERVAL = 45.0
+
+# Баланс "задержка / число запросов" по умолчанию
+DEFAULT_TRADEOFF = 0.5
+
+# Сколько последних интервалов между спинами помнить
+CADENCE_HISTORY = 50
+
+# Небольшая пауза после ожидаемого спина, чтобы результат успел попасть в API
+RESULT_LAG = 1.0
+
+
+def _epoch(timestamp) -> Optional[float]:
+    """Время игры в секундах Unix (None, если времени нет)"""
+    if isinstance(timestamp, datetime):
+        return timestamp.timestamp()
+    if isinstance(timestamp, str):
+        try:
+            return datetime.fromisoformat(timestamp.replace('Z', '+00:00')).timestamp()
+        except ValueError:
+            return None
+    return None
+
+
+class TableCadence:
+    """Ритм спинов одного стола"""
+
+    def __init__(self, history: int = CADENCE_HISTORY):
+        self.intervals = deque(maxlen=history)
+        self.last_game = None
+        # Минимальная разница "наши часы - время игры": сдвиг часов плюс задержка API
+        self.offset = None
+        self.idle_polls = 0
+        self.stats = {"polls": 0, "hits": 0, "latency_total": 0.0}
+
+    def quantile(self, q: float) -> float:
+        """Квантиль интервала между спинами"""
+        if not self.intervals:
+            return DEFAULT_SPIN_INTERVAL
+        ordered = sorted(self.intervals)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class PollScheduler:
+    """Планировщик опросов для многих столов"""
+
+    def __init__(self, tradeoff: float = DEFAULT_TRADEOFF, min_delay: float = 2.0,
+                 max_delay: float = 300.0, jitter: float = 0.1, idle_backoff: float = 2.0,
+                 history: int = CADENCE_HISTORY, rng: random.Random = None):
+        """
+        Args:
+            tradeoff (float): 0 - минимальная задержка получения спина, 1 - минимум запросов
+            min_delay (float): Минимальная пауза между опросами стола
+            max_delay (float): Максимальная пауза (в том числе при долгом простое)
+            jitter (float): Случайный разброс паузы (0.1 = +-10%)
+            idle_backoff (float): Во сколько раз растет пауза после каждого пустого опроса
+            history (int): Сколько последних интервалов между спинами помнить
+            rng (random.Random): Генератор случайных чисел (для воспроизводимых тестов)
+        """
+        if not 0 <= tradeoff <= 1:
+            raise ValueError("tradeoff должен быть от 0 до 1")
+        self.tradeoff = tradeoff
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.idle_backoff = idle_backoff
+        self.history = history
+        self.rng = rng or random.Random()
+        self.tables: Dict[str, TableCadence] = {}
+
+    def _table(self, table_id: str) -> TableCadence:
+        cadence = self.tables.get(table_id)
+        if cadence is None:
+            cadence = self.tables[table_id] = TableCadence(self.history)
+        return cadence
+
+    def observe(self, table_id: str, new_results: List[Dict], now: float = None):
+        """
+        Учитывает результат опроса
+
+        Args:
+            table_id (str): Стол
+            new_results (List[Dict]): Новые игры этого опроса (в любом порядке, с timestamp)
+            now (float): Время опроса (time.time), для тестов
+        """
+        now = time.time() if now is None else now
+        cadence = self._table(table_id)
+        cadence.stats["polls"] += 1
+
+        games = sorted(t for t in (_epoch(result.get('timestamp')) for result in new_results) if t is not None)
+        if not games:
+            cadence.idle_polls += 1
+            return
+
+        cadence.idle_polls = 0
+        cadence.stats["hits"] += 1
+        previous = cadence.last_game
+        for game in games:
+            if previous is not None and game > previous:
+                cadence.intervals.append(game - previous)
+            previous = game
+        cadence.last_game = max(games[-1], cadence.last_game or games[-1])
+
+        offset = now - cadence.last_game
+        if cadence.offset is not None:
+            # Задержка обнаружения нового спина относительно лучшего возможного случая
+            cadence.stats["latency_total"] += max(0.0, offset - cadence.offset)
+        cadence.offset = offset if cadence.offset is None else min(cadence.offset, offset)
+
+    def next_delay(self, table_id: str, now: float = None) -> float:
+        """
+        Пауза до следующего опроса стола
+
+        Простыми словами: ожидаемый момент следующего спина - время последней
+        игры плюс квантиль интервала (ниже квантиль при tradeoff ближе к 0 -
+        опрашиваем раньше). Если этот момент прошел, а спина нет - повторяем
+        через короткие паузы; если стол молчит намного дольше обычного, каждая
+        следующая пауза в idle_backoff раз длиннее
+
+        Returns:
+            float: Пауза в секундах
+        """
+        now = time.time() if now is None else now
+        cadence = self._table(table_id)
+        typical = cadence.quantile(0.5)
+
+        if cadence.last_game is None:
+            delay = typical * (0.25 + 0.5 * self.tradeoff)
+        else:
+            last_seen = cadence.last_game + cadence.offset
+            expected = last_seen + cadence.quantile(0.25 + 0.5 * self.tradeoff)
+            delay = expected + RESULT_LAG - now
+            if delay <= 0:
+                # Спин запаздывает: короткие повторы
+                delay = typical * (0.1 + 0.3 * self.tradeoff)
+                # Стол молчит дольше обычного - паузы растут вместе с простоем
+                overdue = now - last_seen - 2 * cadence.quantile(0.95)
+                if overdue > 0:
+                    delay = max(delay, overdue * (self.idle_backoff - 1))
+
+        delay *= 1 + self.rng.uniform(-self.jitter, self.jitter)
+        return max(self.min_delay, min(self.max_delay, delay))
+
+    def summary(self) -> Dict[str, Dict]:
+        """
+        Сводка по столам
+
+        Returns:
+            Dict[str, Dict]: Для каждого стола - медианный интервал спинов, число
+                опросов, доля результативных опросов и средняя задержка получения спина
+        """
+        result = {}
+        for table_id, cadence in self.tables.items():
+            stats = cadence.stats
+            hits = stats["hits"]
+            result[table_id] = {
+                "median_interval": cadence.quantile(0.5),
+                "polls": stats["polls"],
+                "hit_rate": hits / stats["polls"] if stats["polls"] else 0.0,
+                "avg_latency": stats["latency_total"] / (hits - 1) if hits > 1 else 0.0,
+                "idle_polls": cadence.idle_polls
+            }
+        return result
+
+
+# Тестирование
+if __name__ == "__main__":
+    from datetime import timedelta
+
+    print("Тестируем адаптивное расписание...")
+
+    def simulate(tradeoff: float = None, fixed: float = None, hours: float = 3.0, seed: int = 0):
+        """Один стол: спин каждые ~40 с, час простоя в середине"""
+        rng = random.Random(seed)
+        spins, moment = [], 0.0
+        while moment < hours * 3600:
+            moment += rng.uniform(35, 45) if not 3600 <= moment < 7200 else 3600
+            spins.append(moment)
+
+        scheduler = PollScheduler(tradeoff if tradeoff is not None else DEFAULT_TRADEOFF, rng=random.Random(seed + 1))
+        start = datetime(2026, 1, 1)
+        clock, seen, polls, latency = 0.0, 0, 0, 0.0
+        while clock < hours * 3600:
+            polls += 1
+            fresh = [spin for spin in spins[seen:] if spin + 0.5 <= clock]
+            latency += sum(clock - spin for spin in fresh)
+            seen += len(fresh)
+            scheduler.observe("t", [{'timestamp': start + timedelta(seconds=spin)} for spin in fresh],
+                              now=start.timestamp() + clock)
+            clock += fixed if fixed else scheduler.next_delay("t", now=start.timestamp() + clock)
+        return polls, latency / max(1, seen)
+
+    def average(**kwargs):
+        """Среднее по 10 прогонам"""
+        runs = [simulate(seed=seed, **kwargs) for seed in range(10)]
+        return sum(run[0] for run in runs) / len(runs), sum(run[1] for run in runs) / len(runs)
+
+    polls, latency = average(fixed=30)
+    print(f"Фиксированные 30 с: запросов {polls:.0f}, средняя задержка {latency:.1f} с")
+    for tradeoff in (0.0, 0.5, 1.0):
+        polls, latency = average(tradeoff=tradeoff)
+        print(f"Адаптивно, tradeoff={tradeoff}: запросов {polls:.0f}, средняя задержка {latency:.1f} с")
+
+    print("\nТест завершен!")
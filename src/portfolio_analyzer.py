@@ -0,0 +1,306 @@
+"""
+ПОРТФЕЛЬНЫЙ АНАЛИЗАТОР СТРАТЕГИЙ
+===============================
+
+Этот модуль тестирует сразу несколько стратегий, которые играют с ОДНИМ общим банкроллом.
+
+Простыми словами:
+- Все стратегии делают ставки на каждом спине одновременно
+- Ставки списываются с общего баланса
+- Каждой стратегии можно ограничить долю банкролла
+- Работают стоп-лосс и тейк-профит из STRATEGY_CONFIG
+- Показывает насколько похожи кривые доходности стратегий (корреляция)
+"""
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+import sys
+import math
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Dict, Optional
+
+from data_collector import DataCollector
+from game_analyzer import GameStrategy, PredefinedStrategies
+from utils import RouletteUtils
+
+# config.py лежит в корне проекта
+sys.path.append(str(Path(__file__).parent.parent))
+from config import STRATEGY_CONFIG
+
+
+class PortfolioAnalyzer:
+    """Тестирование набора стратегий на общем банкролле"""
+
+    def __init__(self, data_collector: DataCollector):
+        """
+        Инициализация анализатора портфеля
+
+        Args:
+            data_collector (DataCollector): Сборщик данных для получения истории
+        """
+        self.data_collector = data_collector
+        self.utils = RouletteUtils()
+
+    def test_portfolio(self, strategies: List[GameStrategy], start_date: datetime,
+                       end_date: datetime = None, initial_balance: float = None,
+                       allocations: Optional[Dict[str, float]] = None,
+                       stop_loss: float = None, take_profit: float = None) -> Dict:
+        """
+        Тестирует портфель стратегий с общим банкроллом
+
+        Простыми словами: Все стратегии играют одновременно из одного кошелька.
+        Проход по истории один, на каждом спине работа пропорциональна числу стратегий.
+
+        Args:
+            strategies (List[GameStrategy]): Стратегии портфеля
+            start_date (datetime): Начальная дата периода
+            end_date (datetime): Конечная дата периода
+            initial_balance (float): Общий банкролл (по умолчанию STRATEGY_CONFIG['bankroll'])
+            allocations (Dict[str, float]): Максимальная доля текущего баланса на ставку
+                для каждой стратегии по имени (по умолчанию поровну 1/N)
+            stop_loss (float): Стоп-лосс в деньгах (по умолчанию STRATEGY_CONFIG['stop_loss'])
+            take_profit (float): Тейк-профит в деньгах (по умолчанию STRATEGY_CONFIG['take_profit'])
+
+        Returns:
+            Dict: Результаты портфеля и каждой стратегии
+        """
+        if not strategies:
+            return {"error": "Портфель пуст"}
+
+        if initial_balance is None:
+            initial_balance = STRATEGY_CONFIG['bankroll']
+        if stop_loss is None:
+            stop_loss = STRATEGY_CONFIG['stop_loss']
+        if take_profit is None:
+            take_profit = STRATEGY_CONFIG['take_profit']
+
+        spins = self.data_collector.get_spins_by_period(start_date, end_date)
+
+        if len(spins) < 10:
+            return {"error": "Недостаточно данных для тестирования"}
+
+        count = len(strategies)
+        names = [strategy.name for strategy in strategies]
+        allocations = allocations or {}
+        caps = [min(max(allocations.get(name, 1.0 / count), 0.0), 1.0) for name in names]
+
+        for strategy in strategies:
+            strategy.reset(initial_balance)
+
+        print(f"Тестируем портфель из {count} стратегий на {len(spins)} спинах...")
+
+        # Состояние каждой стратегии внутри портфеля
+        profits = [0.0] * count
+        total_bets = [0] * count
+        winning_bets = [0] * count
+        peaks = [0.0] * count
+        drawdowns = [0.0] * count
+        curves = [[] for _ in range(count)]
+
+        balance = initial_balance
+        peak_balance = initial_balance
+        max_drawdown = 0.0
+        equity_curve = []
+        stop_reason = None
+
+        # История общая для всех стратегий и только дополняется,
+        # поэтому не копируем ее на каждом спине
+        history = []
+        calculate_payout = self.utils.calculate_payout
+
+        for i, spin in enumerate(spins):
+            if balance <= 0:
+                stop_reason = "bankrupt"
+                print("Общий баланс исчерпан, тестирование остановлено")
+                break
+
+            spin_number = i + 1
+            available = balance
+            placed = [None] * count
+
+            # Сначала все стратегии делают ставки
+            for k, strategy in enumerate(strategies):
+                cap = min(caps[k] * balance, available)
+                strategy.current_spin = spin_number
+                strategy.balance = cap  # Стратегия видит только свою долю
+
+                bet_info = strategy.make_bet(spin_number, history)
+                amount = min(bet_info.get("amount", 0), cap)
+
+                if bet_info.get("type") == "skip" or amount <= 0:
+                    continue
+
+                available -= amount
+                placed[k] = (bet_info, amount)
+
+            # Потом все ставки рассчитываются по одному результату
+            winning_number = spin['number']
+            for k in range(count):
+                bet = placed[k]
+                if bet is not None:
+                    bet_info, amount = bet
+                    payout = calculate_payout(bet_info.get("type", "color"), amount,
+                                              winning_number, bet_info.get("numbers", []))
+                    delta = payout - amount
+                    balance += delta
+                    profits[k] += delta
+                    total_bets[k] += 1
+                    if payout > 0:
+                        winning_bets[k] += 1
+
+                    if profits[k] > peaks[k]:
+                        peaks[k] = profits[k]
+                    elif peaks[k] - profits[k] > drawdowns[k]:
+                        drawdowns[k] = peaks[k] - profits[k]
+
+                curves[k].append(profits[k])
+
+            history.append(spin)
+            equity_curve.append(balance)
+
+            if balance > peak_balance:
+                peak_balance = balance
+            elif peak_balance - balance > max_drawdown:
+                max_drawdown = peak_balance - balance
+
+            if stop_loss and initial_balance - balance >= stop_loss:
+                stop_reason = "stop_loss"
+                print(f"Сработал стоп-лосс на спине {spin_number}, баланс: {balance:.2f}")
+                break
+
+            if take_profit and balance - initial_balance >= take_profit:
+                stop_reason = "take_profit"
+                print(f"Сработал тейк-профит на спине {spin_number}, баланс: {balance:.2f}")
+                break
+
+        total_profit = balance - initial_balance
+
+        strategy_results = []
+        for k in range(count):
+            win_rate = (winning_bets[k] / total_bets[k] * 100) if total_bets[k] > 0 else 0
+            strategy_results.append({
+                "strategy_name": names[k],
+                "allocation": caps[k],
+                "total_profit": profits[k],
+                "total_bets": total_bets[k],
+                "winning_bets": winning_bets[k],
+                "losing_bets": total_bets[k] - winning_bets[k],
+                "win_rate": win_rate,
+                "max_drawdown": drawdowns[k]
+            })
+
+        results = {
+            "strategy_names": names,
+            "period": {"start": start_date, "end": end_date or datetime.now()},
+            "initial_balance": initial_balance,
+            "final_balance": balance,
+            "total_profit": total_profit,
+            "profit_percentage": (total_profit / initial_balance * 100),
+            "max_drawdown": max_drawdown,
+            "stop_reason": stop_reason,
+            "spins_tested": len(equity_curve),
+            "strategies": strategy_results,
+            "equity_curve": equity_curve,
+            "correlation": {
+                "names": names,
+                "matrix": self._equity_correlation(curves)
+            }
+        }
+
+        return results
+
+    def _equity_correlation(self, curves: List[List[float]]) -> List[List[float]]:
+        """
+        Считает корреляцию между кривыми доходности стратегий
+
+        Простыми словами: Сравниваем изменения прибыли стратегий от спина к спину.
+        Накопленные кривые почти всегда "коррелируют" из-за тренда,
+        поэтому берем приращения.
+
+        Args:
+            curves (List[List[float]]): Накопленная прибыль каждой стратегии по спинам
+
+        Returns:
+            List[List[float]]: Матрица корреляций (0 для стратегий без ставок)
+        """
+        count = len(curves)
+
+        if NUMPY_AVAILABLE and curves and len(curves[0]) > 1:
+            increments = np.diff(np.asarray(curves, dtype=float), axis=1, prepend=0.0)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                matrix = np.corrcoef(increments)
+            matrix = np.nan_to_num(np.atleast_2d(matrix), nan=0.0)
+            np.fill_diagonal(matrix, 1.0)
+            return matrix.tolist()
+
+        # Вычисляем вручную
+        increments = []
+        for curve in curves:
+            previous = 0.0
+            row = []
+            for value in curve:
+                row.append(value - previous)
+                previous = value
+            increments.append(row)
+
+        length = len(increments[0]) if increments else 0
+        means = [sum(row) / length if length else 0.0 for row in increments]
+
+        matrix = [[1.0 if a == b else 0.0 for b in range(count)] for a in range(count)]
+        for a in range(count):
+            for b in range(a + 1, count):
+                cov = var_a = var_b = 0.0
+                for x, y in zip(increments[a], increments[b]):
+                    dx = x - means[a]
+                    dy = y - means[b]
+                    cov += dx * dy
+                    var_a += dx * dx
+                    var_b += dy * dy
+                if var_a > 0 and var_b > 0:
+                    matrix[a][b] = matrix[b][a] = cov / math.sqrt(var_a * var_b)
+
+        return matrix
+
+
+# Тестирование
+if __name__ == "__main__":
+    print("Тестируем портфельный анализатор...")
+
+    collector = DataCollector("../data/test_portfolio.db")
+
+    start_date = datetime.now() - timedelta(days=3)
+    print("Генерируем тестовые данные...")
+    collector.generate_random_spins(300, start_date)
+
+    analyzer = PortfolioAnalyzer(collector)
+
+    strategies = [
+        PredefinedStrategies.martingale_red(10),
+        PredefinedStrategies.dozen_rotation(15),
+        PredefinedStrategies.hot_numbers(5, 30)
+    ]
+
+    results = analyzer.test_portfolio(strategies, start_date, initial_balance=5000,
+                                      allocations={"Мартингейл Красное": 0.5})
+
+    print(f"\n=== РЕЗУЛЬТАТЫ ПОРТФЕЛЯ ===")
+    print(f"Итоговый баланс: {results['final_balance']:.2f}")
+    print(f"Прибыль: {results['total_profit']:.2f} ({results['profit_percentage']:.1f}%)")
+    print(f"Максимальная просадка: {results['max_drawdown']:.2f}")
+    print(f"Причина остановки: {results['stop_reason'] or 'конец данных'}")
+
+    for result in results['strategies']:
+        print(f"\n{result['strategy_name']} (доля {result['allocation']:.0%}):")
+        print(f"  Прибыль: {result['total_profit']:.2f}")
+        print(f"  Ставок: {result['total_bets']}, процент побед: {result['win_rate']:.1f}%")
+
+    print("\nКорреляция кривых доходности:")
+    for name, row in zip(results['correlation']['names'], results['correlation']['matrix']):
+        print(f"  {name}: " + " ".join(f"{value:+.2f}" for value in row))
+
+    print("\nТест завершен!")
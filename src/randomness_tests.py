@@ -0,0 +1,480 @@
+"""
+СТАТИСТИЧЕСКИЕ ТЕСТЫ СЛУЧАЙНОСТИ
+===============================
+
+Этот модуль проверяет, похожа ли история стола на честную рулетку.
+
+Простыми словами:
+- Хи-квадрат: все ли числа выпадают одинаково часто
+- Тест серий (Вальда-Вольфовица): не слишком ли много/мало смен красного
+- Автокорреляция: зависит ли число от предыдущих
+- Тест интервалов: нормальные ли промежутки между красными
+- Тест собирателя купонов: сколько спинов нужно, чтобы выпали все 37 чисел
+- Тест соседей на колесе: не падает ли шарик слишком близко к прошлому числу
+- Все тесты считаются через numpy сразу для сотен столов
+- p-значения поправляются на множественное сравнение (Бенджамини-Хохберг или Бонферрони)
+"""
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+try:
+    from scipy import stats as scipy_stats
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+import math
+from typing import List, Dict, Sequence
+
+from utils import RouletteUtils
+
+
+TEST_NAMES = ["chi_square", "runs", "autocorrelation", "gap", "coupon_collector", "wheel_distance"]
+
+# Тест интервалов: промежутки 0..GAP_BINS-1 между красными + "хвост"
+GAP_BINS = 6
+# Тест собирателя купонов: столько равновероятных корзин по длине сборки
+COUPON_BINS = 5
+
+
+def chi_square_sf(statistic, df):
+    """
+    p-значение хи-квадрат (вероятность получить статистику не меньше)
+
+    Простыми словами: если есть scipy - точное значение, иначе
+    приближение Уилсона-Хилферти (хорошо работает уже при df >= 3)
+    """
+    statistic = np.asarray(statistic, dtype=float)
+    df = np.asarray(df, dtype=float)
+    if SCIPY_AVAILABLE:
+        return scipy_stats.chi2.sf(statistic, df)
+
+    ratio = np.cbrt(np.maximum(statistic, 0) / df)
+    z = (ratio - (1 - 2 / (9 * df))) / np.sqrt(2 / (9 * df))
+    return 0.5 * _erfc(z / math.sqrt(2))
+
+
+def normal_two_sided(z):
+    """Двустороннее p-значение для z-оценки"""
+    return _erfc(np.abs(np.asarray(z, dtype=float)) / math.sqrt(2))
+
+
+def _erfc(values):
+    """Поэлементная erfc для numpy массива"""
+    values = np.asarray(values, dtype=float)
+    return np.vectorize(math.erfc, otypes=[float])(values) if values.size else values
+
+
+def adjust_p_values(p_values, method: str = "bh"):
+    """
+    Поправка на множественное сравнение
+
+    Простыми словами: если проверить сотни столов, какие-то "провалят" тест
+    чисто случайно. Поправка делает p-значения честнее.
+
+    Args:
+        p_values: Массив p-значений (NaN - тест не выполнялся)
+        method (str): "bh" (Бенджамини-Хохберг) или "bonferroni"
+
+    Returns:
+        numpy массив поправленных p-значений той же формы
+    """
+    p_values = np.asarray(p_values, dtype=float)
+    flat = p_values.ravel()
+    adjusted = np.full(flat.shape, np.nan)
+    valid = ~np.isnan(flat)
+    count = int(valid.sum())
+    if not count:
+        return adjusted.reshape(p_values.shape)
+
+    valid_p = flat[valid]
+    if method == "bonferroni":
+        adjusted[valid] = np.minimum(1.0, valid_p * count)
+    elif method == "bh":
+        order = np.argsort(valid_p)
+        ranked = valid_p[order] * count / np.arange(1, count + 1)
+        # Монотонность: идем с конца и берем накопленный минимум
+        ranked = np.minimum.accumulate(ranked[::-1])[::-1]
+        result = np.empty(count)
+        result[order] = np.minimum(1.0, ranked)
+        adjusted[valid] = result
+    else:
+        raise ValueError(f"Неизвестный метод поправки: {method}")
+
+    return adjusted.reshape(p_values.shape)
+
+
+def coupon_length_distribution(coupons: int = 37, tolerance: float = 1e-10) -> List[float]:
+    """
+    Точное распределение длины сборки всех купонов
+
+    Простыми словами: probabilities[r] - вероятность того, что последнее
+    из 37 чисел впервые выпадет ровно на спине r
+
+    Returns:
+        List[float]: Вероятности по длине (индекс = длина)
+    """
+    distinct = [0.0] * (coupons + 1)  # вероятность иметь j разных чисел
+    distinct[0] = 1.0
+    probabilities = [0.0]
+    collected = 0.0
+    spins = 0
+
+    while collected < 1 - tolerance:
+        spins += 1
+        # Собрать все на этом спине = было coupons-1 разных и выпало недостающее
+        finish = distinct[coupons - 1] / coupons
+        probabilities.append(finish)
+        collected += finish
+
+        updated = [0.0] * (coupons + 1)
+        for j in range(coupons):
+            if distinct[j]:
+                updated[j] += distinct[j] * j / coupons
+                updated[j + 1] += distinct[j] * (coupons - j) / coupons
+        updated[coupons] = 0.0  # собранные уже учтены в probabilities
+        distinct = updated
+
+    return probabilities
+
+
+def _coupon_bins(bins: int = COUPON_BINS):
+    """Границы корзин длины сборки с почти равными вероятностями"""
+    probabilities = coupon_length_distribution()
+    cumulative = 0.0
+    edges = []
+    for length, probability in enumerate(probabilities):
+        cumulative += probability
+        if len(edges) < bins - 1 and cumulative >= (len(edges) + 1) / bins:
+            edges.append(length + 1)  # корзина: длина < edge
+
+    bin_probabilities = []
+    lower = 0
+    for edge in edges + [len(probabilities)]:
+        bin_probabilities.append(sum(probabilities[lower:edge]))
+        lower = edge
+    bin_probabilities[-1] += 1 - sum(bin_probabilities)
+    return edges, bin_probabilities
+
+
+class RandomnessTestSuite:
+    """Набор тестов случайности для одного или многих столов"""
+
+    def __init__(self, max_lag: int = 5, alpha: float = 0.05,
+                 correction: str = "bh", min_spins: int = 100):
+        """
+        Args:
+            max_lag (int): До какого лага проверять автокорреляцию
+            alpha (float): Уровень значимости после поправки
+            correction (str): "bh" или "bonferroni"
+            min_spins (int): Минимум спинов для проверки стола
+        """
+        self.max_lag = max_lag
+        self.alpha = alpha
+        self.correction = correction
+        self.min_spins = min_spins
+        self._red_lookup = None
+        self._wheel_position = None
+        self._coupon_edges = None
+        self._coupon_probabilities = None
+
+    def run(self, sequences: Dict[str, Sequence[int]]) -> Dict:
+        """
+        Прогоняет все тесты по всем столам
+
+        Простыми словами: столы с одинаковой длиной истории проверяются
+        одной матричной операцией, затем все p-значения поправляются вместе
+
+        Args:
+            sequences (Dict[str, Sequence[int]]): Название стола -> выпавшие числа
+
+        Returns:
+            Dict: tables - результаты по столам, flagged - провалившиеся тесты,
+                summary - сколько столов и тестов проверено
+        """
+        if not NUMPY_AVAILABLE:
+            return {"error": "Для тестов случайности нужен numpy"}
+
+        self._prepare_tables()
+
+        tables = {}
+        skipped = {}
+        groups: Dict[int, List[str]] = {}
+        for name, numbers in sequences.items():
+            if len(numbers) < self.min_spins:
+                skipped[name] = f"Недостаточно данных (минимум {self.min_spins} спинов)"
+                continue
+            groups.setdefault(len(numbers), []).append(name)
+
+        for names in groups.values():
+            matrix = np.asarray([sequences[name] for name in names], dtype=np.intp)
+            group_results = self._run_group(matrix)
+            for row, name in enumerate(names):
+                tables[name] = {test: group_results[test][row] for test in TEST_NAMES}
+
+        # Поправка по всем (стол, тест) сразу
+        names = list(tables)
+        raw = np.array([[tables[name][test]["p_value"] if tables[name][test]["p_value"] is not None else np.nan
+                         for test in TEST_NAMES] for name in names], dtype=float).reshape(len(names), len(TEST_NAMES))
+        adjusted = adjust_p_values(raw, self.correction)
+
+        flagged = []
+        for row, name in enumerate(names):
+            for column, test in enumerate(TEST_NAMES):
+                result = tables[name][test]
+                value = adjusted[row, column]
+                result["adjusted_p_value"] = None if np.isnan(value) else float(value)
+                result["passed"] = None if np.isnan(value) else bool(value >= self.alpha)
+                if result["passed"] is False:
+                    flagged.append({"table": name, "test": test,
+                                    "p_value": result["p_value"],
+                                    "adjusted_p_value": result["adjusted_p_value"]})
+
+        flagged.sort(key=lambda x: x["adjusted_p_value"])
+        for name, reason in skipped.items():
+            tables[name] = {"error": reason}
+
+        return {
+            "tables": tables,
+            "flagged": flagged,
+            "summary": {
+                "tables_tested": len(names),
+                "tables_skipped": len(skipped),
+                "tests_run": int((~np.isnan(raw)).sum()),
+                "correction": self.correction,
+                "alpha": self.alpha
+            }
+        }
+
+    def run_single(self, numbers: Sequence[int]) -> Dict:
+        """
+        Тесты для одной истории
+
+        Returns:
+            Dict: Результаты тестов и список провалившихся (или ошибка)
+        """
+        report = self.run({"table": numbers})
+        if "error" in report:
+            return report
+        result = report["tables"]["table"]
+        if "error" in result:
+            return result
+        return {"tests": result, "flagged": [item["test"] for item in report["flagged"]]}
+
+    def _prepare_tables(self):
+        """Справочные массивы, которые нужны всем тестам"""
+        if self._red_lookup is not None:
+            return
+        self._red_lookup = np.zeros(37, dtype=bool)
+        self._red_lookup[list(RouletteUtils.RED_NUMBERS)] = True
+        self._wheel_position = np.zeros(37, dtype=np.intp)
+        self._wheel_position[RouletteUtils.WHEEL_ORDER] = np.arange(37)
+        self._coupon_edges, self._coupon_probabilities = _coupon_bins()
+
+    @staticmethod
+    def _row_bincount(values, bins: int):
+        """bincount по каждой строке матрицы (значения 0..bins-1)"""
+        rows = values.shape[0]
+        offsets = (np.arange(rows) * bins)[:, None]
+        return np.bincount((values + offsets).ravel(), minlength=rows * bins).reshape(rows, bins)
+
+    @staticmethod
+    def _pack(statistics, df, p_values, extra: Dict = None) -> List[Dict]:
+        """Раскладывает массивы результатов по столам"""
+        results = []
+        for row in range(len(statistics)):
+            p_value = p_values[row]
+            item = {
+                "statistic": float(statistics[row]),
+                "df": int(df[row]) if np.ndim(df) else int(df),
+                "p_value": None if np.isnan(p_value) else float(p_value)
+            }
+            if extra:
+                for key, values in extra.items():
+                    value = values[row]
+                    item[key] = value.tolist() if hasattr(value, "tolist") else value
+            results.append(item)
+        return results
+
+    def _run_group(self, matrix) -> Dict[str, List[Dict]]:
+        """Все тесты для столов одинаковой длины (матрица столы x спины)"""
+        return {
+            "chi_square": self._chi_square(matrix),
+            "runs": self._runs(matrix),
+            "autocorrelation": self._autocorrelation(matrix),
+            "gap": self._gap(matrix),
+            "coupon_collector": self._coupon_collector(matrix),
+            "wheel_distance": self._wheel_distance(matrix)
+        }
+
+    def _chi_square(self, matrix) -> List[Dict]:
+        """Хи-квадрат: равномерность 37 чисел"""
+        length = matrix.shape[1]
+        counts = self._row_bincount(matrix, 37)
+        expected = length / 37
+        statistic = ((counts - expected) ** 2 / expected).sum(axis=1)
+        return self._pack(statistic, 36, chi_square_sf(statistic, 36))
+
+    def _runs(self, matrix) -> List[Dict]:
+        """Тест серий Вальда-Вольфовица: красное против остального"""
+        red = self._red_lookup[matrix]
+        length = matrix.shape[1]
+        n1 = red.sum(axis=1).astype(float)
+        n2 = length - n1
+        runs = 1 + (red[:, 1:] != red[:, :-1]).sum(axis=1)
+
+        mean = 2 * n1 * n2 / length + 1
+        variance = 2 * n1 * n2 * (2 * n1 * n2 - length) / (length ** 2 * (length - 1))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            z = np.where(variance > 0, (runs - mean) / np.sqrt(variance), np.nan)
+        p_values = np.where(np.isnan(z), np.nan, normal_two_sided(np.nan_to_num(z)))
+        return self._pack(np.nan_to_num(z), 0, p_values, {"runs": runs, "expected_runs": mean})
+
+    def _autocorrelation(self, matrix) -> List[Dict]:
+        """Автокорреляция чисел на лагах 1..max_lag и статистика Льюнга-Бокса"""
+        length = matrix.shape[1]
+        centered = matrix - matrix.mean(axis=1, keepdims=True)
+        denominator = (centered ** 2).sum(axis=1)
+        lags = range(1, min(self.max_lag, length - 1) + 1)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            correlations = np.stack([(centered[:, :-lag] * centered[:, lag:]).sum(axis=1) / denominator
+                                     for lag in lags], axis=1)
+        correlations = np.nan_to_num(correlations)
+        weights = np.array([length - lag for lag in lags], dtype=float)
+        statistic = length * (length + 2) * (correlations ** 2 / weights).sum(axis=1)
+        df = len(weights)
+        return self._pack(statistic, df, chi_square_sf(statistic, df), {"lags": correlations})
+
+    def _gap(self, matrix) -> List[Dict]:
+        """Тест интервалов: распределение промежутков между красными"""
+        red = self._red_lookup[matrix]
+        rows, columns = np.nonzero(red)
+        same_row = rows[1:] == rows[:-1]
+        gaps = np.minimum(columns[1:] - columns[:-1] - 1, GAP_BINS)[same_row]
+        gap_rows = rows[1:][same_row]
+
+        counts = np.zeros((matrix.shape[0], GAP_BINS + 1), dtype=np.int64)
+        np.add.at(counts, (gap_rows, gaps), 1)
+
+        p = len(RouletteUtils.RED_NUMBERS) / 37
+        probabilities = np.array([p * (1 - p) ** k for k in range(GAP_BINS)] + [(1 - p) ** GAP_BINS])
+        total_gaps = counts.sum(axis=1, keepdims=True)
+        expected = total_gaps * probabilities
+        with np.errstate(divide="ignore", invalid="ignore"):
+            statistic = np.where(expected > 0, (counts - expected) ** 2 / expected, 0).sum(axis=1)
+        p_values = np.where(total_gaps[:, 0] > 0, chi_square_sf(statistic, GAP_BINS), np.nan)
+        return self._pack(statistic, GAP_BINS, p_values, {"gaps": total_gaps[:, 0]})
+
+    @staticmethod
+    def _coupon_lengths(matrix) -> List[List[int]]:
+        """
+        Длины сборок всех 37 чисел подряд по каждой строке
+
+        Простыми словами: сборка, начатая с позиции s, заканчивается там, где
+        впервые после s выпадает последнее из 37 чисел. Для числа, которое уже
+        было до s, это следующее выпадение после его прошлого раза, поэтому
+        конец сборки с s - накопленный максимум "следующих выпадений" всех
+        позиций до s. Чтобы учесть и числа, которых до s еще не было, перед
+        строкой ставятся 37 "виртуальных" спинов 0..36 - их следующее
+        выпадение и есть первое. Следующее выпадение каждой позиции берется
+        из устойчивой сортировки строки по числу, дальше сборки идут прыжками
+        от конца одной к началу следующей сразу по всем строкам
+        """
+        rows, length = matrix.shape
+        width = length + 37
+        extended = np.empty((rows, width), dtype=np.uint8)
+        extended[:, :37] = np.arange(37)
+        extended[:, 37:] = matrix
+
+        order = np.argsort(extended, axis=1, kind="stable")
+        ordered = np.take_along_axis(extended, order, axis=1)
+        same = ordered[:, 1:] == ordered[:, :-1]
+        row_index = np.arange(rows)
+        following = np.empty((rows, width), dtype=np.int64)
+        following[row_index[:, None], order[:, :-1]] = np.where(same, order[:, 1:], width)
+        following[row_index, order[:, -1]] = width
+        # following[s + 36] - 37 - конец сборки, начатой с позиции s (>= length - не собрана)
+        np.maximum.accumulate(following, axis=1, out=following)
+
+        lengths = [[] for _ in range(rows)]
+        starts = np.zeros(rows, dtype=np.int64)
+        active = row_index if length else row_index[:0]
+        while active.size:
+            ends = following[active, starts[active] + 36] - 37
+            complete = ends < length
+            active, ends = active[complete], ends[complete]
+            for row, size in zip(active.tolist(), (ends - starts[active] + 1).tolist()):
+                lengths[row].append(size)
+            starts[active] = ends + 1
+            active = active[starts[active] < length]
+        return lengths
+
+    def _coupon_collector(self, matrix) -> List[Dict]:
+        """Тест собирателя купонов: за сколько спинов выпадают все 37 чисел"""
+        edges = np.asarray(self._coupon_edges)
+        probabilities = np.asarray(self._coupon_probabilities)
+        bins = len(probabilities)
+        statistics = np.zeros(matrix.shape[0])
+        p_values = np.full(matrix.shape[0], np.nan)
+        segments_count = np.zeros(matrix.shape[0], dtype=np.int64)
+
+        for row, lengths in enumerate(self._coupon_lengths(matrix)):
+            segments_count[row] = len(lengths)
+            # Хи-квадрат имеет смысл, когда в корзинах ожидается хотя бы по 2 сборки
+            if len(lengths) < 2 * bins:
+                continue
+            counts = np.bincount(np.searchsorted(edges, lengths, side="right"), minlength=bins)
+            expected = len(lengths) * probabilities
+            statistics[row] = ((counts - expected) ** 2 / expected).sum()
+            p_values[row] = chi_square_sf(statistics[row], bins - 1)
+
+        return self._pack(statistics, bins - 1, p_values, {"segments": segments_count})
+
+    def _wheel_distance(self, matrix) -> List[Dict]:
+        """Тест соседей: расстояние по колесу между соседними спинами"""
+        positions = self._wheel_position[matrix]
+        steps = np.abs(np.diff(positions, axis=1))
+        distance = np.minimum(steps, 37 - steps)  # 0..18
+        counts = self._row_bincount(distance, 19)
+
+        probabilities = np.array([1 / 37] + [2 / 37] * 18)
+        expected = (matrix.shape[1] - 1) * probabilities
+        statistic = ((counts - expected) ** 2 / expected).sum(axis=1)
+        return self._pack(statistic, 18, chi_square_sf(statistic, 18))
+
+
+# Тестирование
+if __name__ == "__main__":
+    import random
+    import time
+
+    print("Тестируем статистические тесты случайности...")
+
+    tables = {f"table_{i}": [random.randint(0, 36) for _ in range(1000)] for i in range(300)}
+    # Один "плохой" стол: шарик часто падает рядом с прошлым числом
+    biased = [random.randint(0, 36)]
+    wheel = RouletteUtils.WHEEL_ORDER
+    for _ in range(999):
+        if random.random() < 0.3:
+            biased.append(wheel[(wheel.index(biased[-1]) + 1) % 37])
+        else:
+            biased.append(random.randint(0, 36))
+    tables["biased_table"] = biased
+
+    suite = RandomnessTestSuite()
+    started = time.perf_counter()
+    report = suite.run(tables)
+    elapsed = time.perf_counter() - started
+
+    print(f"Проверено столов: {report['summary']['tables_tested']}, тестов: {report['summary']['tests_run']}")
+    print(f"Время: {elapsed * 1000:.0f} мс (scipy: {SCIPY_AVAILABLE})")
+    print("Провалившиеся тесты после поправки:")
+    for item in report["flagged"][:10]:
+        print(f"  {item['table']}: {item['test']} (p={item['adjusted_p_value']:.2e})")
+
+    print("\nТест завершен!")
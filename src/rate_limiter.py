@@ -0,0 +1,353 @@
+"""
+ОБЩИЙ ОГРАНИЧИТЕЛЬ ЧАСТОТЫ ЗАПРОСОВ
+==================================
+
+Этот модуль следит, чтобы все сборщики вместе не превышали лимит запросов
+API_CONFIG['rate_limit'] (запросов в минуту) к одному серверу.
+
+Простыми словами:
+- У каждого сервера (host) есть "ведро жетонов": жетоны добавляются с
+  постоянной скоростью (rate_limit в минуту), каждый запрос забирает один жетон
+- Если жетонов нет - запрос ждет; сколько ждали, записывается в статистику
+- Запросы с приоритетом: сначала живые опросы, потом догрузка истории,
+  в конце - поиск API и проверки
+- Ограничитель один на весь процесс (get_rate_limiter), а при указанном
+  файле состояния - общий для нескольких процессов
+"""
+
+import heapq
+import itertools
+import json
+import sys
+import threading
+import time
+import urllib.parse
+import urllib.request
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+# Добавляем путь к корню проекта для импорта конфигурации
+sys.path.append(str(Path(__file__).parent.parent))
+from config import API_CONFIG
+
+
+# Приоритеты запросов (меньше - важнее)
+PRIORITY_LIVE = 0
+PRIORITY_BACKFILL = 1
+PRIORITY_DISCOVERY = 2
+
+PRIORITY_NAMES = {
+    PRIORITY_LIVE: "live",
+    PRIORITY_BACKFILL: "backfill",
+    PRIORITY_DISCOVERY: "discovery"
+}
+
+
+def request_host(target) -> str:
+    """Сервер запроса: из адреса, urllib.request.Request или уже готового имени"""
+    if isinstance(target, urllib.request.Request):
+        return target.host.lower()
+    if "://" in target:
+        return (urllib.parse.urlsplit(target).netloc or target).lower()
+    return target.lower()
+
+
+class RateLimiter:
+    """Ведро жетонов для каждого сервера с очередью по приоритетам"""
+
+    def __init__(self, rate_per_minute: float = 60, burst: Optional[float] = None,
+                 host_rates: Dict[str, float] = None, state_file: Optional[str] = None):
+        """
+        Args:
+            rate_per_minute (float): Запросов в минуту к одному серверу
+            burst (float): Сколько запросов можно сделать подряд без ожидания
+                (по умолчанию - лимит на 5 секунд, но не меньше 1)
+            host_rates (Dict[str, float]): Свой лимит в минуту для отдельных серверов
+            state_file (str): Файл общего состояния для нескольких процессов
+                (None - лимит только внутри процесса)
+        """
+        self.rate_per_minute = rate_per_minute
+        self.burst = burst
+        self.host_rates = {host.lower(): rate for host, rate in (host_rates or {}).items()}
+        self.state_file = state_file
+        if state_file and not FCNTL_AVAILABLE:
+            print("⚠️ Общий лимит между процессами недоступен на этой системе, лимит только для процесса")
+            self.state_file = None
+
+        self._lock = threading.RLock()
+        self._condition = threading.Condition(self._lock)
+        self._buckets: Dict[str, list] = {}
+        self._waiters: Dict[str, list] = {}
+        self._sequence = itertools.count()
+        self._stats: Dict[str, Dict] = {}
+
+    def _rate(self, host: str) -> float:
+        """Жетонов в секунду для сервера"""
+        return self.host_rates.get(host, self.rate_per_minute) / 60.0
+
+    def _capacity(self, host: str) -> float:
+        if self.burst is not None:
+            return self.burst
+        return max(1.0, self._rate(host) * 5)
+
+    def _refill(self, state: list, host: str, now: float):
+        """Добавляет жетоны за прошедшее время; state = [жетоны, время]"""
+        if state[1] is not None:
+            state[0] = min(self._capacity(host), state[0] + (now - state[1]) * self._rate(host))
+        state[1] = now
+
+    def _take_token(self, host: str) -> float:
+        """
+        Пытается забрать жетон
+
+        Returns:
+            float: 0 - жетон получен, иначе через сколько секунд он появится
+        """
+        if self.state_file:
+            return self._take_shared_token(host)
+
+        state = self._buckets.get(host)
+        if state is None:
+            state = self._buckets[host] = [self._capacity(host), None]
+        self._refill(state, host, time.monotonic())
+        if state[0] >= 1:
+            state[0] -= 1
+            return 0.0
+        return (1 - state[0]) / self._rate(host)
+
+    def _take_shared_token(self, host: str) -> float:
+        """То же, что _take_token, но ведро хранится в файле под блокировкой"""
+        path = Path(self.state_file)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a+", encoding="utf-8") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                try:
+                    buckets = json.loads(f.read() or "{}")
+                except ValueError:
+                    buckets = {}
+                state = buckets.get(host) or [self._capacity(host), None]
+                # Между процессами общее только время по часам системы
+                self._refill(state, host, time.time())
+                wait = 0.0
+                if state[0] >= 1:
+                    state[0] -= 1
+                else:
+                    wait = (1 - state[0]) / self._rate(host)
+                buckets[host] = state
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(buckets))
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+        return wait
+
+    def _enqueue(self, host: str, priority: int) -> tuple:
+        """Ставит запрос в очередь сервера"""
+        ticket = (priority, next(self._sequence))
+        heapq.heappush(self._waiters.setdefault(host, []), ticket)
+        return ticket
+
+    def _dequeue(self, host: str, ticket: tuple):
+        """Убирает запрос из очереди (получил жетон или отменен)"""
+        waiters = self._waiters[host]
+        if waiters and waiters[0] == ticket:
+            heapq.heappop(waiters)
+        elif ticket in waiters:
+            waiters.remove(ticket)
+            heapq.heapify(waiters)
+        self._condition.notify_all()
+
+    def _try_acquire(self, host: str, ticket: tuple) -> float:
+        """Жетон достается только первому в очереди; остальные ждут своей очереди"""
+        waiters = self._waiters[host]
+        if waiters[0] != ticket:
+            return 1 / self._rate(host)
+        wait = self._take_token(host)
+        if not wait:
+            self._dequeue(host, ticket)
+        return wait
+
+    def _record(self, host: str, priority: int, waited: float):
+        """Записывает время ожидания в статистику"""
+        stats = self._stats.setdefault(host, {"acquired": 0, "wait_total": 0.0, "wait_max": 0.0,
+                                              "by_priority": {}})
+        stats["acquired"] += 1
+        stats["wait_total"] += waited
+        stats["wait_max"] = max(stats["wait_max"], waited)
+        name = PRIORITY_NAMES.get(priority, str(priority))
+        by_priority = stats["by_priority"].setdefault(name, {"acquired": 0, "wait_total": 0.0})
+        by_priority["acquired"] += 1
+        by_priority["wait_total"] += waited
+
+    def acquire(self, target: Union[str, urllib.request.Request], priority: int = PRIORITY_LIVE) -> float:
+        """
+        Ждет разрешения на запрос (блокирующий вариант)
+
+        Args:
+            target: Адрес, Request или имя сервера
+            priority (int): PRIORITY_LIVE, PRIORITY_BACKFILL или PRIORITY_DISCOVERY
+
+        Returns:
+            float: Сколько секунд пришлось ждать
+        """
+        host = request_host(target)
+        started = time.monotonic()
+        with self._condition:
+            ticket = self._enqueue(host, priority)
+            try:
+                while True:
+                    wait = self._try_acquire(host, ticket)
+                    if not wait:
+                        break
+                    self._condition.wait(wait)
+            except BaseException:
+                self._dequeue(host, ticket)
+                raise
+            waited = time.monotonic() - started
+            self._record(host, priority, waited)
+        return waited
+
+    async def acquire_async(self, target: Union[str, urllib.request.Request],
+                            priority: int = PRIORITY_LIVE) -> float:
+        """То же, что acquire, но ожидание не блокирует цикл событий asyncio"""
+        import asyncio
+
+        host = request_host(target)
+        started = time.monotonic()
+        with self._lock:
+            ticket = self._enqueue(host, priority)
+        try:
+            while True:
+                with self._lock:
+                    wait = self._try_acquire(host, ticket)
+                if not wait:
+                    break
+                await asyncio.sleep(wait)
+        except BaseException:
+            with self._lock:
+                self._dequeue(host, ticket)
+            raise
+        waited = time.monotonic() - started
+        with self._lock:
+            self._record(host, priority, waited)
+        return waited
+
+    def stats(self) -> Dict[str, Dict]:
+        """
+        Статистика ожидания по серверам
+
+        Returns:
+            Dict[str, Dict]: Для каждого сервера - сколько запросов прошло, суммарное,
+                среднее и максимальное ожидание, а также разбивка по приоритетам
+        """
+        with self._lock:
+            result = {}
+            for host, stats in self._stats.items():
+                result[host] = {
+                    **stats,
+                    "avg_wait": stats["wait_total"] / stats["acquired"] if stats["acquired"] else 0.0,
+                    "by_priority": {name: dict(values) for name, values in stats["by_priority"].items()},
+                    "waiting": len(self._waiters.get(host, []))
+                }
+            return result
+
+
+_shared_limiter: Optional[RateLimiter] = None
+_shared_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """
+    Общий ограничитель процесса, настроенный по API_CONFIG
+
+    Простыми словами: все сборщики берут жетоны из одного места,
+    поэтому лимит соблюдается для всех вместе
+    """
+    global _shared_limiter
+    with _shared_lock:
+        if _shared_limiter is None:
+            _shared_limiter = RateLimiter(
+                rate_per_minute=API_CONFIG.get('rate_limit', 60),
+                burst=API_CONFIG.get('rate_limit_burst'),
+                host_rates=API_CONFIG.get('host_rate_limits'),
+                state_file=API_CONFIG.get('rate_limit_state_file')
+            )
+        return _shared_limiter
+
+
+def rate_limited_urlopen(request: Union[str, urllib.request.Request], timeout: float = None,
+                         priority: int = PRIORITY_LIVE, limiter: RateLimiter = None):
+    """
+    urllib.request.urlopen с ожиданием жетона общего ограничителя
+
+    Args:
+        request: Адрес или urllib.request.Request
+        timeout (float): Таймаут запроса
+        priority (int): Приоритет запроса
+        limiter (RateLimiter): Ограничитель (по умолчанию общий для процесса)
+
+    Returns:
+        Ответ urllib.request.urlopen
+    """
+    (limiter or get_rate_limiter()).acquire(request, priority)
+    if timeout is None:
+        return urllib.request.urlopen(request)
+    return urllib.request.urlopen(request, timeout=timeout)
+
+
+# Тестирование
+if __name__ == "__main__":
+    import asyncio
+    import tempfile
+
+    print("Тестируем ограничитель частоты запросов...")
+
+    # 600 запросов в минуту = 10 в секунду, без запаса на серию
+    limiter = RateLimiter(rate_per_minute=600, burst=1)
+    order = []
+
+    def worker(priority: int, count: int):
+        for _ in range(count):
+            limiter.acquire("https://games.example.net/api", priority)
+            order.append(priority)
+
+    threads = [threading.Thread(target=worker, args=(priority, 5))
+               for priority in (PRIORITY_DISCOVERY, PRIORITY_BACKFILL, PRIORITY_LIVE)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+    print(f"15 запросов за {elapsed:.2f} с (ожидалось ~1.4 с)")
+    print(f"Порядок приоритетов: {order}")
+
+    async def async_demo():
+        await asyncio.gather(*(limiter.acquire_async("games.example.net", PRIORITY_LIVE) for _ in range(5)))
+
+    asyncio.run(async_demo())
+    for host, stats in limiter.stats().items():
+        print(f"{host}: запросов {stats['acquired']}, среднее ожидание {stats['avg_wait']:.2f} с, "
+              f"максимум {stats['wait_max']:.2f} с")
+        for name, values in stats["by_priority"].items():
+            print(f"  {name}: {values['acquired']} запросов, ожидание {values['wait_total']:.2f} с")
+
+    if FCNTL_AVAILABLE:
+        with tempfile.TemporaryDirectory() as folder:
+            shared = [RateLimiter(rate_per_minute=600, burst=1, state_file=f"{folder}/limits.json")
+                      for _ in range(2)]
+            started = time.monotonic()
+            for index in range(10):
+                shared[index % 2].acquire("games.example.net")
+            print(f"Два ограничителя с общим файлом: 10 запросов за {time.monotonic() - started:.2f} с")
+
+    print("\nТест завершен!")
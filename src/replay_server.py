@@ -0,0 +1,433 @@
+"""
+ЛОКАЛЬНЫЙ ЗАМЕНИТЕЛЬ API КАЗИНО
+==============================
+
+Этот модуль поднимает локальный HTTP-сервер, который отвечает как API Pragmatic Play.
+
+Простыми словами:
+- Нагрузочно тестировать сборщики на настоящем казино нельзя, поэтому здесь
+  сервер, который отвечает на те же адреса в том же формате:
+  /api/ui/statisticHistory, /api/tables-details и /cgibin/tableconfig.jsp
+- У каждого стола свой поток спинов: случайный (воспроизводимый по seed)
+  или записанный ранее (из нашей базы spins или из сохраненных ответов API)
+- Можно задать задержку ответа, долю ошибок 503, долю отказов 429 и
+  как часто крутится колесо - и так проверить повторы, предохранители,
+  планировщик опросов и скорость записи без интернета
+- Формат tables-details и tableconfig.jsp приблизительный (настоящие ответы
+  у нас не сохранены) - сборщикам из них нужны только tableId и название стола
+"""
+
+import gzip
+import json
+import random
+import sqlite3
+import threading
+import time
+import urllib.parse
+from collections import deque
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from utils import RouletteUtils
+
+
+STATISTIC_HISTORY_PATH = "/api/ui/statisticHistory"
+TABLES_DETAILS_PATH = "/api/tables-details"
+TABLE_CONFIG_PATH = "/cgibin/tableconfig.jsp"
+
+# Настоящий API отдает не больше 500 игр
+MAX_GAMES = 500
+
+DEALER_NAMES = ("Anna", "Maria", "Elena", "Sofia", "Ieva", "Laura", "Kristina", "Olga")
+
+# Смена дилера каждые столько игр
+DEALER_SHIFT_GAMES = 40
+
+# Ответы больше этого размера сжимаются, если клиент принимает gzip
+GZIP_MIN_BYTES = 1024
+
+
+class TableStream:
+    """
+    Поток спинов одного стола
+
+    Простыми словами: игры "происходят" по часам - каждые spin_interval секунд
+    (с разбросом) появляется новая; история за прошлое достраивается при
+    первом обращении, поэтому тысячи столов не стоят ничего, пока их не спросят
+    """
+
+    def __init__(self, table_id: str, spin_interval: float = 45.0, jitter: float = 0.2,
+                 numbers: Optional[Sequence[int]] = None, seed: int = 0,
+                 start_time: float = None, keep: int = MAX_GAMES):
+        """
+        Args:
+            table_id (str): ID стола
+            spin_interval (float): Среднее время между спинами (секунды)
+            jitter (float): Разброс интервала (0.2 - плюс-минус 20%)
+            numbers (Sequence[int]): Записанные числа по порядку (None - случайные)
+            seed (int): Seed генератора (один seed - один и тот же поток)
+            start_time (float): Время запуска сервера (unix); к нему уже есть keep игр истории
+            keep (int): Сколько последних игр хранить
+        """
+        self.table_id = table_id
+        self.spin_interval = spin_interval
+        self.jitter = jitter
+        self.numbers = list(numbers) if numbers else None
+        self.rng = random.Random(f"{seed}:{table_id}")
+        self.dealer_offset = self.rng.randrange(len(DEALER_NAMES))
+        self.games = deque(maxlen=keep)
+        self.game_count = 0
+        self.first_game_id = self.rng.randrange(10_000_000, 90_000_000)
+
+        start_time = time.time() if start_time is None else start_time
+        self.next_time = start_time - keep * spin_interval + self.rng.uniform(0, spin_interval)
+        self._lock = threading.Lock()
+
+    def dealer(self, game_index: int) -> str:
+        """Дилер, который вел игру с этим номером"""
+        return DEALER_NAMES[(self.dealer_offset + game_index // DEALER_SHIFT_GAMES) % len(DEALER_NAMES)]
+
+    def _next_number(self) -> int:
+        if self.numbers:
+            return self.numbers[self.game_count % len(self.numbers)]
+        return self.rng.randint(0, 36)
+
+    def advance(self, now: float = None) -> int:
+        """
+        Доигрывает спины до момента now
+
+        Returns:
+            int: Сколько новых игр появилось
+        """
+        now = time.time() if now is None else now
+        added = 0
+        with self._lock:
+            while self.next_time <= now:
+                number = self._next_number()
+                moment = datetime.fromtimestamp(self.next_time, timezone.utc)
+                game = {
+                    "gameId": str(self.first_game_id + self.game_count),
+                    "gameResult": f"{number} {RouletteUtils.get_color(number).title()}",
+                    "gameTime": moment.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z',
+                    "dealerName": self.dealer(self.game_count)
+                }
+                # Храним сразу готовый JSON игры - ответ собирается склейкой
+                self.games.append((number, json.dumps(game, separators=(',', ':')).encode()))
+                self.game_count += 1
+                added += 1
+                spread = self.spin_interval * self.jitter
+                self.next_time += self.spin_interval + self.rng.uniform(-spread, spread)
+        return added
+
+    def history_body(self, number_of_games: int, now: float = None) -> bytes:
+        """Тело ответа statisticHistory: последние игры, новые первыми"""
+        self.advance(now)
+        with self._lock:
+            count = min(max(number_of_games, 0), len(self.games))
+            fragments = [self.games[-1 - i][1] for i in range(count)]
+        return b'{"history":[' + b','.join(fragments) + b']}'
+
+    def last_numbers(self, limit: int = 10, now: float = None) -> List[int]:
+        """Последние числа стола (новые первыми)"""
+        self.advance(now)
+        with self._lock:
+            return [self.games[-1 - i][0] for i in range(min(limit, len(self.games)))]
+
+    def details(self, now: float = None) -> Dict:
+        """Описание стола для tables-details"""
+        last = self.last_numbers(10, now)
+        return {
+            "tableId": self.table_id,
+            "tableName": f"Roulette {self.table_id}",
+            "gameType": "roulette",
+            "open": True,
+            "dealerName": self.dealer(max(self.game_count - 1, 0)),
+            "lastResults": last
+        }
+
+    def config(self) -> Dict:
+        """Конфигурация стола для tableconfig.jsp"""
+        return {
+            "tableId": self.table_id,
+            "tableName": f"Roulette {self.table_id}",
+            "gameType": "ROULETTE",
+            "minBet": 0.1,
+            "maxBet": 5000,
+            "currency": "GBP",
+            "dealerName": self.dealer(max(self.game_count - 1, 0)),
+            "spinInterval": self.spin_interval
+        }
+
+
+def load_recorded_streams(path: str) -> Dict[str, List[int]]:
+    """
+    Загружает записанные числа по столам
+
+    Простыми словами: можно "проиграть" то, что мы уже собрали -
+    из нашей базы (.db, таблица spins) или из JSON-файла вида
+    {"стол": [числа по порядку]} или {"стол": ответ statisticHistory}
+
+    Args:
+        path (str): Путь к .db или .json
+
+    Returns:
+        Dict[str, List[int]]: Числа каждого стола от старых к новым
+    """
+    path = Path(path)
+    streams: Dict[str, List[int]] = {}
+
+    if path.suffix == '.db':
+        with sqlite3.connect(str(path)) as conn:
+            rows = conn.execute("""
+                SELECT COALESCE(table_name, 'default'), number FROM spins
+                ORDER BY timestamp, id
+            """)
+            for table_name, number in rows:
+                streams.setdefault(table_name, []).append(number)
+        return streams
+
+    from history_parser import parse_history
+
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    for table_id, recorded in data.items():
+        if isinstance(recorded, dict):
+            # Ответ API - игры новые первыми
+            streams[table_id] = parse_history(recorded, table_id).numbers[::-1]
+        else:
+            streams[table_id] = [int(number) for number in recorded]
+    return streams
+
+
+class ReplayServer:
+    """
+    Локальный сервер с API statisticHistory / tables-details / tableconfig.jsp
+    """
+
+    def __init__(self, tables: int = 100, table_ids: Sequence[str] = None,
+                 recorded: Dict[str, Sequence[int]] = None, spin_interval: float = 45.0,
+                 spin_jitter: float = 0.2, latency: float = 0.0, latency_jitter: float = 0.0,
+                 error_rate: float = 0.0, throttle_rate: float = 0.0, retry_after: float = 1.0,
+                 seed: int = 0, host: str = "127.0.0.1", port: int = 0):
+        """
+        Args:
+            tables (int): Сколько синтетических столов создать (если table_ids и recorded не заданы)
+            table_ids (Sequence[str]): Свои ID столов
+            recorded (Dict[str, Sequence[int]]): Записанные числа по столам (см. load_recorded_streams)
+            spin_interval (float): Среднее время между спинами (секунды)
+            spin_jitter (float): Разброс времени между спинами (доля)
+            latency (float): Задержка ответа (секунды)
+            latency_jitter (float): Случайная добавка к задержке (0..latency_jitter секунд)
+            error_rate (float): Доля ответов 503
+            throttle_rate (float): Доля ответов 429 с Retry-After
+            retry_after (float): Значение Retry-After для 429 (секунды)
+            seed (int): Seed для потоков спинов и для ошибок (один seed - один и тот же прогон)
+            host (str): Адрес сервера
+            port (int): Порт (0 - любой свободный)
+        """
+        self.spin_interval = spin_interval
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+        started = time.time()
+        recorded = recorded or {}
+        if table_ids is None:
+            table_ids = list(recorded) or [f"replay{i:05d}" for i in range(tables)]
+        self.streams: Dict[str, TableStream] = {
+            table_id: TableStream(table_id, spin_interval, spin_jitter, recorded.get(table_id), seed, started)
+            for table_id in table_ids
+        }
+
+        self.stats = {"requests": 0, "history": 0, "details": 0, "config": 0, "not_found": 0,
+                      "errors_injected": 0, "throttled": 0, "games_served": 0, "bytes_sent": 0}
+        self._stats_lock = threading.Lock()
+
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def statistic_history_url(self) -> str:
+        """Адрес для AsyncTableCollector(base_url=...)"""
+        return self.base_url + STATISTIC_HISTORY_PATH
+
+    def start(self) -> "ReplayServer":
+        """Запускает сервер в фоновом потоке"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Останавливает сервер"""
+        if self._thread is not None:
+            self._httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._httpd.server_close()
+
+    def __enter__(self) -> "ReplayServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _count(self, **increments):
+        with self._stats_lock:
+            for key, value in increments.items():
+                self.stats[key] += value
+
+    def _fault(self) -> Optional[int]:
+        """Какую ошибку изобразить для этого запроса (None - ответить нормально)"""
+        if not self.error_rate and not self.throttle_rate:
+            return None
+        with self._rng_lock:
+            roll = self.rng.random()
+        if roll < self.throttle_rate:
+            return 429
+        if roll < self.throttle_rate + self.error_rate:
+            return 503
+        return None
+
+    def _delay(self) -> float:
+        if not self.latency_jitter:
+            return self.latency
+        with self._rng_lock:
+            return self.latency + self.rng.uniform(0, self.latency_jitter)
+
+    def handle(self, path: str, query: Dict[str, List[str]]) -> (int, bytes):
+        """
+        Ответ на запрос (без HTTP) - удобно и для тестов без сети
+
+        Returns:
+            (int, bytes): Код ответа и тело
+        """
+        self._count(requests=1)
+        fault = self._fault()
+        if fault == 429:
+            self._count(throttled=1)
+            return 429, b'{"error":"Too Many Requests"}'
+        if fault == 503:
+            self._count(errors_injected=1)
+            return 503, b'{"error":"Service Unavailable"}'
+
+        if path == STATISTIC_HISTORY_PATH:
+            stream = self.streams.get(query.get('tableId', [''])[0])
+            if stream is None:
+                self._count(not_found=1)
+                return 200, b'{"history":[]}'
+            try:
+                number_of_games = min(int(query.get('numberOfGames', ['50'])[0]), MAX_GAMES)
+            except ValueError:
+                number_of_games = 50
+            body = stream.history_body(number_of_games)
+            self._count(history=1, games_served=min(number_of_games, len(stream.games)))
+            return 200, body
+
+        if path == TABLES_DETAILS_PATH:
+            now = time.time()
+            body = json.dumps({"tables": [stream.details(now) for stream in self.streams.values()]}).encode()
+            self._count(details=1)
+            return 200, body
+
+        if path == TABLE_CONFIG_PATH:
+            stream = self.streams.get(query.get('table_id', [''])[0])
+            if stream is None:
+                self._count(not_found=1)
+                return 404, b'{"error":"Unknown table"}'
+            self._count(config=1)
+            return 200, json.dumps(stream.config()).encode()
+
+        self._count(not_found=1)
+        return 404, b'{"error":"Not Found"}'
+
+    def _make_handler(self):
+        server = self
+
+        class ReplayHandler(BaseHTTPRequestHandler):
+            """HTTP/1.1 с keep-alive, как у настоящего API"""
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                parts = urllib.parse.urlsplit(self.path)
+                delay = server._delay()
+                if delay > 0:
+                    time.sleep(delay)
+                status, body = server.handle(parts.path, urllib.parse.parse_qs(parts.query))
+
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                if status == 429:
+                    self.send_header("Retry-After", f"{server.retry_after:g}")
+                if len(body) >= GZIP_MIN_BYTES and 'gzip' in self.headers.get('Accept-Encoding', ''):
+                    body = gzip.compress(body, compresslevel=1)
+                    self.send_header("Content-Encoding", "gzip")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                server._count(bytes_sent=len(body))
+
+            def log_message(self, *args):
+                pass
+
+        return ReplayHandler
+
+
+# Тестирование
+if __name__ == "__main__":
+    import asyncio
+    from async_collector import AsyncTableCollector, QueueSink
+    from http_client import ResilientHTTPClient
+    from rate_limiter import RateLimiter
+
+    print("Тестируем локальный заменитель API...")
+
+    # Формат ответа - тот же, что разбирают сборщики
+    from history_parser import parse_history
+    replay = ReplayServer(tables=3, spin_interval=45, seed=7)
+    status, body = replay.handle(STATISTIC_HISTORY_PATH, {'tableId': ['replay00001'], 'numberOfGames': ['5']})
+    batch = parse_history(body, 'replay00001')
+    print(f"statisticHistory: {status}, игр: {len(batch)}, числа: {batch.numbers}, дилер: {batch.dealers[0]}")
+    again = ReplayServer(tables=3, spin_interval=45, seed=7)
+    same = parse_history(again.handle(STATISTIC_HISTORY_PATH, {'tableId': ['replay00001'],
+                                                                'numberOfGames': ['5']})[1], 'x').numbers
+    print(f"Тот же seed - те же числа: {same == batch.numbers}")
+
+    # Нагрузка: 1000 столов, спин каждые 2 с, 2% ошибок 503, 1% отказов 429
+    tables = 1000
+    with ReplayServer(tables=tables, spin_interval=2.0, latency=0.002, latency_jitter=0.003,
+                      error_rate=0.02, throttle_rate=0.01, retry_after=0.05, seed=1) as server:
+
+        async def benchmark():
+            sink = QueueSink()
+            collector = AsyncTableCollector(list(server.streams), sink, base_url=server.statistic_history_url,
+                                            interval=0.5, max_per_host=32,
+                                            rate_limiter=RateLimiter(rate_per_minute=10_000_000),
+                                            http_client=ResilientHTTPClient(retry_attempts=3, timeout=5,
+                                                                            base_delay=0.05, max_delay=0.5,
+                                                                            failure_threshold=10_000))
+            started = time.perf_counter()
+            await collector.run(rounds=3)
+            elapsed = time.perf_counter() - started
+            stats = collector.latency_stats()
+            print(f"Столов: {tables}, запросов: {stats['requests']} за {elapsed:.1f} с "
+                  f"({stats['requests'] / elapsed:.0f} в секунду), соединений: {stats['connections_opened']}")
+            print(f"Игр в ответах: {stats['games_received']} ({stats['games_received'] / elapsed:.0f} в секунду), "
+                  f"новых результатов: {sink.queue.qsize()}, ошибок после повторов: {stats['errors']}")
+
+        asyncio.run(benchmark())
+        print(f"Сервер: {server.stats}")
+
+    print("\nТест завершен!")
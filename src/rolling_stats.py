@@ -0,0 +1,258 @@
+"""
+СКОЛЬЗЯЩАЯ СТАТИСТИКА НА НАКОПЛЕННЫХ СУММАХ
+==========================================
+
+Этот модуль считает статистику в скользящих окнах за линейное время.
+
+Простыми словами:
+- Для каждой метрики (красное, дюжина, сектор...) один раз считаем
+  накопленную сумму попаданий
+- Количество попаданий в любом окне = разность двух накопленных сумм
+- Не нужно пересчитывать каждое окно заново и делать копии списков
+- Можно сразу считать несколько размеров окон и много метрик
+"""
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+import math
+from itertools import accumulate
+from typing import List, Dict, Iterable, Optional
+
+from utils import RouletteUtils
+
+
+# Базовое окно и пороги волатильности, которые исторически использует ИИ-ассистент
+# (процент красных в окне из 20 спинов: выше 15 - нестабильно, ниже 8 - стабильно)
+BASE_WINDOW = 20
+BASE_VOLATILE_THRESHOLD = 15
+BASE_STABLE_THRESHOLD = 8
+SECTOR_SIZE = 5
+
+
+def _build_metrics() -> Dict[str, frozenset]:
+    """Набор метрик: название -> числа, которые считаются попаданием"""
+    metrics = {
+        "red": frozenset(RouletteUtils.RED_NUMBERS),
+        "black": frozenset(RouletteUtils.BLACK_NUMBERS),
+        "zero": frozenset({0}),
+        "even": frozenset(n for n in range(1, 37) if n % 2 == 0),
+        "odd": frozenset(n for n in range(1, 37) if n % 2 == 1),
+        "low": frozenset(range(1, 19)),
+        "high": frozenset(range(19, 37)),
+    }
+    for dozen in (1, 2, 3):
+        metrics[f"dozen_{dozen}"] = frozenset(n for n in range(1, 37) if RouletteUtils.get_dozen(n) == dozen)
+    for column in (1, 2, 3):
+        metrics[f"column_{column}"] = frozenset(n for n in range(1, 37) if RouletteUtils.get_column(n) == column)
+
+    wheel_order = RouletteUtils.WHEEL_ORDER
+    for start_pos in range(0, 37, SECTOR_SIZE):
+        metrics[f"sector_{start_pos//SECTOR_SIZE + 1}"] = frozenset(wheel_order[start_pos:start_pos + SECTOR_SIZE])
+    return metrics
+
+
+METRICS = _build_metrics()
+
+
+def expected_share_std(metric: str, window: int) -> float:
+    """
+    Ожидаемое стандартное отклонение доли попаданий (в процентах) для честной рулетки
+
+    Args:
+        metric (str): Название метрики
+        window (int): Размер окна
+
+    Returns:
+        float: 100 * sqrt(p * (1 - p) / window)
+    """
+    p = len(METRICS[metric]) / 37
+    return 100 * math.sqrt(p * (1 - p) / window)
+
+
+def classify_volatility(metric: str, window: int, mean_val: float, std: float) -> Dict:
+    """
+    Оценивает волатильность метрики по готовым среднему и std
+
+    Простыми словами: пороги масштабируются по ожидаемому разбросу, поэтому
+    для красного в окне 20 получаются прежние 15% и 8%
+
+    Args:
+        metric (str): Название метрики
+        window (int): Размер окна
+        mean_val (float): Средний процент попаданий в окне
+        std (float): Стандартное отклонение процента
+
+    Returns:
+        Dict: std, mean, тренд и предсказуемость
+    """
+    expected_std = expected_share_std(metric, window)
+    scale = expected_std / expected_share_std("red", BASE_WINDOW)
+
+    result = {
+        "metric": metric,
+        "window": window,
+        "mean": mean_val,
+        "std": std,
+        "expected_std": expected_std,
+        "trend": "stable",
+        "predictability": "medium"
+    }
+
+    if std > BASE_VOLATILE_THRESHOLD * scale:
+        result["trend"] = "volatile"
+        result["predictability"] = "low"
+    elif std < BASE_STABLE_THRESHOLD * scale:
+        result["trend"] = "stable"
+        result["predictability"] = "high"
+
+    return result
+
+
+class RollingStatistics:
+    """Скользящие доли попаданий по накопленным суммам"""
+
+    def __init__(self, numbers: List[int], metrics: Optional[Iterable[str]] = None):
+        """
+        Строит накопленные суммы для всех метрик за один проход
+
+        Args:
+            numbers (List[int]): Выпавшие числа по порядку
+            metrics (Iterable[str]): Какие метрики считать (по умолчанию все из METRICS)
+        """
+        self.metrics = list(metrics) if metrics is not None else list(METRICS)
+        unknown = [metric for metric in self.metrics if metric not in METRICS]
+        if unknown:
+            raise ValueError(f"Неизвестные метрики: {unknown}")
+
+        self.total = len(numbers)
+        self._prefix = {}
+
+        if NUMPY_AVAILABLE:
+            # Таблица "метрика x число" -> 0/1, затем одна выборка и cumsum по всем метрикам сразу
+            table = np.zeros((len(self.metrics), 37), dtype=np.int32)
+            for row, metric in enumerate(self.metrics):
+                table[row, list(METRICS[metric])] = 1
+            prefix = np.zeros((len(self.metrics), self.total + 1), dtype=np.int64)
+            if self.total:
+                np.cumsum(table[:, np.asarray(numbers, dtype=np.intp)], axis=1, out=prefix[:, 1:])
+            for row, metric in enumerate(self.metrics):
+                self._prefix[metric] = prefix[row]
+        else:
+            for metric in self.metrics:
+                hits = METRICS[metric]
+                self._prefix[metric] = list(accumulate((1 if number in hits else 0 for number in numbers), initial=0))
+
+    @classmethod
+    def from_spins(cls, spins: List[Dict], metrics: Optional[Iterable[str]] = None) -> "RollingStatistics":
+        """Создает статистику из списка спинов (словарей)"""
+        return cls([spin['number'] for spin in spins], metrics)
+
+    def window_counts(self, metric: str, window: int):
+        """
+        Количество попаданий метрики в каждом окне
+
+        Простыми словами: окно [i, i + window) = prefix[i + window] - prefix[i]
+
+        Args:
+            metric (str): Название метрики
+            window (int): Размер окна
+
+        Returns:
+            Список (или numpy массив) длиной total - window + 1
+        """
+        prefix = self._prefix[metric]
+        if window <= 0 or window > self.total:
+            return np.zeros(0, dtype=np.int64) if NUMPY_AVAILABLE else []
+        if NUMPY_AVAILABLE:
+            return prefix[window:] - prefix[:-window]
+        return [prefix[i + window] - prefix[i] for i in range(self.total - window + 1)]
+
+    def window_shares(self, metric: str, window: int) -> List[float]:
+        """
+        Процент попаданий метрики в каждом скользящем окне
+
+        Args:
+            metric (str): Название метрики
+            window (int): Размер окна
+
+        Returns:
+            List[float]: Проценты для каждого окна
+        """
+        counts = self.window_counts(metric, window)
+        if NUMPY_AVAILABLE:
+            return (counts / window * 100).tolist()
+        return [count / window * 100 for count in counts]
+
+    def volatility(self, metric: str = "red", window: int = BASE_WINDOW) -> Dict:
+        """
+        Волатильность доли попаданий метрики
+
+        Простыми словами: насколько сильно "скачет" доля метрики от окна к окну
+
+        Args:
+            metric (str): Название метрики
+            window (int): Размер окна
+
+        Returns:
+            Dict: std, mean, тренд и предсказуемость
+        """
+        counts = self.window_counts(metric, window)
+        if len(counts) == 0:
+            return {"error": "Недостаточно данных для окон"}
+
+        if NUMPY_AVAILABLE:
+            shares = counts / window * 100
+            mean_val = float(shares.mean())
+            std = float(shares.std())
+        else:
+            shares = [count / window * 100 for count in counts]
+            mean_val = sum(shares) / len(shares)
+            std = math.sqrt(sum((x - mean_val) ** 2 for x in shares) / len(shares))
+
+        return classify_volatility(metric, window, mean_val, std)
+
+    def analyze(self, windows: Iterable[int] = (BASE_WINDOW,),
+                metrics: Optional[Iterable[str]] = None) -> Dict:
+        """
+        Волатильность сразу для нескольких окон и метрик
+
+        Args:
+            windows (Iterable[int]): Размеры окон
+            metrics (Iterable[str]): Метрики (по умолчанию все посчитанные)
+
+        Returns:
+            Dict: {window: {metric: результат volatility}}
+        """
+        metrics = list(metrics) if metrics is not None else self.metrics
+        return {window: {metric: self.volatility(metric, window) for metric in metrics}
+                for window in windows}
+
+
+# Тестирование
+if __name__ == "__main__":
+    import random
+    import time
+
+    print("Тестируем скользящую статистику...")
+
+    numbers = [random.randint(0, 36) for _ in range(20000)]
+
+    started = time.perf_counter()
+    stats = RollingStatistics(numbers)
+    report = stats.analyze(windows=(20, 50, 100))
+    elapsed = time.perf_counter() - started
+
+    print(f"Метрик: {len(stats.metrics)}, окон: 3, спинов: {len(numbers)}")
+    print(f"Время: {elapsed * 1000:.1f} мс")
+
+    for window, by_metric in report.items():
+        print(f"\nОкно {window}:")
+        for metric in ("red", "dozen_1", "sector_1", "zero"):
+            row = by_metric[metric]
+            print(f"  {metric}: std {row['std']:.2f} (ожидается {row['expected_std']:.2f}) -> {row['trend']}")
+
+    print("\nТест завершен!")
@@ -0,0 +1,324 @@
+"""
+АНАЛИТИКА ПО СЕГМЕНТАМ
+=====================
+
+Этот модуль сравнивает поведение рулетки у разных дилеров, в разное время суток,
+в разных сессиях и на разных столах.
+
+Простыми словами:
+- Распределение чисел по каждому сегменту считается одним SQL запросом с GROUP BY
+  (колонки дилера, стола и сессии проиндексированы)
+- Расстояния по колесу между соседними спинами и серии цветов считаются
+  группировкой через numpy - все сегменты за один проход
+- Результат каждого сегмента кешируется и пересчитывается только если
+  в сегменте появились новые спины. Период округляется до целых дней, поэтому
+  повторные запросы "за последние N дней" попадают в тот же кеш
+"""
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+import sqlite3
+from collections import OrderedDict
+from datetime import datetime, time as day_time
+from typing import List, Dict, Tuple
+
+from data_collector import DataCollector
+from utils import RouletteUtils
+from sector_engine import WHEEL_POSITION
+from randomness_tests import chi_square_sf, adjust_p_values
+
+
+# Как получить ключ сегмента из таблицы spins
+SEGMENT_KEYS = {
+    "dealer": "COALESCE(dealer, 'unknown')",
+    "hour": "strftime('%H', timestamp)",
+    "session": "COALESCE(session_id, 'unknown')",
+    "table": "COALESCE(table_name, 'unknown')"
+}
+
+# Соседние спины сегмента считаются парой только если между ними не больше 10 минут
+MAX_PAIR_GAP_DAYS = 10 / (24 * 60)
+LONG_STREAK = 7
+
+# Сколько результатов сегментов держать в кеше (самые давние по использованию вытесняются)
+SEGMENT_CACHE_SIZE = 512
+
+
+def day_period(start_date: datetime, end_date: datetime) -> Tuple[datetime, datetime]:
+    """
+    Округляет период до целых дней (только для ключа кеша)
+
+    Простыми словами: "с 14:37 пять дней назад до сейчас" и тот же запрос
+    минутой позже попадают в один ключ кеша. Сами спины берутся за точный
+    период, а то, что данные в нем не изменились, проверяет подпись сегмента
+
+    Returns:
+        Tuple[datetime, datetime]: Начало первого дня и конец последнего дня периода
+    """
+    return (datetime.combine(start_date.date(), day_time.min),
+            datetime.combine(end_date.date(), day_time.max))
+
+
+class SegmentAnalyzer:
+    """Статистика по дилерам, часам, сессиям и столам с кешем по сегментам"""
+
+    def __init__(self, data_collector: DataCollector):
+        """
+        Args:
+            data_collector (DataCollector): Сборщик данных (нужен путь к базе)
+        """
+        self.data_collector = data_collector
+        # (группировка, сегмент, день начала, день конца) -> (подпись, результат)
+        self._cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self.cache_size = SEGMENT_CACHE_SIZE
+
+    def analyze(self, by: str, start_date: datetime, end_date: datetime = None,
+                min_spins: int = 37) -> Dict:
+        """
+        Статистика всех сегментов за период
+
+        Простыми словами: для каждого дилера (часа, сессии, стола) - распределение
+        чисел и цветов, "почерк" по расстояниям на колесе и длинные серии
+
+        Args:
+            by (str): "dealer", "hour", "session" или "table"
+            start_date (datetime): Начальная дата
+            end_date (datetime): Конечная дата (по умолчанию - сейчас)
+            min_spins (int): Сегменты с меньшим числом спинов не анализируются
+
+        Returns:
+            Dict: segments - результаты по сегментам, flagged - сегменты с
+                подозрительным распределением, cache - сколько сегментов взято из кеша
+        """
+        if by not in SEGMENT_KEYS:
+            return {"error": f"Неизвестная группировка: {by}. Доступно: {list(SEGMENT_KEYS)}"}
+        if not NUMPY_AVAILABLE:
+            return {"error": "Для аналитики по сегментам нужен numpy"}
+
+        start, end = start_date, end_date or datetime.now()
+        key_start, key_end = day_period(start, end)
+        key_sql = SEGMENT_KEYS[by]
+        cache = self._cache
+
+        with sqlite3.connect(self.data_collector.db_path) as conn:
+            cursor = conn.cursor()
+
+            # Подпись сегмента за точный период: количество спинов, первый и последний id
+            cursor.execute(f"""
+                SELECT {key_sql} AS segment, COUNT(*), MIN(id), MAX(id) FROM spins
+                WHERE timestamp BETWEEN ? AND ?
+                GROUP BY segment
+            """, (start, end))
+            signatures = {segment: (count, min_id, max_id) for segment, count, min_id, max_id in cursor.fetchall()
+                          if count >= min_spins}
+
+            results = {}
+            stale = []
+            for segment, signature in signatures.items():
+                entry = cache.get((by, segment, key_start, key_end))
+                if entry is not None and entry[0] == signature:
+                    results[segment] = entry[1]
+                else:
+                    stale.append(segment)
+
+            if stale:
+                fresh = self._compute(cursor, key_sql, stale, start, end)
+                results.update(fresh)
+
+        # Использованные сегменты - в конец очереди, лишние старые - из кеша
+        for segment, signature in signatures.items():
+            key = (by, segment, key_start, key_end)
+            cache[key] = (signature, results[segment])
+            cache.move_to_end(key)
+        while len(cache) > self.cache_size:
+            cache.popitem(last=False)
+
+        segments = {segment: dict(results[segment]) for segment in sorted(signatures)}
+
+        # Поправка на множественное сравнение по всем сегментам вместе
+        names = list(segments)
+        raw = np.array([[segments[name]["distribution"]["p_value"],
+                         segments[name]["wheel_distance"]["p_value"]] for name in names], dtype=float)
+        adjusted = adjust_p_values(raw, "bh")
+
+        flagged = []
+        for row, name in enumerate(names):
+            for column, part in enumerate(("distribution", "wheel_distance")):
+                value = adjusted[row, column]
+                segments[name][part] = dict(segments[name][part],
+                                            adjusted_p_value=None if np.isnan(value) else float(value))
+                if not np.isnan(value) and value < 0.05:
+                    flagged.append({"segment": name, "test": part, "adjusted_p_value": float(value)})
+        flagged.sort(key=lambda x: x["adjusted_p_value"])
+
+        return {
+            "by": by,
+            "period": {"start": start, "end": end},
+            "segments": segments,
+            "flagged": flagged,
+            "cache": {"recomputed": len(stale), "reused": len(signatures) - len(stale)}
+        }
+
+    def _compute(self, cursor, key_sql: str, segments: List[str],
+                 start_date: datetime, end_date: datetime) -> Dict[str, Dict]:
+        """Считает статистику выбранных сегментов за один проход"""
+        placeholders = ",".join("?" * len(segments))
+        index_of = {segment: index for index, segment in enumerate(segments)}
+        size = len(segments)
+
+        # 1. Распределение чисел - сразу агрегатом в SQL
+        cursor.execute(f"""
+            SELECT {key_sql} AS segment, number, COUNT(*) FROM spins
+            WHERE timestamp BETWEEN ? AND ? AND segment IN ({placeholders})
+            GROUP BY segment, number
+        """, (start_date, end_date, *segments))
+        counts = np.zeros((size, 37), dtype=np.int64)
+        for segment, number, count in cursor.fetchall():
+            counts[index_of[segment], number] = count
+
+        # 2. Последовательности - один упорядоченный проход, дальше группировка numpy
+        cursor.execute(f"""
+            SELECT {key_sql} AS segment, number, julianday(timestamp), COALESCE(table_name, '')
+            FROM spins
+            WHERE timestamp BETWEEN ? AND ? AND segment IN ({placeholders})
+            ORDER BY segment, timestamp
+        """, (start_date, end_date, *segments))
+        rows = cursor.fetchall()
+
+        keys = np.fromiter((index_of[row[0]] for row in rows), dtype=np.int64, count=len(rows))
+        numbers = np.fromiter((row[1] for row in rows), dtype=np.int64, count=len(rows))
+        days = np.fromiter((row[2] for row in rows), dtype=float, count=len(rows))
+        tables = [row[3] for row in rows]
+
+        # Пара соседних спинов: тот же сегмент, тот же стол и небольшой промежуток
+        same_table = np.fromiter((tables[i] == tables[i - 1] for i in range(1, len(tables))),
+                                 dtype=bool, count=max(0, len(tables) - 1))
+        paired = (keys[1:] == keys[:-1]) & same_table & (np.diff(days) <= MAX_PAIR_GAP_DAYS)
+
+        positions = np.asarray(WHEEL_POSITION)[numbers]
+        steps = np.abs(np.diff(positions))
+        distance = np.minimum(steps, 37 - steps)
+        pair_keys = keys[1:][paired]
+        distance_hist = np.bincount(pair_keys * 19 + distance[paired], minlength=size * 19).reshape(size, 19)
+
+        # Серии цветов: новая серия начинается при смене цвета, на зеро и там, где
+        # соседние спины не пара (другой сегмент, другой стол или долгий перерыв)
+        red_lookup = np.zeros(37, dtype=np.int8)
+        red_lookup[list(RouletteUtils.RED_NUMBERS)] = 1
+        red_lookup[list(RouletteUtils.BLACK_NUMBERS)] = 2
+        colors = red_lookup[numbers]
+        starts = np.ones(len(colors), dtype=bool)
+        if len(colors) > 1:
+            starts[1:] = (colors[1:] != colors[:-1]) | ~paired | (colors[1:] == 0)
+        run_starts = np.flatnonzero(starts)
+        run_lengths = np.diff(np.append(run_starts, len(colors)))
+        run_keys = keys[run_starts]
+        run_colors = colors[run_starts]
+
+        max_streak = np.zeros((size, 3), dtype=np.int64)
+        np.maximum.at(max_streak, (run_keys, run_colors), run_lengths)
+        long_runs = np.bincount(run_keys[(run_lengths >= LONG_STREAK) & (run_colors > 0)], minlength=size)
+
+        # Тесты: хи-квадрат распределения чисел и расстояний по колесу
+        totals = counts.sum(axis=1)
+        expected = totals[:, None] / 37
+        with np.errstate(divide="ignore", invalid="ignore"):
+            distribution_statistic = np.where(expected > 0, (counts - expected) ** 2 / expected, 0).sum(axis=1)
+        distribution_p = chi_square_sf(distribution_statistic, 36)
+
+        pairs = distance_hist.sum(axis=1)
+        probabilities = np.array([1 / 37] + [2 / 37] * 18)
+        distance_expected = pairs[:, None] * probabilities
+        with np.errstate(divide="ignore", invalid="ignore"):
+            distance_statistic = np.where(distance_expected > 0,
+                                          (distance_hist - distance_expected) ** 2 / distance_expected, 0).sum(axis=1)
+            mean_distance = np.where(pairs > 0, (distance_hist * np.arange(19)).sum(axis=1) / pairs, 0)
+        distance_p = np.where(pairs > 0, chi_square_sf(distance_statistic, 18), np.nan)
+
+        red_numbers = list(RouletteUtils.RED_NUMBERS)
+        black_numbers = list(RouletteUtils.BLACK_NUMBERS)
+
+        results = {}
+        for segment, index in index_of.items():
+            total = int(totals[index])
+            results[segment] = {
+                "spins": total,
+                "colors": {
+                    "red": round(int(counts[index, red_numbers].sum()) / total * 100, 2),
+                    "black": round(int(counts[index, black_numbers].sum()) / total * 100, 2),
+                    "green": round(int(counts[index, 0]) / total * 100, 2)
+                },
+                "distribution": {
+                    "counts": counts[index].tolist(),
+                    "most_frequent": [int(n) for n in np.argsort(-counts[index], kind="stable")[:5]],
+                    "chi_square": float(distribution_statistic[index]),
+                    "p_value": float(distribution_p[index])
+                },
+                "wheel_distance": {
+                    "pairs": int(pairs[index]),
+                    "histogram": distance_hist[index].tolist(),
+                    "mean": float(mean_distance[index]),
+                    "chi_square": float(distance_statistic[index]),
+                    "p_value": None if np.isnan(distance_p[index]) else float(distance_p[index])
+                },
+                "streaks": {
+                    "max_red": int(max_streak[index, 1]),
+                    "max_black": int(max_streak[index, 2]),
+                    f"streaks_{LONG_STREAK}_plus": int(long_runs[index])
+                }
+            }
+        return results
+
+    def clear_cache(self):
+        """Очищает кеш сегментов"""
+        self._cache.clear()
+
+
+# Тестирование
+if __name__ == "__main__":
+    import random
+    import time
+    from datetime import timedelta
+
+    print("Тестируем аналитику по сегментам...")
+
+    collector = DataCollector("../data/test_segments.db")
+    start = datetime.now() - timedelta(days=2)
+
+    # Три дилера на одном столе, у dealer_3 шарик часто падает рядом с прошлым числом
+    with sqlite3.connect(collector.db_path) as conn:
+        previous = random.randint(0, 36)
+        rows = []
+        for i in range(3000):
+            dealer = f"dealer_{i // 100 % 3 + 1}"
+            if dealer == "dealer_3" and random.random() < 0.3:
+                number = RouletteUtils.WHEEL_ORDER[(WHEEL_POSITION[previous] + 1) % 37]
+            else:
+                number = random.randint(0, 36)
+            rows.append((number, RouletteUtils.get_color(number), start + timedelta(minutes=i),
+                         "test", "Test Table", dealer))
+            previous = number
+        conn.executemany("""
+            INSERT INTO spins (number, color, timestamp, session_id, table_name, dealer)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, rows)
+
+    analyzer = SegmentAnalyzer(collector)
+    for by in ("dealer", "hour"):
+        started = time.perf_counter()
+        report = analyzer.analyze(by, start)
+        elapsed = (time.perf_counter() - started) * 1000
+        print(f"\nГруппировка '{by}': {len(report['segments'])} сегментов за {elapsed:.1f} мс")
+        for item in report["flagged"][:5]:
+            print(f"  ⚠️  {item['segment']}: {item['test']} (p={item['adjusted_p_value']:.2e})")
+
+    # Как в меню: период "последние 2 дня" считается от нового "сейчас"
+    started = time.perf_counter()
+    report = analyzer.analyze("dealer", datetime.now() - timedelta(days=2))
+    print(f"\nПовторный запрос: {(time.perf_counter() - started) * 1000:.1f} мс, кеш: {report['cache']}")
+
+    print("\nТест завершен!")
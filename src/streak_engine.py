@@ -0,0 +1,348 @@
+"""
+ДВИЖОК СЕРИЙ
+============
+
+Этот модуль находит серии (несколько одинаковых результатов подряд) сразу
+для цвета, четности, больших/малых, дюжин и колонок.
+
+Простыми словами:
+- Каждое свойство числа - это маленький код: 0 для зеро, дальше 1, 2 (и 3)
+- Серии находятся кодированием длин серий (RLE) по массиву чисел:
+  одна операция numpy на все свойства сразу, без перебора строк цветов
+- Зеро прерывает любую серию и само серией не считается
+- Закончившиеся серии сворачиваются в гистограммы длин,
+  поэтому историю можно дописывать по одному спину или пачкой
+"""
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+import math
+from typing import List, Dict, Iterable, Optional, Tuple
+
+from utils import RouletteUtils
+
+
+def _property(labels: Tuple[str, ...], code) -> Tuple[Tuple[str, ...], List[int]]:
+    """Названия значений свойства и код свойства для каждого числа 0-36"""
+    return labels, [0] + [code(number) for number in range(1, 37)]
+
+
+# Свойство -> (названия значений, код для каждого числа). Код 0 - всегда зеро
+PROPERTIES = {
+    "color": _property(("green", "red", "black"),
+                       lambda n: 1 if n in RouletteUtils.RED_NUMBERS else 2),
+    "parity": _property(("zero", "even", "odd"), lambda n: 1 if n % 2 == 0 else 2),
+    "half": _property(("zero", "low", "high"), lambda n: 1 if n <= 18 else 2),
+    "dozen": _property(("zero", "dozen_1", "dozen_2", "dozen_3"), lambda n: (n - 1) // 12 + 1),
+    "column": _property(("zero", "column_1", "column_2", "column_3"), lambda n: (n - 1) % 3 + 1)
+}
+
+# Длина серии, начиная с которой она попадает в список длинных серий
+LONG_RUN = 7
+
+
+def encode_runs(numbers: Iterable[int], properties: Iterable[str] = None) -> Dict[str, Dict]:
+    """
+    Кодирование длин серий для нескольких свойств за один проход
+
+    Простыми словами: строим матрицу "свойство x спин", отмечаем места,
+    где значение меняется (или выпало зеро), и по этим отметкам сразу
+    получаем начала и длины всех серий всех свойств
+
+    Args:
+        numbers (Iterable[int]): Выпавшие числа
+        properties (Iterable[str]): Свойства из PROPERTIES (по умолчанию все)
+
+    Returns:
+        Dict[str, Dict]: Для каждого свойства массивы starts, lengths и values
+    """
+    names = list(properties or PROPERTIES)
+    numbers = np.asarray(list(numbers) if not isinstance(numbers, np.ndarray) else numbers, dtype=np.int64)
+    size = len(numbers)
+    if not size:
+        empty = np.zeros(0, dtype=np.int64)
+        return {name: {"starts": empty, "lengths": empty, "values": empty} for name in names}
+
+    codes = np.array([PROPERTIES[name][1] for name in names], dtype=np.int64)
+    values = codes[:, numbers]
+
+    # Новая серия начинается в первом спине, при смене значения и на каждом зеро
+    boundaries = np.ones(values.shape, dtype=bool)
+    boundaries[:, 1:] = (values[:, 1:] != values[:, :-1]) | (values[:, 1:] == 0)
+
+    rows, starts = np.nonzero(boundaries)
+    # Первый спин каждой строки - всегда начало серии, поэтому длины можно
+    # считать по "развернутой" матрице: до следующего начала или до конца строки
+    flat = rows * size + starts
+    lengths = np.diff(np.append(flat, len(names) * size))
+    run_values = values[rows, starts]
+
+    splits = np.searchsorted(rows, np.arange(1, len(names)))
+    return {name: {"starts": part_starts, "lengths": part_lengths, "values": part_values}
+            for name, part_starts, part_lengths, part_values in zip(
+                names, np.split(starts, splits), np.split(lengths, splits), np.split(run_values, splits))}
+
+
+class StreakEngine:
+    """Серии всех свойств с гистограммами длин и поддержкой дописывания"""
+
+    def __init__(self, numbers: Optional[Iterable[int]] = None, properties: Iterable[str] = None,
+                 long_run: int = LONG_RUN):
+        """
+        Args:
+            numbers (Iterable[int]): Начальная история чисел
+            properties (Iterable[str]): Свойства из PROPERTIES (по умолчанию все)
+            long_run (int): С какой длины серия считается длинной
+        """
+        self.properties = list(properties or PROPERTIES)
+        self.long_run = long_run
+        self._codes = [PROPERTIES[name][1] for name in self.properties]
+        self._labels = [PROPERTIES[name][0] for name in self.properties]
+        self.reset()
+        if numbers is not None:
+            self.extend(numbers)
+
+    @classmethod
+    def from_spins(cls, spins: List[Dict], **kwargs) -> "StreakEngine":
+        """Создает движок по списку спинов"""
+        return cls([spin['number'] for spin in spins], **kwargs)
+
+    def reset(self):
+        """Очищает все серии"""
+        size = len(self.properties)
+        self.total = 0
+        # Текущая (незакончившаяся) серия каждого свойства
+        self.current_value = [0] * size
+        self.current_length = [0] * size
+        self.current_start = [0] * size
+        # [свойство][значение][длина] -> сколько закончившихся серий такой длины
+        self.histograms = [[[0] for _ in labels] for labels in self._labels]
+        self._long_runs: List[List[Dict]] = [[] for _ in range(size)]
+        self._head = None
+
+    def _index(self, prop: str) -> int:
+        """Номер свойства"""
+        return self.properties.index(prop)
+
+    def _close(self, index: int, value: int, length: int, start: int):
+        """Сворачивает закончившуюся серию в гистограмму"""
+        if not value:
+            return
+        histogram = self.histograms[index][value]
+        if length >= len(histogram):
+            histogram.extend([0] * (length - len(histogram) + 1))
+        histogram[length] += 1
+        if length >= self.long_run:
+            self._long_runs[index].append({"value": self._labels[index][value], "length": length,
+                                           "start": start, "end": start + length - 1})
+
+    def add(self, number: int):
+        """
+        Учитывает один спин
+
+        Простыми словами: для каждого свойства либо продолжаем текущую серию,
+        либо закрываем ее и начинаем новую
+        """
+        position = self.total
+        for index, codes in enumerate(self._codes):
+            value = codes[number]
+            if value and value == self.current_value[index] and self.current_length[index]:
+                self.current_length[index] += 1
+            else:
+                if self.current_length[index]:
+                    self._close(index, self.current_value[index],
+                                self.current_length[index], self.current_start[index])
+                self.current_value[index] = value
+                self.current_length[index] = 1
+                self.current_start[index] = position
+        self.total += 1
+
+    def extend(self, numbers: Iterable[int]):
+        """
+        Учитывает несколько спинов
+
+        Простыми словами: с numpy пачка кодируется целиком, а первая серия
+        пачки склеивается с текущей серией, если это продолжение
+        """
+        if not NUMPY_AVAILABLE:
+            for number in numbers:
+                self.add(number)
+            return
+
+        numbers = np.asarray(list(numbers) if not isinstance(numbers, np.ndarray) else numbers, dtype=np.int64)
+        if not len(numbers):
+            return
+        offset = self.total
+        encoded = encode_runs(numbers, self.properties)
+
+        for index, prop in enumerate(self.properties):
+            starts = encoded[prop]["starts"] + offset
+            lengths = encoded[prop]["lengths"].copy()
+            values = encoded[prop]["values"]
+
+            # Склейка с текущей серией
+            if self.current_length[index]:
+                if values[0] and values[0] == self.current_value[index]:
+                    lengths[0] += self.current_length[index]
+                    starts[0] = self.current_start[index]
+                else:
+                    self._close(index, self.current_value[index],
+                                self.current_length[index], self.current_start[index])
+
+            # Все серии, кроме последней, закончились
+            closed_values = values[:-1]
+            closed_lengths = lengths[:-1]
+            for value in range(1, len(self._labels[index])):
+                value_lengths = closed_lengths[closed_values == value]
+                if not len(value_lengths):
+                    continue
+                counts = np.bincount(value_lengths)
+                histogram = self.histograms[index][value]
+                if len(counts) > len(histogram):
+                    histogram.extend([0] * (len(counts) - len(histogram)))
+                for length in np.flatnonzero(counts):
+                    histogram[length] += int(counts[length])
+
+            labels = self._labels[index]
+            for run in np.flatnonzero((closed_lengths >= self.long_run) & (closed_values > 0)):
+                start, length = int(starts[run]), int(closed_lengths[run])
+                self._long_runs[index].append({"value": labels[values[run]], "length": length,
+                                               "start": start, "end": start + length - 1})
+
+            self.current_value[index] = int(values[-1])
+            self.current_length[index] = int(lengths[-1])
+            self.current_start[index] = int(starts[-1])
+
+        self.total += len(numbers)
+
+    def sync(self, spins: List[Dict]):
+        """
+        Догоняет движок до истории спинов стратегии
+
+        Простыми словами: если история выросла - дописываем новые спины,
+        если это другая (или укороченная) история - считаем заново
+        """
+        head = spins[0] if spins else None
+        if len(spins) < self.total or head is not self._head:
+            self.reset()
+            self._head = head
+        if len(spins) > self.total:
+            self.extend([spin['number'] for spin in spins[self.total:]])
+
+    def current(self, prop: str = "color") -> Tuple[str, int]:
+        """Текущая серия свойства: (значение, длина). На зеро длина серии 0"""
+        index = self._index(prop)
+        value = self.current_value[index]
+        length = self.current_length[index] if value else 0
+        return self._labels[index][value], length
+
+    def histogram(self, prop: str = "color", include_open: bool = True) -> Dict[str, Dict[int, int]]:
+        """
+        Гистограмма длин серий
+
+        Args:
+            prop (str): Свойство
+            include_open (bool): Учитывать ли текущую незакончившуюся серию
+
+        Returns:
+            Dict[str, Dict[int, int]]: Значение -> {длина серии: сколько раз}
+        """
+        index = self._index(prop)
+        result = {}
+        for value, label in enumerate(self._labels[index]):
+            if not value:
+                continue
+            counts = {length: count for length, count in enumerate(self.histograms[index][value]) if count}
+            if include_open and self.current_value[index] == value and self.current_length[index]:
+                length = self.current_length[index]
+                counts[length] = counts.get(length, 0) + 1
+            result[label] = dict(sorted(counts.items()))
+        return result
+
+    def summary(self, prop: str = "color", include_open: bool = True) -> Dict:
+        """
+        Статистика серий в формате PatternAnalyzer.analyze_color_patterns
+
+        Returns:
+            Dict: Для каждого значения с сериями - avg_streak, max_streak,
+                total_streaks, streaks_3_plus, streaks_5_plus
+        """
+        analysis = {}
+        for label, counts in self.histogram(prop, include_open).items():
+            total = sum(counts.values())
+            if not total:
+                continue
+            analysis[label] = {
+                "avg_streak": sum(length * count for length, count in counts.items()) / total,
+                "max_streak": max(counts),
+                "total_streaks": total,
+                "streaks_3_plus": sum(count for length, count in counts.items() if length >= 3),
+                "streaks_5_plus": sum(count for length, count in counts.items() if length >= 5)
+            }
+        return analysis
+
+    def long_runs(self, prop: str = "color") -> List[Dict]:
+        """Закончившиеся длинные серии по порядку (текущая серия не входит - она еще идет)"""
+        return list(self._long_runs[self._index(prop)])
+
+    def longest_runs(self) -> Dict[str, Dict]:
+        """
+        Самые длинные серии всех свойств
+
+        Простыми словами: для каждого значения - самая длинная серия, текущая серия
+        и какой длины самую длинную серию стоит ожидать при честной рулетке
+        за столько спинов (приближение log(n * q) / log(1 / p))
+
+        Returns:
+            Dict[str, Dict]: Свойство -> значение -> max, current, expected_max
+        """
+        result = {}
+        for index, prop in enumerate(self.properties):
+            codes = self._codes[index]
+            current_label, current_length = self.current(prop)
+            result[prop] = {}
+            for label, counts in self.histogram(prop).items():
+                probability = sum(1 for number in range(37) if self._labels[index][codes[number]] == label) / 37
+                expected = (math.log(self.total * (1 - probability)) / math.log(1 / probability)
+                            if self.total * (1 - probability) > 1 else 0.0)
+                result[prop][label] = {
+                    "max": max(counts) if counts else 0,
+                    "current": current_length if label == current_label else 0,
+                    "expected_max": expected
+                }
+        return result
+
+
+# Тестирование
+if __name__ == "__main__":
+    import random
+    import time
+
+    print("Тестируем движок серий...")
+
+    numbers = [random.randint(0, 36) for _ in range(200000)]
+
+    started = time.perf_counter()
+    engine = StreakEngine(numbers)
+    bulk_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    single = StreakEngine()
+    for number in numbers:
+        single.add(number)
+    single_ms = (time.perf_counter() - started) * 1000
+
+    same = all(engine.summary(prop) == single.summary(prop) for prop in PROPERTIES)
+    print(f"Спинов: {len(numbers)}, пачкой: {bulk_ms:.0f} мс, по одному: {single_ms:.0f} мс, совпадает: {same}")
+
+    for prop, values in engine.longest_runs().items():
+        text = ", ".join(f"{label} {info['max']} (ожидалось ~{info['expected_max']:.1f})"
+                         for label, info in values.items())
+        print(f"  {prop}: {text}")
+
+    print(f"Длинных серий цвета: {len(engine.long_runs('color'))}")
+    print("\nТест завершен!")
@@ -0,0 +1,360 @@
+"""
+АНАЛИЗ ПЕРЕХОДОВ МЕЖДУ ЧИСЛАМИ
+=============================
+
+Этот модуль изучает, зависит ли следующее число от предыдущих.
+
+Простыми словами:
+- Матрица 37 x 37: сколько раз после числа A выпало число B
+- Гистограмма сдвигов по колесу: на сколько ячеек "ушел" шарик от прошлого числа
+- Более длинные контексты (после пары или тройки чисел) хранятся только
+  для тех, что реально встречались
+- Все обновляется по одному спину
+- Статистические тесты показывают, есть ли в переходах настоящая структура
+- Прогноз следующего числа можно использовать как признак для стратегий ИИ;
+  его точность проверяется "вперед": каждый спин угадывается по счетчикам,
+  в которых этого спина еще нет (иначе на честном колесе видно ложное преимущество)
+"""
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+import math
+from typing import List, Dict, Iterable, Optional, Tuple
+
+from sector_engine import WHEEL_POSITION
+from randomness_tests import chi_square_sf, adjust_p_values
+
+
+class TransitionAnalyzer:
+    """Переходы число -> число, сдвиги по колесу и длинные контексты"""
+
+    def __init__(self, numbers: Optional[Iterable[int]] = None, max_order: int = 3,
+                 top: int = 3, min_observations: int = 37):
+        """
+        Args:
+            numbers (Iterable[int]): Начальная история чисел
+            max_order (int): Самый длинный контекст (1 - только предыдущее число)
+            top (int): Сколько чисел прогноза проверять на каждом спине
+            min_observations (int): Сколько раз контекст должен встретиться для прогноза
+        """
+        self.max_order = max_order
+        self.top = top
+        self.min_observations = min_observations
+        self.reset()
+        if numbers is not None:
+            self.extend(numbers)
+
+    def reset(self):
+        """Очищает все счетчики"""
+        self.total = 0
+        self.transitions = [[0] * 37 for _ in range(37)]  # [предыдущее][следующее]
+        self.wheel_offsets = [0] * 37                      # сдвиг по колесу по часовой стрелке
+        self.contexts: Dict[Tuple[int, ...], Dict[int, int]] = {}  # контекст -> {следующее: сколько}
+        self._row_totals = [0] * 37                        # сумма каждой строки матрицы
+        self._context_totals: Dict[Tuple[int, ...], int] = {}
+        # Проверка прогноза "вперед": сколько спинов угадывали и сколько угадали
+        self.predicted = 0
+        self.predicted_hits = 0
+        self._recent: List[int] = []
+        self._head = None
+
+    def add(self, number: int):
+        """
+        Учитывает один спин
+
+        Простыми словами: обновляем одну ячейку матрицы, одну ячейку
+        гистограммы сдвигов и по одной записи на каждый длинный контекст.
+        Перед этим проверяем, угадал бы прогноз этот спин
+        """
+        recent = self._recent
+        if recent:
+            self._score(number)
+            previous = recent[-1]
+            self.transitions[previous][number] += 1
+            self._row_totals[previous] += 1
+            self.wheel_offsets[(WHEEL_POSITION[number] - WHEEL_POSITION[previous]) % 37] += 1
+
+            for order in range(2, self.max_order + 1):
+                if len(recent) < order:
+                    break
+                context = tuple(recent[-order:])
+                followers = self.contexts.setdefault(context, {})
+                followers[number] = followers.get(number, 0) + 1
+                self._context_totals[context] = self._context_totals.get(context, 0) + 1
+
+        recent.append(number)
+        if len(recent) > self.max_order:
+            del recent[0]
+        self.total += 1
+
+    def _score(self, number: int):
+        """
+        Угадал бы predict(self.top) число number по счетчикам до него
+
+        Простыми словами: выбираем тот же контекст, что и next_distribution,
+        и считаем, сколько чисел стоят в прогнозе выше number (при равенстве
+        выше меньшее число, как в predict)
+        """
+        recent = self._recent
+        counts = None
+        for order in range(min(self.max_order, len(recent)), 1, -1):
+            context = tuple(recent[-order:])
+            if self._context_totals.get(context, 0) >= self.min_observations:
+                followers = self.contexts[context]
+                counts = [followers.get(candidate, 0) for candidate in range(37)]
+                break
+        if counts is None:
+            if self._row_totals[recent[-1]] < self.min_observations:
+                return
+            counts = self.transitions[recent[-1]]
+
+        own = counts[number]
+        above = 0
+        for candidate in range(37):
+            count = counts[candidate]
+            if count > own or (count == own and candidate < number):
+                above += 1
+                if above >= self.top:
+                    break
+        self.predicted += 1
+        if above < self.top:
+            self.predicted_hits += 1
+
+    def extend(self, numbers: Iterable[int]):
+        """Учитывает несколько спинов"""
+        for number in numbers:
+            self.add(number)
+
+    def sync(self, spins: List[Dict]):
+        """
+        Догоняет анализатор до истории спинов стратегии
+
+        Простыми словами: если история выросла - дописываем новые спины,
+        если это другая (или укороченная) история - считаем заново
+        """
+        head = spins[0] if spins else None
+        if len(spins) < self.total or head is not self._head:
+            self.reset()
+            self._head = head
+        if len(spins) > self.total:
+            self.extend(spin['number'] for spin in spins[self.total:])
+
+    def next_distribution(self, context: Optional[List[int]] = None,
+                          min_observations: int = 37) -> Tuple[List[float], int]:
+        """
+        Вероятности следующего числа после контекста
+
+        Простыми словами: берем самый длинный контекст, который встречался
+        достаточно часто; если такого нет - укорачиваем (вплоть до одного числа)
+
+        Args:
+            context (List[int]): Последние числа (по умолчанию - из истории анализатора)
+            min_observations (int): Сколько раз контекст должен встретиться
+
+        Returns:
+            Tuple[List[float], int]: 37 вероятностей и длина использованного контекста
+                (0 - данных мало, вернули равномерное распределение)
+        """
+        context = list(context) if context is not None else list(self._recent)
+
+        for order in range(min(self.max_order, len(context)), 1, -1):
+            followers = self.contexts.get(tuple(context[-order:]))
+            if followers:
+                observed = sum(followers.values())
+                if observed >= min_observations:
+                    return [followers.get(number, 0) / observed for number in range(37)], order
+
+        if context:
+            row = self.transitions[context[-1]]
+            observed = sum(row)
+            if observed >= min_observations:
+                return [count / observed for count in row], 1
+
+        return [1 / 37] * 37, 0
+
+    def predict(self, top: int = 3, context: Optional[List[int]] = None,
+                min_observations: int = 37) -> List[int]:
+        """Самые вероятные следующие числа (пусто, если данных мало)"""
+        probabilities, order = self.next_distribution(context, min_observations)
+        if not order:
+            return []
+        ranked = sorted(range(37), key=lambda number: probabilities[number], reverse=True)
+        return ranked[:top]
+
+    def analyze(self, top: int = 5) -> Dict:
+        """
+        Статистические тесты переходов
+
+        Простыми словами:
+        - independence: зависит ли следующее число от предыдущего (хи-квадрат 37 x 37)
+        - rows: для каждого числа - отличается ли то, что выпадает после него,
+          от равномерного (с поправкой Бенджамини-Хохберга)
+        - wheel_offsets: равномерны ли сдвиги шарика по колесу
+
+        Args:
+            top (int): Сколько самых частых переходов и сдвигов показать
+
+        Returns:
+            Dict: Результаты тестов
+        """
+        if not NUMPY_AVAILABLE:
+            return {"error": "Для тестов переходов нужен numpy"}
+        if self.total < 2:
+            return {"error": "Недостаточно данных для анализа переходов"}
+
+        counts = np.asarray(self.transitions, dtype=float)
+        transitions_total = counts.sum()
+
+        # Независимость: ожидаемое = сумма строки * сумма столбца / всего
+        row_sums = counts.sum(axis=1)
+        column_sums = counts.sum(axis=0)
+        expected = np.outer(row_sums, column_sums) / transitions_total
+        mask = expected > 0
+        independence_statistic = float((((counts - expected) ** 2)[mask] / expected[mask]).sum())
+        used_rows = int((row_sums > 0).sum())
+        used_columns = int((column_sums > 0).sum())
+        independence_df = max(1, (used_rows - 1) * (used_columns - 1))
+
+        # Каждая строка против равномерного распределения
+        with np.errstate(divide="ignore", invalid="ignore"):
+            row_expected = row_sums[:, None] / 37
+            row_statistics = np.where(row_expected > 0, (counts - row_expected) ** 2 / row_expected, 0).sum(axis=1)
+        row_p = np.where(row_sums > 0, chi_square_sf(row_statistics, 36), np.nan)
+        row_adjusted = adjust_p_values(row_p, "bh")
+
+        rows = []
+        for previous in range(37):
+            if np.isnan(row_adjusted[previous]) or row_adjusted[previous] >= 0.05:
+                continue
+            followers = counts[previous]
+            rows.append({
+                "previous": previous,
+                "observations": int(row_sums[previous]),
+                "statistic": float(row_statistics[previous]),
+                "p_value": float(row_p[previous]),
+                "adjusted_p_value": float(row_adjusted[previous]),
+                "most_likely_next": [int(number) for number in np.argsort(-followers, kind="stable")[:3]]
+            })
+        rows.sort(key=lambda x: x["adjusted_p_value"])
+
+        # Сдвиги по колесу против равномерного
+        offsets = np.asarray(self.wheel_offsets, dtype=float)
+        offsets_expected = transitions_total / 37
+        offsets_statistic = float(((offsets - offsets_expected) ** 2 / offsets_expected).sum())
+
+        # Самые "перепредставленные" переходы (наблюдаемое / ожидаемое)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            lift = np.where(expected > 0, counts / expected, 0)
+        flat_order = np.argsort(-lift, axis=None, kind="stable")[:top]
+        top_transitions = [{
+            "from": int(index // 37),
+            "to": int(index % 37),
+            "count": int(counts.flat[index]),
+            "expected": float(expected.flat[index]),
+            "lift": float(lift.flat[index])
+        } for index in flat_order if counts.flat[index] > 0]
+
+        return {
+            "total_transitions": int(transitions_total),
+            "independence": {
+                "statistic": independence_statistic,
+                "df": independence_df,
+                "p_value": float(chi_square_sf(independence_statistic, independence_df)),
+                "min_expected": float(expected[mask].min()) if mask.any() else 0.0
+            },
+            "rows": rows,
+            "wheel_offsets": {
+                "histogram": self.wheel_offsets[:],
+                "statistic": offsets_statistic,
+                "df": 36,
+                "p_value": float(chi_square_sf(offsets_statistic, 36)),
+                "most_common": [int(offset) for offset in np.argsort(-offsets, kind="stable")[:top]]
+            },
+            "top_transitions": top_transitions,
+            "contexts": {
+                "max_order": self.max_order,
+                "stored": len(self.contexts)
+            }
+        }
+
+    def features(self) -> Dict:
+        """
+        Признаки для генератора стратегий ИИ
+
+        Простыми словами: если на каждом спине ставить на top чисел прогноза
+        (predict), построенного только по предыдущим спинам, как часто это
+        угадывало бы. Оценка "вперед" - числа не выбираются по тем же
+        счетчикам, на которых проверяются
+
+        Returns:
+            Dict: Доля попаданий, ожидаемый доход на единицу ставки, p-value
+                превышения честной доли и прогноз на следующий спин
+        """
+        top = self.top
+        observed = self.predicted
+        fair_hit_rate = top / 37
+        hit_rate = self.predicted_hits / observed if observed else 0.0
+
+        # Одностороннее z-приближение биномиального теста: угадываем ли чаще честного
+        if observed:
+            spread = math.sqrt(observed * fair_hit_rate * (1 - fair_hit_rate))
+            z_score = (self.predicted_hits - observed * fair_hit_rate) / spread
+            p_value = 0.5 * math.erfc(z_score / math.sqrt(2))
+        else:
+            p_value = 1.0
+
+        return {
+            "top": top,
+            "min_observations": self.min_observations,
+            "max_order": self.max_order,
+            "observations": observed,
+            "hit_rate": hit_rate,
+            "fair_hit_rate": fair_hit_rate,
+            # Ставка на top чисел: выигрыш 36 единиц на число из top потраченных
+            "edge_per_unit": hit_rate * 36 / top - 1 if observed else -1.0,
+            "p_value": p_value,
+            "next_numbers": self.predict(top, min_observations=self.min_observations)
+        }
+
+
+# Тестирование
+if __name__ == "__main__":
+    import random
+    import time
+
+    print("Тестируем анализ переходов...")
+
+    # Колесо с "памятью": иногда шарик падает через 10 ячеек от прошлого числа
+    from utils import RouletteUtils
+    wheel = RouletteUtils.WHEEL_ORDER
+    numbers = [random.randint(0, 36)]
+    for _ in range(20000):
+        if random.random() < 0.1:
+            numbers.append(wheel[(WHEEL_POSITION[numbers[-1]] + 10) % 37])
+        else:
+            numbers.append(random.randint(0, 36))
+
+    started = time.perf_counter()
+    analyzer = TransitionAnalyzer(numbers)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    report = analyzer.analyze()
+    print(f"Спинов: {analyzer.total}, построение: {build_ms:.0f} мс, контекстов: {report['contexts']['stored']}")
+    print(f"Независимость: p={report['independence']['p_value']:.2e}")
+    print(f"Сдвиги по колесу: p={report['wheel_offsets']['p_value']:.2e}, "
+          f"чаще всего {report['wheel_offsets']['most_common'][:3]}")
+    print(f"Значимых строк: {len(report['rows'])}")
+
+    features = analyzer.features()
+    print(f"Угадывание топ-3 (вперед): {features['hit_rate']:.3f} (честно {features['fair_hit_rate']:.3f}), "
+          f"преимущество {features['edge_per_unit']:+.3f}, p={features['p_value']:.2e}")
+
+    fair = TransitionAnalyzer(random.randint(0, 36) for _ in range(20000)).features()
+    print(f"Честное колесо: угадывание {fair['hit_rate']:.3f}, преимущество {fair['edge_per_unit']:+.3f}, "
+          f"p={fair['p_value']:.2f}")
+
+    print("\nТест завершен!")
@@ -15,6 +15,7 @@ from datetime import datetime
 from typing import List, Dict
 from game_analyzer import GameStrategy
 from utils import RouletteUtils
+from streak_engine import StreakEngine
 
 
 class UserStrategies:
@@ -206,6 +207,8 @@ class UserStrategies:
         strategy.betting_active = False
         strategy.target_color = None
         strategy.losses_in_row = 0
+        strategy.streaks = StreakEngine(properties=["color"])
+        strategy.waiting_since = 0  # с какого спина считать серию после выигрыша
         
         def make_bet_logic(spin_number: int, history: List[Dict]) -> Dict:
             if not history:
@@ -216,30 +219,23 @@ class UserStrategies:
             last_color = last_spin['color']
             
             if not strategy.betting_active:
-                # Режим ожидания серии
-                if last_color == 'green':
-                    # Зеро прерывает серию
-                    strategy.current_streak = 0
-                    strategy.streak_color = None
-                elif strategy.streak_color is None:
-                    # Начинаем считать серию
-                    strategy.streak_color = last_color
-                    strategy.current_streak = 1
-                elif last_color == strategy.streak_color:
-                    # Серия продолжается
-                    strategy.current_streak += 1
-                    
-                    if strategy.current_streak >= strategy.wait_streaks:
-                        # Серия достигла нужной длины - начинаем ставить!
-                        strategy.betting_active = True
-                        strategy.target_color = "black" if strategy.streak_color == "red" else "red"
-                        strategy.current_bet = strategy.initial_bet
-                        strategy.losses_in_row = 0
-                        print(f"🎯 Серия {strategy.streak_color} достигла {strategy.current_streak}! Начинаем ставить на {strategy.target_color}")
-                else:
-                    # Серия прервалась, начинаем сначала
-                    strategy.streak_color = last_color
-                    strategy.current_streak = 1
+                # Режим ожидания серии: текущая серия берется из движка серий
+                # (зеро прерывает серию), но не раньше последнего выигрыша
+                strategy.streaks.sync(history)
+                if len(history) < strategy.waiting_since:
+                    # Новая история - ждем серию с начала
+                    strategy.waiting_since = 0
+                streak_color, streak_length = strategy.streaks.current("color")
+                strategy.current_streak = min(streak_length, len(history) - strategy.waiting_since)
+                strategy.streak_color = streak_color if strategy.current_streak else None
+                
+                if strategy.current_streak >= strategy.wait_streaks:
+                    # Серия достигла нужной длины - начинаем ставить!
+                    strategy.betting_active = True
+                    strategy.target_color = "black" if strategy.streak_color == "red" else "red"
+                    strategy.current_bet = strategy.initial_bet
+                    strategy.losses_in_row = 0
+                    print(f"🎯 Серия {strategy.streak_color} достигла {strategy.current_streak}! Начинаем ставить на {strategy.target_color}")
                 
                 # В режиме ожидания не ставим
                 return {"type": "skip", "numbers": [], "amount": 0}
@@ -252,6 +248,7 @@ class UserStrategies:
                     strategy.betting_active = False
                     strategy.current_streak = 0
                     strategy.streak_color = None
+                    strategy.waiting_since = len(history)
                     strategy.current_bet = strategy.initial_bet
                     return {"type": "skip", "numbers": [], "amount": 0}
                 elif last_color == 'green':
@@ -24,7 +24,11 @@ class RouletteUtils:
     
     # Черные числа в европейской рулетке  
     BLACK_NUMBERS = {2, 4, 6, 8, 10, 11, 13, 15, 17, 20, 22, 24, 26, 28, 29, 31, 33, 35}
-    
+
+    # Порядок чисел на колесе европейской рулетки (по часовой стрелке от зеро)
+    WHEEL_ORDER = [0, 32, 15, 19, 4, 21, 2, 25, 17, 34, 6, 27, 13, 36, 11, 30, 8, 23, 10,
+                   5, 24, 16, 33, 1, 20, 14, 31, 9, 22, 18, 29, 7, 28, 12, 35, 3, 26]
+
     @staticmethod
     def get_color(number: int) -> str:
         """
@@ -7,13 +7,20 @@
 """
 
 import json
+import sys
 import time
 import urllib.request
 import urllib.parse
-from datetime import datetime
 from typing import Dict, List
 from pathlib import Path
 
+sys.path.append(str(Path(__file__).parent / "src"))
+from poll_scheduler import PollScheduler
+from rate_limiter import PRIORITY_LIVE
+from http_client import get_http_client, HTTPClientError
+from config import CONNECTION_CONFIG
+from history_parser import parse_history
+
 
 class SingleTableOnlyCollector:
     """Класс для получения данных СТРОГО с одного стола"""
@@ -50,110 +57,61 @@ class SingleTableOnlyCollector:
             
         Returns:
             Список результатов ТОЛЬКО с целевого стола
+            
+        Raises:
+            HTTPClientError: API недоступен (после всех повторов) или предохранитель выбит
         """
         if not self.config:
             print("❌ Нет конфигурации API")
             return []
         
-        try:
-            # Строгая проверка стола
-            print(f"🔍 Получение данных ТОЛЬКО с стола: {self.target_table_id}")
-            
-            # API запрос СТРОГО для одного стола
-            auth = self.config['api']['auth']
-            base_url = "https://games.pragmaticplaylive.net/api/ui/statisticHistory"
-            
-            # Параметры ТОЛЬКО для нашего стола
-            params = {
-                'tableId': self.target_table_id,  # СТРОГО наш стол
-                'numberOfGames': min(limit, 500),
-                'JSESSIONID': auth['jsessionid']
-            }
-            
-            url = f"{base_url}?" + urllib.parse.urlencode(params)
-            
-            req = urllib.request.Request(url)
-            req.add_header('User-Agent', self.config['api']['headers']['User-Agent'])
-            req.add_header('Accept', 'application/json')
-            
-            with urllib.request.urlopen(req, timeout=10) as response:
-                if response.getcode() == 200:
-                    data = json.loads(response.read().decode('utf-8'))
-                    results = self._parse_single_table_only(data)
-                    
-                    # ДВОЙНАЯ ПРОВЕРКА: убираем любые данные не с нашего стола
-                    filtered_results = []
-                    for result in results:
-                        if result.get('table_id') == self.target_table_id:
-                            filtered_results.append(result)
-                        else:
-                            print(f"🚫 ОТФИЛЬТРОВАН результат с чужого стола: {result.get('table_id')}")
-                    
-                    print(f"✅ ПОЛУЧЕНО {len(filtered_results)} результатов ТОЛЬКО с стола {self.target_table_id}")
-                    return filtered_results
-                else:
-                    print(f"❌ API вернул код {response.getcode()}")
-                    
-        except Exception as e:
-            print(f"❌ Ошибка API: {e}")
+        # Строгая проверка стола
+        print(f"🔍 Получение данных ТОЛЬКО с стола: {self.target_table_id}")
+        
+        # API запрос СТРОГО для одного стола
+        auth = self.config['api']['auth']
+        base_url = "https://games.pragmaticplaylive.net/api/ui/statisticHistory"
+        
+        # Параметры ТОЛЬКО для нашего стола
+        params = {
+            'tableId': self.target_table_id,  # СТРОГО наш стол
+            'numberOfGames': min(limit, 500),
+            'JSESSIONID': auth['jsessionid']
+        }
+        
+        url = f"{base_url}?" + urllib.parse.urlencode(params)
+        
+        req = urllib.request.Request(url)
+        req.add_header('User-Agent', self.config['api']['headers']['User-Agent'])
+        req.add_header('Accept', 'application/json')
+        
+        # Повторы и предохранитель - в общем клиенте; ошибка сети уходит вызывающему коду
+        body = get_http_client().get(req, priority=PRIORITY_LIVE, timeout=10)
+        results = self._parse_single_table_only(body)
         
-        return []
+        # ДВОЙНАЯ ПРОВЕРКА: убираем любые данные не с нашего стола
+        filtered_results = []
+        for result in results:
+            if result.get('table_id') == self.target_table_id:
+                filtered_results.append(result)
+            else:
+                print(f"🚫 ОТФИЛЬТРОВАН результат с чужого стола: {result.get('table_id')}")
+        
+        print(f"✅ ПОЛУЧЕНО {len(filtered_results)} результатов ТОЛЬКО с стола {self.target_table_id}")
+        return filtered_results
     
-    def _parse_single_table_only(self, data: Dict) -> List[Dict]:
+    def _parse_single_table_only(self, data) -> List[Dict]:
         """
-        Парсит данные с проверкой стола
+        Парсит данные (тело ответа или JSON); все игры СТРОГО привязываются к нашему столу
         """
-        results = []
-        
         try:
-            if 'history' in data and isinstance(data['history'], list):
-                print(f"📊 Получено {len(data['history'])} записей")
-                
-                for game in data['history']:
-                    if not isinstance(game, dict):
-                        continue
-                    
-                    # Парсим номер и цвет
-                    winning_number = None
-                    color = None
-                    
-                    if 'gameResult' in game:
-                        try:
-                            parts = game['gameResult'].split()
-                            if len(parts) >= 2:
-                                winning_number = int(parts[0])
-                                api_color = parts[1].lower()
-                                color = api_color if api_color in ['red', 'black', 'green'] else self._get_color(winning_number)
-                        except (ValueError, IndexError):
-                            continue
-                    
-                    if winning_number is not None and 0 <= winning_number <= 36:
-                        # Время
-                        timestamp = datetime.now()
-                        if 'gameTime' in game:
-                            try:
-                                timestamp = datetime.fromisoformat(game['gameTime'].replace('Z', '+00:00'))
-                            except:
-                                pass
-                        
-                        # СТРОГО привязываем к нашему столу
-                        result = {
-                            'number': winning_number,
-                            'color': color,
-                            'timestamp': timestamp,
-                            'table_id': self.target_table_id,  # СТРОГО наш стол
-                            'source': 'single_table_api',
-                            'game_id': game.get('gameId', '')
-                        }
-                        
-                        results.append(result)
-                
-                print(f"✅ Обработано {len(results)} результатов стола {self.target_table_id}")
-                
-        except Exception as e:
+            batch = parse_history(data, self.target_table_id)
+        except ValueError as e:
             print(f"❌ Ошибка парсинга: {e}")
-        
-        return results
+            return []
+
+        print(f"📊 Обработано {len(batch)} из {batch.received} записей стола {self.target_table_id}")
+        return batch.to_records('single_table_api', sort=False)
     
     def _get_color(self, number: int) -> str:
         """Определяет цвет числа"""
@@ -162,12 +120,15 @@ class SingleTableOnlyCollector:
         red_numbers = {1, 3, 5, 7, 9, 12, 14, 16, 18, 19, 21, 23, 25, 27, 30, 32, 34, 36}
         return 'red' if number in red_numbers else 'black'
     
-    def monitor_single_table(self, duration_minutes: int = 30):
+    def monitor_single_table(self, duration_minutes: int = 30, tradeoff: float = None):
         """
         Мониторинг ТОЛЬКО одного стола в реальном времени
         
         Args:
             duration_minutes: Продолжительность мониторинга
+            tradeoff: 0 - быстрее узнавать о спине, 1 - меньше запросов (см. poll_scheduler;
+                None - poll_tradeoff из CONNECTION_CONFIG). Если adaptive_polling выключен,
+                стол опрашивается раз в update_interval секунд
         """
         print(f"🎰 МОНИТОРИНГ ТОЛЬКО СТОЛА {self.target_table_id}")
         print(f"⏱️  Продолжительность: {duration_minutes} минут")
@@ -178,6 +139,13 @@ class SingleTableOnlyCollector:
         
         spin_counter = 0
         last_results = set()  # Для избежания дублей
+        # Опрашиваем стол в ритме его спинов (или с постоянной паузой из конфигурации)
+        adaptive = CONNECTION_CONFIG.get('adaptive_polling', True)
+        scheduler = PollScheduler(CONNECTION_CONFIG.get('poll_tradeoff', 0.5) if tradeoff is None else tradeoff)
+        fixed_delay = CONNECTION_CONFIG.get('update_interval', 120)
+        
+        def next_delay() -> float:
+            return scheduler.next_delay(self.target_table_id) if adaptive else fixed_delay
         
         while time.time() < end_time:
             try:
@@ -185,6 +153,7 @@ class SingleTableOnlyCollector:
                 current_results = self.get_single_table_data(10)
                 
                 # Ищем новые результаты
+                new_results = []
                 for result in current_results:
                     result_key = f"{result['game_id']}_{result['number']}_{result['timestamp']}"
                     
@@ -196,20 +165,26 @@ class SingleTableOnlyCollector:
                         self._save_to_database(result)
                         
                         last_results.add(result_key)
+                        new_results.append(result)
                         
                         # Ограничиваем размер кэша
                         if len(last_results) > 100:
                             last_results = set(list(last_results)[-50:])
                 
-                # Ждем перед следующим запросом
-                time.sleep(30)  # 30 секунд между запросами
+                # Ждем до ожидаемого следующего спина
+                scheduler.observe(self.target_table_id, new_results)
+                time.sleep(next_delay())
                 
             except KeyboardInterrupt:
                 print("⏹️  Мониторинг остановлен пользователем")
                 break
+            except HTTPClientError as e:
+                # Клиент уже повторил запрос; ждем, пока endpoint снова можно пробовать
+                print(f"❌ API недоступен: {e}")
+                time.sleep(max(e.retry_after, next_delay()))
             except Exception as e:
                 print(f"❌ Ошибка мониторинга: {e}")
-                time.sleep(10)
+                time.sleep(next_delay())
         
         print(f"✅ Мониторинг завершен. Получено {spin_counter} новых спинов ТОЛЬКО с стола {self.target_table_id}")
     
@@ -266,7 +241,11 @@ def test_single_table():
     collector = SingleTableOnlyCollector("roulettestura541")
     
     # Получаем данные
-    results = collector.get_single_table_data(20)
+    try:
+        results = collector.get_single_table_data(20)
+    except HTTPClientError as e:
+        print(f"❌ API недоступен: {e}")
+        return
     
     if results:
         print(f"\n📊 ПОЛУЧЕНО {len(results)} РЕЗУЛЬТАТОВ ТОЛЬКО С СТОЛА roulettestura541:")
@@ -9,6 +9,11 @@ import urllib.request
 import urllib.parse
 import json
 from datetime import datetime
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent / "src"))
+from rate_limiter import rate_limited_urlopen, PRIORITY_DISCOVERY
 
 def test_pragmatic_api():
     """Тестирование Pragmatic Play API"""
@@ -51,7 +56,7 @@ def test_pragmatic_api():
                 req = urllib.request.Request(api_url, data=post_data, headers=headers)
                 req.add_header('Content-Type', 'application/json')
             
-            with urllib.request.urlopen(req, timeout=10) as response:
+            with rate_limited_urlopen(req, timeout=10, priority=PRIORITY_DISCOVERY) as response:
                 status_code = response.getcode()
                 content_type = response.headers.get('Content-Type', '')
                 
@@ -135,7 +140,7 @@ def test_alternative_endpoints():
         try:
             req = urllib.request.Request(url, headers=headers)
             
-            with urllib.request.urlopen(req, timeout=5) as response:
+            with rate_limited_urlopen(req, timeout=5, priority=PRIORITY_DISCOVERY) as response:
                 status_code = response.getcode()
                 content_type = response.headers.get('Content-Type', '')
                 
@@ -9,6 +9,10 @@ import json
 import urllib.request
 import urllib.parse
 from pathlib import Path
+import sys
+
+sys.path.append(str(Path(__file__).parent / "src"))
+from rate_limiter import rate_limited_urlopen, PRIORITY_DISCOVERY
 
 class UniversalAPISetup:
     """Универсальная настройка API"""
@@ -226,7 +230,7 @@ class UniversalAPISetup:
                 for header, value in config['api']['headers'].items():
                     req.add_header(header, value)
                 
-                with urllib.request.urlopen(req, timeout=10) as response:
+                with rate_limited_urlopen(req, timeout=10, priority=PRIORITY_DISCOVERY) as response:
                     status_code = response.getcode()
                     content_type = response.headers.get('Content-Type', '')
                     data = response.read(300).decode('utf-8', errors='ignore')
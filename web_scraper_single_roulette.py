@@ -3,8 +3,16 @@
 ========================================
 
 Этот скрапер извлекает данные ТОЛЬКО с одной конкретной рулетки используя XPath
+
+Простыми словами:
+- Вся строка истории забирается из браузера ОДНИМ вызовом execute_script
+  (раньше - отдельный запрос к браузеру на каждый дочерний элемент)
+- Числа разбираются одним заранее скомпилированным шаблоном
+- Режим "observer": в страницу внедряется MutationObserver, и новые числа
+  приходят сразу, как только страница их показала (без опроса раз в 30 секунд)
 """
 
+import sys
 import time
 from datetime import datetime
 from typing import List, Dict
@@ -12,6 +20,28 @@ import re
 import sqlite3
 from pathlib import Path
 
+sys.path.append(str(Path(__file__).parent / "src"))
+from dom_feed import SeleniumFeed
+
+
+# Число рулетки 0-36 (в том числе "#5" и "№5") - один проход по тексту
+NUMBER_SCANNER = re.compile(r'(?:#|№)?\b(3[0-6]|[12][0-9]|[0-9])\b')
+
+# Забирает элемент истории целиком: текст и каждый дочерний элемент (одна ячейка - одно число)
+EXTRACT_HISTORY_JS = """
+const node = document.evaluate(arguments[0], document, null,
+                               XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+if (!node) { return null; }
+const items = [];
+for (const child of node.children) {
+    items.push({
+        text: (child.innerText || child.textContent || '').trim(),
+        value: child.getAttribute('data-value') || child.getAttribute('data-number') || ''
+    });
+}
+return {text: node.innerText || node.textContent || '', items: items};
+"""
+
 
 class SingleRouletteWebScraper:
     """Веб-скрапер для одной конкретной рулетки"""
@@ -97,13 +127,70 @@ class SingleRouletteWebScraper:
         """
         Извлекает числа из элемента по XPath
         
+        Простыми словами: один execute_script возвращает всю строку истории;
+        если JavaScript выполнить не удалось - старый способ по элементам
+        
         Returns:
-            Список результатов рулетки
+            Список результатов рулетки (новые первыми, как на странице)
         """
         if not self.driver:
             print("❌ WebDriver не инициализирован")
             return []
         
+        try:
+            history = self.driver.execute_script(EXTRACT_HISTORY_JS, self.target_xpath)
+        except Exception as e:
+            print(f"⚠️ execute_script не сработал ({e}), читаем по элементам")
+            return self._extract_numbers_by_elements()
+        
+        if history is None:
+            print(f"❌ Элемент не найден: {self.target_xpath}")
+            return []
+        
+        results = self.parse_history_snapshot(history)
+        print(f"✅ Извлечено {len(results)} результатов")
+        return results
+    
+    def parse_history_snapshot(self, history: Dict) -> List[Dict]:
+        """
+        Разбирает снимок строки истории из EXTRACT_HISTORY_JS
+        
+        Args:
+            history: {"text": текст элемента, "items": [{"text", "value"}, ...]}
+        
+        Returns:
+            Список результатов в порядке на странице
+        """
+        numbers = []
+        for item in history.get('items') or []:
+            # Одна ячейка истории - одно число (первое найденное)
+            match = NUMBER_SCANNER.search(item.get('value') or item.get('text') or '')
+            if match:
+                numbers.append(int(match.group(1)))
+        
+        if not numbers:
+            # Ячеек нет - числа прямо в тексте элемента
+            numbers = [int(number) for number in NUMBER_SCANNER.findall(history.get('text') or '')]
+        
+        now = datetime.now()
+        return [self._make_result(number, now, 'web_scraper') for number in numbers]
+    
+    def _make_result(self, number: int, timestamp: datetime, source: str) -> Dict:
+        return {
+            'number': number,
+            'color': self._get_color(number),
+            'timestamp': timestamp,
+            'source': source,
+            'xpath': self.target_xpath
+        }
+    
+    def _extract_numbers_by_elements(self) -> List[Dict]:
+        """
+        Старый способ: обход дочерних элементов (запрос к браузеру на каждый)
+        
+        Returns:
+            Список результатов рулетки
+        """
         try:
             from selenium.webdriver.common.by import By
             from selenium.webdriver.support.ui import WebDriverWait
@@ -169,33 +256,9 @@ class SingleRouletteWebScraper:
     
     def _extract_numbers_from_text(self, text: str) -> List[Dict]:
         """Извлекает числа рулетки из текста"""
-        results = []
-        
-        # Паттерны для поиска чисел рулетки (0-36)
-        patterns = [
-            r'\b([0-9]|[1-2][0-9]|3[0-6])\b',  # Числа 0-36
-            r'#([0-9]|[1-2][0-9]|3[0-6])\b',    # С решеткой
-            r'№([0-9]|[1-2][0-9]|3[0-6])\b',    # С номером
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, text)
-            for match in matches:
-                try:
-                    number = int(match)
-                    if 0 <= number <= 36:
-                        color = self._get_color(number)
-                        results.append({
-                            'number': number,
-                            'color': color,
-                            'timestamp': datetime.now(),
-                            'source': 'web_scraper',
-                            'xpath': self.target_xpath
-                        })
-                except ValueError:
-                    continue
-        
-        return results
+        now = datetime.now()
+        return [self._make_result(int(number), now, 'web_scraper')
+                for number in NUMBER_SCANNER.findall(text)]
     
     def _extract_numbers_from_html(self, html: str) -> List[Dict]:
         """Извлекает числа рулетки из HTML"""
@@ -266,18 +329,28 @@ class SingleRouletteWebScraper:
         print(f"💾 Сохранено {saved_count} результатов")
         return saved_count
     
-    def monitor_roulette(self, url: str, duration_minutes: int = 30, check_interval: int = 30):
+    def monitor_roulette(self, url: str, duration_minutes: int = 30, check_interval: int = 30,
+                         mode: str = "poll"):
         """
         Мониторинг рулетки в реальном времени
         
         Args:
             url: URL страницы с рулеткой
             duration_minutes: Продолжительность мониторинга
-            check_interval: Интервал проверки в секундах
+            check_interval: Интервал проверки в секундах (в режиме observer -
+                как долго ждать нового числа до вывода статистики)
+            mode: "poll" - перечитывать страницу каждые check_interval секунд,
+                "observer" - MutationObserver, новые числа приходят сами
         """
+        if mode not in ("poll", "observer"):
+            raise ValueError(f"Неизвестный режим: {mode}")
+        
         print(f"🎰 ЗАПУСК МОНИТОРИНГА РУЛЕТКИ")
         print(f"⏱️  Продолжительность: {duration_minutes} минут")
-        print(f"🔄 Интервал проверки: {check_interval} секунд")
+        if mode == "observer":
+            print("⚡ Режим: MutationObserver (новые числа сразу по изменению страницы)")
+        else:
+            print(f"🔄 Интервал проверки: {check_interval} секунд")
         print("="*60)
         
         if not self.setup_selenium(url):
@@ -289,21 +362,33 @@ class SingleRouletteWebScraper:
         
         last_results = set()
         total_new_results = 0
+        feed = None
         
         try:
+            if mode == "observer":
+                feed = SeleniumFeed(self.driver, xpath=self.target_xpath, table_id='web_scraper')
+                status = feed.install()
+                if not status or not status.get('attached'):
+                    print("⚠️ Элемент пока не найден, наблюдатель подключится, когда он появится")
+            
             while time.time() < end_time:
-                print(f"\n🔍 Проверка результатов... ({datetime.now().strftime('%H:%M:%S')})")
-                
-                # Извлекаем результаты
-                results = self.extract_numbers_from_xpath()
-                
-                # Фильтруем новые результаты
-                new_results = []
-                for result in results:
-                    result_key = (result['number'], result['timestamp'].strftime('%Y-%m-%d %H:%M'))
-                    if result_key not in last_results:
-                        new_results.append(result)
-                        last_results.add(result_key)
+                if feed is not None:
+                    # Ждем, пока страница сама покажет новое число
+                    wait = max(1.0, min(check_interval, end_time - time.time()))
+                    new_results = [{**result, 'xpath': self.target_xpath} for result in feed.next_batch(wait)]
+                else:
+                    print(f"\n🔍 Проверка результатов... ({datetime.now().strftime('%H:%M:%S')})")
+                    
+                    # Извлекаем результаты
+                    results = self.extract_numbers_from_xpath()
+                    
+                    # Фильтруем новые результаты
+                    new_results = []
+                    for result in results:
+                        result_key = (result['number'], result['timestamp'].strftime('%Y-%m-%d %H:%M'))
+                        if result_key not in last_results:
+                            new_results.append(result)
+                            last_results.add(result_key)
                 
                 if new_results:
                     print(f"🎯 Найдено {len(new_results)} новых результатов:")
@@ -319,9 +404,10 @@ class SingleRouletteWebScraper:
                 # Показываем статистику
                 print(f"📊 Всего собрано результатов: {total_new_results}")
                 
-                # Ждем перед следующей проверкой
-                print(f"⏳ Ожидание {check_interval} секунд...")
-                time.sleep(check_interval)
+                # Ждем перед следующей проверкой (наблюдатель ждет сам)
+                if feed is None:
+                    print(f"⏳ Ожидание {check_interval} секунд...")
+                    time.sleep(check_interval)
                 
         except KeyboardInterrupt:
             print("\n⏹️  Мониторинг остановлен пользователем")
@@ -438,7 +524,10 @@ def main():
                 interval = input("Интервал проверки в секундах (по умолчанию 30): ").strip()
                 interval = int(interval) if interval.isdigit() else 30
                 
-                scraper.monitor_roulette(url, duration, interval)
+                observer = input("Мгновенный режим MutationObserver вместо опроса? (y/n): ").strip().lower()
+                mode = "observer" if observer == 'y' else "poll"
+                
+                scraper.monitor_roulette(url, duration, interval, mode)
         
         elif choice == '3':
             scraper.show_statistics()